@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import fcntl
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from dynamite_nsm import const
+from dynamite_nsm import download
+
+
+class ArtifactCache:
+    """
+    A persistent, content-addressed store for downloaded archives
+
+    Archives are stored once per SHA-256 under <cache_directory>/objects/, and indexed by archive name. The cache lives
+    outside of the install_cache, so it survives mirror/config updates and uninstalls; once it grows beyond its size
+    cap the least recently used archives are evicted.
+    """
+
+    def __init__(self, cache_directory=const.ARTIFACT_CACHE,
+                 max_size_bytes=const.ARTIFACT_CACHE_MAX_SIZE_MB * 1024 ** 2):
+        """
+        :param cache_directory: The directory the cache is stored in (E.G /var/cache/dynamite/artifacts/)
+        :param max_size_bytes: The maximum combined size of all cached archives
+        """
+        self.cache_directory = cache_directory
+        self.objects_directory = os.path.join(cache_directory, 'objects')
+        self.index_path = os.path.join(cache_directory, 'index.json')
+        self.max_size_bytes = max_size_bytes
+
+    @contextmanager
+    def _locked(self):
+        if not os.path.exists(self.objects_directory):
+            os.makedirs(self.objects_directory)
+        with open(os.path.join(self.cache_directory, '.lock'), 'a') as lock_f:
+            fcntl.flock(lock_f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_f, fcntl.LOCK_UN)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path) as index_f:
+                return json.load(index_f)
+        except (IOError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_directory, prefix='.index.')
+        with os.fdopen(fd, 'w') as tmp_f:
+            json.dump(index, tmp_f, indent=1, sort_keys=True)
+        os.rename(tmp_path, self.index_path)
+
+    @staticmethod
+    def _find(index, name, sha256=None):
+        candidates = [entry for entry in index.get(name, []) if not sha256 or entry['sha256'] == sha256.lower()]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda entry: entry['last_used'])
+
+    def _object_path(self, sha256):
+        return os.path.join(self.objects_directory, sha256)
+
+    def _evict(self, index, keep=None):
+        # keep (a SHA-256) is never evicted; an archive larger than the cap on its own is still held until the next
+        # store, as the caller is about to fetch it
+        entries = []
+        object_sizes = {}
+        for name, name_entries in index.items():
+            for entry in name_entries:
+                entries.append((entry['last_used'], name, entry))
+                object_sizes[entry['sha256']] = entry['size']
+        total = sum(object_sizes.values())
+        for _, name, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_size_bytes:
+                break
+            if entry['sha256'] == keep:
+                continue
+            index[name].remove(entry)
+            if not index[name]:
+                del index[name]
+            if not any([e['sha256'] == entry['sha256'] for name_entries in index.values() for e in name_entries]):
+                object_path = self._object_path(entry['sha256'])
+                if os.path.exists(object_path):
+                    os.remove(object_path)
+                total -= entry['size']
+
+    @staticmethod
+    def _link_or_copy(source, destination):
+        if os.path.exists(destination):
+            os.remove(destination)
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copy(source, destination)
+
+    def incoming_path(self):
+        """
+        :return: A new path inside the cache, that an archive can be written to directly and then adopted with
+                 store(move=True), rather than being written elsewhere and copied in
+        """
+        with self._locked():
+            fd, path = tempfile.mkstemp(dir=self.objects_directory, prefix='.incoming-')
+            os.close(fd)
+        return path
+
+    def lookup(self, name, sha256=None):
+        """
+        :param name: The archive name (E.G elasticsearch-7.2.0.tar.gz)
+        :param sha256: If given, only an archive with this checksum will match
+        :return: The path to the cached archive, or None if it is not cached
+        """
+        with self._locked():
+            entry = self._find(self._read_index(), name, sha256)
+            if entry and os.path.exists(self._object_path(entry['sha256'])):
+                return self._object_path(entry['sha256'])
+        return None
+
+    def fetch(self, name, destination, sha256=None):
+        """
+        Copy a cached archive to destination (hard-linking where possible), and mark it as recently used
+
+        :param name: The archive name (E.G elasticsearch-7.2.0.tar.gz)
+        :param destination: The path to place the archive at
+        :param sha256: If given, only an archive with this checksum will match
+        :return: True, if the archive was found in the cache
+        """
+        with self._locked():
+            index = self._read_index()
+            entry = self._find(index, name, sha256)
+            if not entry:
+                return False
+            object_path = self._object_path(entry['sha256'])
+            if not os.path.exists(object_path):
+                index[name].remove(entry)
+                self._write_index(index)
+                return False
+            destination_directory = os.path.dirname(destination)
+            if destination_directory and not os.path.exists(destination_directory):
+                os.makedirs(destination_directory)
+            self._link_or_copy(object_path, destination)
+            entry['last_used'] = time.time()
+            self._write_index(index)
+        return True
+
+    def store(self, name, path, sha256=None, move=False):
+        """
+        Add an archive to the cache, evicting the least recently used archives (other than this one) if the cache is
+        over its size cap
+
+        :param name: The archive name (E.G elasticsearch-7.2.0.tar.gz)
+        :param path: The path to the archive
+        :param sha256: The SHA-256 of the archive, if it is already known
+        :param move: Rename path into the cache instead of linking/copying it (E.G a path from incoming_path)
+        :return: The SHA-256 of the archive
+        """
+        if not sha256:
+            sha256 = download.sha256_of_file(path)
+        sha256 = sha256.lower()
+        with self._locked():
+            index = self._read_index()
+            object_path = self._object_path(sha256)
+            if not os.path.exists(object_path):
+                if move:
+                    os.rename(path, object_path)
+                else:
+                    tmp_path = object_path + '.tmp'
+                    self._link_or_copy(path, tmp_path)
+                    os.rename(tmp_path, object_path)
+            elif move:
+                os.remove(path)
+            entry = self._find(index, name, sha256)
+            if entry:
+                entry['last_used'] = time.time()
+            else:
+                index.setdefault(name, []).append({
+                    'sha256': sha256,
+                    'size': os.path.getsize(object_path),
+                    'last_used': time.time()
+                })
+            self._evict(index, keep=sha256)
+            self._write_index(index)
+        return sha256
+
+    def remove(self, name):
+        """
+        Remove every cached version of an archive
+
+        :param name: The archive name (E.G elasticsearch-7.2.0.tar.gz)
+        """
+        with self._locked():
+            index = self._read_index()
+            index.pop(name, None)
+            referenced = set([e['sha256'] for name_entries in index.values() for e in name_entries])
+            for object_name in os.listdir(self.objects_directory):
+                # Skip archives still being written (.incoming-*)
+                if object_name not in referenced and not object_name.startswith('.'):
+                    os.remove(os.path.join(self.objects_directory, object_name))
+            self._write_index(index)
+
+    def size(self):
+        """
+        :return: The combined size of all cached archives in bytes
+        """
+        with self._locked():
+            return sum([os.path.getsize(os.path.join(self.objects_directory, object_name))
+                        for object_name in os.listdir(self.objects_directory)])
@@ -36,6 +36,12 @@ def register_agent_component_args(agt_component_parser, parent_parsers):
                                     help="A friendly identifier for this agent. Defaults to {}.".format(
                                         get_default_agent_tag())
                                     )
+    agt_install_parser.add_argument("--throughput-profile", dest="agent_throughput_profile", type=str,
+                                    default=None,
+                                    choices=['low-latency', 'balanced', 'high-throughput', 'wan-constrained'],
+                                    help="How Filebeat batches, queues and ships events to the targets. "
+                                         "Defaults to balanced."
+                                    )
 
     # === Setup Agent Component Uninstall Arguments === #
     agt_uninstall_parser = agent_component_args_subparsers.add_parser(
@@ -78,6 +84,65 @@ def register_agent_component_args(agt_component_parser, parent_parsers):
         parents=parent_parsers)
     agt_update_parser.set_defaults(action_name="update")
 
+    # === Setup Agent Component Autoscale Arguments === #
+
+    agt_autoscale_parser = agent_component_args_subparsers.add_parser(
+        "autoscale", help="Resize Zeek workers based on recent capture loss and CPU usage.",
+        parents=parent_parsers)
+    agt_autoscale_parser.add_argument("--dry-run", dest="autoscale_dry_run", default=False, action="store_true",
+                                      help="Report the changes that would be made, without making them.")
+    agt_autoscale_parser.add_argument("--interval", dest="autoscale_interval", type=int, default=None,
+                                      help="Keep re-evaluating every N seconds (E.G 900), rather than once.")
+    agt_autoscale_parser.add_argument("--deploy-now", dest="autoscale_deploy_now", default=False,
+                                      action="store_true",
+                                      help="Deploy changes immediately, rather than waiting for traffic to quiet down.")
+    agt_autoscale_parser.set_defaults(action_name="autoscale")
+
+    # === Setup Agent Component Tune Arguments === #
+
+    agt_tune_parser = agent_component_args_subparsers.add_parser(
+        "tune", help="Show, diff, apply or revert kernel and NIC tuning for packet capture.",
+        parents=parent_parsers)
+    agt_tune_parser.add_argument("tune_action", type=str, nargs='?', default='show',
+                                 choices=['show', 'diff', 'apply', 'revert'],
+                                 help="show the current and tuned values, diff only those that would change, "
+                                      "apply the profile, or revert to the values from before it was applied.")
+    agt_tune_parser.add_argument("--capture-interfaces", dest="tune_capture_interfaces", type=str, nargs='+',
+                                 default=None,
+                                 help="The network interfaces to tune. Defaults to those Zeek and Suricata capture on."
+                                 )
+    agt_tune_parser.set_defaults(action_name="tune")
+
+    # === Setup Agent Component Filter Arguments === #
+
+    agt_filter_parser = agent_component_args_subparsers.add_parser(
+        "filter", help="Manage the filters Filebeat applies to events before shipping them.",
+        parents=parent_parsers)
+    agt_filter_parser.add_argument("filter_command", type=str, nargs='?', default='list',
+                                   choices=['list', 'profiles', 'add', 'remove', 'apply-profile', 'remove-profile',
+                                            'estimate'],
+                                   help="list the configured filters, list the curated profiles, add or remove a "
+                                        "filter, apply or remove a profile, or estimate the bytes saved.")
+    agt_filter_parser.add_argument("--profile", dest="filter_profile", type=str, default=None,
+                                   help="The curated profile to apply, remove or estimate (E.G zeek-drop-noisy).")
+    agt_filter_parser.add_argument("--log-source", dest="filter_log_source", type=str, default=None,
+                                   help="The events to filter: zeek, zeek:<log>, suricata or suricata:<event_type> "
+                                        "(E.G zeek:weird, suricata:flow).")
+    agt_filter_action_group = agt_filter_parser.add_mutually_exclusive_group()
+    agt_filter_action_group.add_argument("--drop-event", dest="filter_drop_event", default=False,
+                                         action="store_true", help="Drop matching events entirely.")
+    agt_filter_action_group.add_argument("--drop-fields", dest="filter_drop_fields", type=str, nargs='+',
+                                         default=None, help="Remove these fields from matching events.")
+    agt_filter_action_group.add_argument("--include-fields", dest="filter_include_fields", type=str, nargs='+',
+                                         default=None, help="Only keep these fields in matching events.")
+    agt_filter_parser.add_argument("--contains", dest="filter_contains", type=str, default=None,
+                                   help="Only filter events whose raw log line contains this string.")
+    agt_filter_parser.add_argument("--index", dest="filter_index", type=int, default=None,
+                                   help="The index of the filter to remove (as shown by list).")
+    agt_filter_parser.add_argument("--sample-size", dest="filter_sample_size", type=int, default=1000,
+                                   help="The number of recent lines to sample from each log when estimating.")
+    agt_filter_parser.set_defaults(action_name="filter")
+
 
 def register_monitor_component_args(mon_component_parser, parent_parsers):
     monitor_component_args_subparsers = mon_component_parser.add_subparsers()
@@ -161,6 +226,16 @@ def register_monitor_component_args(mon_component_parser, parent_parsers):
         parents=parent_parsers)
     ls_status_parser.set_defaults(action_name="status")
 
+    # === Setup Monitor Component Tune Arguments === #
+    mon_tune_parser = monitor_component_args_subparsers.add_parser(
+        "tune", help="Show, diff, apply or revert kernel tuning for log and flow ingest.",
+        parents=parent_parsers)
+    mon_tune_parser.add_argument("tune_action", type=str, nargs='?', default='show',
+                                 choices=['show', 'diff', 'apply', 'revert'],
+                                 help="show the current and tuned values, diff only those that would change, "
+                                      "apply the profile, or revert to the values from before it was applied.")
+    mon_tune_parser.set_defaults(action_name="tune")
+
 
 def register_lab_component_args(lab_component_parser, parent_parsers):
     lab_component_args_subparsers = lab_component_parser.add_subparsers()
@@ -253,6 +328,21 @@ def register_elasticsearch_component_args(es_component_parser, parent_parsers):
     es_install_parser.add_argument("--skip-install-jdk", dest="skip_elastic_install_jdk", default=False,
                                    action="store_true", help="Skip the installation of Java 11 Development Environment."
                                    )
+    es_install_parser.add_argument("--profile", dest="elastic_profile", type=str, default='auto',
+                                   choices=['auto', 'single-node', 'cluster'],
+                                   help="Tune the indices for a single node (no replicas, asynchronous translog), or a "
+                                        "cluster; auto picks based on the number of data nodes."
+                                   )
+    es_install_parser.add_argument("--cluster-file", dest="elastic_cluster_file", type=str, default=None,
+                                   help="A cluster definition (YAML); install this host as one of its nodes."
+                                   )
+    es_install_parser.add_argument("--node-name", dest="elastic_node_name", type=str, default=None,
+                                   help="The name of this node in the cluster definition."
+                                   )
+    es_install_parser.add_argument("--transport-keystore", dest="elastic_transport_keystore", type=str, default=None,
+                                   help="The certificate keystore shared by the nodes of the cluster (default: "
+                                        "generate a new one)."
+                                   )
     es_install_parser.set_defaults(action_name="install")
 
     # === Setup ElasticSearch Component Uninstall Arguments === #
@@ -277,6 +367,23 @@ def register_elasticsearch_component_args(es_component_parser, parent_parsers):
     # === Setup ElasticSearch Component Restart Arguments === #
     es_restart_parser = elasticsearch_component_args_subparsers.add_parser(
         "restart", help="Restart ElasticSearch.", parents=parent_parsers)
+    es_restart_parser.add_argument("--rolling", dest="es_restart_rolling", default=False, action="store_true",
+                                   help="Hold shard allocation and flush before restarting, then wait for the cluster "
+                                        "to recover; avoids re-replicating every shard of the node.")
+    es_restart_parser.add_argument("--nodes", dest="es_restart_nodes", type=str, default=None,
+                                   help="A comma separated list of the nodes to restart, one at a time (--rolling; "
+                                        "default the local node).")
+    es_restart_parser.add_argument("--all-nodes", dest="es_restart_all_nodes", default=False, action="store_true",
+                                   help="Restart every node in the cluster, one at a time (--rolling).")
+    es_restart_parser.add_argument("--wait-for-status", dest="es_restart_wait_for_status", type=str, default='green',
+                                   choices=['green', 'yellow'],
+                                   help="The cluster health to reach before moving on to the next node.")
+    es_restart_parser.add_argument("--remote-command", dest="es_restart_remote_command", type=str,
+                                   default='ssh {host} systemctl restart elasticsearch.service',
+                                   help="The command used to restart nodes on other hosts; {host} and {name} are "
+                                        "replaced by the node's address and name.")
+    es_restart_parser.add_argument("--es-password", dest="elastic_password", type=str,
+                                   help="The password used for logging into ElasticSearch (--rolling).")
     es_restart_parser.set_defaults(action_name="restart")
 
     # === Setup ElasticSearch Component Status Arguments === #
@@ -284,6 +391,111 @@ def register_elasticsearch_component_args(es_component_parser, parent_parsers):
         "status", help="Status ElasticSearch.", parents=parent_parsers)
     es_status_parser.set_defaults(action_name="status")
 
+    # === Setup ElasticSearch Component Indices Arguments === #
+    es_indices_parser = elasticsearch_component_args_subparsers.add_parser(
+        "indices", help="View or apply the index templates and lifecycle policies.", parents=parent_parsers)
+    es_indices_parser.add_argument("es_indices_command", type=str, choices=['status', 'tiers', 'show', 'apply'],
+                                   help="status: show the indices of each family; tiers: show the shards and disk "
+                                        "usage of the hot and warm nodes; show: print the templates and policies "
+                                        "that would be applied; apply: install them.")
+    es_indices_parser.add_argument("--es-host", dest="es_host", type=str, default=None,
+                                   help="The host where ElasticSearch lives (default the local node).")
+    es_indices_parser.add_argument("--es-port", dest="es_port", type=int, default=None,
+                                   help="The port that ElasticSearch is listening on.")
+    es_indices_parser.add_argument("--es-password", dest="elastic_password", type=str,
+                                   help="The password used for logging into ElasticSearch.")
+    es_indices_parser.add_argument("--rollover-max-age", dest="es_indices_rollover_max_age", type=str, default='7d',
+                                   help="The oldest an index may get before it is rolled over.")
+    es_indices_parser.add_argument("--warm-after-days", dest="es_indices_warm_after_days", type=int, default=2,
+                                   help="The number of days after which indices are made read-only, force-merged "
+                                        "and moved to the warm nodes.")
+    es_indices_parser.add_argument("--daily-warm-after-days", dest="es_indices_daily_warm_after_days", type=int,
+                                   default=7,
+                                   help="The same, for daily indices; events arriving later than this can no longer "
+                                        "be written to the index of their day.")
+    es_indices_parser.add_argument("--retention-days", dest="es_indices_retention_days", type=int, default=None,
+                                   help="The number of days after which indices are deleted; by default indices "
+                                        "are kept until deleted by hand.")
+    es_indices_parser.add_argument("--refresh-interval", dest="es_indices_refresh_interval", type=str, default='30s',
+                                   help="How often new events become searchable.")
+    es_indices_parser.add_argument("--no-rollover", dest="es_indices_no_rollover", default=False,
+                                   action="store_true", help="Keep writing to daily indices.")
+    es_indices_parser.add_argument("--profile", dest="elastic_profile", type=str, default='auto',
+                                   choices=['auto', 'single-node', 'cluster'],
+                                   help="The index profile; auto picks based on the number of data nodes.")
+    es_indices_parser.add_argument("--disk-type", dest="elastic_disk_type", type=str, default='auto',
+                                   choices=['auto', 'ssd', 'hdd'],
+                                   help="The type of the data disk; auto inspects the local node's data path.")
+    es_indices_parser.add_argument("--tiering", dest="es_indices_tiering", type=str, default='auto',
+                                   choices=['auto', 'hot-warm', 'none'],
+                                   help="Write indices on the hot nodes and move them to the warm nodes as they age; "
+                                        "auto does so when there are data nodes with box_type hot and warm.")
+    es_indices_parser.set_defaults(action_name="indices")
+
+    # === Setup ElasticSearch Component Mappings Arguments === #
+    es_mappings_parser = elasticsearch_component_args_subparsers.add_parser(
+        "mappings", help="View, apply or benchmark the Zeek and Suricata field mappings.", parents=parent_parsers)
+    es_mappings_parser.add_argument("es_mappings_command", type=str, choices=['show', 'apply', 'benchmark'],
+                                    help="show: print the mappings; apply: reinstall the index templates and roll "
+                                         "the write indices over; benchmark: compare them with the default "
+                                         "mappings on a sample.")
+    es_mappings_parser.add_argument("--es-host", dest="es_host", type=str, default=None,
+                                    help="The host where ElasticSearch lives (default the local node).")
+    es_mappings_parser.add_argument("--es-port", dest="es_port", type=int, default=None,
+                                    help="The port that ElasticSearch is listening on.")
+    es_mappings_parser.add_argument("--es-password", dest="elastic_password", type=str,
+                                    help="The password used for logging into ElasticSearch.")
+    es_mappings_parser.add_argument("--sample", dest="es_mappings_sample_path", type=str, default=None,
+                                    help="A file with one JSON event per line (E.G eve.json) to benchmark with.")
+    es_mappings_parser.add_argument("--sample-index", dest="es_mappings_sample_index", type=str, default=None,
+                                    help="The indices to sample events from, when no file is given "
+                                         "(default suricata-1.1.0-*).")
+    es_mappings_parser.add_argument("--sample-size", dest="es_mappings_sample_size", type=int, default=10000,
+                                    help="The number of events to benchmark with.")
+    es_mappings_parser.set_defaults(action_name="mappings")
+
+    # === Setup ElasticSearch Component Profile Arguments === #
+    es_profile_parser = elasticsearch_component_args_subparsers.add_parser(
+        "profile", help="View or apply the single-node/cluster index profile.", parents=parent_parsers)
+    es_profile_parser.add_argument("es_profile_command", type=str, choices=['show', 'apply'],
+                                   help="show: print the settings of the profile; apply: install them in the "
+                                        "templates, and update existing indices.")
+    es_profile_parser.add_argument("--profile", dest="elastic_profile", type=str, default='auto',
+                                   choices=['auto', 'single-node', 'cluster'],
+                                   help="The index profile; auto picks based on the number of data nodes.")
+    es_profile_parser.add_argument("--disk-type", dest="elastic_disk_type", type=str, default='auto',
+                                   choices=['auto', 'ssd', 'hdd'],
+                                   help="The type of the data disk; auto inspects the local node's data path.")
+    es_profile_parser.add_argument("--es-host", dest="es_host", type=str, default=None,
+                                   help="The host where ElasticSearch lives (default the local node).")
+    es_profile_parser.add_argument("--es-port", dest="es_port", type=int, default=None,
+                                   help="The port that ElasticSearch is listening on.")
+    es_profile_parser.add_argument("--es-password", dest="elastic_password", type=str,
+                                   help="The password used for logging into ElasticSearch.")
+    es_profile_parser.set_defaults(action_name="profile")
+
+    # === Setup ElasticSearch Component Cluster Arguments === #
+    es_cluster_parser = elasticsearch_component_args_subparsers.add_parser(
+        "cluster", help="Configure, bootstrap or verify a multi-node cluster.", parents=parent_parsers)
+    es_cluster_parser.add_argument("es_cluster_command", type=str, choices=['config', 'bootstrap', 'verify'],
+                                   help="config: write a node's settings to its elasticsearch.yml; bootstrap: once "
+                                        "every node is running, set up passwords and templates (on the first "
+                                        "master); verify: check that every node joined with its roles.")
+    es_cluster_parser.add_argument("--cluster-file", dest="elastic_cluster_file", type=str, required=True,
+                                   help="The cluster definition (YAML).")
+    es_cluster_parser.add_argument("--node-name", dest="elastic_node_name", type=str, default=None,
+                                   help="The node to configure (config; default the local node).")
+    es_cluster_parser.add_argument("--configuration-directory", dest="es_cluster_configuration_directory", type=str,
+                                   default=None, help="The configuration directory to write to (config; default "
+                                                      "the local node's).")
+    es_cluster_parser.add_argument("--es-host", dest="es_host", type=str, default=None,
+                                   help="The host where ElasticSearch lives (default the local node).")
+    es_cluster_parser.add_argument("--es-port", dest="es_port", type=int, default=None,
+                                   help="The port that ElasticSearch is listening on.")
+    es_cluster_parser.add_argument("--es-password", dest="elastic_password", type=str,
+                                   help="The password used for logging into ElasticSearch.")
+    es_cluster_parser.set_defaults(action_name="cluster")
+
 
 def register_logstash_component_args(ls_component_parser, parent_parsers):
     logstash_component_args_subparsers = ls_component_parser.add_subparsers()
@@ -354,6 +566,48 @@ def register_logstash_component_args(ls_component_parser, parent_parsers):
         "status", help="Status LogStash.", parents=parent_parsers)
     ls_status_parser.set_defaults(action_name="status")
 
+    # === Setup LogStash Component Autotune Arguments === #
+    ls_autotune_parser = logstash_component_args_subparsers.add_parser(
+        "autotune", help="Size LogStash pipeline workers and batches from the cores and JVM heap.",
+        parents=parent_parsers)
+    ls_autotune_parser.add_argument("--calibrate", dest="ls_autotune_calibrate", default=False, action="store_true",
+                                    help="Measure a few batch sizes against live traffic and keep the fastest; "
+                                         "restarts LogStash several times.")
+    ls_autotune_parser.add_argument("--sample-seconds", dest="ls_autotune_sample_seconds", type=int, default=60,
+                                    help="The number of seconds to measure each batch size for.")
+    ls_autotune_parser.add_argument("--max-gc-percent", dest="ls_autotune_max_gc_percent", type=float, default=5.0,
+                                    help="The largest share of time the JVM may spend in garbage collection.")
+    ls_autotune_parser.add_argument("--ordered", dest="ls_autotune_ordered", type=str, default=None,
+                                    choices=['auto', 'true', 'false'],
+                                    help="Set pipeline.ordered (LogStash 7.7 and later).")
+    ls_autotune_parser.add_argument("--dry-run", dest="ls_autotune_dry_run", default=False, action="store_true",
+                                    help="Only show the settings that would be applied.")
+    ls_autotune_parser.set_defaults(action_name="autotune")
+
+    # === Setup LogStash Component Queue Arguments === #
+    ls_queue_parser = logstash_component_args_subparsers.add_parser(
+        "queue", help="Inspect or size LogStash persisted queues, and replay or drain dead-letter queues.",
+        parents=parent_parsers)
+    ls_queue_parser.add_argument("ls_queue_command", type=str, choices=['status', 'size', 'replay', 'drain'],
+                                 help="status: show the depth of every queue; size: size the persisted queues from "
+                                      "the free disk; replay: feed a pipeline's dead letters back into it; "
+                                      "drain: discard a pipeline's dead letters (LogStash must be stopped).")
+    ls_queue_parser.add_argument("--events-per-second", dest="ls_queue_events_per_second", type=int, default=1000,
+                                 help="The number of events per second expected across the queued pipelines.")
+    ls_queue_parser.add_argument("--buffer-hours", dest="ls_queue_buffer_hours", type=float, default=1.0,
+                                 help="How long an ElasticSearch outage the persisted queues should absorb.")
+    ls_queue_parser.add_argument("--event-bytes", dest="ls_queue_event_bytes", type=int, default=1024,
+                                 help="The average size of an event in the persisted queue.")
+    ls_queue_parser.add_argument("--disk-percent", dest="ls_queue_disk_percent", type=float, default=50.0,
+                                 help="The largest share of the free disk the persisted queues may claim.")
+    ls_queue_parser.add_argument("--pipeline", dest="ls_queue_pipeline", type=str, default=None,
+                                 help="The pipeline to size (default every persisted pipeline), replay or drain.")
+    ls_queue_parser.add_argument("--no-dlq", dest="ls_queue_no_dlq", default=False, action="store_true",
+                                 help="Do not enable the dead-letter queue when sizing.")
+    ls_queue_parser.add_argument("--dry-run", dest="ls_queue_dry_run", default=False, action="store_true",
+                                 help="Only show the queue sizes that would be applied.")
+    ls_queue_parser.set_defaults(action_name="queue")
+
 
 def register_kibana_component_args(kb_component_parser, parent_parsers):
     kibana_component_args_subparsers = kb_component_parser.add_subparsers()
@@ -477,3 +731,9 @@ def register_updates_component_args(upd_component_parser, parent_parsers):
         help="Install the latest default configurations and mirrors.", parents=parent_parsers)
 
     upd_install_parser.set_defaults(action_name="install")
+
+
+def register_status_component_args(status_component_parser, parent_parsers):
+    # === Setup Status Component Arguments === #
+    status_component_parser.add_argument("--timeout", dest="status_timeout", type=int, default=15,
+                                         help="The maximum number of seconds to wait on any single service.")
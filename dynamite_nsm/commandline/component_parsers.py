@@ -57,3 +57,10 @@ update_component_parser = component_subparsers.add_parser(
     help="Update to the latest default configurations and mirrors."
 )
 update_component_parser.set_defaults(component_name="updates")
+
+status_component_parser = component_subparsers.add_parser(
+    "status",
+    help="Get the status of every Dynamite service installed on this host.",
+    parents=[base_parser]
+)
+status_component_parser.set_defaults(component_name="status", action_name="status")
@@ -8,9 +8,14 @@ class AgentComponent(component.BaseComponent):
     """
 
     def __init__(self, capture_network_interfaces, targets, kafka_topic=None, kafka_username=None, kafka_password=None,
-                 agent_analyzers=('zeek', 'suricata'), tag=None, prompt_on_uninstall=True, stdout=True, verbose=False):
+                 agent_analyzers=('zeek', 'suricata'), tag=None, throughput_profile=None, prompt_on_uninstall=True,
+                 stdout=True, verbose=False):
 
         self.agent_update_strategy = execution_strategy.AgentSuricataUpdateStrategy()
+        self.agent_autoscale_strategy = execution_strategy.AgentZeekAutoscaleStrategy(stdout=stdout, verbose=verbose)
+        self.agent_tune_strategy = execution_strategy.AgentTuneStrategy(
+            capture_network_interfaces=capture_network_interfaces, stdout=stdout, verbose=verbose)
+        self.agent_filter_strategy = execution_strategy.AgentFilebeatFilterStrategy(stdout=stdout, verbose=verbose)
 
         component.BaseComponent.__init__(
             self,
@@ -25,6 +30,7 @@ class AgentComponent(component.BaseComponent):
                 kafka_password=kafka_password,
                 agent_analyzers=agent_analyzers,
                 tag=tag,
+                throughput_profile=throughput_profile,
                 stdout=stdout,
                 verbose=verbose
             ),
@@ -61,6 +67,9 @@ class AgentCommandlineComponent(component.BaseComponent):
 
     def __init__(self, args):
         self.agent_update_strategy = None
+        self.agent_autoscale_strategy = None
+        self.agent_tune_strategy = None
+        self.agent_filter_strategy = None
 
         component.BaseComponent.__init__(
             self,
@@ -73,7 +82,10 @@ class AgentCommandlineComponent(component.BaseComponent):
             process_stop_strategy=None,
             process_restart_strategy=None,
             process_status_strategy=None,
-            agent_update_strategy=None
+            agent_update_strategy=None,
+            agent_autoscale_strategy=None,
+            agent_tune_strategy=None,
+            agent_filter_strategy=None
         )
         if args.action_name == "config":
             self.register_config_strategy(execution_strategy.AgentConfigStrategy())
@@ -88,6 +100,7 @@ class AgentCommandlineComponent(component.BaseComponent):
                     kafka_password=args.kafka_password,
                     agent_analyzers=args.agent_analyzers,
                     tag=args.agent_tag,
+                    throughput_profile=args.agent_throughput_profile,
                     stdout=not args.no_stdout,
                     verbose=args.verbose and not args.no_stdout
                 ))
@@ -141,6 +154,50 @@ class AgentCommandlineComponent(component.BaseComponent):
                 execution_strategy.AgentSuricataUpdateStrategy()
             )
             self.execute_agent_update_strategy()
+        elif args.action_name == "autoscale":
+            self.register_agent_autoscale_strategy(
+                execution_strategy.AgentZeekAutoscaleStrategy(
+                    dry_run=args.autoscale_dry_run,
+                    interval=args.autoscale_interval,
+                    deploy_now=args.autoscale_deploy_now,
+                    stdout=not args.no_stdout,
+                    verbose=args.verbose and not args.no_stdout
+                )
+            )
+            self.execute_agent_autoscale_strategy()
+        elif args.action_name == "tune":
+            self.register_agent_tune_strategy(
+                execution_strategy.AgentTuneStrategy(
+                    action=args.tune_action,
+                    capture_network_interfaces=args.tune_capture_interfaces,
+                    stdout=not args.no_stdout,
+                    verbose=args.verbose and not args.no_stdout
+                )
+            )
+            self.execute_agent_tune_strategy()
+        elif args.action_name == "filter":
+            filter_action, filter_fields = None, None
+            if args.filter_drop_event:
+                filter_action = 'drop_event'
+            elif args.filter_drop_fields:
+                filter_action, filter_fields = 'drop_fields', args.filter_drop_fields
+            elif args.filter_include_fields:
+                filter_action, filter_fields = 'include_fields', args.filter_include_fields
+            self.register_agent_filter_strategy(
+                execution_strategy.AgentFilebeatFilterStrategy(
+                    action=args.filter_command,
+                    profile=args.filter_profile,
+                    log_source=args.filter_log_source,
+                    filter_action=filter_action,
+                    fields=filter_fields,
+                    contains=args.filter_contains,
+                    index=args.filter_index,
+                    sample_size=args.filter_sample_size,
+                    stdout=not args.no_stdout,
+                    verbose=args.verbose and not args.no_stdout
+                )
+            )
+            self.execute_agent_filter_strategy()
 
 
 if __name__ == '__main__':
@@ -3,16 +3,21 @@ import sys
 import logging
 
 from dynamite_nsm import const
+from dynamite_nsm import tuning
 from dynamite_nsm import utilities
 from dynamite_nsm.logger import get_logger
 from dynamite_nsm.tuis import agent_config_selector
+from dynamite_nsm.services.base import install as base_install
+from dynamite_nsm.components.base import status
 from dynamite_nsm.components.base import execution_strategy
 from dynamite_nsm.services.zeek import install as zeek_install
+from dynamite_nsm.services.zeek import autoscale as zeek_autoscale
 from dynamite_nsm.services.zeek import process as zeek_process
 from dynamite_nsm.services.zeek import profile as zeek_profile
 from dynamite_nsm.services.filebeat import install as filebeat_install
 from dynamite_nsm.services.filebeat import process as filebeat_process
 from dynamite_nsm.services.filebeat import profile as filebeat_profile
+from dynamite_nsm.services.filebeat import filters as filebeat_filters
 from dynamite_nsm.services.suricata import install as suricata_install
 from dynamite_nsm.services.suricata import process as suricata_process
 from dynamite_nsm.services.suricata import profile as suricata_profile
@@ -36,34 +41,17 @@ def log_message(msg, level=logging.INFO, stdout=True, verbose=False):
         logger.error(msg)
 
 
-def get_agent_status(verbose=False, pretty_print_status=True):
-    zeek_profiler = zeek_profile.ProcessProfiler()
-    suricata_profiler = suricata_profile.ProcessProfiler()
-    status_tables = "\n"
-    agent_status = {}
-    filebeat_status = filebeat_process.ProcessManager(verbose=verbose,
-                                                      pretty_print_status=pretty_print_status).status()
-    status_tables += filebeat_status + '\n\n'
-    agent_status.update({
-        'filebeat': filebeat_status
-    })
-    if zeek_profiler.is_installed():
-        zeek_status = zeek_process.ProcessManager(verbose=verbose, pretty_print_status=pretty_print_status).status()
-        status_tables += zeek_status + '\n\n'
-        agent_status.update({
-            'zeek': zeek_status
-        })
-    if suricata_profiler.is_installed():
-        suricata_status = suricata_process.ProcessManager(verbose=verbose,
-                                                          pretty_print_status=pretty_print_status).status()
-        status_tables += suricata_status + '\n\n'
-        agent_status.update({
-            'suricata': suricata_status
-        })
-
+def get_agent_status(verbose=False, pretty_print_status=True, timeout=status.DEFAULT_PROBE_TIMEOUT):
+    status_collector = status.StatusCollector(timeout=timeout, pretty_print_status=pretty_print_status)
+    probe_args = {'verbose': verbose, 'pretty_print_status': pretty_print_status}
+    status_collector.add_probe('filebeat', filebeat_process.status, probe_args)
+    if zeek_profile.ProcessProfiler().is_installed():
+        status_collector.add_probe('zeek', zeek_process.status, probe_args)
+    if suricata_profile.ProcessProfiler().is_installed():
+        status_collector.add_probe('suricata', suricata_process.status, probe_args)
     if pretty_print_status:
-        return status_tables
-    return agent_status
+        return status_collector.collect_tables()
+    return dict(status_collector.collect())
 
 
 def get_installed_agent_analyzers():
@@ -148,7 +136,7 @@ class AgentInstallStrategy(execution_strategy.BaseExecStrategy):
     """
 
     def __init__(self, capture_network_interfaces, targets, kafka_topic=None, kafka_username=None, kafka_password=None,
-                 agent_analyzers=('zeek', 'suricata'), tag=None, stdout=True, verbose=False):
+                 agent_analyzers=('zeek', 'suricata'), tag=None, throughput_profile=None, stdout=True, verbose=False):
         execution_strategy.BaseExecStrategy.__init__(
             self,
             strategy_name="agent_install",
@@ -163,15 +151,39 @@ class AgentInstallStrategy(execution_strategy.BaseExecStrategy):
                 None,
             )
         )
-        if not filebeat_profile.ProcessProfiler().is_installed():
+        # Archives are fetched concurrently up front, so that later downloads overlap with the (long) Zeek and
+        # Suricata compilations; the installers themselves still run one after the other, as they share the OS
+        # package manager.
+        install_zeek = not zeek_profile.ProcessProfiler().is_installed() and 'zeek' in agent_analyzers
+        install_suricata = not suricata_profile.ProcessProfiler().is_installed() and 'suricata' in agent_analyzers
+        install_filebeat = not filebeat_profile.ProcessProfiler().is_installed()
+        env_step = self.step_names[0]
+        downloads = []
+        if install_filebeat:
+            downloads.append(('download_filebeat', const.FILE_BEAT_MIRRORS, const.FILE_BEAT_ARCHIVE_NAME))
+        if install_zeek:
+            downloads.append(('download_zeek', const.ZEEK_MIRRORS, const.ZEEK_ARCHIVE_NAME))
+        if install_suricata:
+            downloads.append(('download_suricata', const.SURICATA_MIRRORS, const.SURICATA_ARCHIVE_NAME))
+            downloads.append(('download_oinkmaster', const.OINKMASTER_MIRRORS, const.OINKMASTER_ARCHIVE_NAME))
+        for step_name, mirror_path, archive_name in downloads:
+            self.add_function(func=base_install.BaseInstallManager.download_from_mirror, argument_dict={
+                'mirror_path': mirror_path,
+                'fname': archive_name,
+                'stdout': False,
+                'verbose': bool(verbose)
+            }, name=step_name, depends_on=(env_step,))
+        previous_install = env_step
+        if install_filebeat:
             filebeat_args = {
                 'targets': list(targets),
                 'kafka_topic': kafka_topic,
                 'kafka_username': kafka_username,
                 'kafka_password': kafka_password,
                 'agent_tag': tag,
+                'throughput_profile': throughput_profile,
                 'install_directory': '/opt/dynamite/filebeat/',
-                'download_filebeat_archive': True,
+                'download_filebeat_archive': False,
                 'stdout': bool(stdout)
             }
             monitor_log_paths = []
@@ -182,48 +194,50 @@ class AgentInstallStrategy(execution_strategy.BaseExecStrategy):
             filebeat_args.update({
                 'monitor_log_paths': monitor_log_paths
             })
-            self.add_function(func=filebeat_install.install_filebeat, argument_dict=filebeat_args)
+            previous_install = self.add_function(func=filebeat_install.install_filebeat, argument_dict=filebeat_args,
+                                                 name='install_filebeat',
+                                                 depends_on=(previous_install, 'download_filebeat'))
         else:
-            self.add_function(func=log_message,
-                              argument_dict={
-                                  "msg": 'Skipping Filebeat installation; already installed',
-                                  'stdout': bool(stdout),
-                                  'verbose': bool(verbose)
-                              },
-                              return_format=None)
-        if not zeek_profile.ProcessProfiler().is_installed() and 'zeek' in agent_analyzers:
-            self.add_function(func=zeek_install.install_zeek, argument_dict={
+            previous_install = self.add_function(func=log_message,
+                                                 argument_dict={
+                                                     "msg": 'Skipping Filebeat installation; already installed',
+                                                     'stdout': bool(stdout),
+                                                     'verbose': bool(verbose)
+                                                 },
+                                                 return_format=None, depends_on=(previous_install,))
+        if install_zeek:
+            previous_install = self.add_function(func=zeek_install.install_zeek, argument_dict={
                 'configuration_directory': '/etc/dynamite/zeek/',
                 'install_directory': '/opt/dynamite/zeek',
                 'capture_network_interfaces': list(capture_network_interfaces),
-                'download_zeek_archive': True,
+                'download_zeek_archive': False,
                 'stdout': bool(stdout),
                 'verbose': bool(verbose)
-            })
+            }, name='install_zeek', depends_on=(previous_install, 'download_zeek'))
         else:
-            self.add_function(func=log_message, argument_dict={
+            previous_install = self.add_function(func=log_message, argument_dict={
                 "msg": 'Skipping Zeek installation.',
                 'stdout': bool(stdout),
                 'verbose': bool(verbose)
             },
-                              return_format=None)
-        if not suricata_profile.ProcessProfiler().is_installed() and 'suricata' in agent_analyzers:
+                              return_format=None, depends_on=(previous_install,))
+        if install_suricata:
             self.add_function(func=suricata_install.install_suricata, argument_dict={
                 'configuration_directory': '/etc/dynamite/suricata/',
                 'install_directory': '/opt/dynamite/suricata',
                 'log_directory': '/var/log/dynamite/suricata/',
                 'capture_network_interfaces': list(capture_network_interfaces),
-                'download_suricata_archive': True,
+                'download_suricata_archive': False,
                 'stdout': bool(stdout),
                 'verbose': bool(verbose)
-            })
+            }, name='install_suricata', depends_on=(previous_install, 'download_suricata', 'download_oinkmaster'))
         else:
             self.add_function(func=log_message, argument_dict={
                 "msg": 'Skipping Suricata installation.',
                 'stdout': bool(stdout),
                 'verbose': bool(verbose)
             },
-                              return_format=None)
+                              return_format=None, depends_on=(previous_install,))
         self.add_function(func=log_message, argument_dict={
             "msg": '*** Agent installed successfully. ***',
             'verbose': bool(verbose)
@@ -471,6 +485,112 @@ class AgentSuricataUpdateStrategy(execution_strategy.BaseExecStrategy):
         )
 
 
+class AgentZeekAutoscaleStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to resize the agent's Zeek workers
+    """
+
+    def __init__(self, dry_run=False, interval=None, deploy_now=False, stdout=True, verbose=False):
+        execution_strategy.BaseExecStrategy.__init__(
+            self, strategy_name="agent_autoscale",
+            strategy_description="Resize Zeek workers based on recent capture loss and CPU usage.",
+            functions=(
+                utilities.create_dynamite_environment_file,
+            ),
+            arguments=(
+                # utilities.create_dynamite_environment_file
+                {},
+            ),
+            return_formats=(
+                None,
+            )
+        )
+        if zeek_profile.ProcessProfiler().is_installed():
+            self.add_function(func=zeek_autoscale.autoscale_workers, argument_dict={
+                'dry_run': bool(dry_run),
+                'interval': interval,
+                'deploy_now': bool(deploy_now),
+                'stdout': bool(stdout),
+                'verbose': bool(verbose)
+            }, return_format='text')
+        else:
+            self.add_function(func=log_message, argument_dict={
+                "msg": 'Zeek is not installed; nothing to autoscale.',
+                'stdout': bool(stdout),
+                'verbose': bool(verbose)
+            })
+
+
+class AgentTuneStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to show, diff, apply or revert the agent kernel and NIC tuning profile
+    """
+
+    def __init__(self, action='show', capture_network_interfaces=None, stdout=True, verbose=False):
+        execution_strategy.BaseExecStrategy.__init__(
+            self, strategy_name="agent_tune",
+            strategy_description="Tune the kernel and capture interfaces for packet capture.",
+            functions=(
+                utilities.create_dynamite_environment_file,
+                tuning.tune,
+            ),
+            arguments=(
+                # utilities.create_dynamite_environment_file
+                {},
+                # tuning.tune
+                {
+                    'profile': 'agent',
+                    'action': str(action),
+                    'capture_network_interfaces': capture_network_interfaces,
+                    'stdout': bool(stdout),
+                    'verbose': bool(verbose)
+                },
+            ),
+            return_formats=(
+                None,
+                'text'
+            )
+        )
+
+
+class AgentFilebeatFilterStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to manage the filters Filebeat applies to events before shipping them
+    """
+
+    def __init__(self, action='list', profile=None, log_source=None, filter_action=None, fields=None, contains=None,
+                 index=None, sample_size=filebeat_filters.DEFAULT_SAMPLE_SIZE, stdout=True, verbose=False):
+        execution_strategy.BaseExecStrategy.__init__(
+            self, strategy_name="agent_filter",
+            strategy_description="Manage the filters Filebeat applies to events before shipping them.",
+            functions=(
+                utilities.create_dynamite_environment_file,
+                filebeat_filters.manage_filters,
+            ),
+            arguments=(
+                # utilities.create_dynamite_environment_file
+                {},
+                # filebeat_filters.manage_filters
+                {
+                    'action': str(action),
+                    'profile': profile,
+                    'log_source': log_source,
+                    'filter_action': filter_action,
+                    'fields': fields,
+                    'contains': contains,
+                    'index': index,
+                    'sample_size': int(sample_size),
+                    'stdout': bool(stdout),
+                    'verbose': bool(verbose)
+                },
+            ),
+            return_formats=(
+                None,
+                'text'
+            )
+        )
+
+
 # Test Functions
 
 def run_install_strategy():
@@ -26,3 +26,17 @@ class StrategyNotImplemented(Exception):
         """
         msg = "No strategy for {}:{}".format(component_name, command_name)
         super(StrategyNotImplemented, self).__init__(msg)
+
+
+class StrategyDependencyError(Exception):
+    """
+    Thrown when the steps of a strategy reference unknown steps, or depend on each other in a cycle
+    """
+
+    def __init__(self, strategy_name, message):
+        """
+        :param strategy_name: The name of the strategy
+        :param message: A description of the problem
+        """
+        msg = "Invalid step dependencies in {}; {}".format(strategy_name, message)
+        super(StrategyDependencyError, self).__init__(msg)
@@ -1,6 +1,17 @@
 import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from dynamite_nsm.logger import get_logger
 from dynamite_nsm.components.base import exceptions
 
+DEFAULT_MAX_WORKERS = 4
+
+_previous_step = object()
+
 
 def print_json_message(msg_obj):
     print(json.dumps(msg_obj, indent=1))
@@ -11,18 +22,27 @@ def print_text_message(msg_obj):
 
 
 class BaseExecStrategy:
-    """Register a set of functions to be executed in defined order"""
+    """
+    Register a set of functions to be executed in defined order
 
-    def __init__(self, strategy_name, strategy_description, functions=(), arguments=(), return_formats=()):
+    By default every function depends on the one registered before it, so functions run one after the other. Steps may
+    instead be given a name and an explicit list of the steps they depend on; steps whose dependencies have completed
+    are then run concurrently (up to max_workers at a time).
+    """
+
+    def __init__(self, strategy_name, strategy_description, functions=(), arguments=(), return_formats=(),
+                 max_workers=DEFAULT_MAX_WORKERS):
         """
         :param strategy_name: The name of the strategy
         :param strategy_description: A long description of the strategy
         :param functions: A list of functions (<type:function>) to be called
         :param arguments: A list of adjacent arguments (<type:list<<type: dict>>)
         :param return_formats: A list of the return types to print (E.G [None, None, 'json'])
+        :param max_workers: The maximum number of steps to run at the same time
         """
         self.strategy_name = strategy_name
         self.strategy_description = strategy_description
+        self.max_workers = max(1, int(max_workers))
 
         self.functions = list(functions)
         self.arguments = list(arguments)
@@ -31,32 +51,153 @@ class BaseExecStrategy:
         if len(self.functions) != len(self.arguments) != len(self.return_formats):
             raise exceptions.StrategyExecutionError(len(self.functions), len(self.arguments), len(return_formats))
 
-    def add_function(self, func, argument_dict, return_format=None):
+        self.step_names = []
+        self.dependencies = []
+        for func in self.functions:
+            self._add_step(func, None, _previous_step)
+        self.step_timings = OrderedDict()
+        self._print_lock = threading.Lock()
+
+    def _add_step(self, func, name, depends_on):
+        index = len(self.step_names)
+        if not name:
+            name = '{}-{}'.format(getattr(func, '__name__', 'step'), index)
+        if name in self.step_names:
+            raise exceptions.StrategyDependencyError(self.strategy_name, 'duplicate step name {}'.format(name))
+        if depends_on is _previous_step:
+            depends_on = self.step_names[-1:]
+        self.step_names.append(name)
+        self.dependencies.append(tuple(depends_on))
+        return name
+
+    def add_function(self, func, argument_dict, return_format=None, name=None, depends_on=_previous_step):
         """
         Alternative method of adding function to execute
 
         :param func: A <type:function> function to be called
         :param argument_dict: A <type: dict> of corresponding arguments
         :param return_format: The return type to print
+        :param name: A unique name for this step, used to reference it in depends_on
+        :param depends_on: The names of the steps that must complete before this one starts; defaults to the
+                           previously added step. Pass an empty tuple for a step that can start right away.
+        :return: The name of the step
         """
+        name = self._add_step(func, name, depends_on)
         self.functions.append(func)
         self.arguments.append(argument_dict)
         self.return_formats.append(return_format)
+        return name
+
+    def _validate_dependencies(self):
+        """
+        :return: A list of step indexes in an order that satisfies every dependency
+        """
+        indexes = dict([(name, i) for i, name in enumerate(self.step_names)])
+        for name, depends_on in zip(self.step_names, self.dependencies):
+            for dependency in depends_on:
+                if dependency not in indexes:
+                    raise exceptions.StrategyDependencyError(
+                        self.strategy_name, '{} depends on unknown step {}'.format(name, dependency))
+        order = []
+        state = {}
+
+        def visit(i, path):
+            if state.get(i) == 'done':
+                return
+            if state.get(i) == 'visiting':
+                raise exceptions.StrategyDependencyError(
+                    self.strategy_name, 'cycle between {}'.format(' -> '.join(path + [self.step_names[i]])))
+            state[i] = 'visiting'
+            for dependency in self.dependencies[i]:
+                visit(indexes[dependency], path + [self.step_names[i]])
+            state[i] = 'done'
+            order.append(i)
+
+        for i in range(0, len(self.step_names)):
+            visit(i, [])
+        return order
+
+    def _print_result(self, ret_fmt, result):
+        with self._print_lock:
+            if str(ret_fmt).lower() == "json":
+                print_json_message(result)
+            elif str(ret_fmt).lower() == "text":
+                print_text_message(result)
+
+    def _run_step(self, i, logger=None):
+        name = self.step_names[i]
+        if logger:
+            logger.info('Starting {}.'.format(name))
+        start = time.time()
+        try:
+            result = self.functions[i](**self.arguments[i])
+        finally:
+            self.step_timings[name] = time.time() - start
+        if logger:
+            logger.info('Finished {} in {:.1f}s.'.format(name, self.step_timings[name]))
+        if self.return_formats[i]:
+            self._print_result(self.return_formats[i], result)
+        return result
 
     def execute_strategy(self):
         """
         Run your functions with corresponding arguments and return formats.
+
+        Steps are started as soon as all of the steps they depend on have completed; a step that is the only one
+        runnable is executed on the calling thread, otherwise steps are handed to a pool of max_workers threads. If a
+        step raises, no further steps are started; steps that are already running are waited on, and the first error
+        is then re-raised.
         """
-        for i in range(0, len(self.functions)):
-            func = self.functions[i]
-            args = self.arguments[i]
-            ret_fmt = self.return_formats[i]
-            if not ret_fmt:
-                func(**args)
-            elif str(ret_fmt).lower() == "json":
-                print_json_message(func(**args))
-            elif str(ret_fmt).lower() == "text":
-                print_text_message(func(**args))
+        order = self._validate_dependencies()
+        logger = get_logger('STRATEGY', level=logging.INFO, stdout=True)
+        self.step_timings = OrderedDict()
+        completed = set()
+        pending = list(order)
+        running = {}
+        failure = None
+        executor = None
+
+        def runnable():
+            return [i for i in pending
+                    if all([dependency in completed for dependency in self.dependencies[i]])]
+
+        try:
+            while pending or running:
+                ready = runnable() if not failure else []
+                if not running and len(ready) == 1:
+                    # Every other pending step is waiting on this one; there is nothing to gain from a worker thread
+                    i = ready[0]
+                    pending.remove(i)
+                    self._run_step(i)
+                    completed.add(self.step_names[i])
+                    continue
+                for i in ready[:max(0, self.max_workers - len(running))]:
+                    if not executor:
+                        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                    pending.remove(i)
+                    running[executor.submit(self._run_step, i, logger)] = i
+                if not running:
+                    break
+                done, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    try:
+                        future.result()
+                        completed.add(self.step_names[i])
+                    except BaseException as e:
+                        logger.error('{} failed; {}'.format(self.step_names[i], e))
+                        if failure is None:
+                            failure = e
+            if failure is not None:
+                skipped = [self.step_names[i] for i in pending]
+                if skipped:
+                    logger.warning('Skipped {} after an earlier step failed.'.format(', '.join(skipped)))
+                raise failure
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+                logger.info('{} step timings: {}'.format(self.strategy_name, ', '.join(
+                    ['{}={:.1f}s'.format(name, elapsed) for name, elapsed in self.step_timings.items()])))
 
 
 if __name__ == '__main__':
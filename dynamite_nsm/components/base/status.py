@@ -0,0 +1,89 @@
+import time
+import threading
+from collections import OrderedDict
+
+import tabulate
+
+DEFAULT_PROBE_TIMEOUT = 15
+
+
+class StatusCollector:
+    """
+    Run a set of service status probes concurrently, each bounded by its own timeout
+    """
+
+    def __init__(self, timeout=DEFAULT_PROBE_TIMEOUT, pretty_print_status=True):
+        """
+        :param timeout: The maximum number of seconds to wait on any single probe
+        :param pretty_print_status: If True, probes are expected to return tables, and failed probes are rendered as
+                                    tables as well
+        """
+        self.timeout = timeout
+        self.pretty_print_status = pretty_print_status
+        self.probes = []
+
+    def add_probe(self, name, func, argument_dict=None):
+        """
+        Register a status probe
+
+        :param name: The name of the service being probed (E.G zeek)
+        :param func: A <type:function> that returns the status of the service
+        :param argument_dict: A <type: dict> of corresponding arguments
+        """
+        self.probes.append((name, func, argument_dict or {}))
+
+    def _format_failure(self, name, reason):
+        if self.pretty_print_status:
+            return tabulate.tabulate([
+                ['Service', name],
+                ['Running', '\033[93munknown\033[0m'],
+                ['Error', reason]
+            ], tablefmt='fancy_grid')
+        return {
+            'running': None,
+            'error': reason
+        }
+
+    def collect(self):
+        """
+        Execute every probe in its own thread, and wait for them to complete
+
+        Probes that raise, or that have not returned once their timeout expires, are reported as failures; the
+        remaining results are returned as usual. Probe threads are daemonized, so a wedged probe will not hold up the
+        exit of the calling process.
+
+        :return: An OrderedDict mapping each probe name to its result (in the order the probes were added)
+        """
+        results = {}
+        errors = {}
+        threads = []
+
+        def run_probe(probe_name, probe_func, probe_args):
+            try:
+                results[probe_name] = probe_func(**probe_args)
+            except Exception as e:
+                errors[probe_name] = str(e)
+
+        for name, func, args in self.probes:
+            thread = threading.Thread(target=run_probe, args=(name, func, args), name='status-{}'.format(name))
+            thread.daemon = True
+            thread.start()
+            threads.append((name, thread))
+
+        deadline = time.time() + self.timeout
+        status = OrderedDict()
+        for name, thread in threads:
+            thread.join(max(0, deadline - time.time()))
+            if name in results:
+                status[name] = results[name]
+            elif name in errors:
+                status[name] = self._format_failure(name, errors[name])
+            else:
+                status[name] = self._format_failure(name, 'Timed out after {} seconds.'.format(self.timeout))
+        return status
+
+    def collect_tables(self):
+        """
+        :return: All probe results joined into a single printable string (requires pretty_print_status)
+        """
+        return '\n' + '\n\n'.join([str(table) for table in self.collect().values()])
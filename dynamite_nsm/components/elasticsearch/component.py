@@ -11,7 +11,7 @@ class ElasticsearchComponent(component.BaseComponent):
     """
 
     def __init__(self, install_password='changeme', install_heap_size_gigs=4, install_jdk=True,
-                 prompt_on_uninstall=True, stdout=True, verbose=False):
+                 install_profile='auto', prompt_on_uninstall=True, stdout=True, verbose=False):
         component.BaseComponent.__init__(
             self,
             component_name="ElasticSearch",
@@ -20,6 +20,7 @@ class ElasticsearchComponent(component.BaseComponent):
                 password=install_password,
                 heap_size_gigs=install_heap_size_gigs,
                 install_jdk=install_jdk,
+                profile=install_profile,
                 stdout=stdout,
                 verbose=verbose
             ),
@@ -47,6 +48,21 @@ class ElasticsearchComponent(component.BaseComponent):
             process_status_strategy=execution_strategy.ElasticsearchProcessStatusStrategy(
                 stdout=stdout,
                 verbose=verbose,
+            ),
+            indices_strategy=execution_strategy.ElasticsearchIndicesStrategy(
+                password=install_password,
+                stdout=stdout,
+                verbose=verbose
+            ),
+            mappings_strategy=execution_strategy.ElasticsearchMappingsStrategy(
+                password=install_password,
+                stdout=stdout,
+                verbose=verbose
+            ),
+            profile_strategy=execution_strategy.ElasticsearchProfileStrategy(
+                password=install_password,
+                stdout=stdout,
+                verbose=verbose
             )
         )
 
@@ -67,7 +83,11 @@ class ElasticsearchCommandlineComponent(component.BaseComponent):
             process_start_strategy=None,
             process_stop_strategy=None,
             process_restart_strategy=None,
-            process_status_strategy=None
+            process_status_strategy=None,
+            indices_strategy=None,
+            mappings_strategy=None,
+            profile_strategy=None,
+            cluster_strategy=None
         )
         if args.action_name == "chpasswd":
             old_es_password = args.old_elastic_password
@@ -100,6 +120,10 @@ class ElasticsearchCommandlineComponent(component.BaseComponent):
                     password=es_password,
                     heap_size_gigs=args.elastic_heap_size,
                     install_jdk=not args.skip_elastic_install_jdk,
+                    profile=args.elastic_profile,
+                    cluster_file=args.elastic_cluster_file,
+                    node_name=args.elastic_node_name,
+                    transport_keystore=args.elastic_transport_keystore,
                     stdout=not args.no_stdout,
                     verbose=args.verbose and not args.no_stdout
                 ))
@@ -132,11 +156,23 @@ class ElasticsearchCommandlineComponent(component.BaseComponent):
             )
             self.execute_process_stop_strategy()
         elif args.action_name == "restart":
+            es_password = args.elastic_password
+            if args.es_restart_rolling and not es_password:
+                es_password = getpass.getpass('[?] Enter the ElasticSearch password: ')
+            node_names = None
+            if args.es_restart_nodes:
+                node_names = [name.strip() for name in args.es_restart_nodes.split(',') if name.strip()]
             self.register_process_restart_strategy(
                 execution_strategy.ElasticsearchProcessRestartStrategy(
                     status=True,
                     stdout=not args.no_stdout,
                     verbose=args.verbose and not args.no_stdout,
+                    rolling=args.es_restart_rolling,
+                    node_names=node_names,
+                    all_nodes=args.es_restart_all_nodes,
+                    password=es_password,
+                    wait_for_status=args.es_restart_wait_for_status,
+                    remote_restart_command=args.es_restart_remote_command
                 )
             )
             self.execute_process_restart_strategy()
@@ -149,6 +185,83 @@ class ElasticsearchCommandlineComponent(component.BaseComponent):
                 )
             )
             self.execute_process_status_strategy()
+        elif args.action_name == "indices":
+            es_password = args.elastic_password
+            if not es_password:
+                es_password = getpass.getpass('[?] Enter the ElasticSearch password: ')
+            self.register_indices_strategy(
+                execution_strategy.ElasticsearchIndicesStrategy(
+                    action=args.es_indices_command,
+                    host=args.es_host,
+                    port=args.es_port,
+                    password=es_password,
+                    rollover_max_age=args.es_indices_rollover_max_age,
+                    warm_after_days=args.es_indices_warm_after_days,
+                    daily_warm_after_days=args.es_indices_daily_warm_after_days,
+                    retention_days=args.es_indices_retention_days,
+                    refresh_interval=args.es_indices_refresh_interval,
+                    rollover=not args.es_indices_no_rollover,
+                    profile=args.elastic_profile,
+                    disk_type=args.elastic_disk_type,
+                    tiering=args.es_indices_tiering,
+                    stdout=not args.no_stdout,
+                    verbose=args.verbose and not args.no_stdout
+                )
+            )
+            self.execute_indices_strategy()
+        elif args.action_name == "mappings":
+            es_password = args.elastic_password
+            if not es_password:
+                es_password = getpass.getpass('[?] Enter the ElasticSearch password: ')
+            self.register_mappings_strategy(
+                execution_strategy.ElasticsearchMappingsStrategy(
+                    action=args.es_mappings_command,
+                    host=args.es_host,
+                    port=args.es_port,
+                    password=es_password,
+                    sample_path=args.es_mappings_sample_path,
+                    sample_index=args.es_mappings_sample_index,
+                    sample_size=args.es_mappings_sample_size,
+                    stdout=not args.no_stdout,
+                    verbose=args.verbose and not args.no_stdout
+                )
+            )
+            self.execute_mappings_strategy()
+        elif args.action_name == "profile":
+            es_password = args.elastic_password
+            if not es_password:
+                es_password = getpass.getpass('[?] Enter the ElasticSearch password: ')
+            self.register_profile_strategy(
+                execution_strategy.ElasticsearchProfileStrategy(
+                    action=args.es_profile_command,
+                    profile=args.elastic_profile,
+                    disk_type=args.elastic_disk_type,
+                    host=args.es_host,
+                    port=args.es_port,
+                    password=es_password,
+                    stdout=not args.no_stdout,
+                    verbose=args.verbose and not args.no_stdout
+                )
+            )
+            self.execute_profile_strategy()
+        elif args.action_name == "cluster":
+            es_password = args.elastic_password
+            if args.es_cluster_command != 'config' and not es_password:
+                es_password = getpass.getpass('[?] Enter the ElasticSearch password: ')
+            self.register_cluster_strategy(
+                execution_strategy.ElasticsearchClusterStrategy(
+                    action=args.es_cluster_command,
+                    cluster_file=args.elastic_cluster_file,
+                    node_name=args.elastic_node_name,
+                    configuration_directory=args.es_cluster_configuration_directory,
+                    host=args.es_host,
+                    port=args.es_port,
+                    password=es_password,
+                    stdout=not args.no_stdout,
+                    verbose=args.verbose and not args.no_stdout
+                )
+            )
+            self.execute_cluster_strategy()
 
 
 if __name__ == '__main__':
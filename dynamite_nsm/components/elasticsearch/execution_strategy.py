@@ -5,7 +5,8 @@ from dynamite_nsm import const
 from dynamite_nsm.logger import get_logger
 from dynamite_nsm.components.base import execution_strategy
 from dynamite_nsm.utilities import check_socket, prompt_input
-from dynamite_nsm.services.elasticsearch import config, install, process
+from dynamite_nsm.services.elasticsearch import cluster, config, indices, install, mappings, process, profiles, \
+    restart
 
 
 def check_elasticsearch_target(host, port, perform_check=True):
@@ -79,7 +80,8 @@ class ElasticsearchInstallStrategy(execution_strategy.BaseExecStrategy):
     Steps to install elasticsearch
     """
 
-    def __init__(self, password, heap_size_gigs, install_jdk, stdout, verbose):
+    def __init__(self, password, heap_size_gigs, install_jdk, stdout, verbose, profile=profiles.AUTO,
+                 cluster_file=None, node_name=None, transport_keystore=None):
         execution_strategy.BaseExecStrategy.__init__(
             self,
             strategy_name="elasticsearch_install",
@@ -103,6 +105,10 @@ class ElasticsearchInstallStrategy(execution_strategy.BaseExecStrategy):
                     "heap_size_gigs": int(heap_size_gigs),
                     "install_jdk": bool(install_jdk),
                     "create_dynamite_user": True,
+                    "profile": str(profile),
+                    "cluster_file": cluster_file,
+                    "node_name": node_name,
+                    "transport_keystore": transport_keystore,
                     "stdout": bool(stdout),
                     "verbose": bool(verbose)
                 },
@@ -231,54 +237,220 @@ class ElasticsearchProcessRestartStrategy(execution_strategy.BaseExecStrategy):
     Steps to restart elasticsearch
     """
 
-    def __init__(self, status, stdout, verbose):
+    def __init__(self, status, stdout, verbose, rolling=False, node_names=None, all_nodes=False, password='changeme',
+                 wait_for_status='green', remote_restart_command=restart.DEFAULT_REMOTE_RESTART_COMMAND):
+        if rolling:
+            execution_strategy.BaseExecStrategy.__init__(
+                self, strategy_name="elasticsearch_restart",
+                strategy_description="Restart ElasticSearch nodes one at a time.",
+                functions=(
+                    restart.rolling_restart,
+                ),
+                arguments=(
+                    # restart.rolling_restart
+                    {
+                        "node_names": node_names,
+                        "all_nodes": bool(all_nodes),
+                        "password": str(password),
+                        "wait_for_status": str(wait_for_status),
+                        "remote_restart_command": str(remote_restart_command),
+                        "stdout": bool(stdout),
+                        "verbose": bool(verbose)
+                    },
+                ),
+                return_formats=(
+                    'text',
+                )
+            )
+        else:
+            execution_strategy.BaseExecStrategy.__init__(
+                self, strategy_name="elasticsearch_restart",
+                strategy_description="Restart ElasticSearch process.",
+                functions=(
+                    process.stop,
+                    process.start,
+                ),
+                arguments=(
+                    # process.stop
+                    {
+                        "stdout": bool(stdout),
+                        "verbose": bool(verbose)
+                    },
+
+                    # process.start
+                    {
+                        "stdout": bool(stdout),
+                        "verbose": bool(verbose),
+                    },
+                ),
+                return_formats=(
+                    None,
+                    None
+                )
+            )
+        if status:
+            self.add_function(process.status, {"pretty_print_status": True}, return_format="text")
+
+
+class ElasticsearchProcessStatusStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to get the status of elasticsearch
+    """
+
+    def __init__(self, stdout=True, verbose=False):
         execution_strategy.BaseExecStrategy.__init__(
-            self, strategy_name="elasticsearch_restart",
-            strategy_description="Restart ElasticSearch process.",
+            self, strategy_name="elasticsearch_status",
+            strategy_description="Get the status of the ElasticSearch process.",
             functions=(
-                process.stop,
-                process.start,
+                process.status,
             ),
             arguments=(
-                # process.stop
+                # process.status
+                {
+                    "stdout": bool(stdout),
+                    "verbose": bool(verbose),
+                    "pretty_print_status": True
+                },
+            ),
+            return_formats=(
+                'text',
+            )
+        )
+
+
+class ElasticsearchIndicesStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to view or apply the index templates and lifecycle policies
+    """
+
+    def __init__(self, action='status', host=None, port=None, password='changeme',
+                 rollover_max_age=indices.DEFAULT_ROLLOVER_MAX_AGE, warm_after_days=indices.DEFAULT_WARM_AFTER_DAYS,
+                 daily_warm_after_days=indices.DEFAULT_DAILY_WARM_AFTER_DAYS,
+                 retention_days=indices.DEFAULT_RETENTION_DAYS, refresh_interval=indices.DEFAULT_REFRESH_INTERVAL,
+                 rollover=True, profile=profiles.AUTO, disk_type=profiles.AUTO, tiering=indices.TIERING_AUTO,
+                 stdout=True, verbose=False):
+        execution_strategy.BaseExecStrategy.__init__(
+            self, strategy_name="elasticsearch_indices",
+            strategy_description="View or apply the index templates and lifecycle policies.",
+            functions=(
+                indices.manage_indices,
+            ),
+            arguments=(
+                # indices.manage_indices
                 {
+                    "action": str(action),
+                    "host": host,
+                    "port": port,
+                    "password": str(password),
+                    "rollover_max_age": str(rollover_max_age),
+                    "warm_after_days": int(warm_after_days),
+                    "daily_warm_after_days": int(daily_warm_after_days),
+                    "retention_days": int(retention_days) if retention_days is not None else None,
+                    "refresh_interval": str(refresh_interval),
+                    "rollover": bool(rollover),
+                    "profile": str(profile),
+                    "disk_type": str(disk_type),
+                    "tiering": str(tiering),
                     "stdout": bool(stdout),
                     "verbose": bool(verbose)
                 },
+            ),
+            return_formats=(
+                'text',
+            )
+        )
 
-                # process.start
+
+class ElasticsearchMappingsStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to view, apply or benchmark the field mappings
+    """
+
+    def __init__(self, action='show', host=None, port=None, password='changeme', sample_path=None, sample_index=None,
+                 sample_size=10000, stdout=True, verbose=False):
+        execution_strategy.BaseExecStrategy.__init__(
+            self, strategy_name="elasticsearch_mappings",
+            strategy_description="View, apply or benchmark the field mappings.",
+            functions=(
+                mappings.manage_mappings,
+            ),
+            arguments=(
+                # mappings.manage_mappings
                 {
+                    "action": str(action),
+                    "host": host,
+                    "port": port,
+                    "password": str(password),
+                    "sample_path": sample_path,
+                    "sample_index": sample_index,
+                    "sample_size": int(sample_size),
                     "stdout": bool(stdout),
-                    "verbose": bool(verbose),
+                    "verbose": bool(verbose)
                 },
             ),
             return_formats=(
-                None,
-                None
+                'text',
             )
         )
-        if status:
-            self.add_function(process.status, {"pretty_print_status": True}, return_format="text")
 
 
-class ElasticsearchProcessStatusStrategy(execution_strategy.BaseExecStrategy):
+class ElasticsearchProfileStrategy(execution_strategy.BaseExecStrategy):
     """
-    Steps to get the status of elasticsearch
+    Steps to view or apply the single-node/cluster index profile
     """
 
-    def __init__(self, stdout=True, verbose=False):
+    def __init__(self, action='show', profile=profiles.AUTO, disk_type=profiles.AUTO, host=None, port=None,
+                 password='changeme', stdout=True, verbose=False):
         execution_strategy.BaseExecStrategy.__init__(
-            self, strategy_name="elasticsearch_status",
-            strategy_description="Get the status of the ElasticSearch process.",
+            self, strategy_name="elasticsearch_profile",
+            strategy_description="View or apply the single-node/cluster index profile.",
             functions=(
-                process.status,
+                profiles.manage_profile,
             ),
             arguments=(
-                # process.status
+                # profiles.manage_profile
                 {
+                    "action": str(action),
+                    "profile": str(profile),
+                    "disk_type": str(disk_type),
+                    "host": host,
+                    "port": port,
+                    "password": str(password),
                     "stdout": bool(stdout),
-                    "verbose": bool(verbose),
-                    "pretty_print_status": True
+                    "verbose": bool(verbose)
+                },
+            ),
+            return_formats=(
+                'text',
+            )
+        )
+
+
+class ElasticsearchClusterStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to configure, bootstrap or verify a multi-node cluster
+    """
+
+    def __init__(self, action='verify', cluster_file=None, node_name=None, configuration_directory=None, host=None,
+                 port=None, password='changeme', stdout=True, verbose=False):
+        execution_strategy.BaseExecStrategy.__init__(
+            self, strategy_name="elasticsearch_cluster",
+            strategy_description="Configure, bootstrap or verify a multi-node cluster.",
+            functions=(
+                cluster.manage_cluster,
+            ),
+            arguments=(
+                # cluster.manage_cluster
+                {
+                    "action": str(action),
+                    "cluster_file": cluster_file,
+                    "node_name": node_name,
+                    "configuration_directory": configuration_directory,
+                    "host": host,
+                    "port": port,
+                    "password": str(password),
+                    "stdout": bool(stdout),
+                    "verbose": bool(verbose)
                 },
             ),
             return_formats=(
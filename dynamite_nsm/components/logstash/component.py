@@ -46,7 +46,9 @@ class LogstashComponent(component.BaseComponent):
                 stdout=stdout,
                 verbose=verbose
             ),
-            process_status_strategy=execution_strategy.LogstashProcessStatusStrategy(stdout=stdout, verbose=verbose)
+            process_status_strategy=execution_strategy.LogstashProcessStatusStrategy(stdout=stdout, verbose=verbose),
+            autotune_strategy=execution_strategy.LogstashAutotuneStrategy(stdout=stdout, verbose=verbose),
+            queue_strategy=execution_strategy.LogstashQueueStrategy(stdout=stdout, verbose=verbose)
         )
 
 
@@ -66,7 +68,9 @@ class LogstashCommandlineComponent(component.BaseComponent):
             process_start_strategy=None,
             process_stop_strategy=None,
             process_restart_strategy=None,
-            process_status_strategy=None
+            process_status_strategy=None,
+            autotune_strategy=None,
+            queue_strategy=None
         )
         if args.action_name == "chpasswd":
             new_logstash_password = args.new_logstash_password
@@ -144,6 +148,35 @@ class LogstashCommandlineComponent(component.BaseComponent):
                                                                  verbose=args.verbose and not args.no_stdout)
             )
             self.execute_process_status_strategy()
+        elif args.action_name == "autotune":
+            self.register_autotune_strategy(
+                execution_strategy.LogstashAutotuneStrategy(
+                    calibrate=args.ls_autotune_calibrate,
+                    sample_seconds=args.ls_autotune_sample_seconds,
+                    max_gc_fraction=args.ls_autotune_max_gc_percent / 100.0,
+                    ordered=args.ls_autotune_ordered,
+                    dry_run=args.ls_autotune_dry_run,
+                    stdout=not args.no_stdout,
+                    verbose=args.verbose and not args.no_stdout
+                )
+            )
+            self.execute_autotune_strategy()
+        elif args.action_name == "queue":
+            self.register_queue_strategy(
+                execution_strategy.LogstashQueueStrategy(
+                    action=args.ls_queue_command,
+                    events_per_second=args.ls_queue_events_per_second,
+                    buffer_seconds=int(args.ls_queue_buffer_hours * 3600),
+                    event_bytes=args.ls_queue_event_bytes,
+                    disk_share=args.ls_queue_disk_percent / 100.0,
+                    pipeline_id=args.ls_queue_pipeline,
+                    enable_dead_letter_queue=not args.ls_queue_no_dlq,
+                    dry_run=args.ls_queue_dry_run,
+                    stdout=not args.no_stdout,
+                    verbose=args.verbose and not args.no_stdout
+                )
+            )
+            self.execute_queue_strategy()
 
 
 if __name__ == '__main__':
@@ -5,7 +5,7 @@ from dynamite_nsm import const
 from dynamite_nsm.logger import get_logger
 from dynamite_nsm.components.base import execution_strategy
 from dynamite_nsm.utilities import check_socket, prompt_input
-from dynamite_nsm.services.logstash import config, install, process
+from dynamite_nsm.services.logstash import autotune, config, install, process, queues
 
 
 def print_message(msg):
@@ -282,6 +282,74 @@ class LogstashProcessStatusStrategy(execution_strategy.BaseExecStrategy):
         )
 
 
+class LogstashAutotuneStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to size LogStash pipeline workers and batches
+    """
+
+    def __init__(self, calibrate=False, sample_seconds=autotune.DEFAULT_SAMPLE_SECONDS,
+                 max_gc_fraction=autotune.DEFAULT_MAX_GC_FRACTION, ordered=None, dry_run=False, stdout=True,
+                 verbose=False):
+        execution_strategy.BaseExecStrategy.__init__(
+            self, strategy_name="logstash_autotune",
+            strategy_description="Size LogStash pipeline workers and batches from the cores and JVM heap.",
+            functions=(
+                autotune.autotune_pipelines,
+            ),
+            arguments=(
+                # autotune.autotune_pipelines
+                {
+                    "calibrate": bool(calibrate),
+                    "sample_seconds": int(sample_seconds),
+                    "max_gc_fraction": float(max_gc_fraction),
+                    "ordered": ordered,
+                    "dry_run": bool(dry_run),
+                    "stdout": bool(stdout),
+                    "verbose": bool(verbose)
+                },
+            ),
+            return_formats=(
+                'text',
+            )
+        )
+
+
+class LogstashQueueStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to inspect or size LogStash persisted queues, and replay or drain dead-letter queues
+    """
+
+    def __init__(self, action='status', events_per_second=queues.DEFAULT_EVENTS_PER_SECOND,
+                 buffer_seconds=queues.DEFAULT_BUFFER_SECONDS, event_bytes=queues.DEFAULT_EVENT_BYTES,
+                 disk_share=queues.DEFAULT_DISK_SHARE, pipeline_id=None, enable_dead_letter_queue=True,
+                 dry_run=False, stdout=True, verbose=False):
+        execution_strategy.BaseExecStrategy.__init__(
+            self, strategy_name="logstash_queue",
+            strategy_description="Inspect or size LogStash persisted queues, and replay or drain dead letters.",
+            functions=(
+                queues.manage_queues,
+            ),
+            arguments=(
+                # queues.manage_queues
+                {
+                    "action": str(action),
+                    "events_per_second": int(events_per_second),
+                    "buffer_seconds": int(buffer_seconds),
+                    "event_bytes": int(event_bytes),
+                    "disk_share": float(disk_share),
+                    "pipeline_id": pipeline_id,
+                    "enable_dead_letter_queue": bool(enable_dead_letter_queue),
+                    "dry_run": bool(dry_run),
+                    "stdout": bool(stdout),
+                    "verbose": bool(verbose)
+                },
+            ),
+            return_formats=(
+                'text',
+            )
+        )
+
+
 # Test Functions
 
 
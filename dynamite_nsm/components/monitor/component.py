@@ -14,6 +14,8 @@ class MonitorComponent(component.BaseComponent):
                  elasticsearch_host="localhost", elasticsearch_port=9200, elasticsearch_password='changeme',
                  logstash_heap_size_gigs=4, elasticsearch_heap_size_gigs=4, install_jdk=True, prompt_on_uninstall=True,
                  stdout=True, verbose=False):
+        self.monitor_tune_strategy = execution_strategy.MonitorTuneStrategy(stdout=stdout, verbose=verbose)
+
         component.BaseComponent.__init__(
             self,
             component_name="Monitor",
@@ -65,6 +67,8 @@ class MonitorCommandlineComponent(component.BaseComponent):
     """
 
     def __init__(self, args):
+        self.monitor_tune_strategy = None
+
         component.BaseComponent.__init__(
             self,
             component_name="Monitor",
@@ -76,7 +80,8 @@ class MonitorCommandlineComponent(component.BaseComponent):
             process_start_strategy=None,
             process_stop_strategy=None,
             process_restart_strategy=None,
-            process_status_strategy=None
+            process_status_strategy=None,
+            monitor_tune_strategy=None
         )
         if args.action_name == "chpasswd":
             old_monitor_password = args.old_monitor_password
@@ -160,6 +165,15 @@ class MonitorCommandlineComponent(component.BaseComponent):
                 )
             )
             self.execute_process_status_strategy()
+        elif args.action_name == "tune":
+            self.register_monitor_tune_strategy(
+                execution_strategy.MonitorTuneStrategy(
+                    action=args.tune_action,
+                    stdout=not args.no_stdout,
+                    verbose=args.verbose and not args.no_stdout
+                )
+            )
+            self.execute_monitor_tune_strategy()
 
 
 if __name__ == '__main__':
@@ -3,9 +3,12 @@ import sys
 import logging
 
 from dynamite_nsm import const
+from dynamite_nsm import tuning
 from dynamite_nsm import utilities
 from dynamite_nsm.logger import get_logger
+from dynamite_nsm.components.base import status
 from dynamite_nsm.components.base import execution_strategy
+from dynamite_nsm.services.base import install as base_install
 from dynamite_nsm.services.kibana import config as kb_config
 from dynamite_nsm.services.kibana import install as kb_install
 from dynamite_nsm.services.kibana import process as kb_process
@@ -73,21 +76,15 @@ def prompt_monitor_uninstall(prompt_user=True, stdout=True):
             exit(0)
 
 
-def get_monitor_status(stdout=True, verbose=False, pretty_print_status=True):
+def get_monitor_status(stdout=True, verbose=False, pretty_print_status=True, timeout=status.DEFAULT_PROBE_TIMEOUT):
+    status_collector = status.StatusCollector(timeout=timeout, pretty_print_status=pretty_print_status)
+    probe_args = {'stdout': stdout, 'verbose': verbose, 'pretty_print_status': pretty_print_status}
+    status_collector.add_probe('elasticsearch', es_process.status, probe_args)
+    status_collector.add_probe('logstash', ls_process.status, probe_args)
+    status_collector.add_probe('kibana', kb_process.status, probe_args)
     if pretty_print_status:
-        tables = "\n"
-        tables += es_process.status(stdout=stdout, verbose=verbose, pretty_print_status=pretty_print_status) + '\n\n'
-        tables += ls_process.status(stdout=stdout, verbose=verbose, pretty_print_status=pretty_print_status) + '\n\n'
-        tables += kb_process.status(stdout=stdout, verbose=verbose, pretty_print_status=pretty_print_status)
-        return tables
-
-    return (
-        dict(
-            elasticsearch=es_process.status(stdout=stdout, verbose=verbose),
-            logstash=ls_process.status(stdout=stdout, verbose=verbose),
-            kibana=kb_process.status(stdout=stdout, verbose=verbose)
-        )
-    )
+        return status_collector.collect_tables()
+    return dict(status_collector.collect())
 
 
 class MonitorChangePasswordStrategy(execution_strategy.BaseExecStrategy):
@@ -158,7 +155,29 @@ class MonitorInstallStrategy(execution_strategy.BaseExecStrategy):
 
         self.add_function(func=remove_kibana_tar_archive, argument_dict={}, return_format=None)
 
-        if not es_profile.ProcessProfiler().is_installed():
+        # Stream all three archives concurrently (extracting them as they download, while teeing them into the
+        # artifact cache); the installers below find them already extracted, so the LogStash and Kibana downloads
+        # overlap with the ElasticSearch installation, and each tarball is only read once.
+        cleanup_step = self.step_names[-1]
+        install_elasticsearch = not es_profile.ProcessProfiler().is_installed()
+        install_logstash = not ls_profile.ProcessProfiler().is_installed()
+        install_kibana = not kb_profile.ProcessProfiler().is_installed()
+        downloads = []
+        if install_elasticsearch:
+            downloads.append(('download_elasticsearch', const.ELASTICSEARCH_MIRRORS, const.ELASTICSEARCH_ARCHIVE_NAME))
+        if install_logstash:
+            downloads.append(('download_logstash', const.LOGSTASH_MIRRORS, const.LOGSTASH_ARCHIVE_NAME))
+        if install_kibana:
+            downloads.append(('download_kibana', const.KIBANA_MIRRORS, const.KIBANA_ARCHIVE_NAME))
+        for step_name, mirror_path, archive_name in downloads:
+            self.add_function(func=base_install.BaseInstallManager.download_and_extract_from_mirror, argument_dict={
+                'mirror_path': mirror_path,
+                'fname': archive_name,
+                'stdout': False,
+                'verbose': bool(verbose)
+            }, return_format=None, name=step_name, depends_on=(cleanup_step,))
+
+        if install_elasticsearch:
             self.add_function(func=es_install.install_elasticsearch, argument_dict={
                 "configuration_directory": "/etc/dynamite/elasticsearch/",
                 "install_directory": "/opt/dynamite/elasticsearch/",
@@ -169,19 +188,19 @@ class MonitorInstallStrategy(execution_strategy.BaseExecStrategy):
                 "create_dynamite_user": True,
                 "stdout": bool(stdout),
                 "verbose": bool(verbose)
-            }, return_format=None)
+            }, return_format=None, depends_on=(cleanup_step, 'download_elasticsearch'))
         else:
             self.add_function(func=log_message, argument_dict={
                 "msg": 'Skipping ElasticSearch installation; already installed.',
                 'stdout': bool(stdout),
                 'verbose': bool(verbose)
-            }, return_format=None)
+            }, return_format=None, depends_on=(cleanup_step,))
 
         self.add_function(func=es_process.start, argument_dict={
             "stdout": False
         }, return_format=None)
 
-        if not ls_profile.ProcessProfiler().is_installed():
+        if install_logstash:
             self.add_function(func=ls_install.install_logstash, argument_dict={
                 "configuration_directory": "/etc/dynamite/logstash/",
                 "install_directory": "/opt/dynamite/logstash/",
@@ -195,7 +214,7 @@ class MonitorInstallStrategy(execution_strategy.BaseExecStrategy):
                 "create_dynamite_user": False,
                 "stdout": bool(stdout),
                 "verbose": bool(verbose)
-            }, return_format=None)
+            }, return_format=None, depends_on=(self.step_names[-1], 'download_logstash'))
         else:
             self.add_function(func=log_message, argument_dict={
                 "msg": 'Skipping LogStash installation; already installed.',
@@ -203,7 +222,7 @@ class MonitorInstallStrategy(execution_strategy.BaseExecStrategy):
                 'verbose': bool(verbose)
             }, return_format=None)
 
-        if not kb_profile.ProcessProfiler().is_installed():
+        if install_kibana:
             self.add_function(func=kb_install.install_kibana, argument_dict={
                 "configuration_directory": "/etc/dynamite/kibana/",
                 "install_directory": "/opt/dynamite/kibana/",
@@ -216,7 +235,7 @@ class MonitorInstallStrategy(execution_strategy.BaseExecStrategy):
                 "create_dynamite_user": True,
                 "stdout": bool(stdout),
                 "verbose": bool(verbose)
-            }, return_format=None)
+            }, return_format=None, depends_on=(self.step_names[-1], 'download_kibana'))
         else:
             self.add_function(func=log_message, argument_dict={
                 "msg": 'Skipping Kibana installation; already installed.',
@@ -490,6 +509,37 @@ class MonitorProcessStatusStrategy(execution_strategy.BaseExecStrategy):
         )
 
 
+class MonitorTuneStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to show, diff, apply or revert the monitor kernel tuning profile
+    """
+
+    def __init__(self, action='show', stdout=True, verbose=False):
+        execution_strategy.BaseExecStrategy.__init__(
+            self, strategy_name="monitor_tune",
+            strategy_description="Tune the kernel for log and flow ingest.",
+            functions=(
+                utilities.create_dynamite_environment_file,
+                tuning.tune,
+            ),
+            arguments=(
+                # utilities.create_dynamite_environment_file
+                {},
+                # tuning.tune
+                {
+                    'profile': 'monitor',
+                    'action': str(action),
+                    'stdout': bool(stdout),
+                    'verbose': bool(verbose)
+                },
+            ),
+            return_formats=(
+                None,
+                'text'
+            )
+        )
+
+
 # Test Functions
 
 def run_install_strategy():
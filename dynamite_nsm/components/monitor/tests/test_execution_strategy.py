@@ -0,0 +1,64 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+from dynamite_nsm import const
+from dynamite_nsm.services.base import install as base_install
+from dynamite_nsm.components.monitor import execution_strategy
+
+
+def create_dummy_archive(archive_path, directory_name):
+    with tarfile.open(archive_path, mode='w:gz') as tf:
+        member = tarfile.TarInfo('{}/bin/run'.format(directory_name))
+        tf.addfile(member, io.BytesIO(b''))
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.install_cache = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.install_cache)
+
+    def create_install_strategy(self):
+        not_installed = mock.Mock(**{'return_value.is_installed.return_value': False})
+        with mock.patch.object(execution_strategy.es_profile, 'ProcessProfiler', not_installed), \
+                mock.patch.object(execution_strategy.ls_profile, 'ProcessProfiler', not_installed), \
+                mock.patch.object(execution_strategy.kb_profile, 'ProcessProfiler', not_installed):
+            return execution_strategy.MonitorInstallStrategy(
+                '0.0.0.0', '0.0.0.0', 5601, 'localhost', 9200, 'changeme', 4, 4, False, stdout=False, verbose=False)
+
+    def test_install_streams_archives(self):
+        strategy = self.create_install_strategy()
+
+        for step_name in ('download_elasticsearch', 'download_logstash', 'download_kibana'):
+            func = strategy.functions[strategy.step_names.index(step_name)]
+            assert(func == base_install.BaseInstallManager.download_and_extract_from_mirror)
+
+    def test_installer_skips_extraction_of_streamed_archive(self):
+        archive_path = os.path.join(self.install_cache, const.ELASTICSEARCH_ARCHIVE_NAME)
+        create_dummy_archive(archive_path, const.ELASTICSEARCH_DIRECTORY_NAME)
+        with mock.patch.object(const, 'INSTALL_CACHE', self.install_cache):
+            # What the download_elasticsearch step leaves behind
+            base_install.BaseInstallManager.extract_archive(archive_path)
+            with mock.patch('dynamite_nsm.download.extract_archive') as extract_archive:
+                base_install.BaseInstallManager.extract_archive(archive_path)
+
+        assert(not extract_archive.called)
+
+    def test_installer_reextracts_missing_tree(self):
+        archive_path = os.path.join(self.install_cache, const.ELASTICSEARCH_ARCHIVE_NAME)
+        create_dummy_archive(archive_path, const.ELASTICSEARCH_DIRECTORY_NAME)
+        with mock.patch.object(const, 'INSTALL_CACHE', self.install_cache):
+            base_install.BaseInstallManager.extract_archive(archive_path)
+            shutil.rmtree(os.path.join(self.install_cache, const.ELASTICSEARCH_DIRECTORY_NAME))
+
+            assert(not base_install.BaseInstallManager.is_extracted(archive_path))
+            base_install.BaseInstallManager.extract_archive(archive_path)
+
+        assert(os.path.exists(os.path.join(self.install_cache, const.ELASTICSEARCH_DIRECTORY_NAME, 'bin', 'run')))
@@ -0,0 +1,46 @@
+from dynamite_nsm.components.base import component
+from dynamite_nsm.components.status import execution_strategy
+
+
+class StatusComponent(component.BaseComponent):
+    """
+    Status Component Wrapper intended for general use
+    """
+
+    def __init__(self, verbose=False, timeout=15):
+        component.BaseComponent.__init__(
+            self,
+            component_name="Status",
+            component_description="Get the status of every Dynamite service installed on this host.",
+            process_status_strategy=execution_strategy.HostProcessStatusStrategy(
+                verbose=verbose,
+                timeout=timeout
+            )
+        )
+
+
+class StatusCommandlineComponent(component.BaseComponent):
+    """
+    Status Commandline Component intended for commandline use.
+    """
+
+    def __init__(self, args):
+        component.BaseComponent.__init__(
+            self,
+            component_name="Status",
+            component_description="Get the status of every Dynamite service installed on this host.",
+            process_status_strategy=None
+        )
+        if args.action_name == "status":
+            self.register_process_status_strategy(
+                execution_strategy.HostProcessStatusStrategy(
+                    verbose=args.verbose,
+                    timeout=args.status_timeout
+                )
+            )
+            self.execute_process_status_strategy()
+
+
+if __name__ == '__main__':
+    status_component = StatusComponent()
+    status_component.execute_process_status_strategy()
@@ -0,0 +1,99 @@
+from dynamite_nsm.components.base import status
+from dynamite_nsm.components.base import execution_strategy
+from dynamite_nsm.services.zeek import process as zeek_process
+from dynamite_nsm.services.zeek import profile as zeek_profile
+from dynamite_nsm.services.kibana import process as kb_process
+from dynamite_nsm.services.kibana import profile as kb_profile
+from dynamite_nsm.services.filebeat import process as filebeat_process
+from dynamite_nsm.services.filebeat import profile as filebeat_profile
+from dynamite_nsm.services.logstash import process as ls_process
+from dynamite_nsm.services.logstash import profile as ls_profile
+from dynamite_nsm.services.suricata import process as suricata_process
+from dynamite_nsm.services.suricata import profile as suricata_profile
+from dynamite_nsm.services.dynamited import process as dynamited_process
+from dynamite_nsm.services.dynamited import profile as dynamited_profile
+from dynamite_nsm.services.elasticsearch import process as es_process
+from dynamite_nsm.services.elasticsearch import profile as es_profile
+
+
+def get_installed_services():
+    """
+    :return: A list of (name, status function) tuples for every service installed on this host
+    """
+    services = []
+    if filebeat_profile.ProcessProfiler().is_installed():
+        services.append(('filebeat', filebeat_process.status))
+    if zeek_profile.ProcessProfiler().is_installed():
+        services.append(('zeek', zeek_process.status))
+    if suricata_profile.ProcessProfiler().is_installed():
+        services.append(('suricata', suricata_process.status))
+    if es_profile.ProcessProfiler().is_installed():
+        services.append(('elasticsearch', es_process.status))
+    if ls_profile.ProcessProfiler().is_installed():
+        services.append(('logstash', ls_process.status))
+    if kb_profile.ProcessProfiler().is_installed():
+        services.append(('kibana', kb_process.status))
+    if dynamited_profile.ProcessProfiler().is_installed():
+        services.append(('dynamited', dynamited_process.status))
+    return services
+
+
+def get_host_status(verbose=False, pretty_print_status=True, timeout=status.DEFAULT_PROBE_TIMEOUT):
+    """
+    Get the status of every agent, monitor and daemon service installed on this host; services are probed concurrently
+
+    :param verbose: Include detailed systemd output
+    :param pretty_print_status: If True, return a printable string of tables
+    :param timeout: The maximum number of seconds to wait on any single service
+    :return: The status of each installed service
+    """
+    status_collector = status.StatusCollector(timeout=timeout, pretty_print_status=pretty_print_status)
+    for name, status_func in get_installed_services():
+        status_collector.add_probe(name, status_func, {'verbose': verbose, 'pretty_print_status': pretty_print_status})
+    if not status_collector.probes:
+        if pretty_print_status:
+            return 'No Dynamite services are installed on this host.'
+        return {}
+    if pretty_print_status:
+        return status_collector.collect_tables()
+    return dict(status_collector.collect())
+
+
+class HostProcessStatusStrategy(execution_strategy.BaseExecStrategy):
+    """
+    Steps to get the status of every installed service
+    """
+
+    def __init__(self, verbose, timeout=status.DEFAULT_PROBE_TIMEOUT):
+        execution_strategy.BaseExecStrategy.__init__(
+            self, strategy_name="host_status",
+            strategy_description="Get the status of all Dynamite services installed on this host.",
+            functions=(
+                get_host_status,
+            ),
+            arguments=(
+                # get_host_status
+                {
+                    'verbose': bool(verbose),
+                    'pretty_print_status': True,
+                    'timeout': int(timeout)
+                },
+            ),
+            return_formats=(
+                'text',
+            )
+        )
+
+
+# Test Functions
+
+def run_process_status_strategy():
+    host_status_strategy = HostProcessStatusStrategy(
+        verbose=False
+    )
+    host_status_strategy.execute_strategy()
+
+
+if __name__ == '__main__':
+    run_process_status_strategy()
+    pass
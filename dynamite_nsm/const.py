@@ -16,6 +16,9 @@ INSTALL_PATH = "/opt/dynamite"
 CONFIG_PATH = "/etc/dynamite"
 LOG_PATH = '/var/log/dynamite/'
 INSTALL_CACHE = "/tmp/dynamite/install_cache/"
+ARTIFACT_CACHE = "/var/cache/dynamite/artifacts/"
+BUILD_CACHE = "/var/cache/dynamite/build/"
+CCACHE_DIRECTORY = "/var/cache/dynamite/ccache/"
 
 
 def bootstrap_constants_from_const_environment_file():
@@ -35,6 +38,8 @@ def bootstrap_constants_from_const_environment_file():
 extracted_constants = bootstrap_constants_from_const_environment_file()
 
 VERSION = extracted_constants.get('VERSION', '0.7.2')
+ARTIFACT_CACHE_MAX_SIZE_MB = int(extracted_constants.get('ARTIFACT_CACHE_MAX_SIZE_MB', 4096))
+BUILD_MEMORY_PER_JOB_MB = int(extracted_constants.get('BUILD_MEMORY_PER_JOB_MB', 1536))
 DYNAMITE_SDK_ARCHIVE_NAME = extracted_constants.get('DYNAMITE_SDK_ARCHIVE_NAME', 'dynamite-sdk-lite-0.1.2.tar.gz')
 ELASTIFLOW_ARCHIVE_NAME = extracted_constants.get('ELASTIFLOW_ARCHIVE_NAME', 'elastiflow-vlabs-0.5.3-3.5.0.tar.gz')
 ELASTICSEARCH_ARCHIVE_NAME = extracted_constants.get('ELASTICSEARCH_ARCHIVE_NAME', 'elasticsearch-7.2.0.tar.gz')
@@ -0,0 +1,505 @@
+import os
+import time
+import shutil
+import socket
+import hashlib
+import logging
+import tarfile
+import tempfile
+import threading
+from datetime import datetime
+
+try:
+    from urllib2 import urlopen
+    from urllib2 import URLError
+    from urllib2 import HTTPError
+    from urllib2 import Request
+except Exception:
+    from urllib.request import urlopen
+    from urllib.error import URLError
+    from urllib.error import HTTPError
+    from urllib.request import Request
+
+try:
+    from httplib import HTTPException
+except ImportError:
+    from http.client import HTTPException
+
+import progressbar
+
+from dynamite_nsm import const
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm import exceptions as general_exceptions
+
+CHUNK_SIZE = 64 * 1024
+PROBE_BYTES = 256 * 1024
+PROBE_TIMEOUT = 10
+READ_TIMEOUT = 30
+SEGMENT_THRESHOLD = 64 * 1024 * 1024
+MAX_SEGMENTS = 4
+
+
+class MirrorEntry:
+    """
+    A single line of a mirror file; either "<url>" or "<url> <sha256>"
+    """
+
+    def __init__(self, url, sha256=None):
+        self.url = url
+        self.sha256 = sha256.lower() if sha256 else None
+        self.throughput = None
+        self.size = None
+        self.accepts_ranges = False
+
+    def __repr__(self):
+        return 'MirrorEntry({})'.format(self.url)
+
+
+def parse_mirror_file(mirror_path):
+    """
+    :param mirror_path: The path to a mirror file (E.G /etc/dynamite/mirrors/elasticsearch)
+    :return: A list of MirrorEntry objects, in the order they are listed
+    """
+    entries = []
+    with open(mirror_path) as mirror_f:
+        for line in mirror_f.readlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split()
+            sha256 = None
+            if len(parts) > 1:
+                sha256 = parts[1]
+                if sha256.lower().startswith('sha256:'):
+                    sha256 = sha256[len('sha256:'):]
+            entries.append(MirrorEntry(parts[0], sha256))
+    return entries
+
+
+def _open_range(url, start=None, end=None, timeout=READ_TIMEOUT):
+    request = Request(url)
+    if start is not None:
+        request.add_header('Range', 'bytes={}-{}'.format(start, '' if end is None else end))
+    return urlopen(request, timeout=timeout)
+
+
+def _parse_total_size(response):
+    content_range = response.headers.get('Content-Range')
+    if content_range and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1].strip()
+        if total.isdigit():
+            return int(total)
+    content_length = response.headers.get('Content-Length')
+    if response.getcode() == 200 and content_length and content_length.isdigit():
+        return int(content_length)
+    return None
+
+
+def probe_mirror(entry, timeout=PROBE_TIMEOUT):
+    """
+    Fetch the first few hundred KiB of a mirror's file, recording its throughput, the total file size and whether
+    ranged requests are supported
+
+    :param entry: A MirrorEntry
+    :param timeout: The number of seconds before the probe is abandoned
+    :return: The MirrorEntry, with its throughput, size and accepts_ranges attributes populated
+    """
+    start = time.time()
+    response = _open_range(entry.url, 0, PROBE_BYTES - 1, timeout=timeout)
+    try:
+        received = len(response.read(PROBE_BYTES))
+    finally:
+        response.close()
+    entry.throughput = received / max(time.time() - start, 1e-6)
+    entry.accepts_ranges = response.getcode() == 206
+    entry.size = _parse_total_size(response)
+    return entry
+
+
+def rank_mirrors(entries, timeout=PROBE_TIMEOUT, logger=None):
+    """
+    Probe every mirror concurrently
+
+    :param entries: A list of MirrorEntry objects
+    :param timeout: The number of seconds to wait on the probes
+    :param logger: An optional logger used to report unreachable mirrors
+    :return: The reachable mirrors ordered fastest first, followed by any that could not be probed
+    """
+    failed = {}
+    threads = []
+
+    def run_probe(mirror_entry):
+        try:
+            probe_mirror(mirror_entry, timeout=timeout)
+        except Exception as e:
+            failed[mirror_entry.url] = e
+
+    for entry in entries:
+        thread = threading.Thread(target=run_probe, args=(entry,))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+    deadline = time.time() + timeout
+    for thread in threads:
+        thread.join(max(0, deadline - time.time()))
+    reachable = [e for e in entries if e.throughput is not None and e.url not in failed]
+    unreachable = [e for e in entries if e not in reachable]
+    if logger:
+        for entry in unreachable:
+            logger.debug('Could not probe mirror {}; {}'.format(entry.url, failed.get(entry.url, 'timed out')))
+    return sorted(reachable, key=lambda e: e.throughput, reverse=True) + unreachable
+
+
+def _create_progressbar(filename, size):
+    widgets = [
+        '\033[92m',
+        '{} '.format(datetime.strftime(datetime.utcnow(), '%Y-%m-%d %H:%M:%S')),
+        '\033[0m',
+        '\033[0;36m'
+        'DOWNLOAD_MANAGER ',
+        '\033[0m',
+        '          | ',
+    ]
+    if size:
+        widgets += [progressbar.FileTransferSpeed(), ' ', progressbar.Bar(), ' ', '({})'.format(filename),
+                    ' ', progressbar.ETA()]
+        try:
+            return progressbar.ProgressBar(widgets=widgets, max_value=size)
+        except TypeError:
+            return progressbar.ProgressBar(widgets=widgets, maxval=size)
+    widgets += [' ', progressbar.BouncingBar(), ' ', '({})'.format(filename)]
+    try:
+        return progressbar.ProgressBar(widgets=widgets, max_value=progressbar.UnknownLength)
+    except TypeError:
+        return progressbar.ProgressBar(maxval=progressbar.UnknownLength)
+
+
+class _Progress:
+
+    def __init__(self, filename, size, stdout):
+        self.received = 0
+        self._lock = threading.Lock()
+        self._pb = None
+        if stdout:
+            try:
+                self._pb = _create_progressbar(filename, size)
+                self._pb.start()
+            except Exception:
+                # Something broke, disable the progressbar going forward
+                self._pb = None
+
+    def update(self, num_bytes):
+        with self._lock:
+            self.received += num_bytes
+            if self._pb:
+                try:
+                    self._pb.update(self.received)
+                except ValueError:
+                    pass
+
+    def finish(self):
+        if self._pb:
+            try:
+                self._pb.finish()
+            except Exception:
+                pass
+
+
+def _plan_segments(size, segments):
+    if not size:
+        return [(0, None)]
+    segment_size = -(-size // segments)
+    return [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+
+
+def _fetch_segment(url, part_path, start, end, progress):
+    """
+    Download bytes [start, end] of url into part_path, resuming from whatever part_path already holds
+    """
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if end is not None and start + offset > end:
+        progress.update(offset)
+        return
+    if offset or start or end is not None:
+        response = _open_range(url, start + offset, end)
+    else:
+        response = _open_range(url)
+    try:
+        if offset and response.getcode() != 206:
+            # The server ignored the range; start the segment over
+            if start:
+                raise general_exceptions.DownloadError("{} does not honour byte ranges.".format(url))
+            offset = 0
+        progress.update(offset)
+        with open(part_path, 'ab' if offset else 'wb') as part_f:
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                part_f.write(chunk)
+                progress.update(len(chunk))
+    finally:
+        response.close()
+
+
+def _assemble(part_paths, destination):
+    tmp_path = destination + '.tmp'
+    with open(tmp_path, 'wb') as out_f:
+        for part_path in part_paths:
+            with open(part_path, 'rb') as part_f:
+                while True:
+                    chunk = part_f.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    out_f.write(chunk)
+    return tmp_path
+
+
+def sha256_of_file(path):
+    """
+    :param path: The path to a file
+    :return: The hex encoded SHA-256 digest of the file
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _remove_parts(part_paths):
+    for part_path in part_paths:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+
+def fetch(entry, destination, segments=MAX_SEGMENTS, segment_threshold=SEGMENT_THRESHOLD, stdout=False):
+    """
+    Download a single mirror entry; partially downloaded data from a previous attempt is resumed when the mirror
+    supports ranged requests, and large files are split into parallel ranged segments
+
+    :param entry: A (probed) MirrorEntry
+    :param destination: The path to write the file to
+    :param segments: The maximum number of parallel segments
+    :param segment_threshold: The minimum file size (in bytes) before the download is split into segments
+    :param stdout: Print a progressbar to console
+    """
+    if not entry.accepts_ranges or not entry.size or entry.size < segment_threshold:
+        segments = 1
+    plan = _plan_segments(entry.size if entry.accepts_ranges else None, segments)
+    part_paths = ['{}.part{}'.format(destination, i) for i in range(len(plan))]
+    # Partial data can only be resumed if it was laid out in exactly the same segments
+    existing_parts = [path for path in ['{}.part{}'.format(destination, i) for i in range(max(MAX_SEGMENTS, segments))]
+                      if os.path.exists(path)]
+    resumable = entry.accepts_ranges and existing_parts == part_paths[:len(existing_parts)] and all(
+        [os.path.getsize(path) <= end - start + 1 for path, (start, end) in zip(part_paths, plan)
+         if end is not None and os.path.exists(path)])
+    if existing_parts and not resumable:
+        _remove_parts(existing_parts)
+    progress = _Progress(os.path.basename(destination), entry.size, stdout)
+    errors = []
+
+    def run_segment(part_path, start, end):
+        try:
+            _fetch_segment(entry.url, part_path, start, end, progress)
+        except Exception as e:
+            errors.append(e)
+
+    threads = []
+    for part_path, (start, end) in zip(part_paths, plan):
+        thread = threading.Thread(target=run_segment, args=(part_path, start, end))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    progress.finish()
+    if errors:
+        raise errors[0]
+    if entry.size and sum([os.path.getsize(p) for p in part_paths]) != entry.size:
+        raise general_exceptions.DownloadError("Incomplete download of {}.".format(entry.url))
+    tmp_path = _assemble(part_paths, destination)
+    if entry.sha256:
+        actual_sha256 = sha256_of_file(tmp_path)
+        if actual_sha256 != entry.sha256:
+            os.remove(tmp_path)
+            _remove_parts(part_paths)
+            raise general_exceptions.DownloadError(
+                "SHA-256 mismatch for {}; expected {} got {}.".format(entry.url, entry.sha256, actual_sha256))
+    os.rename(tmp_path, destination)
+    _remove_parts(part_paths)
+
+
+class _TeeReader:
+    """
+    A file-like wrapper around an HTTP response, that hashes and copies everything read through it
+    """
+
+    def __init__(self, response, tee_f, progress):
+        self.response = response
+        self.tee_f = tee_f
+        self.progress = progress
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chunk = self.response.read()
+        else:
+            chunk = self.response.read(size)
+        if chunk:
+            self.digest.update(chunk)
+            self.tee_f.write(chunk)
+            self.received += len(chunk)
+            self.progress.update(len(chunk))
+        return chunk
+
+    def drain(self):
+        """
+        Consume whatever the tar reader left unread (end-of-archive padding), so the copy and hash are complete
+        """
+        while self.read(CHUNK_SIZE):
+            pass
+
+
+def _promote(staging_directory, destination_directory):
+    """
+    Move the extracted top-level entries from the staging directory into their final location, replacing any
+    previous extraction; the previous entry is renamed aside, the new one renamed in, and only then is the old one
+    deleted, so an interrupted swap never loses the previous extraction
+
+    :return: The names of the entries moved into place
+    """
+    replaced_directory = tempfile.mkdtemp(dir=destination_directory, prefix='.replaced-')
+    names = sorted(os.listdir(staging_directory))
+    try:
+        for name in names:
+            target = os.path.join(destination_directory, name)
+            staged = os.path.join(staging_directory, name)
+            if not os.path.lexists(target):
+                os.rename(staged, target)
+                continue
+            replaced = os.path.join(replaced_directory, name)
+            os.rename(target, replaced)
+            try:
+                os.rename(staged, target)
+            except OSError:
+                os.rename(replaced, target)
+                raise
+    finally:
+        shutil.rmtree(replaced_directory, ignore_errors=True)
+    return names
+
+
+def extract_archive(archive_path, destination_directory):
+    """
+    Extract a tar archive into a staging directory, and only move it into place once extraction has completed
+
+    :param archive_path: The path to the archive
+    :param destination_directory: The directory to extract into
+    :return: The names of the top-level entries extracted
+    """
+    if not os.path.exists(destination_directory):
+        os.makedirs(destination_directory)
+    staging_directory = tempfile.mkdtemp(dir=destination_directory, prefix='.extract-')
+    try:
+        with tarfile.open(archive_path) as tf:
+            tf.extractall(path=staging_directory)
+        return _promote(staging_directory, destination_directory)
+    finally:
+        shutil.rmtree(staging_directory, ignore_errors=True)
+
+
+def stream_extract(entry, archive_path, destination_directory, stdout=False):
+    """
+    Extract an archive while it downloads, by feeding the HTTP response straight through tarfile's stream mode
+
+    The raw archive is written to archive_path and hashed as it passes through. Extraction happens in a staging
+    directory that is only moved into place once the download is complete and (if the mirror lists one) the SHA-256
+    matches; archive_path is likewise only written once everything checks out.
+
+    :param entry: A (probed) MirrorEntry
+    :param archive_path: The path to store the downloaded archive at
+    :param destination_directory: The directory to extract into
+    :param stdout: Print a progressbar to console
+    :return: A tuple containing the SHA-256 of the downloaded archive, and the names of the top-level entries extracted
+    """
+    if not os.path.exists(destination_directory):
+        os.makedirs(destination_directory)
+    staging_directory = tempfile.mkdtemp(dir=destination_directory, prefix='.extract-')
+    tmp_archive_path = archive_path + '.stream'
+    progress = _Progress(os.path.basename(archive_path), entry.size, stdout)
+    response = _open_range(entry.url)
+    try:
+        with open(tmp_archive_path, 'wb') as tee_f:
+            reader = _TeeReader(response, tee_f, progress)
+            with tarfile.open(fileobj=reader, mode='r|*') as tf:
+                tf.extractall(path=staging_directory)
+            reader.drain()
+        progress.finish()
+        if entry.size and reader.received != entry.size:
+            raise general_exceptions.DownloadError("Incomplete download of {}; received {} of {} bytes.".format(
+                entry.url, reader.received, entry.size))
+        sha256 = reader.digest.hexdigest()
+        if entry.sha256 and sha256 != entry.sha256:
+            raise general_exceptions.DownloadError(
+                "SHA-256 mismatch for {}; expected {} got {}.".format(entry.url, entry.sha256, sha256))
+        names = _promote(staging_directory, destination_directory)
+        os.rename(tmp_archive_path, archive_path)
+        return sha256, names
+    finally:
+        response.close()
+        shutil.rmtree(staging_directory, ignore_errors=True)
+        if os.path.exists(tmp_archive_path):
+            os.remove(tmp_archive_path)
+
+
+def download_from_mirrors(entries, filename, directory=const.INSTALL_CACHE, stdout=False, verbose=False):
+    """
+    Download a file from the fastest responding mirror, falling back to the others in order of speed
+
+    :param entries: A list of MirrorEntry objects
+    :param filename: The name of the file to store
+    :param directory: The directory to store the file in
+    :param stdout: Print output to console
+    :param verbose: Include detailed debug messages
+    :return: The path to the downloaded file
+    """
+    log_level = logging.INFO
+    if verbose:
+        log_level = logging.DEBUG
+    logger = get_logger('DOWNLOAD_MANAGER', level=log_level, stdout=stdout)
+
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    destination = os.path.join(directory, filename)
+    ranked = rank_mirrors(entries, logger=logger)
+    for entry in ranked:
+        logger.info("Downloading {} from {}".format(filename, entry.url))
+        try:
+            if entry.throughput is None:
+                probe_mirror(entry)
+            fetch(entry, destination, stdout=stdout)
+            return destination
+        # A connection dropped mid-response surfaces as HTTPException (IncompleteRead) on some Python versions
+        except (URLError, HTTPError, HTTPException, socket.error, socket.timeout, IOError,
+                general_exceptions.DownloadError) as e:
+            logger.warning("Failed to download {} from {}; {}".format(filename, entry.url, e))
+    raise general_exceptions.DownloadError(
+        "General error while attempting to download {} from all mirrors.".format(filename))
+
+
+def download_from_mirror_file(mirror_path, filename, directory=const.INSTALL_CACHE, stdout=False, verbose=False):
+    """
+    :param mirror_path: The path to a mirror file (E.G /etc/dynamite/mirrors/elasticsearch)
+    :param filename: The name of the file to store
+    :param directory: The directory to store the file in
+    :param stdout: Print output to console
+    :param verbose: Include detailed debug messages
+    :return: The path to the downloaded file
+    """
+    return download_from_mirrors(parse_mirror_file(mirror_path), filename, directory=directory, stdout=stdout,
+                                 verbose=verbose)
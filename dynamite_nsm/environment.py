@@ -0,0 +1,154 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from dynamite_nsm import const
+
+
+class EnvironmentStore:
+    """
+    In-process view of the /etc/dynamite/environment file.
+
+    The file is parsed once, and only re-parsed when its mtime, inode or size changes. Updates are written atomically
+    (to a temporary file that then replaces the original) while holding a lock, so concurrent writers within the same
+    process can not interleave.
+    """
+
+    def __init__(self, env_path):
+        """
+        :param env_path: The path to the environment file (E.G /etc/dynamite/environment)
+        """
+        self.env_path = env_path
+        self._variables = OrderedDict()
+        self._signature = None
+        self._lock = threading.RLock()
+
+    def _stat_signature(self):
+        st = os.stat(self.env_path)
+        return st.st_ino, st.st_mtime, st.st_size
+
+    @staticmethod
+    def parse(lines):
+        """
+        Parse KEY=VALUE lines; blank lines, comments and lines without a '=' are ignored
+
+        :param lines: An iterable of lines
+        :return: An OrderedDict of variables
+        """
+        variables = OrderedDict()
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+                value = value[1:-1]
+            variables[key.strip()] = value
+        return variables
+
+    def _load(self):
+        """
+        Re-parse the environment file if it has changed since it was last read
+
+        :raises IOError: if the file does not exist
+        """
+        with self._lock:
+            signature = self._stat_signature()
+            if signature != self._signature:
+                with open(self.env_path) as env_f:
+                    self._variables = self.parse(env_f.readlines())
+                self._signature = signature
+
+    def _write(self, variables):
+        env_directory = os.path.dirname(self.env_path)
+        if not os.path.exists(env_directory):
+            os.makedirs(env_directory)
+        fd, tmp_path = tempfile.mkstemp(dir=env_directory, prefix='.environment.')
+        try:
+            with os.fdopen(fd, 'w') as tmp_f:
+                for key, value in variables.items():
+                    tmp_f.write('{}={}\n'.format(key, value))
+                tmp_f.flush()
+                os.fsync(tmp_f.fileno())
+            os.chmod(tmp_path, 0o700)
+            os.rename(tmp_path, self.env_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._variables = variables
+        self._signature = self._stat_signature()
+
+    def as_dict(self):
+        """
+        :return: A copy of all the variables in the environment file
+        """
+        with self._lock:
+            self._load()
+            return dict(self._variables)
+
+    def get(self, key, default=None):
+        """
+        :param key: The name of the variable (E.G ES_HOME)
+        :param default: The value to return if the variable is not set
+        :return: The value of the variable
+        """
+        with self._lock:
+            self._load()
+            return self._variables.get(key, default)
+
+    def update(self, variables):
+        """
+        Add or overwrite several variables with a single atomic write
+
+        :param variables: A dictionary of variable names and values
+        """
+        with self._lock:
+            try:
+                self._load()
+                new_variables = OrderedDict(self._variables)
+            except (IOError, OSError):
+                new_variables = OrderedDict()
+            for key, value in variables.items():
+                new_variables[key] = value
+            self._write(new_variables)
+
+    def remove(self, *keys):
+        """
+        Remove one or more variables with a single atomic write
+
+        :param keys: The names of the variables to remove
+        """
+        with self._lock:
+            self._load()
+            new_variables = OrderedDict([(k, v) for k, v in self._variables.items() if k not in keys])
+            if new_variables != self._variables:
+                self._write(new_variables)
+
+    def export_string(self):
+        """
+        :return: The variables as a giant shell export string
+        """
+        export_str = ''
+        for key, value in self.as_dict().items():
+            export_str += 'export {}=\'{}\' && '.format(key, value)
+        return export_str
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_environment_store(env_path=None):
+    """
+    :param env_path: The path to the environment file; defaults to /etc/dynamite/environment
+    :return: The EnvironmentStore shared by everything in this process for the given path
+    """
+    if not env_path:
+        env_path = os.path.join(const.CONFIG_PATH, 'environment')
+    with _stores_lock:
+        if env_path not in _stores:
+            _stores[env_path] = EnvironmentStore(env_path)
+        return _stores[env_path]
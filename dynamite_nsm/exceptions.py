@@ -114,6 +114,18 @@ class ResetPasswordError(Exception):
         super(ResetPasswordError, self).__init__(msg)
 
 
+class TuningError(Exception):
+    """
+    Thrown when kernel or network interface tuning fails
+    """
+    def __init__(self, message):
+        """
+        :param message: A more specific error message
+        """
+        msg = "An error occurred while attempting to tune the host: {}".format(message)
+        super(TuningError, self).__init__(msg)
+
+
 class UninstallError(Exception):
     """
     Thrown when a component fails to uninstall
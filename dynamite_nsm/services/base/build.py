@@ -0,0 +1,224 @@
+import os
+import json
+import shutil
+import subprocess
+
+import psutil
+
+from dynamite_nsm import const
+from dynamite_nsm import utilities
+
+CONFIGURE_STAMP = '.dynamite-configure'
+SOURCE_MANIFEST = '.dynamite-sources'
+CCACHE_MASQUERADE_DIRECTORIES = ('/usr/lib/ccache', '/usr/lib64/ccache', '/usr/local/lib/ccache')
+
+
+def get_parallel_jobs(memory_per_job_mb=const.BUILD_MEMORY_PER_JOB_MB):
+    """
+    Determine how many compilation jobs to run at once; one per CPU core, capped by the amount of available memory so
+    that large C++ translation units do not push the host into swap (or the OOM killer)
+
+    :param memory_per_job_mb: The amount of memory a single compiler process is expected to need
+    :return: The number of jobs to pass to make -j
+    """
+    available_mb = psutil.virtual_memory().available // (1024 ** 2)
+    return max(1, min(utilities.get_cpu_core_count(), available_mb // max(1, memory_per_job_mb)))
+
+
+def find_ccache():
+    """
+    :return: The path to the ccache binary, or None if ccache is not installed
+    """
+    for directory in os.environ.get('PATH', '').split(os.pathsep) + ['/usr/bin', '/usr/local/bin']:
+        path = os.path.join(directory, 'ccache')
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+def get_build_environment(use_ccache=True):
+    """
+    Build the environment compilers are run in; when ccache is installed compilations are routed through it (via its
+    compiler masquerade directory for autotools projects, and the compiler launcher variables for CMake projects)
+
+    :param use_ccache: If True, use ccache when it is available
+    :return: A dictionary of environment variables
+    """
+    env = dict(os.environ)
+    ccache = find_ccache() if use_ccache else None
+    if not ccache:
+        return env
+    utilities.makedirs(const.CCACHE_DIRECTORY, exist_ok=True)
+    env['CCACHE_DIR'] = const.CCACHE_DIRECTORY
+    env['CMAKE_C_COMPILER_LAUNCHER'] = ccache
+    env['CMAKE_CXX_COMPILER_LAUNCHER'] = ccache
+    for masquerade_directory in CCACHE_MASQUERADE_DIRECTORIES:
+        if os.path.isdir(masquerade_directory):
+            env['PATH'] = masquerade_directory + os.pathsep + env.get('PATH', '')
+            break
+    return env
+
+
+def _read_source_manifest(build_directory):
+    try:
+        with open(os.path.join(build_directory, SOURCE_MANIFEST)) as manifest_f:
+            return json.load(manifest_f)
+    except (IOError, ValueError):
+        return {}
+
+
+def _write_source_manifest(build_directory, manifest):
+    manifest_path = os.path.join(build_directory, SOURCE_MANIFEST)
+    with open(manifest_path + '.tmp', 'w') as manifest_f:
+        json.dump(manifest, manifest_f)
+    os.rename(manifest_path + '.tmp', manifest_path)
+
+
+def _sync_source_tree(source_directory, build_directory):
+    """
+    Copy the files that are new or have changed (by size or mtime, against the manifest of the last sync) from the
+    source directory into the build directory, leaving the build artifacts already in there untouched
+
+    Changed files are given the current time as their mtime rather than the archive's, so that make sees them as
+    newer than the objects built from their previous version.
+
+    :return: The number of files that were copied
+    """
+    manifest = _read_source_manifest(build_directory)
+    synced = {}
+    copied = 0
+    for root, dirs, files in os.walk(source_directory):
+        target_root = os.path.join(build_directory, os.path.relpath(root, source_directory))
+        utilities.makedirs(target_root, exist_ok=True)
+        for name in files:
+            source_path = os.path.join(root, name)
+            target_path = os.path.join(target_root, name)
+            if os.path.islink(source_path):
+                if os.path.lexists(target_path):
+                    if os.path.islink(target_path) and os.readlink(target_path) == os.readlink(source_path):
+                        continue
+                    os.remove(target_path)
+                os.symlink(os.readlink(source_path), target_path)
+                copied += 1
+                continue
+            relative_path = os.path.relpath(source_path, source_directory)
+            source_st = os.stat(source_path)
+            synced[relative_path] = [source_st.st_size, int(source_st.st_mtime)]
+            if os.path.exists(target_path):
+                if manifest.get(relative_path) == synced[relative_path]:
+                    continue
+                # Trees synced before the manifest existed carry the sources' own timestamps
+                target_st = os.stat(target_path)
+                if relative_path not in manifest and target_st.st_size == source_st.st_size and \
+                        int(target_st.st_mtime) == int(source_st.st_mtime):
+                    continue
+            shutil.copy(source_path, target_path)
+            copied += 1
+    _write_source_manifest(build_directory, synced)
+    return copied
+
+
+def get_build_tree_path(component, source_name):
+    """
+    :param component: The name of the component being built (E.G zeek)
+    :param source_name: The name of the extracted source directory (E.G zeek-3.0.3)
+    :return: The path to the persistent build tree
+    """
+    return os.path.join(const.BUILD_CACHE, component, source_name)
+
+
+def prepare_build_tree(component, source_directory, prune=True):
+    """
+    Mirror a freshly extracted source tree into a persistent build tree (E.G /var/cache/dynamite/build/zeek/zeek-3.0.3)
+
+    Unchanged sources keep their timestamps and changed ones are stamped with the current time, so configuring and
+    compiling in the persistent tree only rebuilds what is out of date.
+
+    :param component: The name of the component being built (E.G zeek)
+    :param source_directory: The path to the extracted sources
+    :param prune: If True, remove the build trees of other versions of this component
+    :return: The path to the build tree
+    """
+    component_directory = os.path.join(const.BUILD_CACHE, component)
+    build_directory = get_build_tree_path(component, os.path.basename(os.path.normpath(source_directory)))
+    utilities.makedirs(build_directory, exist_ok=True)
+    if prune:
+        for name in os.listdir(component_directory):
+            if name != os.path.basename(build_directory):
+                shutil.rmtree(os.path.join(component_directory, name), ignore_errors=True)
+    if _sync_source_tree(source_directory, build_directory):
+        # Sources changed; do not trust the previous configuration
+        stamp_path = os.path.join(build_directory, CONFIGURE_STAMP)
+        if os.path.exists(stamp_path):
+            os.remove(stamp_path)
+    return build_directory
+
+
+def run_build_command(command, build_directory, env=None, verbose=False, expected_lines=None):
+    """
+    Run a build command, either streaming its output to the console, or replacing it with a progressbar
+
+    :param command: The shell command to run (E.G make -j8)
+    :param build_directory: The directory to run the command in
+    :param env: The environment to run the command in
+    :param verbose: If True, stream the output of the command to the console
+    :param expected_lines: The number of lines of output to expect (used to size the progressbar)
+    :return: The exit code of the command
+    """
+    if verbose:
+        process = subprocess.Popen(command, shell=True, cwd=build_directory, env=env)
+        process.communicate()
+        return process.returncode
+    process = subprocess.Popen(command, shell=True, cwd=build_directory, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    if expected_lines:
+        return utilities.run_subprocess_with_status(process, expected_lines=expected_lines)
+    process.communicate()
+    return process.returncode
+
+
+def configure(build_directory, configure_command, env=None, verbose=False):
+    """
+    Run a configure script, unless the build tree was already configured with the exact same command and its sources
+    have not changed since
+
+    :param build_directory: The path to the build tree
+    :param configure_command: The configure command (E.G ./configure --prefix=/opt/dynamite/zeek)
+    :param env: The environment to run the command in
+    :param verbose: If True, stream the output of the command to the console
+    :return: The exit code of the configure script (0 if it was skipped)
+    """
+    stamp_path = os.path.join(build_directory, CONFIGURE_STAMP)
+    try:
+        with open(stamp_path) as stamp_f:
+            if stamp_f.read() == configure_command:
+                return 0
+    except IOError:
+        pass
+    return_code = run_build_command(configure_command, build_directory, env=env, verbose=verbose)
+    if return_code == 0:
+        with open(stamp_path, 'w') as stamp_f:
+            stamp_f.write(configure_command)
+    return return_code
+
+
+def make(build_directory, targets=('install',), jobs=None, env=None, verbose=False, expected_lines=None):
+    """
+    Compile with make -jN, then run each of the given targets (E.G install)
+
+    :param build_directory: The path to the build tree
+    :param targets: The make targets to run once the build has completed
+    :param jobs: The number of parallel jobs; defaults to get_parallel_jobs()
+    :param env: The environment to run the command in; defaults to get_build_environment()
+    :param verbose: If True, stream the output of the command to the console
+    :param expected_lines: The number of lines of output to expect (used to size the progressbar)
+    :return: The exit code of the first failing make invocation (or 0)
+    """
+    if not jobs:
+        jobs = get_parallel_jobs()
+    if env is None:
+        env = get_build_environment()
+    command = 'make -j{}'.format(jobs)
+    for target in targets:
+        command += ' && make {}'.format(target)
+    return run_build_command(command, build_directory, env=env, verbose=verbose, expected_lines=expected_lines)
@@ -1,8 +1,11 @@
+import os
+import json
+import shutil
 import logging
-import tarfile
 
 from dynamite_nsm import const
-from dynamite_nsm import utilities
+from dynamite_nsm import artifact_cache
+from dynamite_nsm import download
 from dynamite_nsm.logger import get_logger
 from dynamite_nsm import exceptions as general_exceptions
 
@@ -16,35 +19,150 @@ class BaseInstallManager:
         self.logger = get_logger(str(name).upper(), level=log_level, stdout=stdout)
 
     @staticmethod
-    def download_from_mirror(mirror_path, fname, stdout=False, verbose=False):
+    def _get_logger(stdout, verbose):
         log_level = logging.INFO
         if verbose:
             log_level = logging.DEBUG
-        logger = get_logger('BASESVC', level=log_level, stdout=stdout)
+        return get_logger('BASESVC', level=log_level, stdout=stdout)
+
+    @staticmethod
+    def _read_mirrors(mirror_path):
+        try:
+            return download.parse_mirror_file(mirror_path)
+        except IOError as e:
+            raise general_exceptions.DownloadError(
+                "General error while attempting to read mirrors from {}; {}".format(mirror_path, e))
+
+    @staticmethod
+    def _fetch_from_cache(cache, mirrors, fname, logger):
+        archive_path = os.path.join(const.INSTALL_CACHE, fname)
+        checksums = [mirror.sha256 for mirror in mirrors if mirror.sha256]
+        try:
+            if cache.fetch(fname, archive_path, sha256=checksums[0] if checksums else None):
+                logger.info("Using cached copy of {}".format(fname))
+                return True
+        except (IOError, OSError) as e:
+            logger.warning("Could not read {} from the artifact cache; {}".format(fname, e))
+        return False
+
+    @staticmethod
+    def _add_to_cache(cache, fname, logger, sha256=None):
+        try:
+            cache.store(fname, os.path.join(const.INSTALL_CACHE, fname), sha256=sha256)
+        except (IOError, OSError) as e:
+            logger.warning("Could not add {} to the artifact cache; {}".format(fname, e))
+
+    @staticmethod
+    def _stream_extract_into_cache(cache, mirror, fname, logger, stdout=False):
+        # The archive is teed straight into the artifact cache while it is extracted, then linked into the
+        # install_cache; it is never written twice
+        archive_path = os.path.join(const.INSTALL_CACHE, fname)
+        try:
+            incoming_path = cache.incoming_path()
+        except (IOError, OSError) as e:
+            logger.warning("Could not add {} to the artifact cache; {}".format(fname, e))
+            _, names = download.stream_extract(mirror, archive_path, const.INSTALL_CACHE, stdout=stdout)
+            BaseInstallManager._mark_extracted(archive_path, names)
+            return
+        try:
+            sha256, names = download.stream_extract(mirror, incoming_path, const.INSTALL_CACHE, stdout=stdout)
+            try:
+                cache.store(fname, incoming_path, sha256=sha256, move=True)
+                cache.fetch(fname, archive_path, sha256=sha256)
+            except (IOError, OSError) as e:
+                logger.warning("Could not add {} to the artifact cache; {}".format(fname, e))
+                shutil.move(incoming_path, archive_path)
+        finally:
+            if os.path.exists(incoming_path):
+                os.remove(incoming_path)
+        BaseInstallManager._mark_extracted(archive_path, names)
+
+    @staticmethod
+    def _get_extraction_stamp_path(archive_path):
+        directory, fname = os.path.split(archive_path)
+        return os.path.join(directory, '.{}.extracted'.format(fname))
+
+    @staticmethod
+    def _mark_extracted(archive_path, names):
+        archive_stat = os.stat(archive_path)
+        with open(BaseInstallManager._get_extraction_stamp_path(archive_path), 'w') as stamp_f:
+            json.dump({'size': archive_stat.st_size, 'mtime': archive_stat.st_mtime, 'names': names}, stamp_f)
+
+    @staticmethod
+    def is_extracted(archive_path):
+        """
+        :param archive_path: The path to an archive in the install_cache
+        :return: True, if this exact archive has already been extracted to the install_cache (E.G by a
+                 download_and_extract_from_mirror step that ran ahead of the installer), and its entries still exist
+        """
+        try:
+            with open(BaseInstallManager._get_extraction_stamp_path(archive_path)) as stamp_f:
+                stamp = json.load(stamp_f)
+            archive_stat = os.stat(archive_path)
+        except (IOError, OSError, ValueError):
+            return False
+        return stamp.get('size') == archive_stat.st_size and stamp.get('mtime') == archive_stat.st_mtime and all(
+            [os.path.exists(os.path.join(const.INSTALL_CACHE, name)) for name in stamp.get('names', [])])
+
+    @staticmethod
+    def download_from_mirror(mirror_path, fname, stdout=False, verbose=False):
+        """
+        Download an archive from the fastest of the mirrors listed in mirror_path, resuming any partial download and
+        verifying the SHA-256 checksum when the mirror file lists one
+
+        :param mirror_path: The path to the mirror list (E.G /etc/dynamite/mirrors/elasticsearch)
+        :param fname: The name of the file to store in the install_cache
+        :param stdout: Print output to console
+        :param verbose: Include detailed debug messages
+        """
+        logger = BaseInstallManager._get_logger(stdout, verbose)
+        mirrors = BaseInstallManager._read_mirrors(mirror_path)
+        cache = artifact_cache.ArtifactCache()
+        if BaseInstallManager._fetch_from_cache(cache, mirrors, fname, logger):
+            return
+        download.download_from_mirrors(mirrors, fname, stdout=stdout, verbose=verbose)
+        BaseInstallManager._add_to_cache(cache, fname, logger)
+
+    @staticmethod
+    def download_and_extract_from_mirror(mirror_path, fname, stdout=False, verbose=False):
+        """
+        Download an archive and extract it to the install_cache in a single pass; the archive is extracted as it
+        downloads, while a copy is written into the artifact cache (and linked into the install_cache). Falls back to
+        a regular download followed by an extraction if no mirror could be streamed from.
 
-        with open(mirror_path) as mirror_f:
-            res, err = None, None
-            for url in mirror_f.readlines():
-                logger.info("Downloading {} from {}".format(fname,  url))
+        :param mirror_path: The path to the mirror list (E.G /etc/dynamite/mirrors/elasticsearch)
+        :param fname: The name of the file to store in the install_cache
+        :param stdout: Print output to console
+        :param verbose: Include detailed debug messages
+        """
+        logger = BaseInstallManager._get_logger(stdout, verbose)
+        mirrors = BaseInstallManager._read_mirrors(mirror_path)
+        cache = artifact_cache.ArtifactCache()
+        archive_path = os.path.join(const.INSTALL_CACHE, fname)
+        if not BaseInstallManager._fetch_from_cache(cache, mirrors, fname, logger):
+            for mirror in download.rank_mirrors(mirrors, logger=logger):
+                logger.info("Downloading and extracting {} from {}".format(fname, mirror.url))
                 try:
-                    res = utilities.download_file(url, fname, stdout=stdout)
+                    BaseInstallManager._stream_extract_into_cache(cache, mirror, fname, logger, stdout=stdout)
                 except Exception as e:
-                    res, err = False, e
-                    logger.warning("Failed to download {} from {}; {}".format(fname, url, e))
-                if res:
-                    break
-            if not res:
-                raise general_exceptions.DownloadError(
-                    "General error while attempting to download {} from all mirrors ;".format(fname))
+                    logger.warning("Failed to stream {} from {}; {}".format(fname, mirror.url, e))
+                    continue
+                return
+            logger.info("Falling back to downloading {} before extracting it.".format(fname))
+            download.download_from_mirrors(mirrors, fname, stdout=stdout, verbose=verbose)
+            BaseInstallManager._add_to_cache(cache, fname, logger)
+        BaseInstallManager.extract_archive(archive_path)
 
     @staticmethod
     def extract_archive(archive_path):
+        if BaseInstallManager.is_extracted(archive_path):
+            return
         try:
-            tf = tarfile.open(archive_path)
-            tf.extractall(path=const.INSTALL_CACHE)
+            names = download.extract_archive(archive_path, const.INSTALL_CACHE)
         except IOError as e:
             raise general_exceptions.ArchiveExtractionError(
                 "Could not extract {} archive to {}; {}".format(archive_path, const.INSTALL_CACHE, e))
         except Exception as e:
             raise general_exceptions.ArchiveExtractionError(
-                "General error while attempting to extract {}} archive; {}".format(archive_path, e))
+                "General error while attempting to extract {} archive; {}".format(archive_path, e))
+        BaseInstallManager._mark_extracted(archive_path, names)
@@ -24,7 +24,7 @@ class BaseProcessManager:
         self.stdout = stdout
         self.verbose = verbose
         self.pretty_print_status = pretty_print_status
-        self.sysctl = systemctl.SystemCtl()
+        self.sysctl = systemctl.SystemCtl(roles=('agent', 'monitor'))
         if pid_file:
             self.pid = self._get_pid(pid_file)
 
@@ -56,21 +56,34 @@ class BaseProcessManager:
         self.logger.info('Attempting to stop {}'.format(self.systemd_service))
         return self.sysctl.stop(self.systemd_service)
 
-    def status(self):
-        if self.pid_file:
-            self.pid = self._get_pid(self.pid_file)
-        systemd_info = self.sysctl.status(self.systemd_service)
+    def get_systemd_info(self):
+        """
+        The running state comes from the unit state table shared by every service; systemctl status is only forked
+        for verbose output
+
+        :return: A tuple containing whether the service is running, and a dictionary describing its systemd state
+        """
+        state = self.sysctl.get_state(self.systemd_service)
         info_dict = {
-            'command': systemd_info.cmd,
-            'exit_code': systemd_info.exit,
+            'active_state': state['ActiveState'],
+            'load_state': state['LoadState']
         }
         if self.verbose:
+            systemd_info = self.sysctl.status(self.systemd_service)
             info_dict.update({
+                'command': systemd_info.cmd,
+                'exit_code': systemd_info.exit,
                 'stdout': utilities.wrap_text(systemd_info.out),
                 'stderr': utilities.wrap_text(systemd_info.err)
             })
+        return state['ActiveState'] == 'active', info_dict
+
+    def status(self):
+        if self.pid_file:
+            self.pid = self._get_pid(self.pid_file)
+        running, info_dict = self.get_systemd_info()
         status = {
-            'running': systemd_info.exit == 0
+            'running': running
         }
         if self.pid:
             status.update({'pid': self.pid})
@@ -100,6 +113,10 @@ class BaseProcessManager:
                 status_tbl.append([
                     'Logs', status['logs']
                 ])
+            if status['info'].get('active_state'):
+                status_tbl.append([
+                    'State', status['info'].get('active_state')
+                ])
             if status['info'].get('command'):
                 status_tbl.append([
                     'Command', status['info'].get('command')
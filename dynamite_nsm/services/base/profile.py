@@ -1,4 +1,75 @@
 import os
+import threading
+
+from dynamite_nsm import utilities
+
+_cache_lock = threading.Lock()
+_directory_snapshots = {}
+_config_cache = {}
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def list_directory(directory):
+    """
+    Snapshot the entries of a directory; the snapshot is reused until the directory's mtime changes
+
+    :param directory: The path to the directory
+    :return: A frozenset of the names in that directory (empty if it does not exist)
+    """
+    signature = _file_signature(directory)
+    if signature is None:
+        return frozenset()
+    with _cache_lock:
+        cached = _directory_snapshots.get(directory)
+        if cached and cached[0] == signature:
+            return cached[1]
+    try:
+        names = frozenset(os.listdir(directory))
+    except OSError:
+        return frozenset()
+    with _cache_lock:
+        _directory_snapshots[directory] = (signature, names)
+    return names
+
+
+def get_cached_config(config_class, configuration_directory, dependent_files):
+    """
+    Retrieve a parsed ConfigManager, only re-parsing when one of the files it was parsed from has changed
+
+    The returned object is shared, and must be treated as read-only; callers that intend to modify and write a
+    configuration should instantiate their own ConfigManager.
+
+    :param config_class: The ConfigManager class (E.G elasticsearch.config.ConfigManager)
+    :param configuration_directory: The configuration directory passed to the ConfigManager
+    :param dependent_files: The paths of all the files the ConfigManager parses
+    :return: An instance of config_class
+    """
+    key = (config_class, configuration_directory)
+    signature = tuple([_file_signature(path) for path in dependent_files])
+    with _cache_lock:
+        cached = _config_cache.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+    config_obj = config_class(configuration_directory=configuration_directory)
+    with _cache_lock:
+        _config_cache[key] = (signature, config_obj)
+    return config_obj
+
+
+def clear_caches():
+    """
+    Drop all directory snapshots and parsed configurations
+    """
+    with _cache_lock:
+        _directory_snapshots.clear()
+        _config_cache.clear()
 
 
 class BaseProcessProfiler:
@@ -10,29 +81,57 @@ class BaseProcessProfiler:
         self.install_archive_path = install_archive_path
         self.required_install_files = required_install_files
         self.required_config_files = required_config_files
+        self._listener = None
 
-    def is_configured(self):
-        if not self.config_directory:
+    @staticmethod
+    def _contains_all(directory, required_files):
+        if not directory:
             return False
-        if not os.path.exists(self.config_directory):
+        if not os.path.exists(directory):
             return False
-        for config_file in self.required_config_files:
-            if config_file not in os.listdir(self.config_directory):
-                return False
-        return True
+        return set(required_files).issubset(list_directory(directory))
+
+    def get_listener(self):
+        """
+        Resolve the address the service listens on; override in services that expose a network API
+
+        :return: A (host, port) tuple, or None if it can not be determined
+        """
+        return None
+
+    def is_configured(self):
+        return self._contains_all(self.config_directory, self.required_config_files)
 
     def is_downloaded(self):
         return os.path.exists(self.install_archive_path)
 
     def is_installed(self):
-        if not self.install_directory:
-            return False
-        if not os.path.exists(self.install_directory):
-            return False
-        for install_file in self.required_install_files:
-            if install_file not in os.listdir(self.install_directory):
-                return False
-        return True
+        return self._contains_all(self.install_directory, self.required_install_files)
 
+    def is_listening(self):
+        """
+        Re-resolve the listening address from the (cached) configuration, and check whether the service is accepting
+        connections on it
 
+        :return: True, if the service is listening
+        """
+        self._listener = self.get_listener()
+        if not self._listener:
+            return False
+        host, port = self._listener
+        return utilities.check_socket(host, port)
 
+    def probe(self, timeout=None):
+        """
+        A cheaper alternative to is_listening intended for polling loops; the listening address is resolved once and
+        reused on subsequent calls
+
+        :param timeout: The maximum number of seconds to wait on the connection attempt
+        :return: True, if the service is listening
+        """
+        if not self._listener:
+            self._listener = self.get_listener()
+        if not self._listener:
+            return False
+        host, port = self._listener
+        return utilities.check_socket(host, port, timeout=timeout)
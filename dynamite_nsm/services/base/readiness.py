@@ -0,0 +1,173 @@
+import json
+import time
+import base64
+import socket
+
+try:
+    from urllib2 import urlopen
+    from urllib2 import URLError
+    from urllib2 import HTTPError
+    from urllib2 import Request
+except Exception:
+    from urllib.request import urlopen
+    from urllib.error import URLError
+    from urllib.error import HTTPError
+    from urllib.request import Request
+
+DEFAULT_READY_TIMEOUT = 300
+INITIAL_POLL_INTERVAL = 0.5
+MAX_POLL_INTERVAL = 10
+REQUEST_TIMEOUT = 10
+
+
+def wait_for(check, timeout=DEFAULT_READY_TIMEOUT, initial_interval=INITIAL_POLL_INTERVAL,
+             max_interval=MAX_POLL_INTERVAL, logger=None, description='service'):
+    """
+    Poll a readiness check with capped exponential backoff, returning as soon as it succeeds
+
+    :param check: A function that takes no arguments and returns True once the service is ready
+    :param timeout: The maximum number of seconds to wait
+    :param initial_interval: The number of seconds to wait after the first failed check
+    :param max_interval: The maximum number of seconds to wait between checks
+    :param logger: An optional logger used to report progress
+    :param description: A name for what is being waited on (E.G ElasticSearch API)
+    :return: True, if the check succeeded before the timeout expired
+    """
+    deadline = time.time() + timeout
+    interval = initial_interval
+    attempt = 1
+    while True:
+        try:
+            if check():
+                if logger:
+                    logger.info('{} is ready.'.format(description))
+                return True
+        except Exception as e:
+            if logger:
+                logger.debug('{} readiness check raised an error; {}'.format(description, e))
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            if logger:
+                logger.debug('{} was not ready after {} attempts.'.format(description, attempt))
+            return False
+        if logger:
+            logger.info('Waiting for {} to become ready.'.format(description))
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
+        attempt += 1
+
+
+def _basic_auth_header(username, password):
+    encoded_bytes = '{}:{}'.format(username, password).encode('utf-8')
+    return 'Basic {}'.format(base64.b64encode(encoded_bytes).decode('utf-8'))
+
+
+def http_get(url, username=None, password=None, timeout=REQUEST_TIMEOUT):
+    """
+    Perform a GET request, without raising on HTTP error codes
+
+    :param url: The URL to request
+    :param username: An optional username for basic authentication
+    :param password: An optional password for basic authentication
+    :param timeout: The number of seconds before the request is abandoned
+    :return: A tuple of (HTTP status code, response body); (None, None) if the service could not be reached
+    """
+    return http_request('GET', url, username=username, password=password, timeout=timeout)
+
+
+def http_request(method, url, data=None, username=None, password=None, timeout=REQUEST_TIMEOUT):
+    """
+    Perform a request, without raising on HTTP error codes
+
+    :param method: The HTTP method (E.G PUT)
+    :param url: The URL to request
+    :param data: An optional object, sent as a JSON body; a string is sent as is (E.G a _bulk body, as NDJSON)
+    :param username: An optional username for basic authentication
+    :param password: An optional password for basic authentication
+    :param timeout: The number of seconds before the request is abandoned
+    :return: A tuple of (HTTP status code, response body); (None, None) if the service could not be reached
+    """
+    body = None
+    headers = {'kbn-xsrf': 'true'}
+    if isinstance(data, str):
+        body = data.encode('utf-8')
+        headers['Content-Type'] = 'application/x-ndjson'
+    elif data is not None:
+        body = json.dumps(data).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+    request = Request(url, data=body, headers=headers)
+    request.get_method = lambda: method
+    if username:
+        request.add_header('Authorization', _basic_auth_header(username, password))
+    try:
+        response = urlopen(request, timeout=timeout)
+        return response.getcode(), response.read().decode('utf-8')
+    except HTTPError as e:
+        return e.code, e.read().decode('utf-8', 'ignore')
+    except (URLError, socket.error, socket.timeout):
+        return None, None
+
+
+def elasticsearch_is_ready(host, port, username=None, password=None, wait_for_status='yellow'):
+    """
+    Check whether ElasticSearch has reached the given cluster health; an "authentication required" response only proves
+    that the HTTP layer is up, so it is not accepted. Before the builtin user passwords have been bootstrapped,
+    authenticate as elastic with the bootstrap.password held in the ElasticSearch keystore
+
+    :param host: The ElasticSearch host
+    :param port: The ElasticSearch HTTP port
+    :param username: The user to authenticate as (E.G elastic)
+    :param password: The password of that user
+    :param wait_for_status: The minimum cluster health (green or yellow)
+    :return: True, if ElasticSearch is ready
+    """
+    code, body = http_get('http://{}:{}/_cluster/health?wait_for_status={}&timeout={}s'.format(
+        host, port, wait_for_status, REQUEST_TIMEOUT // 2), username=username, password=password)
+    if code == 200:
+        return json.loads(body).get('status') in ('green', wait_for_status)
+    return False
+
+
+def elasticsearch_master_elected(host, port, username=None, password=None):
+    """
+    Check whether the node knows of an elected master; without one, ElasticSearch answers every cluster-level request
+    with a 503 (master_not_discovered_exception). Security is checked first, so the request must be authenticated;
+    an "authentication required" response says nothing about the master. Read-only, so it is safe to poll
+
+    :param host: The ElasticSearch host
+    :param port: The ElasticSearch HTTP port
+    :param username: The user to authenticate as (E.G elastic)
+    :param password: The password of that user
+    :return: True, if a master has been elected
+    """
+    code, _ = http_get('http://{}:{}/_cluster/health?timeout={}s'.format(host, port, REQUEST_TIMEOUT // 2),
+                       username=username, password=password)
+    return code == 200
+
+
+def kibana_is_ready(host, port, username=None, password=None):
+    """
+    Check whether Kibana has finished booting; Kibana answers with a 503 until it is ready to serve requests
+
+    :param host: The Kibana host
+    :param port: The Kibana port
+    :param username: The user to authenticate as (E.G elastic)
+    :param password: The password of that user
+    :return: True, if Kibana is ready
+    """
+    code, body = http_get('http://{}:{}/api/status'.format(host, port), username=username, password=password)
+    if code == 200:
+        return json.loads(body).get('status', {}).get('overall', {}).get('state') != 'red'
+    return code in (401, 403)
+
+
+def logstash_is_ready(host='localhost', port=9600):
+    """
+    Check whether the LogStash node API is responding
+
+    :param host: The LogStash API host
+    :param port: The LogStash API port
+    :return: True, if LogStash is ready
+    """
+    code, _ = http_get('http://{}:{}/_node'.format(host, port))
+    return code == 200
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from dynamite_nsm.services.base import build
+
+ARCHIVE_MTIME = 1500000000
+
+
+def create_dummy_source(source_directory, content, mtime=ARCHIVE_MTIME):
+    source_path = os.path.join(source_directory, 'src', 'main.cc')
+    if not os.path.exists(os.path.dirname(source_path)):
+        os.makedirs(os.path.dirname(source_path))
+    with open(source_path, 'w') as source_f:
+        source_f.write(content)
+    # Extracted sources carry the archive's timestamps, which are older than any object built from them
+    os.utime(source_path, (mtime, mtime))
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.source_directory = os.path.join(self.root, 'source')
+        self.build_directory = os.path.join(self.root, 'build')
+        os.makedirs(self.build_directory)
+        create_dummy_source(self.source_directory, 'int main() { return 0; }')
+        build._sync_source_tree(self.source_directory, self.build_directory)
+        self.object_path = os.path.join(self.build_directory, 'src', 'main.o')
+        with open(self.object_path, 'w') as object_f:
+            object_f.write('object')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_sync_skips_unchanged_sources(self):
+        create_dummy_source(self.source_directory, 'int main() { return 0; }')
+
+        assert(build._sync_source_tree(self.source_directory, self.build_directory) == 0)
+        assert(os.path.exists(self.object_path))
+
+    def test_sync_makes_changed_sources_newer_than_objects(self):
+        create_dummy_source(self.source_directory, 'int main() { return 1; }', mtime=ARCHIVE_MTIME + 60)
+
+        assert(build._sync_source_tree(self.source_directory, self.build_directory) == 1)
+        target_path = os.path.join(self.build_directory, 'src', 'main.cc')
+        with open(target_path) as target_f:
+            assert(target_f.read() == 'int main() { return 1; }')
+        assert(os.path.getmtime(target_path) >= os.path.getmtime(self.object_path))
+
+    def test_sync_skips_second_sync_of_changed_sources(self):
+        create_dummy_source(self.source_directory, 'int main() { return 1; }', mtime=ARCHIVE_MTIME + 60)
+        build._sync_source_tree(self.source_directory, self.build_directory)
+
+        assert(build._sync_source_tree(self.source_directory, self.build_directory) == 0)
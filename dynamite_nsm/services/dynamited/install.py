@@ -2,7 +2,6 @@ import os
 import sys
 import shutil
 import logging
-import subprocess
 
 from dynamite_nsm import const
 from dynamite_nsm import systemctl
@@ -46,7 +45,6 @@ class InstallManager(install.BaseInstallManager):
             raise dynamited_exceptions.InstallDynamiteDaemonError("Failed to extract dynamited archive")
 
     def setup_dynamited(self):
-        env_file = os.path.join(const.CONFIG_PATH, 'environment')
         self.logger.info('Creating dynamited installation, configuration, and logging directories.')
         try:
             utilities.makedirs(os.path.join(self.install_directory, 'bin'), exist_ok=True)
@@ -82,20 +80,19 @@ class InstallManager(install.BaseInstallManager):
             raise dynamited_exceptions.InstallDynamiteDaemonError("Failed to install dynamited systemd service.")
 
         try:
-            with open(env_file) as env_f:
-                env_f_text = env_f.read()
-                if 'DYNAMITED_INSTALL' not in env_f_text:
-                    self.logger.info('Updating dynamited default install path [{}]'.format(self.install_directory))
-                    subprocess.call('echo DYNAMITED_INSTALL="{}" >> {}'.format(self.install_directory, env_file),
-                                    shell=True)
-                if 'DYNAMITED_CONFIG' not in env_f_text:
-                    self.logger.info('Updating dynamited default config path [{}]'.format(self.configuration_directory))
-                    subprocess.call('echo DYNAMITED_CONFIG="{}" >> {}'.format(self.configuration_directory, env_file),
-                                    shell=True)
-                if 'DYNAMITED_LOGS' not in env_f_text:
-                    self.logger.info('Updating dynamited default log path [{}]'.format(self.log_directory))
-                    subprocess.call('echo DYNAMITED_LOGS="{}" >> {}'.format(self.log_directory, env_file),
-                                    shell=True)
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'DYNAMITED_INSTALL' not in env_dict:
+                self.logger.info('Updating dynamited default install path [{}]'.format(self.install_directory))
+                new_variables['DYNAMITED_INSTALL'] = self.install_directory
+            if 'DYNAMITED_CONFIG' not in env_dict:
+                self.logger.info('Updating dynamited default config path [{}]'.format(self.configuration_directory))
+                new_variables['DYNAMITED_CONFIG'] = self.configuration_directory
+            if 'DYNAMITED_LOGS' not in env_dict:
+                self.logger.info('Updating dynamited default log path [{}]'.format(self.log_directory))
+                new_variables['DYNAMITED_LOGS'] = self.log_directory
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except Exception as e:
             self.logger.error("General error occurred while attempting to install dynamited.")
             self.logger.debug("General error occurred while attempting to install dynamited; {}".format(e))
@@ -140,7 +137,6 @@ def uninstall_dynamited(prompt_user=True, stdout=True, verbose=False):
         log_level = logging.DEBUG
     logger = get_logger('DYNAMITED', level=log_level, stdout=stdout)
 
-    env_file = os.path.join(const.CONFIG_PATH, 'environment')
     environment_variables = utilities.get_environment_file_dict()
     dynamited_profiler = dynamited_profile.ProcessProfiler()
     if not dynamited_profiler.is_installed():
@@ -163,20 +159,7 @@ def uninstall_dynamited(prompt_user=True, stdout=True, verbose=False):
         shutil.rmtree(environment_variables['DYNAMITED_INSTALL'])
         shutil.rmtree(environment_variables['DYNAMITED_CONFIG'])
         shutil.rmtree(const.INSTALL_CACHE, ignore_errors=True)
-        env_lines = ''
-        with open(env_file) as env_fr:
-            for line in env_fr.readlines():
-                if 'DYNAMITED_LOGS' in line:
-                    continue
-                elif 'DYNAMITED_INSTALL' in line:
-                    continue
-                elif 'DYNAMITED_CONFIG' in line:
-                    continue
-                elif line.strip() == '':
-                    continue
-                env_lines += line.strip() + '\n'
-        with open(env_file, 'w') as env_fw:
-            env_fw.write(env_lines)
+        utilities.remove_from_environment_file('DYNAMITED_LOGS', 'DYNAMITED_INSTALL', 'DYNAMITED_CONFIG')
     except Exception as e:
         logger.error("General error occurred while attempting to uninstall dynamited.".format(e))
         logger.debug("General error occurred while attempting to uninstall dynamited; {}".format(e))
@@ -0,0 +1,100 @@
+import json
+
+from dynamite_nsm import utilities
+from dynamite_nsm.services.base import readiness
+from dynamite_nsm.services.elasticsearch import config as elastic_configs
+from dynamite_nsm.services.elasticsearch import exceptions as elastic_exceptions
+
+
+class ElasticsearchAPI:
+    """
+    A minimal client for the ElasticSearch REST API
+    """
+
+    def __init__(self, host=None, port=None, username='elastic', password='changeme'):
+        """
+        :param host: The ElasticSearch host; defaults to the locally installed node
+        :param port: The ElasticSearch HTTP port; defaults to the locally installed node
+        :param username: The user to authenticate as (E.G elastic)
+        :param password: The password of that user
+        """
+        if not host or not port:
+            local_host, local_port = get_local_listener()
+            host = host or local_host
+            port = port or local_port
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+
+    def request(self, method, path, data=None, ignore=(), timeout=readiness.REQUEST_TIMEOUT):
+        """
+        :param method: The HTTP method (E.G PUT)
+        :param path: The API path (E.G /_ilm/policy/dynamite-flows)
+        :param data: An optional object, sent as a JSON body; a string is sent as is (E.G a _bulk body)
+        :param ignore: HTTP error codes that should return None instead of raising (E.G (404,))
+        :param timeout: The number of seconds before the request is abandoned
+        :return: The parsed JSON response
+        """
+        code, body = readiness.http_request(method, 'http://{}:{}{}'.format(self.host, self.port, path), data=data,
+                                            username=self.username, password=self.password, timeout=timeout)
+        if code is None:
+            raise elastic_exceptions.ElasticsearchAPIError(
+                "Could not reach ElasticSearch at {}:{}.".format(self.host, self.port))
+        if code in ignore:
+            return None
+        if not 200 <= code < 300:
+            raise elastic_exceptions.ElasticsearchAPIError("{} {} returned HTTP {}; {}".format(
+                method, path, code, body))
+        return json.loads(body) if body else {}
+
+    def get(self, path, ignore=()):
+        return self.request('GET', path, ignore=ignore)
+
+    def put(self, path, data=None, ignore=()):
+        return self.request('PUT', path, data=data, ignore=ignore)
+
+    def post(self, path, data=None, ignore=(), timeout=readiness.REQUEST_TIMEOUT):
+        return self.request('POST', path, data=data, ignore=ignore, timeout=timeout)
+
+    def delete(self, path, ignore=()):
+        return self.request('DELETE', path, ignore=ignore)
+
+    def get_version(self):
+        """
+        :return: A tuple of integers (E.G (7, 2, 0))
+        """
+        number = self.get('/').get('version', {}).get('number', '0.0.0')
+        return tuple([int(part) for part in number.split('-')[0].split('.')])
+
+    def get_data_node_count(self):
+        """
+        :return: The number of nodes in the cluster that hold data
+        """
+        nodes = self.get('/_cat/nodes?format=json&h=node.role')
+        return len([node for node in nodes if 'd' in node.get('node.role', '')]) or 1
+
+    def get_box_types(self):
+        """
+        :return: A dictionary mapping the name of each data node to its box_type attribute (None if it has none)
+        """
+        nodes = self.get('/_cat/nodes?format=json&h=name,node.role')
+        box_types = dict([(node['name'], None) for node in nodes if 'd' in node.get('node.role', '')])
+        for attribute in self.get('/_cat/nodeattrs?format=json&h=node,attr,value'):
+            if attribute.get('attr') == 'box_type' and attribute.get('node') in box_types:
+                box_types[attribute['node']] = attribute.get('value')
+        return box_types
+
+
+def get_local_listener():
+    """
+    :return: A tuple containing the host and HTTP port of the locally installed ElasticSearch node
+    """
+    configuration_directory = utilities.get_environment_file_dict().get('ES_PATH_CONF')
+    if not configuration_directory:
+        return 'localhost', 9200
+    es_config = elastic_configs.ConfigManager(configuration_directory)
+    host = str(es_config.network_host or 'localhost').strip()
+    if host in ('0.0.0.0', '_site_', '_local_'):
+        host = 'localhost'
+    return host, es_config.http_port or 9200
@@ -0,0 +1,350 @@
+import os
+import logging
+from collections import OrderedDict
+from yaml import load
+
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
+
+import tabulate
+
+from dynamite_nsm import utilities
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.base import readiness
+from dynamite_nsm.services.elasticsearch import api as elastic_api
+from dynamite_nsm.services.elasticsearch import config as elastic_configs
+from dynamite_nsm.services.elasticsearch import process as elastic_process
+from dynamite_nsm.services.elasticsearch import profile as elastic_profile
+from dynamite_nsm.services.elasticsearch import exceptions as elastic_exceptions
+
+ROLES = ('master', 'data', 'ingest')
+BOX_TYPES = ('hot', 'warm')
+
+DEFAULT_HTTP_PORT = 9200
+DEFAULT_TRANSPORT_PORT = 9300
+
+DEFAULT_FORMATION_TIMEOUT = 600
+
+
+def load_cluster_definition(path):
+    """
+    Read and validate a cluster definition, E.G:
+
+    cluster_name: dynamite-cluster
+    nodes:
+      - name: es-1
+        host: 10.0.0.10
+        roles: [master, data, ingest]
+        box_type: hot
+
+    :param path: Path to the cluster definition (YAML)
+    :return: A dictionary containing the cluster_name, and a list of nodes with every option filled in
+    """
+    try:
+        with open(path) as definition_f:
+            definition = load(definition_f, Loader=Loader) or {}
+    except IOError:
+        raise elastic_exceptions.InvalidClusterDefinitionError("Could not locate cluster definition at {}".format(path))
+    except Exception as e:
+        raise elastic_exceptions.InvalidClusterDefinitionError(
+            "General exception when opening/parsing cluster definition at {}; {}".format(path, e))
+    return validate_cluster_definition(definition)
+
+
+def validate_cluster_definition(definition):
+    """
+    :param definition: A dictionary containing the cluster_name, and a list of nodes
+    :return: The definition, with the defaults of each node filled in
+    """
+    nodes = definition.get('nodes') or []
+    if not nodes:
+        raise elastic_exceptions.InvalidClusterDefinitionError("The cluster does not have any nodes.")
+    normalized = []
+    listeners = set()
+    for node in nodes:
+        if not node.get('name') or not node.get('host'):
+            raise elastic_exceptions.InvalidClusterDefinitionError("Every node needs a name and a host.")
+        roles = [str(role) for role in node.get('roles', ROLES)]
+        unknown_roles = [role for role in roles if role not in ROLES]
+        if unknown_roles:
+            raise elastic_exceptions.InvalidClusterDefinitionError("{} has unknown roles: {}.".format(
+                node['name'], ', '.join(unknown_roles)))
+        box_type = node.get('box_type')
+        if box_type is not None and box_type not in BOX_TYPES:
+            raise elastic_exceptions.InvalidClusterDefinitionError("{} has an unknown box_type: {}.".format(
+                node['name'], box_type))
+        if box_type is not None and 'data' not in roles:
+            raise elastic_exceptions.InvalidClusterDefinitionError("{} has a box_type, but no data role.".format(
+                node['name']))
+        normalized_node = OrderedDict([
+            ('name', str(node['name'])),
+            ('host', str(node['host'])),
+            ('http_port', int(node.get('http_port', DEFAULT_HTTP_PORT))),
+            ('transport_port', int(node.get('transport_port', DEFAULT_TRANSPORT_PORT))),
+            ('roles', roles),
+            ('box_type', box_type)
+        ])
+        for listener in ((normalized_node['host'], normalized_node['http_port']),
+                         (normalized_node['host'], normalized_node['transport_port'])):
+            if listener in listeners:
+                raise elastic_exceptions.InvalidClusterDefinitionError(
+                    "{} reuses {}:{}; nodes on the same host need their own ports.".format(node['name'], *listener))
+            listeners.add(listener)
+        normalized.append(normalized_node)
+    names = [node['name'] for node in normalized]
+    if len(set(names)) != len(names):
+        raise elastic_exceptions.InvalidClusterDefinitionError("Node names must be unique.")
+    if not [node for node in normalized if 'master' in node['roles']]:
+        raise elastic_exceptions.InvalidClusterDefinitionError("At least one node must be master-eligible.")
+    data_nodes = [node for node in normalized if 'data' in node['roles']]
+    if [node for node in data_nodes if node['box_type']] and [node for node in data_nodes if not node['box_type']]:
+        # Tiered indices require a box_type; an untagged data node would never hold any of them
+        raise elastic_exceptions.InvalidClusterDefinitionError("Either every data node has a box_type, or none do.")
+    return OrderedDict([('cluster_name', str(definition.get('cluster_name', 'dynamite-cluster'))),
+                        ('nodes', normalized)])
+
+
+def get_node(definition, node_name):
+    """
+    :param definition: A validated cluster definition
+    :param node_name: The name of a node in the definition
+    :return: The node's definition
+    """
+    for node in definition['nodes']:
+        if node['name'] == node_name:
+            return node
+    raise elastic_exceptions.InvalidClusterDefinitionError("{} is not part of the cluster.".format(node_name))
+
+
+def get_master_nodes(definition):
+    """
+    :param definition: A validated cluster definition
+    :return: The master-eligible nodes
+    """
+    return [node for node in definition['nodes'] if 'master' in node['roles']]
+
+
+def get_bootstrap_node(definition):
+    """
+    :param definition: A validated cluster definition
+    :return: The node that bootstraps passwords and templates, once the cluster has formed (the first master)
+    """
+    return get_master_nodes(definition)[0]
+
+
+def apply_node_config(definition, node_name, configuration_directory):
+    """
+    Write the cluster settings of a node to its elasticsearch.yml; every node derives the same discovery settings
+    from the definition
+
+    :param definition: A validated cluster definition
+    :param node_name: The name of the node being configured
+    :param configuration_directory: Path to the configuration directory (E.G /etc/dynamite/elasticsearch/)
+    :return: The ConfigManager of the node
+    """
+    node = get_node(definition, node_name)
+    masters = get_master_nodes(definition)
+    es_config = elastic_configs.ConfigManager(configuration_directory)
+    es_config.cluster_name = definition['cluster_name']
+    es_config.node_name = node['name']
+    es_config.network_host = node['host']
+    es_config.http_port = node['http_port']
+    es_config.transport_port = node['transport_port']
+    es_config.seed_hosts = ['{}:{}'.format(master['host'], master['transport_port']) for master in masters]
+    # Only read when the cluster forms for the first time; every master must list the same nodes
+    es_config.initial_master_nodes = [master['name'] for master in masters]
+    es_config.node_master = 'master' in node['roles']
+    es_config.node_data = 'data' in node['roles']
+    es_config.node_ingest = 'ingest' in node['roles']
+    attributes = dict(es_config.node_attributes or {})
+    if node['box_type']:
+        attributes['box_type'] = node['box_type']
+    else:
+        attributes.pop('box_type', None)
+    es_config.node_attributes = attributes or None
+    if len([other for other in definition['nodes'] if other['host'] == node['host']]) > 1:
+        # Several nodes on one host (E.G for testing) cannot share a data or log directory
+        for token in ('path_data', 'path_logs'):
+            base_path = str(getattr(es_config, token) or '').rstrip('/')
+            if base_path and os.path.basename(base_path) != node['name']:
+                setattr(es_config, token, os.path.join(base_path, node['name']))
+                utilities.makedirs(getattr(es_config, token), exist_ok=True)
+    es_config.write_elasticsearch_config()
+    return es_config
+
+
+class ClusterManager:
+    """
+    Verify that the nodes of a cluster definition have joined, with the expected roles and attributes
+    """
+
+    def __init__(self, definition, host=None, port=None, username='elastic', password='changeme', stdout=True,
+                 verbose=False):
+        """
+        :param definition: A validated cluster definition
+        :param host: The ElasticSearch host; defaults to the locally installed node
+        :param port: The ElasticSearch HTTP port; defaults to the locally installed node
+        :param username: The user to authenticate as (E.G elastic)
+        :param password: The password of that user
+        :param stdout: Print the output to console
+        :param verbose: Include detailed debug messages
+        """
+        log_level = logging.INFO
+        if verbose:
+            log_level = logging.DEBUG
+        self.logger = get_logger('ELASTICSEARCH_CLUSTER', level=log_level, stdout=stdout)
+        self.definition = definition
+        self.api = elastic_api.ElasticsearchAPI(host, port, username=username, password=password)
+
+    def get_problems(self):
+        """
+        :return: A tuple of a list of rows describing each node, and a list of problems (empty once formed)
+        """
+        nodes = {}
+        for node in self.api.get('/_nodes/settings').get('nodes', {}).values():
+            nodes[node['name']] = node
+        master = self.api.get('/_cat/master?format=json')[0].get('node')
+        if self.api.get('/_cluster/health').get('cluster_name') != self.definition['cluster_name']:
+            return [], ['Connected to a different cluster than {}.'.format(self.definition['cluster_name'])]
+        rows, problems = [], []
+        for expected in self.definition['nodes']:
+            actual = nodes.get(expected['name'])
+            if not actual:
+                problems.append('{} has not joined.'.format(expected['name']))
+                rows.append([expected['name'], expected['host'], 'no', '', '', ''])
+                continue
+            roles = [role for role in actual.get('roles', []) if role in ROLES]
+            box_type = actual.get('attributes', {}).get('box_type')
+            if sorted(roles) != sorted(expected['roles']):
+                problems.append('{} has the roles {}, expected {}.'.format(
+                    expected['name'], ', '.join(roles), ', '.join(expected['roles'])))
+            if box_type != expected['box_type']:
+                problems.append('{} has the box_type {}, expected {}.'.format(
+                    expected['name'], box_type, expected['box_type']))
+            rows.append([expected['name'], expected['host'], 'yes', ', '.join(roles), box_type or '',
+                         'elected' if expected['name'] == master else ''])
+        for name in nodes:
+            if name not in [expected['name'] for expected in self.definition['nodes']]:
+                problems.append('{} is not part of the cluster definition.'.format(name))
+        return rows, problems
+
+    def verify(self):
+        """
+        :return: A table describing each node, followed by any problems
+        """
+        rows, problems = self.get_problems()
+        report = tabulate.tabulate(rows, headers=['Node', 'Host', 'Joined', 'Roles', 'Box Type', 'Master'],
+                                   tablefmt='fancy_grid')
+        if problems:
+            return report + '\n' + '\n'.join(['[-] {}'.format(problem) for problem in problems])
+        return report + '\n[+] The cluster has formed as defined.'
+
+    def wait_for_formation(self, timeout=DEFAULT_FORMATION_TIMEOUT):
+        """
+        :param timeout: The maximum number of seconds to wait for every node to join
+        """
+        def formed():
+            _, problems = self.get_problems()
+            for problem in problems:
+                self.logger.info(problem)
+            return not problems
+
+        if not readiness.wait_for(formed, timeout=timeout, logger=None, description='cluster formation'):
+            self.logger.error('The cluster did not form.')
+            raise elastic_exceptions.InvalidClusterDefinitionError(
+                "The cluster did not form within {}s; check that every node is installed and running.".format(timeout))
+        self.logger.info('All {} nodes have joined the cluster.'.format(len(self.definition['nodes'])))
+
+
+def bootstrap_cluster(definition, password='changeme', timeout=DEFAULT_FORMATION_TIMEOUT, stdout=True,
+                      verbose=False):
+    """
+    Once every node of a cluster is installed and running, set the passwords and install the index templates; run on
+    the first master node
+
+    :param definition: A validated cluster definition
+    :param password: The password used for authentication across all builtin users; the one this node was installed
+                     with, as it is also the keystore's bootstrap.password
+    :param timeout: The maximum number of seconds to wait for the cluster to form
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    """
+    # Imported here, as the installer applies cluster definitions
+    from dynamite_nsm.services.elasticsearch import install as elastic_install
+    from dynamite_nsm.services.elasticsearch import indices as elastic_indices
+
+    log_level = logging.INFO
+    if verbose:
+        log_level = logging.DEBUG
+    logger = get_logger('ELASTICSEARCH_CLUSTER', level=log_level, stdout=stdout)
+    env_dict = utilities.get_environment_file_dict()
+    es_config = elastic_configs.ConfigManager(env_dict.get('ES_PATH_CONF'))
+    bootstrap_node = get_bootstrap_node(definition)
+    if es_config.node_name != bootstrap_node['name']:
+        logger.error('The cluster must be bootstrapped from {}.'.format(bootstrap_node['name']))
+        raise elastic_exceptions.InvalidClusterDefinitionError(
+            "The cluster must be bootstrapped from {}, not {}.".format(bootstrap_node['name'], es_config.node_name))
+    if not elastic_profile.ProcessProfiler().is_running():
+        elastic_process.ProcessManager(stdout=stdout, verbose=verbose).start()
+    # The builtin users can only be set up once a master has been elected, which takes a quorum of the masters
+    masters = get_master_nodes(definition)
+    logger.info('Waiting for a quorum of the master nodes ({} of {}) to elect a master.'.format(
+        len(masters) // 2 + 1, len(masters)))
+    host, port = elastic_profile.ProcessProfiler().get_listener() or ('localhost', DEFAULT_HTTP_PORT)
+
+    # Until the builtin users are set up, the elastic user authenticates with the keystore's bootstrap.password
+    def master_elected():
+        return readiness.elasticsearch_master_elected(host, port, username='elastic', password=password)
+
+    if not readiness.wait_for(master_elected, timeout=timeout, logger=None, description='master election'):
+        logger.error('Failed to bootstrap passwords; no master was elected.')
+        raise elastic_exceptions.InvalidClusterDefinitionError(
+            "No master was elected within {}s; check that the master nodes are installed and running, and that the "
+            "password is the one {} was installed with.".format(timeout, bootstrap_node['name']))
+    # elasticsearch-setup-passwords only works once; it is never retried, as a second run would fail with the
+    # generated passwords already in place and hide what went wrong the first time
+    try:
+        elastic_install.bootstrap_passwords(env_dict.get('ES_HOME'), env_dict.get('ES_PATH_CONF'), password,
+                                            stdout=stdout, verbose=verbose)
+    except elastic_exceptions.InstallElasticsearchError:
+        logger.error('Failed to bootstrap passwords. If elasticsearch-setup-passwords got as far as generating '
+                     'them, reset the elastic user\'s password by hand before bootstrapping the cluster again.')
+        raise
+    ClusterManager(definition, password=password, stdout=stdout, verbose=verbose).wait_for_formation(timeout=timeout)
+    logger.info('Installing index templates and lifecycle policies.')
+    elastic_indices.IndexManager(password=password, stdout=stdout, verbose=verbose).apply()
+
+
+def manage_cluster(action='verify', cluster_file=None, node_name=None, configuration_directory=None, host=None,
+                   port=None, username='elastic', password='changeme', stdout=True, verbose=False):
+    """
+    Configure, bootstrap or verify a multi-node cluster
+
+    :param action: config, bootstrap or verify
+    :param cluster_file: Path to the cluster definition (YAML)
+    :param node_name: The node to configure (config); defaults to the local node
+    :param configuration_directory: The configuration directory to write to (config); defaults to the local node's
+    :param host: The ElasticSearch host; defaults to the locally installed node
+    :param port: The ElasticSearch HTTP port; defaults to the locally installed node
+    :param username: The user to authenticate as (E.G elastic)
+    :param password: The password of that user
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: A summary of the changes made, or a table describing the nodes
+    """
+    definition = load_cluster_definition(cluster_file)
+    if action == 'config':
+        configuration_directory = configuration_directory or utilities.get_environment_file_dict().get('ES_PATH_CONF')
+        if not node_name:
+            node_name = elastic_configs.ConfigManager(configuration_directory).node_name
+        apply_node_config(definition, node_name, configuration_directory)
+        return "Configured {} in {}.".format(node_name, configuration_directory)
+    elif action == 'bootstrap':
+        bootstrap_cluster(definition, password=password, stdout=stdout, verbose=verbose)
+        return ClusterManager(definition, password=password, stdout=stdout, verbose=verbose).verify()
+    elif action == 'verify':
+        return ClusterManager(definition, host, port, username=username, password=password, stdout=stdout,
+                              verbose=verbose).verify()
+    raise elastic_exceptions.InvalidClusterDefinitionError("{} is not a valid action.".format(action))
@@ -28,6 +28,7 @@ from dynamite_nsm import const
 from dynamite_nsm import utilities
 from dynamite_nsm.logger import get_logger
 from dynamite_nsm import exceptions as general_exceptions
+from dynamite_nsm.services.base import readiness
 from dynamite_nsm.services.elasticsearch import exceptions as elastic_exceptions
 
 
@@ -43,6 +44,11 @@ class ConfigManager:
         'initial_master_nodes': ('cluster.initial_master_nodes',),
         'network_host': ('network.host',),
         'http_port': ('http.port',),
+        'transport_port': ('transport.port',),
+        'node_master': ('node.master',),
+        'node_data': ('node.data',),
+        'node_ingest': ('node.ingest',),
+        'node_attributes': ('node.attr',),
         'path_data': ('path.data',),
         'path_logs': ('path.logs',),
         'search_max_buckets': ('search.max_buckets',),
@@ -65,6 +71,11 @@ class ConfigManager:
         self.initial_master_nodes = None
         self.network_host = None
         self.http_port = None
+        self.transport_port = None
+        self.node_master = None
+        self.node_data = None
+        self.node_ingest = None
+        self.node_attributes = None
         self.path_data = None
         self.path_logs = None
         self.search_max_buckets = None
@@ -134,14 +145,13 @@ class ConfigManager:
 
         env_path = os.path.join(const.CONFIG_PATH, 'environment')
         try:
-            with open(env_path) as env_f:
-                for line in env_f.readlines():
-                    if line.startswith('JAVA_HOME'):
-                        self.java_home = line.split('=')[1].strip()
-                    elif line.startswith('ES_PATH_CONF'):
-                        self.es_path_conf = line.split('=')[1].strip()
-                    elif line.startswith('ES_HOME'):
-                        self.es_home = line.split('=')[1].strip()
+            for key, value in utilities.get_environment_file_dict().items():
+                if key == 'JAVA_HOME':
+                    self.java_home = value
+                elif key == 'ES_PATH_CONF':
+                    self.es_path_conf = value
+                elif key == 'ES_HOME':
+                    self.es_home = value
         except IOError:
             raise general_exceptions.ReadConfigError("Could not locate environment config at {}".format(env_path))
         except Exception as e:
@@ -232,6 +242,10 @@ class ConfigManager:
             if k not in self.tokens:
                 continue
             token_path = self.tokens[k]
+            # Unset settings (E.G node roles on a single node) are left to ElasticSearch's defaults
+            if v is None and len(token_path) == 1:
+                self.config_data.pop(token_path[0], None)
+                continue
             update_dict_from_path(token_path, v)
         try:
             with open(os.path.join(self.configuration_directory, 'elasticsearch.yml'), 'w') as configyaml:
@@ -439,13 +453,14 @@ def change_elasticsearch_password(old_password, password='changeme', remote_host
                 logger.error('Could not start ElasticSearch Process. Password reset failed.')
                 raise general_exceptions.ResetPasswordError(
                     "ElasticSearch process was not able to start, check your ElasticSearch logs.")
-            while not elastic_profile.ProcessProfiler().is_listening():
-                logger.info('Waiting for ElasticSearch API to become accessible.')
-                time.sleep(5)
-
-            logger.info('ElasticSearch API is up.')
-            logger.debug('Sleeping for 5 seconds, while ElasticSearch API finishes booting.')
-            time.sleep(5)
+            es_profiler = elastic_profile.ProcessProfiler()
+            if not readiness.wait_for(lambda: es_profiler.is_ready(username='elastic', password=old_password),
+                                      logger=logger, description='ElasticSearch API'):
+                logger.error('ElasticSearch API did not become ready within {} seconds.'.format(
+                    readiness.DEFAULT_READY_TIMEOUT))
+                raise general_exceptions.ResetPasswordError(
+                    "ElasticSearch API did not become ready within {} seconds.".format(
+                        readiness.DEFAULT_READY_TIMEOUT))
         else:
             logger.error("ElasticSearch is not installed, and no remote ElasticSearch host was specified.")
             raise general_exceptions.ResetPasswordError(
@@ -74,3 +74,55 @@ class WriteElasticConfigError(exceptions.WriteConfigError):
         msg = "An error occurred when writing elasticsearch.yml configuration: {}".format(message)
         super(WriteElasticConfigError, self).__init__(msg)
 
+
+
+class ElasticsearchAPIError(Exception):
+    """
+    Thrown when the ElasticSearch API rejects a request, or cannot be reached
+    """
+
+    def __init__(self, message):
+        """
+        :param message: A more specific error message
+        """
+        msg = "An error occurred while calling the ElasticSearch API: {}".format(message)
+        super(ElasticsearchAPIError, self).__init__(msg)
+
+
+class InvalidIndexSettingError(Exception):
+    """
+    Thrown when an index template or lifecycle setting is out of range
+    """
+
+    def __init__(self, message):
+        """
+        :param message: A more specific error message
+        """
+        msg = "An invalid index setting was given: {}".format(message)
+        super(InvalidIndexSettingError, self).__init__(msg)
+
+
+class RollingRestartError(Exception):
+    """
+    Thrown when a node fails to restart or rejoin the cluster during a rolling restart
+    """
+
+    def __init__(self, message):
+        """
+        :param message: A more specific error message
+        """
+        msg = "An error occurred during the rolling restart: {}".format(message)
+        super(RollingRestartError, self).__init__(msg)
+
+
+class InvalidClusterDefinitionError(Exception):
+    """
+    Thrown when a cluster definition is invalid, or the cluster does not form as defined
+    """
+
+    def __init__(self, message):
+        """
+        :param message: A more specific error message
+        """
+        msg = "An error occurred with the cluster definition: {}".format(message)
+        super(InvalidClusterDefinitionError, self).__init__(msg)
@@ -0,0 +1,548 @@
+import json
+import logging
+from collections import OrderedDict
+
+import tabulate
+
+from dynamite_nsm import utilities
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.elasticsearch import api as elastic_api
+from dynamite_nsm.services.elasticsearch import mappings as elastic_mappings
+from dynamite_nsm.services.elasticsearch import profiles as elastic_profiles
+from dynamite_nsm.services.elasticsearch import exceptions as elastic_exceptions
+
+# The indices written by the LogStash configs; ElastiFlow also carries the Zeek connection events
+INDEX_FAMILIES = OrderedDict([
+    ('flows', dict(
+        description="ElastiFlow: NetFlow, sFlow, IPFIX and Zeek connection events.",
+        prefix='elastiflow-3.5.0'
+    )),
+    ('suricata', dict(
+        description="Synesis: Suricata alerts and protocol events.",
+        prefix='suricata-1.1.0'
+    )),
+])
+
+# Legacy templates merge by order; ours must win over the ones ElastiFlow/Synesis install through LogStash
+TEMPLATE_ORDER = 10
+ROLLOVER_TEMPLATE_ORDER = 11
+# Applies to every index (E.G Kibana's), so that a single node can reach green
+DEFAULTS_TEMPLATE_NAME = 'dynamite-defaults'
+DEFAULTS_TEMPLATE_ORDER = 0
+
+DEFAULT_REFRESH_INTERVAL = '30s'
+DEFAULT_ROLLOVER_MAX_AGE = '7d'
+DEFAULT_WARM_AFTER_DAYS = 2
+# Daily indices are picked by event timestamp, so late events (E.G from a sensor that was offline) land in older
+# indices; force-merging blocks writes, so they only become warm once late events are unlikely
+DEFAULT_DAILY_WARM_AFTER_DAYS = 7
+# Deleting data is opt-in; without a retention period the lifecycle policies have no delete phase
+DEFAULT_RETENTION_DAYS = None
+
+# Hot/warm tiering: new indices are written on the hot nodes (node.attr.box_type: hot, fast disks), and moved to the
+# warm nodes (box_type: warm, dense disks) when they enter the warm phase
+TIERING_AUTO = 'auto'
+TIERING_HOT_WARM = 'hot-warm'
+TIERING_NONE = 'none'
+TIERINGS = (TIERING_AUTO, TIERING_HOT_WARM, TIERING_NONE)
+HOT_BOX_TYPE = 'hot'
+WARM_BOX_TYPE = 'warm'
+
+# Every shard costs heap whether it holds 1MB or 50GB; rollover keeps each primary near this size
+TARGET_SHARD_SIZE_GB = 30
+MAX_PRIMARY_SHARDS = 8
+
+# forcemerge can only switch the codec from ElasticSearch 7.7; before that best_compression is set at creation
+FORCEMERGE_CODEC_MIN_VERSION = (7, 7)
+
+
+def get_policy_name(family, rollover=True):
+    """
+    :param family: A family in INDEX_FAMILIES (E.G flows)
+    :param rollover: The policy of the rollover indices if True, otherwise that of the daily indices
+    :return: The name of the lifecycle policy
+    """
+    return 'dynamite-{}'.format(family) if rollover else 'dynamite-{}-daily'.format(family)
+
+
+def get_shard_count(data_node_count):
+    """
+    :param data_node_count: The number of data nodes in the cluster
+    :return: The number of primary shards for each new index; one per data node, so indexing is spread evenly
+    """
+    return max(1, min(MAX_PRIMARY_SHARDS, data_node_count))
+
+
+def get_lifecycle_policy(shards=1, rollover=True, rollover_max_age=DEFAULT_ROLLOVER_MAX_AGE,
+                         warm_after_days=DEFAULT_WARM_AFTER_DAYS, retention_days=DEFAULT_RETENTION_DAYS,
+                         codec_on_merge=False, tiered=False):
+    """
+    :param shards: The number of primary shards of each index
+    :param rollover: Roll over on size/age (indices written through an alias); daily indices skip this action, and are
+                     not made read-only (only the write block of the force-merge applies to them)
+    :param rollover_max_age: The oldest a write index may get before it is rolled over (E.G 7d)
+    :param warm_after_days: The number of days after which indices are made read-only and force-merged to a single
+                            segment; for daily indices, pass the daily_warm_after_days of the caller
+    :param retention_days: The number of days after which indices are deleted; None keeps them until deleted by hand
+    :param codec_on_merge: Switch to best_compression while force-merging (ElasticSearch 7.7+)
+    :param tiered: Move indices to the warm nodes when they enter the warm phase
+    :return: An ILM policy
+    """
+    forcemerge = {'max_num_segments': 1}
+    if codec_on_merge:
+        forcemerge['index_codec'] = 'best_compression'
+    phases = OrderedDict()
+    if rollover:
+        phases['hot'] = {
+            'min_age': '0ms',
+            'actions': {
+                'rollover': {
+                    'max_size': '{}gb'.format(shards * TARGET_SHARD_SIZE_GB),
+                    'max_age': rollover_max_age
+                },
+                'set_priority': {'priority': 100}
+            }
+        }
+    phases['warm'] = {
+        'min_age': '{}d'.format(warm_after_days),
+        'actions': {
+            'forcemerge': forcemerge,
+            'set_priority': {'priority': 50}
+        }
+    }
+    if rollover:
+        phases['warm']['actions']['readonly'] = {}
+    if tiered:
+        # ILM allocates before it force-merges, so the merge I/O lands on the warm nodes, not the ingesting ones
+        phases['warm']['actions']['allocate'] = {'require': {'box_type': WARM_BOX_TYPE}}
+    if retention_days is not None:
+        phases['delete'] = {
+            'min_age': '{}d'.format(retention_days),
+            'actions': {'delete': {}}
+        }
+    return {'policy': {'phases': phases}}
+
+
+def get_index_templates(family, shards=1, refresh_interval=DEFAULT_REFRESH_INTERVAL, codec_on_create=True,
+                        index_settings=None, tiered=False):
+    """
+    Build the templates of an index family; daily indices (prefix-YYYY.MM.dd) and rollover indices
+    (prefix-YYYY.MM.dd-000001) share the tuned settings and mappings, but follow different lifecycle policies
+
+    :param family: A family in INDEX_FAMILIES (E.G flows)
+    :param shards: The number of primary shards of each index
+    :param refresh_interval: How often new events become searchable
+    :param codec_on_create: Create indices with best_compression (when forcemerge cannot switch codecs)
+    :param index_settings: Additional index settings (E.G those of the single-node profile)
+    :param tiered: Create indices on the hot nodes
+    :return: An OrderedDict mapping each template name to its body
+    """
+    prefix = INDEX_FAMILIES[family]['prefix']
+    settings = OrderedDict([
+        ('index.number_of_shards', shards),
+        ('index.refresh_interval', refresh_interval),
+        ('index.lifecycle.name', get_policy_name(family, rollover=False))
+    ])
+    if codec_on_create:
+        settings['index.codec'] = 'best_compression'
+    if tiered:
+        settings['index.routing.allocation.require.box_type'] = HOT_BOX_TYPE
+    settings.update(index_settings or {})
+    return OrderedDict([
+        (get_policy_name(family), {
+            'index_patterns': ['{}-*'.format(prefix)],
+            'order': TEMPLATE_ORDER,
+            'settings': settings,
+            'mappings': elastic_mappings.get_mappings()
+        }),
+        (get_policy_name(family) + '-rollover', {
+            'index_patterns': ['{}-*-00*'.format(prefix)],
+            'order': ROLLOVER_TEMPLATE_ORDER,
+            'settings': {
+                'index.lifecycle.name': get_policy_name(family),
+                'index.lifecycle.rollover_alias': prefix
+            }
+        })
+    ])
+
+
+class IndexManager:
+    """
+    Install the index templates and lifecycle policies of the Zeek, Suricata and flow indices
+    """
+
+    def __init__(self, host=None, port=None, username='elastic', password='changeme', stdout=True, verbose=False):
+        """
+        :param host: The ElasticSearch host; defaults to the locally installed node
+        :param port: The ElasticSearch HTTP port; defaults to the locally installed node
+        :param username: The user to authenticate as (E.G elastic)
+        :param password: The password of that user
+        :param stdout: Print the output to console
+        :param verbose: Include detailed debug messages
+        """
+        log_level = logging.INFO
+        if verbose:
+            log_level = logging.DEBUG
+        self.logger = get_logger('ELASTICSEARCH_INDICES', level=log_level, stdout=stdout)
+        self.api = elastic_api.ElasticsearchAPI(host, port, username=username, password=password)
+        # The data disk can only be inspected when talking to the local node
+        self.local = host is None
+
+    def resolve_profile(self, profile=elastic_profiles.AUTO, disk_type=elastic_profiles.AUTO):
+        """
+        :param profile: auto, single-node or cluster
+        :param disk_type: auto, ssd or hdd
+        :return: A tuple of the profile (single-node or cluster) and the disk type (ssd, hdd or None)
+        """
+        return (elastic_profiles.resolve_profile(profile, self.api.get_data_node_count()),
+                elastic_profiles.resolve_disk_type(disk_type, local=self.local))
+
+    def resolve_tiering(self, tiering=TIERING_AUTO):
+        """
+        :param tiering: auto, hot-warm or none; auto picks hot-warm when there are both hot and warm data nodes
+        :return: True, if indices should be tiered
+        """
+        if tiering not in TIERINGS:
+            raise elastic_exceptions.InvalidIndexSettingError(
+                "{} is not a valid tiering; use one of {}.".format(tiering, ', '.join(TIERINGS)))
+        if tiering == TIERING_NONE:
+            return False
+        box_types = set(self.api.get_box_types().values())
+        tiers_present = HOT_BOX_TYPE in box_types and WARM_BOX_TYPE in box_types
+        if tiering == TIERING_HOT_WARM and not tiers_present:
+            # Shards required on a box_type no node has would never be allocated
+            raise elastic_exceptions.InvalidIndexSettingError(
+                "hot-warm tiering requires data nodes with node.attr.box_type set to {} and to {}.".format(
+                    HOT_BOX_TYPE, WARM_BOX_TYPE))
+        return tiers_present
+
+    def get_desired_state(self, rollover_max_age=DEFAULT_ROLLOVER_MAX_AGE, warm_after_days=DEFAULT_WARM_AFTER_DAYS,
+                          daily_warm_after_days=DEFAULT_DAILY_WARM_AFTER_DAYS, retention_days=DEFAULT_RETENTION_DAYS,
+                          refresh_interval=DEFAULT_REFRESH_INTERVAL, profile=elastic_profiles.AUTO,
+                          disk_type=elastic_profiles.AUTO, tiering=TIERING_AUTO):
+        """
+        :param rollover_max_age: The oldest a write index may get before it is rolled over (E.G 7d)
+        :param warm_after_days: The number of days after which indices are force-merged to a single segment
+        :param daily_warm_after_days: The same, for daily indices; late events can no longer be written to them then
+        :param retention_days: The number of days after which indices are deleted; None keeps them
+        :param refresh_interval: How often new events become searchable
+        :param profile: auto, single-node or cluster
+        :param disk_type: auto, ssd or hdd
+        :param tiering: auto, hot-warm or none
+        :return: A tuple containing the lifecycle policies and the templates (each an OrderedDict name -> body)
+        """
+        if retention_days is not None:
+            if retention_days < 1:
+                raise elastic_exceptions.InvalidIndexSettingError("Indices must be retained for at least a day.")
+            if max(warm_after_days, daily_warm_after_days) >= retention_days:
+                raise elastic_exceptions.InvalidIndexSettingError("Indices must become warm before they are deleted.")
+        shards = get_shard_count(self.api.get_data_node_count())
+        codec_on_merge = self.api.get_version()[0:2] >= FORCEMERGE_CODEC_MIN_VERSION
+        profile, disk_type = self.resolve_profile(profile, disk_type)
+        index_settings = elastic_profiles.get_index_settings(profile, disk_type)
+        tiered = self.resolve_tiering(tiering)
+        policies, templates = OrderedDict(), OrderedDict()
+        templates[DEFAULTS_TEMPLATE_NAME] = {
+            'index_patterns': ['*'],
+            'order': DEFAULTS_TEMPLATE_ORDER,
+            'settings': {'index.number_of_replicas': index_settings['index.number_of_replicas']}
+        }
+        for family in INDEX_FAMILIES:
+            for rollover in (True, False):
+                policies[get_policy_name(family, rollover)] = get_lifecycle_policy(
+                    shards=shards, rollover=rollover, rollover_max_age=rollover_max_age,
+                    warm_after_days=warm_after_days if rollover else daily_warm_after_days,
+                    retention_days=retention_days, codec_on_merge=codec_on_merge, tiered=tiered)
+            templates.update(get_index_templates(family, shards=shards, refresh_interval=refresh_interval,
+                                                 codec_on_create=not codec_on_merge, index_settings=index_settings,
+                                                 tiered=tiered))
+        return policies, templates
+
+    def bootstrap_write_alias(self, family):
+        """
+        Create the first rollover index of a family, behind the alias LogStash writes to
+
+        :param family: A family in INDEX_FAMILIES (E.G flows)
+        :return: True, if the alias was created
+        """
+        prefix = INDEX_FAMILIES[family]['prefix']
+        if self.api.get('/_alias/{}'.format(prefix), ignore=(404,)):
+            return False
+        if self.api.get('/{}'.format(prefix), ignore=(404,)):
+            # LogStash already created a concrete index with the alias' name; it has to be removed by hand
+            self.logger.warning('{} is an index, not an alias; leaving {} on daily indices.'.format(prefix, family))
+            return False
+        # <prefix-{now/d}-000001>, URL encoded
+        self.api.put('/%3C{}-%7Bnow%2Fd%7D-000001%3E'.format(prefix), {
+            'aliases': {prefix: {'is_write_index': True}}
+        })
+        return True
+
+    def apply(self, rollover_max_age=DEFAULT_ROLLOVER_MAX_AGE, warm_after_days=DEFAULT_WARM_AFTER_DAYS,
+              daily_warm_after_days=DEFAULT_DAILY_WARM_AFTER_DAYS, retention_days=DEFAULT_RETENTION_DAYS,
+              refresh_interval=DEFAULT_REFRESH_INTERVAL, rollover=True, profile=elastic_profiles.AUTO,
+              disk_type=elastic_profiles.AUTO, tiering=TIERING_AUTO):
+        """
+        Install (or update) the lifecycle policies and templates; existing indices keep their settings
+
+        :param rollover_max_age: The oldest a write index may get before it is rolled over (E.G 7d)
+        :param warm_after_days: The number of days after which indices are force-merged to a single segment
+        :param daily_warm_after_days: The same, for daily indices; late events can no longer be written to them then
+        :param retention_days: The number of days after which indices are deleted; None keeps them
+        :param refresh_interval: How often new events become searchable
+        :param rollover: Bootstrap the rollover aliases
+        :param profile: auto, single-node or cluster
+        :param disk_type: auto, ssd or hdd
+        :param tiering: auto, hot-warm or none
+        :return: A list of the families now written through a rollover alias
+        """
+        policies, templates = self.get_desired_state(rollover_max_age=rollover_max_age,
+                                                     warm_after_days=warm_after_days,
+                                                     daily_warm_after_days=daily_warm_after_days,
+                                                     retention_days=retention_days,
+                                                     refresh_interval=refresh_interval, profile=profile,
+                                                     disk_type=disk_type, tiering=tiering)
+        for name, policy in policies.items():
+            self.logger.info('Installing lifecycle policy {}.'.format(name))
+            self.api.put('/_ilm/policy/{}'.format(name), policy)
+        if retention_days is None:
+            self.logger.info("The lifecycle policies never delete indices; to expire old data, run 'dynamite "
+                             "elasticsearch indices apply --retention-days <days>'.")
+        else:
+            self.logger.info('The lifecycle policies delete indices after {} days.'.format(retention_days))
+        self._put_templates(templates)
+        self.pin_hot_indices(self.resolve_tiering(tiering))
+        rollover_families = []
+        for family in INDEX_FAMILIES:
+            if not rollover:
+                continue
+            if self.bootstrap_write_alias(family):
+                self.logger.info('Created the rollover alias {}.'.format(INDEX_FAMILIES[family]['prefix']))
+            if self.api.get('/_alias/{}'.format(INDEX_FAMILIES[family]['prefix']), ignore=(404,)):
+                rollover_families.append(family)
+        if rollover_families and utilities.get_environment_file_dict().get('LS_PATH_CONF'):
+            # Imported here, as the LogStash service depends on this module
+            from dynamite_nsm.services.logstash import pipelines as logstash_pipelines
+            if logstash_pipelines.use_rollover_aliases(
+                    [INDEX_FAMILIES[family]['prefix'] for family in rollover_families]):
+                self.logger.info('LogStash now writes to the rollover aliases; restart LogStash to apply.')
+        return rollover_families
+
+    def _put_templates(self, templates):
+        for name, template in templates.items():
+            self.logger.info('Installing index template {}.'.format(name))
+            self.api.put('/_template/{}'.format(name), template)
+
+    def apply_templates(self, refresh_interval=DEFAULT_REFRESH_INTERVAL, profile=elastic_profiles.AUTO,
+                        disk_type=elastic_profiles.AUTO, tiering=TIERING_AUTO):
+        """
+        Install (or update) only the index templates, E.G after the field mappings have changed
+
+        :param refresh_interval: How often new events become searchable
+        :param profile: auto, single-node or cluster
+        :param disk_type: auto, ssd or hdd
+        :param tiering: auto, hot-warm or none
+        """
+        _, templates = self.get_desired_state(refresh_interval=refresh_interval, profile=profile, disk_type=disk_type,
+                                              tiering=tiering)
+        self._put_templates(templates)
+
+    def pin_hot_indices(self, tiered):
+        """
+        Require (or stop requiring) the hot nodes for the NSM indices that have not reached the warm phase yet;
+        the templates only cover indices created from now on
+
+        :param tiered: True, if hot-warm tiering is in use
+        :return: The number of indices updated
+        """
+        patterns = ','.join(['{}-*'.format(definition['prefix']) for definition in INDEX_FAMILIES.values()])
+        if tiered:
+            explained = self.api.get('/{}/_ilm/explain'.format(patterns), ignore=(404,)) or {}
+            # Daily indices have no hot phase; they wait in the new phase until they turn warm
+            indices = [name for name, state in explained.get('indices', {}).items()
+                       if state.get('phase', 'new') in ('new', 'hot')]
+        else:
+            pinned = self.api.get('/{}/_settings/index.routing.allocation.require.box_type'.format(patterns),
+                                  ignore=(404,)) or {}
+            indices = [name for name, state in pinned.items()
+                       if state['settings']['index']['routing']['allocation']['require']['box_type'] == HOT_BOX_TYPE]
+        if not indices:
+            return 0
+        if tiered:
+            self.logger.info('Moving {} hot indices to the hot nodes.'.format(len(indices)))
+        else:
+            self.logger.info('Releasing {} indices from the hot nodes.'.format(len(indices)))
+        self.api.put('/{}/_settings'.format(','.join(sorted(indices))), {
+            'index.routing.allocation.require.box_type': HOT_BOX_TYPE if tiered else None
+        })
+        return len(indices)
+
+    def apply_profile_to_indices(self, profile, disk_type, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        """
+        Update the dynamic settings of existing indices to match a profile
+
+        :param profile: single-node or cluster
+        :param disk_type: ssd, hdd or None (unknown)
+        :param refresh_interval: How often new events become searchable
+        :return: The number of NSM indices updated
+        """
+        patterns = ','.join(['{}-*'.format(definition['prefix']) for definition in INDEX_FAMILIES.values()])
+        indices = self.api.get('/_cat/indices/{}?format=json&h=index'.format(patterns), ignore=(404,)) or []
+        if indices:
+            settings = elastic_profiles.get_index_settings(profile, disk_type, reset_defaults=True)
+            settings['index.refresh_interval'] = refresh_interval
+            self.logger.info('Updating the settings of {} indices.'.format(len(indices)))
+            self.api.put('/{}/_settings'.format(patterns), settings)
+        if profile == elastic_profiles.SINGLE_NODE:
+            # Replicas of any other index (E.G .kibana) cannot be allocated either
+            self.logger.info('Removing the replicas of all other indices.')
+            self.api.put('/_all/_settings', {'index.number_of_replicas': 0})
+        return len(indices)
+
+    def rollover_write_indices(self):
+        """
+        Roll the write alias of each family over to a new index, so updated templates apply without waiting
+        for the next scheduled rollover; daily indices pick them up at midnight
+
+        :return: A list of the aliases rolled over
+        """
+        rolled_over = []
+        for definition in INDEX_FAMILIES.values():
+            prefix = definition['prefix']
+            if not self.api.get('/_alias/{}'.format(prefix), ignore=(404,)):
+                continue
+            response = self.api.post('/{}/_rollover'.format(prefix))
+            self.logger.info('Rolled {} over to {}.'.format(prefix, response.get('new_index')))
+            rolled_over.append(prefix)
+        return rolled_over
+
+    def show(self, rollover_max_age=DEFAULT_ROLLOVER_MAX_AGE, warm_after_days=DEFAULT_WARM_AFTER_DAYS,
+             daily_warm_after_days=DEFAULT_DAILY_WARM_AFTER_DAYS, retention_days=DEFAULT_RETENTION_DAYS,
+             refresh_interval=DEFAULT_REFRESH_INTERVAL, profile=elastic_profiles.AUTO, disk_type=elastic_profiles.AUTO,
+             tiering=TIERING_AUTO):
+        """
+        :return: The lifecycle policies and templates apply would install, as JSON
+        """
+        policies, templates = self.get_desired_state(rollover_max_age=rollover_max_age,
+                                                     warm_after_days=warm_after_days,
+                                                     daily_warm_after_days=daily_warm_after_days,
+                                                     retention_days=retention_days,
+                                                     refresh_interval=refresh_interval, profile=profile,
+                                                     disk_type=disk_type, tiering=tiering)
+        return json.dumps(OrderedDict([('policies', policies), ('templates', templates)]), indent=2)
+
+    def status(self):
+        """
+        :return: A table describing the indices, lifecycle policy and layout of each family
+        """
+        rows = []
+        for family, definition in INDEX_FAMILIES.items():
+            prefix = definition['prefix']
+            indices = self.api.get('/_cat/indices/{}-*?format=json&bytes=b&h=index,pri,store.size'.format(prefix),
+                                   ignore=(404,)) or []
+            policy = self.api.get('/_ilm/policy/{}'.format(get_policy_name(family)), ignore=(404,))
+            alias = self.api.get('/_alias/{}'.format(prefix), ignore=(404,))
+            rows.append([
+                family, '{}-*'.format(prefix), 'rollover' if alias else 'daily', len(indices),
+                sum([int(index.get('pri') or 0) for index in indices]),
+                '{:.1f}GB'.format(sum([int(index.get('store.size') or 0) for index in indices]) / float(1024 ** 3)),
+                'yes' if policy else 'no'
+            ])
+        return tabulate.tabulate(rows, headers=['Family', 'Indices', 'Layout', 'Count', 'Primary Shards', 'Size',
+                                                'Policy Installed'], tablefmt='fancy_grid')
+
+    def tiers(self):
+        """
+        :return: A table describing the nodes, indices, shards and disk usage of each box_type
+        """
+        box_types = self.api.get_box_types()
+        occupancy = OrderedDict()
+        for node, box_type in sorted(box_types.items(), key=lambda item: (item[1] is None, item[1], item[0])):
+            tier = occupancy.setdefault(box_type or 'none', dict(nodes=set(), indices=set(), primaries=0,
+                                                                 replicas=0, relocating=0, size=0, disk_used=0,
+                                                                 disk_total=0))
+            tier['nodes'].add(node)
+        for allocation in self.api.get('/_cat/allocation?format=json&bytes=b&h=node,disk.used,disk.total'):
+            box_type = box_types.get(allocation.get('node'), False)
+            if box_type is False:
+                # The UNASSIGNED row, and nodes without the data role
+                continue
+            tier = occupancy[box_type or 'none']
+            tier['disk_used'] += int(allocation.get('disk.used') or 0)
+            tier['disk_total'] += int(allocation.get('disk.total') or 0)
+        unassigned = 0
+        for shard in self.api.get('/_cat/shards?format=json&bytes=b&h=index,prirep,state,store,node'):
+            if not shard.get('node'):
+                unassigned += 1
+                continue
+            # Relocating shards are listed as "source -> address id target"; they count against their source
+            box_type = box_types.get(shard['node'].split(' ')[0])
+            tier = occupancy.get(box_type or 'none')
+            if tier is None:
+                continue
+            tier['indices'].add(shard['index'])
+            tier['primaries' if shard.get('prirep') == 'p' else 'replicas'] += 1
+            tier['relocating'] += 1 if shard.get('state') == 'RELOCATING' else 0
+            tier['size'] += int(shard.get('store') or 0)
+        rows = []
+        for name, tier in occupancy.items():
+            rows.append([
+                name, len(tier['nodes']), len(tier['indices']), tier['primaries'], tier['replicas'],
+                tier['relocating'], '{:.1f}GB'.format(tier['size'] / float(1024 ** 3)),
+                '{:.1f}/{:.1f}GB ({:.0%})'.format(tier['disk_used'] / float(1024 ** 3),
+                                                  tier['disk_total'] / float(1024 ** 3),
+                                                  tier['disk_used'] / float(max(1, tier['disk_total'])))
+            ])
+        table = tabulate.tabulate(rows, headers=['Tier', 'Nodes', 'Indices', 'Primary Shards', 'Replica Shards',
+                                                 'Relocating', 'Size', 'Disk Used'], tablefmt='fancy_grid')
+        if unassigned:
+            table += '\nUnassigned shards: {}.'.format(unassigned)
+        return table
+
+
+def manage_indices(action='status', host=None, port=None, username='elastic', password='changeme',
+                   rollover_max_age=DEFAULT_ROLLOVER_MAX_AGE, warm_after_days=DEFAULT_WARM_AFTER_DAYS,
+                   daily_warm_after_days=DEFAULT_DAILY_WARM_AFTER_DAYS, retention_days=DEFAULT_RETENTION_DAYS,
+                   refresh_interval=DEFAULT_REFRESH_INTERVAL, rollover=True,
+                   profile=elastic_profiles.AUTO, disk_type=elastic_profiles.AUTO, tiering=TIERING_AUTO, stdout=True,
+                   verbose=False):
+    """
+    View or apply the index templates and lifecycle policies
+
+    :param action: status, tiers, show or apply
+    :param host: The ElasticSearch host; defaults to the locally installed node
+    :param port: The ElasticSearch HTTP port; defaults to the locally installed node
+    :param username: The user to authenticate as (E.G elastic)
+    :param password: The password of that user
+    :param rollover_max_age: The oldest a write index may get before it is rolled over (E.G 7d)
+    :param warm_after_days: The number of days after which indices are force-merged to a single segment
+    :param daily_warm_after_days: The same, for daily indices; late events can no longer be written to them then
+    :param retention_days: The number of days after which indices are deleted; None keeps them
+    :param refresh_interval: How often new events become searchable
+    :param rollover: Bootstrap the rollover aliases (apply)
+    :param profile: auto, single-node or cluster
+    :param disk_type: auto, ssd or hdd
+    :param tiering: auto, hot-warm or none; auto picks hot-warm when there are both hot and warm data nodes
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: A table, the JSON of the policies and templates, or a summary of the changes made
+    """
+    index_manager = IndexManager(host, port, username=username, password=password, stdout=stdout, verbose=verbose)
+    if action == 'status':
+        return index_manager.status()
+    elif action == 'tiers':
+        return index_manager.tiers()
+    elif action == 'show':
+        return index_manager.show(rollover_max_age=rollover_max_age, warm_after_days=warm_after_days,
+                                  daily_warm_after_days=daily_warm_after_days, retention_days=retention_days,
+                                  refresh_interval=refresh_interval, profile=profile, disk_type=disk_type,
+                                  tiering=tiering)
+    elif action == 'apply':
+        rollover_families = index_manager.apply(rollover_max_age=rollover_max_age, warm_after_days=warm_after_days,
+                                                daily_warm_after_days=daily_warm_after_days,
+                                                retention_days=retention_days, refresh_interval=refresh_interval,
+                                                rollover=rollover, profile=profile, disk_type=disk_type,
+                                                tiering=tiering)
+        return "Templates and lifecycle policies installed; rolling over: {}.".format(
+            ', '.join(rollover_families) or 'none')
+    raise elastic_exceptions.InvalidIndexSettingError("{} is not a valid action.".format(action))
@@ -1,6 +1,5 @@
 import os
 import sys
-import time
 import shutil
 import logging
 import tarfile
@@ -22,9 +21,12 @@ from dynamite_nsm import const
 from dynamite_nsm import systemctl
 from dynamite_nsm import utilities
 from dynamite_nsm.services.base import install
+from dynamite_nsm.services.base import readiness
 from dynamite_nsm.logger import get_logger
 from dynamite_nsm import exceptions as general_exceptions
 from dynamite_nsm.services.elasticsearch import config as elastic_configs
+from dynamite_nsm.services.elasticsearch import cluster as elastic_cluster
+from dynamite_nsm.services.elasticsearch import indices as elastic_indices
 from dynamite_nsm.services.elasticsearch import process as elastic_process
 from dynamite_nsm.services.elasticsearch import profile as elastic_profile
 from dynamite_nsm.services.elasticsearch import exceptions as elastic_exceptions
@@ -36,8 +38,8 @@ class InstallManager(install.BaseInstallManager):
     """
 
     def __init__(self, configuration_directory, install_directory, log_directory, host='0.0.0.0', port=9200,
-                 password='changeme', heap_size_gigs=4, download_elasticsearch_archive=True, stdout=False,
-                 verbose=False):
+                 password='changeme', heap_size_gigs=4, download_elasticsearch_archive=True, profile='auto',
+                 cluster_file=None, node_name=None, transport_keystore=None, stdout=False, verbose=False):
         """
         :param configuration_directory: Path to the configuration directory (E.G /etc/dynamite/elasticsearch/)
         :param install_directory: Path to the install directory (E.G /opt/dynamite/elasticsearch/)
@@ -47,6 +49,10 @@ class InstallManager(install.BaseInstallManager):
         :param password: The password used for authentication across all builtin users
         :param heap_size_gigs: The initial/max java heap space to allocate
         :param download_elasticsearch_archive: If True, download the ElasticSearch archive from a mirror
+        :param profile: The index profile; auto, single-node or cluster
+        :param cluster_file: Path to a cluster definition (YAML); installs this host as one of its nodes
+        :param node_name: The name of this node in the cluster definition
+        :param transport_keystore: Path to the certificate keystore shared by the nodes of the cluster
         :param stdout: Print output to console
         :param verbose: Include detailed debug messages
         """
@@ -58,22 +64,38 @@ class InstallManager(install.BaseInstallManager):
         self.install_directory = install_directory
         self.log_directory = log_directory
         self.heap_size_gigs = heap_size_gigs
+        self.profile = profile
+        self.cluster_definition = None
+        self.node_name = node_name
+        self.transport_keystore = transport_keystore
         self.stdout = stdout
         self.verbose = verbose
         utilities.create_dynamite_environment_file()
+        install.BaseInstallManager.__init__(self, 'elasticsearch', verbose=self.verbose, stdout=stdout)
+        if cluster_file:
+            try:
+                self.cluster_definition = elastic_cluster.load_cluster_definition(cluster_file)
+                elastic_cluster.get_node(self.cluster_definition, node_name)
+            except elastic_exceptions.InvalidClusterDefinitionError as e:
+                self.logger.error('Invalid cluster definition.')
+                self.logger.debug('Invalid cluster definition; {}'.format(e))
+                raise elastic_exceptions.InstallElasticsearchError("Invalid cluster definition; {}".format(e))
         if download_elasticsearch_archive:
             try:
-                self.download_from_mirror(const.ELASTICSEARCH_MIRRORS, const.ELASTICSEARCH_ARCHIVE_NAME, stdout=stdout,
-                                          verbose=verbose)
-            except (general_exceptions.ArchiveExtractionError, general_exceptions.DownloadError):
+                self.download_and_extract_from_mirror(const.ELASTICSEARCH_MIRRORS, const.ELASTICSEARCH_ARCHIVE_NAME,
+                                                      stdout=stdout, verbose=verbose)
+            except general_exceptions.DownloadError:
                 self.logger.error("Failed to download ElasticSearch archive.")
                 raise elastic_exceptions.InstallElasticsearchError("Failed to download ElasticSearch archive.")
-        try:
-            self.extract_archive(os.path.join(const.INSTALL_CACHE, const.ELASTICSEARCH_ARCHIVE_NAME))
-        except general_exceptions.ArchiveExtractionError:
-            self.logger.error("Failed to extract ElasticSearch archive.")
-            raise elastic_exceptions.InstallElasticsearchError("Failed to extract ElasticSearch archive.")
-        install.BaseInstallManager.__init__(self, 'elasticsearch', verbose=self.verbose, stdout=stdout)
+            except general_exceptions.ArchiveExtractionError:
+                self.logger.error("Failed to extract ElasticSearch archive.")
+                raise elastic_exceptions.InstallElasticsearchError("Failed to extract ElasticSearch archive.")
+        else:
+            try:
+                self.extract_archive(os.path.join(const.INSTALL_CACHE, const.ELASTICSEARCH_ARCHIVE_NAME))
+            except general_exceptions.ArchiveExtractionError:
+                self.logger.error("Failed to extract ElasticSearch archive.")
+                raise elastic_exceptions.InstallElasticsearchError("Failed to extract ElasticSearch archive.")
 
     def _copy_elasticsearch_files_and_directories(self):
         config_paths = [
@@ -141,21 +163,20 @@ class InstallManager(install.BaseInstallManager):
     def _create_elasticsearch_environment_variables(self):
         env_file = os.path.join(const.CONFIG_PATH, 'environment')
         try:
-            with open(env_file) as env_f:
-                env_str = env_f.read()
-                if 'ES_PATH_CONF' not in env_str:
-                    self.logger.info('Updating ElasticSearch default configuration path [{}]'.format(
-                        self.configuration_directory))
-                    subprocess.call('echo ES_PATH_CONF="{}" >> {}'.format(self.configuration_directory, env_file),
-                                    shell=True)
-                if 'ES_HOME' not in env_str:
-                    self.logger.info('Updating ElasticSearch default home path [{}]'.format(self.install_directory))
-                    subprocess.call('echo ES_HOME="{}" >> {}'.format(self.install_directory, env_file),
-                                    shell=True)
-                if 'ES_LOGS' not in env_str:
-                    self.logger.info('Updating ElasticSearch default log path [{}]'.format(self.log_directory))
-                    subprocess.call('echo ES_LOGS="{}" >> {}'.format(self.log_directory, env_file),
-                                    shell=True)
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'ES_PATH_CONF' not in env_dict:
+                self.logger.info('Updating ElasticSearch default configuration path [{}]'.format(
+                    self.configuration_directory))
+                new_variables['ES_PATH_CONF'] = self.configuration_directory
+            if 'ES_HOME' not in env_dict:
+                self.logger.info('Updating ElasticSearch default home path [{}]'.format(self.install_directory))
+                new_variables['ES_HOME'] = self.install_directory
+            if 'ES_LOGS' not in env_dict:
+                self.logger.info('Updating ElasticSearch default log path [{}]'.format(self.log_directory))
+                new_variables['ES_LOGS'] = self.log_directory
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except IOError:
             self.logger.error("Failed to open {} for reading.".format(env_file))
             raise elastic_exceptions.InstallElasticsearchError("Failed to open {} for reading.".format(env_file))
@@ -186,6 +207,11 @@ class InstallManager(install.BaseInstallManager):
         es_config.http_port = self.port
         try:
             es_config.write_configs()
+            if self.cluster_definition:
+                self.logger.info('Configuring {} as a node of {}.'.format(
+                    self.node_name, self.cluster_definition['cluster_name']))
+                elastic_cluster.apply_node_config(self.cluster_definition, self.node_name,
+                                                  self.configuration_directory)
         except elastic_exceptions.WriteElasticConfigError:
             self.logger.error('Failed to write ElasticSearch config.')
             raise elastic_exceptions.InstallElasticsearchError("Failed to write ElasticSearch config.")
@@ -222,6 +248,7 @@ class InstallManager(install.BaseInstallManager):
         self._create_elasticsearch_environment_variables()
         self._setup_default_elasticsearch_configs()
         self._update_sysctl()
+        self.setup_bootstrap_password()
         try:
             utilities.set_ownership_of_file(self.configuration_directory, user='dynamite', group='dynamite')
             utilities.set_ownership_of_file(self.install_directory, user='dynamite', group='dynamite')
@@ -239,32 +266,61 @@ class InstallManager(install.BaseInstallManager):
         self.logger.info("Installing ElasticSearch systemd Service.")
         if not sysctl.install_and_enable(os.path.join(const.DEFAULT_CONFIGS, 'systemd', 'elasticsearch.service')):
             raise elastic_exceptions.InstallElasticsearchError("Failed to install ElasticSearch systemd service.")
+        if self.cluster_definition and len(self.cluster_definition['nodes']) > 1:
+            # Passwords and templates can only be set up once a quorum of masters has formed the cluster
+            self.setup_transport_keystore()
+            bootstrap_node = elastic_cluster.get_bootstrap_node(self.cluster_definition)
+            self.logger.info("Once every node is installed and running, run 'dynamite elasticsearch cluster "
+                             "bootstrap' on {}.".format(bootstrap_node['name']))
+            return
         self.setup_passwords()
+        self.setup_indices()
 
-    def setup_passwords(self):
-        env_dict = utilities.get_environment_file_dict()
-
-        def setup_from_bootstrap(s):
-            bootstrap_users_and_passwords = {}
-            for line in s.split('\n'):
-                if 'PASSWORD' in line:
-                    _, user, _, password = line.split(' ')
-                    if not isinstance(password, str):
-                        password = password.decode()
-                    bootstrap_users_and_passwords[user] = password
-            es_pass_config = elastic_configs.PasswordConfigManager(
-                auth_user='elastic',
-                current_password=bootstrap_users_and_passwords['elastic'],
-                stdout=self.stdout,
-                verbose=self.verbose
-            )
-            es_pass_config.set_all_passwords(new_password=self.password)
+    def setup_indices(self):
+        """
+        Install the index templates and lifecycle policies; ElasticSearch must be running
+        """
+        self.logger.info('Installing index templates and lifecycle policies.')
+        try:
+            elastic_indices.IndexManager(password=self.password, stdout=self.stdout, verbose=self.verbose).apply(
+                profile=self.profile)
+        except (elastic_exceptions.ElasticsearchAPIError, elastic_exceptions.InvalidIndexSettingError,
+                elastic_exceptions.ReadElasticConfigError) as e:
+            self.logger.error('Failed to install index templates and lifecycle policies.')
+            self.logger.debug('Failed to install index templates and lifecycle policies; {}'.format(e))
+            raise elastic_exceptions.InstallElasticsearchError(
+                "Failed to install index templates and lifecycle policies; {}".format(e))
 
-        if not elastic_profile.ProcessProfiler().is_installed():
-            self.logger.error('ElasticSearch must be installed and running to bootstrap passwords.')
+    def setup_bootstrap_password(self):
+        """
+        Store the password in the ElasticSearch keystore as bootstrap.password; until the builtin user passwords are
+        bootstrapped, it authenticates the elastic user, so the cluster health can be polled before then. The keystore
+        is only read at startup, so this must happen before ElasticSearch is first started
+        """
+        self.logger.info('Setting the bootstrap password in the ElasticSearch keystore.')
+        env_dict = utilities.get_environment_file_dict()
+        es_keystore_util = os.path.join(self.install_directory, 'bin', 'elasticsearch-keystore')
+        keystore_p = subprocess.Popen([es_keystore_util, 'add', '--force', '--stdin', 'bootstrap.password'],
+                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE,
+                                      env=env_dict)
+        try:
+            keystore_p_res = keystore_p.communicate(input=self.password.encode('utf-8'))
+        except Exception as e:
+            self.logger.error("General error occurred while attempting to set the bootstrap password.")
+            self.logger.debug("General error occurred while attempting to set the bootstrap password; {}".format(e))
             raise elastic_exceptions.InstallElasticsearchError(
-                "ElasticSearch must be installed and running to bootstrap passwords.")
+                "General error occurred while attempting to set the bootstrap password; {}".format(e))
+        if keystore_p.returncode != 0:
+            self.logger.error('Failed to set the bootstrap password: \noutput: {}\n\t'.format(keystore_p_res))
+            raise elastic_exceptions.InstallElasticsearchError(
+                "Failed to set the bootstrap password; {}".format(keystore_p_res))
+
+    def setup_transport_keystore(self):
+        """
+        Create the certificate keystore securing traffic between nodes; nodes of a cluster share one keystore
+        """
         self.logger.info('Creating certificate keystore.')
+        env_dict = utilities.get_environment_file_dict()
         es_config_path = os.path.join(self.configuration_directory, 'config')
         try:
             utilities.makedirs(es_config_path, exist_ok=True)
@@ -276,16 +332,26 @@ class InstallManager(install.BaseInstallManager):
                 "General error occurred while attempting to create {} directory; {}".format(es_config_path, e))
         es_cert_util = os.path.join(self.install_directory, 'bin', 'elasticsearch-certutil')
         es_cert_keystore = os.path.join(self.configuration_directory, 'config', 'elastic-certificates.p12')
-        cert_p = subprocess.Popen([es_cert_util, 'cert', '-out', es_cert_keystore, '-pass', ''],
-                                  stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE,
-                                  env=env_dict)
-        try:
-            cert_p_res = cert_p.communicate()
-        except Exception as e:
-            self.logger.error("General error occurred while attempting to install SSL keystores.")
-            self.logger.debug("General error occurred while attempting to install SSL keystores; {}".format(e))
-            raise elastic_exceptions.InstallElasticsearchError(
-                "General error occurred while attempting to install SSL keystores; {}".format(e))
+        cert_p_res = None
+        if self.transport_keystore:
+            try:
+                shutil.copy(self.transport_keystore, es_cert_keystore)
+            except (IOError, shutil.Error) as e:
+                self.logger.error("Failed to copy the certificate keystore {}.".format(self.transport_keystore))
+                self.logger.debug("Failed to copy the certificate keystore {}; {}".format(self.transport_keystore, e))
+                raise elastic_exceptions.InstallElasticsearchError(
+                    "Failed to copy the certificate keystore {}; {}".format(self.transport_keystore, e))
+        else:
+            cert_p = subprocess.Popen([es_cert_util, 'cert', '-out', es_cert_keystore, '-pass', ''],
+                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE,
+                                      env=env_dict)
+            try:
+                cert_p_res = cert_p.communicate()
+            except Exception as e:
+                self.logger.error("General error occurred while attempting to install SSL keystores.")
+                self.logger.debug("General error occurred while attempting to install SSL keystores; {}".format(e))
+                raise elastic_exceptions.InstallElasticsearchError(
+                    "General error occurred while attempting to install SSL keystores; {}".format(e))
         if not os.path.exists(es_cert_keystore):
             self.logger.error('Failed to setup SSL certificate keystore: \noutput: {}\n\t'.format(cert_p_res))
             raise elastic_exceptions.InstallElasticsearchError("Failed to setup SSL keystore; {}".format(cert_p_res))
@@ -300,48 +366,90 @@ class InstallManager(install.BaseInstallManager):
             raise elastic_exceptions.InstallElasticsearchError(
                 "General error occurred while attempting to set permissions for {}; {}".format(keystore_config_path, e)
             )
+
+    def setup_passwords(self):
+        if not elastic_profile.ProcessProfiler().is_installed():
+            self.logger.error('ElasticSearch must be installed and running to bootstrap passwords.')
+            raise elastic_exceptions.InstallElasticsearchError(
+                "ElasticSearch must be installed and running to bootstrap passwords.")
+        self.setup_transport_keystore()
         if not elastic_profile.ProcessProfiler().is_running():
             elastic_process.ProcessManager().start()
-            attempts = 0
-            while not elastic_profile.ProcessProfiler().is_listening():
-                self.logger.info('Waiting for ElasticSearch API to become accessible.')
-                time.sleep(10)
-                attempts += 1
-                if attempts == 10:
-                    self.logger.error("Failed to start ElasticSearch API after 10 attempts.")
-                    raise elastic_exceptions.InstallElasticsearchError(
-                        "Failed to start Elasticsearch API after 10 attempts.")
-            self.logger.info('ElasticSearch API is up.')
-            self.logger.debug('Sleeping for 5 seconds, while ElasticSearch API finishes booting.')
-            time.sleep(5)
-        self.logger.info('Bootstrapping passwords.')
-        es_password_util = os.path.join(self.install_directory, 'bin', 'elasticsearch-setup-passwords')
-        bootstrap_p = subprocess.Popen([es_password_util, 'auto'],
-                                       cwd=self.configuration_directory, stdout=subprocess.PIPE,
-                                       stderr=subprocess.STDOUT, stdin=subprocess.PIPE, env=env_dict)
-        try:
-            bootstrap_p_res = bootstrap_p.communicate(input=b'y\n')
-            if not bootstrap_p_res:
-                self.logger.error('Failed to setup new passwords.')
-                raise elastic_exceptions.InstallElasticsearchError("Failed to bootstrap password.")
-            try:
-                if not isinstance(bootstrap_p_res[0], str):
-                    setup_from_bootstrap(bootstrap_p_res[0].decode())
-                else:
-                    setup_from_bootstrap(bootstrap_p_res[0])
-            except general_exceptions.ResetPasswordError:
-                self.logger.error("Failed to bootstrap password.")
-                raise elastic_exceptions.InstallElasticsearchError("Failed to bootstrap password.")
-        except Exception as e:
-            self.logger.error("General error occurred while attempting to bootstrap ElasticSearch passwords.")
-            self.logger.debug(
-                "General error occurred while attempting to bootstrap ElasticSearch passwords {}".format(e))
+        # Even when ElasticSearch was already running, the cluster may not have reached yellow yet; the password set
+        # up by setup_bootstrap_password authenticates the elastic user until the passwords are bootstrapped
+        es_profiler = elastic_profile.ProcessProfiler()
+        if not readiness.wait_for(lambda: es_profiler.is_ready(username='elastic', password=self.password),
+                                  logger=self.logger, description='ElasticSearch API'):
+            self.logger.error("ElasticSearch API did not become ready within {} seconds.".format(
+                readiness.DEFAULT_READY_TIMEOUT))
             raise elastic_exceptions.InstallElasticsearchError(
-                "General error occurred while attempting to bootstrap ElasticSearch passwords {}".format(e))
+                "ElasticSearch API did not become ready within {} seconds.".format(
+                    readiness.DEFAULT_READY_TIMEOUT))
+        bootstrap_passwords(self.install_directory, self.configuration_directory, self.password, stdout=self.stdout,
+                            verbose=self.verbose)
+
+
+def bootstrap_passwords(install_directory, configuration_directory, password, stdout=True, verbose=False):
+    """
+    Generate the passwords of the builtin users, then replace them with one; ElasticSearch must be running, and
+    (in a cluster) have elected a master
+
+    :param install_directory: Path to the install directory (E.G /opt/dynamite/elasticsearch/)
+    :param configuration_directory: Path to the configuration directory (E.G /etc/dynamite/elasticsearch/)
+    :param password: The password used for authentication across all builtin users
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    """
+    log_level = logging.INFO
+    if verbose:
+        log_level = logging.DEBUG
+    logger = get_logger('ELASTICSEARCH', level=log_level, stdout=stdout)
+    env_dict = utilities.get_environment_file_dict()
+
+    def setup_from_bootstrap(s):
+        bootstrap_users_and_passwords = {}
+        for line in s.split('\n'):
+            if 'PASSWORD' in line:
+                _, user, _, bootstrap_password = line.split(' ')
+                if not isinstance(bootstrap_password, str):
+                    bootstrap_password = bootstrap_password.decode()
+                bootstrap_users_and_passwords[user] = bootstrap_password
+        es_pass_config = elastic_configs.PasswordConfigManager(
+            auth_user='elastic',
+            current_password=bootstrap_users_and_passwords['elastic'],
+            stdout=stdout,
+            verbose=verbose
+        )
+        es_pass_config.set_all_passwords(new_password=password)
+
+    logger.info('Bootstrapping passwords.')
+    es_password_util = os.path.join(install_directory, 'bin', 'elasticsearch-setup-passwords')
+    bootstrap_p = subprocess.Popen([es_password_util, 'auto'],
+                                   cwd=configuration_directory, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, stdin=subprocess.PIPE, env=env_dict)
+    try:
+        bootstrap_p_res = bootstrap_p.communicate(input=b'y\n')
+        if not bootstrap_p_res:
+            logger.error('Failed to setup new passwords.')
+            raise elastic_exceptions.InstallElasticsearchError("Failed to bootstrap password.")
+        try:
+            if not isinstance(bootstrap_p_res[0], str):
+                setup_from_bootstrap(bootstrap_p_res[0].decode())
+            else:
+                setup_from_bootstrap(bootstrap_p_res[0])
+        except general_exceptions.ResetPasswordError:
+            logger.error("Failed to bootstrap password.")
+            raise elastic_exceptions.InstallElasticsearchError("Failed to bootstrap password.")
+    except Exception as e:
+        logger.error("General error occurred while attempting to bootstrap ElasticSearch passwords.")
+        logger.debug("General error occurred while attempting to bootstrap ElasticSearch passwords {}".format(e))
+        raise elastic_exceptions.InstallElasticsearchError(
+            "General error occurred while attempting to bootstrap ElasticSearch passwords {}".format(e))
 
 
 def install_elasticsearch(configuration_directory, install_directory, log_directory, password='changeme',
-                          heap_size_gigs=4, install_jdk=True, create_dynamite_user=True, stdout=True, verbose=False):
+                          heap_size_gigs=4, install_jdk=True, create_dynamite_user=True, profile='auto',
+                          cluster_file=None, node_name=None, transport_keystore=None, stdout=True, verbose=False):
     """
     Install ElasticSearch
 
@@ -352,6 +460,10 @@ def install_elasticsearch(configuration_directory, install_directory, log_direct
     :param heap_size_gigs: The initial/max java heap space to allocate
     :param install_jdk: Install the latest OpenJDK that will be used by Logstash/ElasticSearch
     :param create_dynamite_user: Automatically create the 'dynamite' user, who has privs to run Logstash/ElasticSearch
+    :param profile: The index profile; auto, single-node or cluster
+    :param cluster_file: Path to a cluster definition (YAML); installs this host as one of its nodes
+    :param node_name: The name of this node in the cluster definition
+    :param transport_keystore: Path to the certificate keystore shared by the nodes of the cluster
     :param stdout: Print the output to console
     :param verbose: Include detailed debug messages
     """
@@ -376,7 +488,8 @@ def install_elasticsearch(configuration_directory, install_directory, log_direct
                                   install_directory=install_directory, log_directory=log_directory,
                                   password=password, heap_size_gigs=heap_size_gigs,
                                   download_elasticsearch_archive=not es_profiler.is_downloaded(),
-                                  stdout=stdout, verbose=verbose)
+                                  profile=profile, cluster_file=cluster_file, node_name=node_name,
+                                  transport_keystore=transport_keystore, stdout=stdout, verbose=verbose)
     if install_jdk:
         try:
             utilities.download_java(stdout=stdout)
@@ -406,7 +519,6 @@ def uninstall_elasticsearch(prompt_user=True, stdout=True, verbose=False):
         log_level = logging.DEBUG
     logger = get_logger('ELASTICSEARCH', level=log_level, stdout=stdout)
 
-    env_file = os.path.join(const.CONFIG_PATH, 'environment')
     environment_variables = utilities.get_environment_file_dict()
     es_profiler = elastic_profile.ProcessProfiler()
     if not es_profiler.is_installed():
@@ -432,20 +544,7 @@ def uninstall_elasticsearch(prompt_user=True, stdout=True, verbose=False):
         shutil.rmtree(es_config.es_home)
         shutil.rmtree(es_config.path_logs)
         shutil.rmtree(const.INSTALL_CACHE, ignore_errors=True)
-        env_lines = ''
-        with open(env_file) as env_fr:
-            for line in env_fr.readlines():
-                if 'ES_PATH_CONF' in line:
-                    continue
-                elif 'ES_HOME' in line:
-                    continue
-                elif 'ES_LOGS' in line:
-                    continue
-                elif line.strip() == '':
-                    continue
-                env_lines += line.strip() + '\n'
-        with open(env_file, 'w') as env_fw:
-            env_fw.write(env_lines)
+        utilities.remove_from_environment_file('ES_PATH_CONF', 'ES_HOME', 'ES_LOGS')
     except Exception as e:
         logger.error("General error occurred while attempting to uninstall ElasticSearch.".format(e))
         logger.debug("General error occurred while attempting to uninstall ElasticSearch; {}".format(e))
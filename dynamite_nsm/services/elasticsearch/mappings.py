@@ -0,0 +1,234 @@
+import json
+import time
+import logging
+from collections import OrderedDict
+
+import tabulate
+
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.elasticsearch import api as elastic_api
+from dynamite_nsm.services.elasticsearch import exceptions as elastic_exceptions
+
+# Dynamic templates only decide the mapping of fields nothing else maps explicitly; ElastiFlow/Synesis still own the
+# fields their templates declare. Order matters: the first template that matches a field wins.
+DYNAMIC_TEMPLATES = [
+    # Raw packets and payloads are only ever read from the event itself; never index them
+    ('unindexed_payloads', dict(
+        match_pattern='regex',
+        match=r'^(payload|payload_printable|packet|http_request_body|http_response_body|.*_payload)$',
+        mapping={'type': 'keyword', 'index': False, 'doc_values': False}
+    )),
+    # Zeek (id.orig_h, id.resp_h, *_addr) and Suricata (src_ip, dest_ip) addresses; Zeek's *_l2_addr are MAC addresses
+    ('ip_addresses', dict(
+        match_mapping_type='string',
+        match_pattern='regex',
+        match=r'^(.*_ip|ip|.*_addr|.*_h)$',
+        unmatch=r'^(.*mac.*|.*l2_addr)$',
+        mapping={'type': 'ip', 'ignore_malformed': True}
+    )),
+    # Identifiers and hashes are looked up by exact value, but never aggregated
+    ('identifiers', dict(
+        match_mapping_type='string',
+        match_pattern='regex',
+        match=r'^(uid|fuid|.*_uid|.*_fuids?|uids|community_id|flow_id|tx_id|md5|sha1|sha256|.*_md5|.*_sha1|'
+              r'.*_sha256|cert_chain_fuids|client_cert_chain_fuids)$',
+        mapping={'type': 'keyword', 'doc_values': False, 'ignore_above': 256}
+    )),
+    # The few fields searched as free text; norms only matter for relevance scoring, which NSM searches do not use
+    ('free_text', dict(
+        match_mapping_type='string',
+        match_pattern='regex',
+        match=r'^(message|signature|user_agent|uri|query|msg|sub|subject|issuer)$',
+        mapping={'type': 'text', 'norms': False,
+                 'fields': {'keyword': {'type': 'keyword', 'ignore_above': 1024}}}
+    )),
+    # Everything else is an exact value (protocols, services, states, names)
+    ('strings', dict(
+        match_mapping_type='string',
+        mapping={'type': 'keyword', 'ignore_above': 1024}
+    )),
+]
+
+
+def get_mappings():
+    """
+    :return: The mappings shared by every index family (for use in an index template)
+    """
+    return {
+        'dynamic_templates': [{name: template} for name, template in DYNAMIC_TEMPLATES]
+    }
+
+
+def read_sample(path, limit=None):
+    """
+    :param path: Path to a file containing one JSON event per line (E.G eve.json)
+    :param limit: The maximum number of events to read
+    :return: A list of events
+    """
+    events = []
+    try:
+        with open(path) as sample_f:
+            for line in sample_f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict):
+                    events.append(event)
+                if limit and len(events) >= limit:
+                    break
+    except IOError as e:
+        raise elastic_exceptions.InvalidIndexSettingError("Could not read sample {}; {}".format(path, e))
+    return events
+
+
+class MappingBenchmark:
+    """
+    Index the same sample with ElasticSearch's default dynamic mappings, and with ours, and compare the cost
+    """
+
+    BULK_SIZE = 1000
+
+    def __init__(self, host=None, port=None, username='elastic', password='changeme', stdout=True, verbose=False):
+        """
+        :param host: The ElasticSearch host; defaults to the locally installed node
+        :param port: The ElasticSearch HTTP port; defaults to the locally installed node
+        :param username: The user to authenticate as (E.G elastic)
+        :param password: The password of that user
+        :param stdout: Print the output to console
+        :param verbose: Include detailed debug messages
+        """
+        log_level = logging.INFO
+        if verbose:
+            log_level = logging.DEBUG
+        self.logger = get_logger('ELASTICSEARCH_MAPPINGS', level=log_level, stdout=stdout)
+        self.api = elastic_api.ElasticsearchAPI(host, port, username=username, password=password)
+
+    def get_sample_from_index(self, index_pattern, size=10000):
+        """
+        :param index_pattern: The indices to sample from (E.G suricata-1.1.0-*)
+        :param size: The number of events to sample
+        :return: A list of events
+        """
+        response = self.api.post('/{}/_search'.format(index_pattern), {
+            'size': min(size, 10000),
+            'query': {'function_score': {'random_score': {}}}
+        }, ignore=(404,)) or {}
+        return [hit['_source'] for hit in response.get('hits', {}).get('hits', [])]
+
+    def _load(self, index, events, mappings):
+        self.api.delete('/{}'.format(index), ignore=(404,))
+        # Single shard, no replica, no refresh while loading: only the mappings differ between the runs
+        self.api.put('/{}'.format(index), {
+            'settings': {'index.number_of_shards': 1, 'index.number_of_replicas': 0, 'index.refresh_interval': -1},
+            'mappings': mappings
+        })
+        start = time.time()
+        errors = 0
+        for i in range(0, len(events), self.BULK_SIZE):
+            body = ''
+            for event in events[i:i + self.BULK_SIZE]:
+                body += '{"index":{}}\n' + json.dumps(event) + '\n'
+            response = self.api.post('/{}/_bulk'.format(index), body, timeout=120)
+            if response.get('errors'):
+                errors += len([item for item in response.get('items', []) if item.get('index', {}).get('error')])
+        elapsed = max(0.001, time.time() - start)
+        self.api.post('/{}/_refresh'.format(index))
+        self.api.post('/{}/_forcemerge?max_num_segments=1'.format(index), timeout=600)
+        stats = self.api.get('/{}/_stats/store,docs'.format(index))['_all']['primaries']
+        return dict(elapsed=elapsed, events_per_second=len(events) / elapsed, errors=errors,
+                    size=stats['store']['size_in_bytes'], docs=stats['docs']['count'],
+                    fields=len(self._get_leaf_fields(index)))
+
+    def _get_leaf_fields(self, index):
+        mapping = self.api.get('/{}/_mapping'.format(index))
+        fields = []
+
+        def walk(properties, prefix):
+            for name, field in properties.items():
+                if 'properties' in field:
+                    walk(field['properties'], prefix + name + '.')
+                else:
+                    fields.append(prefix + name)
+                    fields.extend([prefix + name + '.' + sub for sub in field.get('fields', {})])
+        for index_mapping in mapping.values():
+            walk(index_mapping.get('mappings', {}).get('properties', {}), '')
+        return fields
+
+    def run(self, events):
+        """
+        :param events: The sample to index
+        :return: An OrderedDict mapping default and tuned to the time, rate, errors, size and number of fields
+        """
+        if not events:
+            raise elastic_exceptions.InvalidIndexSettingError("The sample does not contain any events.")
+        results = OrderedDict()
+        for name, mappings in (('default', {}), ('tuned', get_mappings())):
+            index = 'dynamite-mapping-benchmark-{}'.format(name)
+            self.logger.info('Indexing {} events with the {} mappings.'.format(len(events), name))
+            try:
+                results[name] = self._load(index, events, mappings)
+            finally:
+                self.api.delete('/{}'.format(index), ignore=(404,))
+        return results
+
+
+def format_benchmark(results):
+    """
+    :param results: The output of MappingBenchmark.run
+    :return: A table comparing the default and tuned mappings
+    """
+    default, tuned = results['default'], results['tuned']
+    rows = [
+        ['Events/s', '{:.0f}'.format(default['events_per_second']), '{:.0f}'.format(tuned['events_per_second']),
+         '{:+.1%}'.format(tuned['events_per_second'] / max(0.001, default['events_per_second']) - 1)],
+        ['Size (bytes)', default['size'], tuned['size'], '{:+.1%}'.format(float(tuned['size']) /
+                                                                         max(1, default['size']) - 1)],
+        ['Bytes/Event', default['size'] // max(1, default['docs']), tuned['size'] // max(1, tuned['docs']), ''],
+        ['Mapped Fields', default['fields'], tuned['fields'], ''],
+        ['Rejected Events', default['errors'], tuned['errors'], '']
+    ]
+    return tabulate.tabulate(rows, headers=['', 'Default', 'Tuned', 'Change'], tablefmt='fancy_grid')
+
+
+def manage_mappings(action='show', host=None, port=None, username='elastic', password='changeme', sample_path=None,
+                    sample_index=None, sample_size=10000, stdout=True, verbose=False):
+    """
+    View, apply or benchmark the field mappings
+
+    :param action: show, apply or benchmark
+    :param host: The ElasticSearch host; defaults to the locally installed node
+    :param port: The ElasticSearch HTTP port; defaults to the locally installed node
+    :param username: The user to authenticate as (E.G elastic)
+    :param password: The password of that user
+    :param sample_path: A file with one JSON event per line to benchmark with (E.G eve.json)
+    :param sample_index: The indices to sample events from when no file is given (E.G suricata-1.1.0-*)
+    :param sample_size: The number of events to benchmark with
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: The mappings as JSON, a summary of the changes made, or a table comparing the mappings
+    """
+    # Imported here, as the index templates embed these mappings
+    from dynamite_nsm.services.elasticsearch import indices as elastic_indices
+
+    if action == 'show':
+        return json.dumps(get_mappings(), indent=2)
+    elif action == 'apply':
+        index_manager = elastic_indices.IndexManager(host, port, username=username, password=password,
+                                                     stdout=stdout, verbose=verbose)
+        index_manager.apply_templates()
+        rolled_over = index_manager.rollover_write_indices()
+        return "Mappings installed; rolled over: {}.".format(', '.join(rolled_over) or 'none')
+    elif action == 'benchmark':
+        benchmark = MappingBenchmark(host, port, username=username, password=password, stdout=stdout,
+                                     verbose=verbose)
+        if sample_path:
+            events = read_sample(sample_path, limit=sample_size)
+        else:
+            events = benchmark.get_sample_from_index(
+                sample_index or '{}-*'.format(elastic_indices.INDEX_FAMILIES['suricata']['prefix']), size=sample_size)
+        return format_benchmark(benchmark.run(events))
+    raise elastic_exceptions.InvalidIndexSettingError("{} is not a valid action.".format(action))
@@ -4,6 +4,7 @@ from dynamite_nsm import const
 from dynamite_nsm import utilities
 
 from dynamite_nsm.services.base import profile
+from dynamite_nsm.services.base import readiness
 from dynamite_nsm.services.elasticsearch import config as elastic_configs
 from dynamite_nsm.services.elasticsearch import process as elastic_process
 
@@ -32,15 +33,36 @@ class ProcessProfiler(profile.BaseProcessProfiler):
                 return elastic_process.ProcessManager().status()['RUNNING']
         return False
 
-    def is_listening(self):
+    def get_listener(self):
         if not self.elasticsearch_config:
-            return False
+            return None
         if not os.path.exists(self.elasticsearch_config):
-            return False
+            return None
 
-        es_config_obj = elastic_configs.ConfigManager(configuration_directory=self.elasticsearch_config)
+        es_config_obj = profile.get_cached_config(
+            elastic_configs.ConfigManager, self.elasticsearch_config,
+            dependent_files=[os.path.join(self.elasticsearch_config, 'elasticsearch.yml'),
+                             os.path.join(self.elasticsearch_config, 'jvm.options'),
+                             self.env_file])
         host = es_config_obj.network_host
         port = es_config_obj.http_port
         if host.strip() == '0.0.0.0':
             host = 'localhost'
-        return utilities.check_socket(host, port)
+        return host, port
+
+    def is_ready(self, username=None, password=None, wait_for_status='yellow'):
+        """
+        Application-level readiness check against the _cluster/health API
+
+        :param username: The user to authenticate as (E.G elastic)
+        :param password: The password of that user
+        :param wait_for_status: The minimum cluster health (green or yellow)
+        :return: True, if ElasticSearch is ready
+        """
+        if not self._listener:
+            self._listener = self.get_listener()
+        if not self._listener:
+            return False
+        host, port = self._listener
+        return readiness.elasticsearch_is_ready(host, port, username=username, password=password,
+                                                wait_for_status=wait_for_status)
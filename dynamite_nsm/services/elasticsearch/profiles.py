@@ -0,0 +1,153 @@
+import os
+import json
+from collections import OrderedDict
+
+from dynamite_nsm import utilities
+from dynamite_nsm.services.elasticsearch import config as elastic_configs
+from dynamite_nsm.services.elasticsearch import exceptions as elastic_exceptions
+
+AUTO = 'auto'
+SINGLE_NODE = 'single-node'
+CLUSTER = 'cluster'
+PROFILES = (AUTO, SINGLE_NODE, CLUSTER)
+
+SSD = 'ssd'
+HDD = 'hdd'
+DISK_TYPES = (AUTO, SSD, HDD)
+
+# Dynamic index settings of each profile; all of them can be changed on live indices
+PROFILE_SETTINGS = {
+    SINGLE_NODE: OrderedDict([
+        # There is nowhere to allocate a replica; it would only keep the cluster yellow
+        ('index.number_of_replicas', 0),
+        # fsync the translog every 5 seconds instead of on every bulk request; a crash loses at most those 5 seconds,
+        # which LogStash's persisted queues and Filebeat's registry re-send
+        ('index.translog.durability', 'async'),
+        ('index.translog.sync_interval', '5s'),
+        ('index.translog.flush_threshold_size', '1gb'),
+    ]),
+    CLUSTER: OrderedDict([
+        ('index.number_of_replicas', 1),
+        # With replicas, an acknowledged event must survive the loss of a node
+        ('index.translog.durability', 'request'),
+        ('index.translog.flush_threshold_size', '1gb'),
+    ])
+}
+
+# Spinning disks cannot serve concurrent merges; solid state disks keep ElasticSearch's default (half the cores, max 4)
+HDD_MERGE_THREADS = 1
+
+
+def get_disk_type(path):
+    """
+    :param path: A path on the disk to check (E.G /opt/dynamite/elasticsearch/data)
+    :return: ssd or hdd; None if it cannot be determined (E.G a network filesystem)
+    """
+    while path and not os.path.exists(path):
+        path = os.path.dirname(path.rstrip('/'))
+    if not path:
+        return None
+    device = os.stat(path).st_dev
+    sys_path = os.path.realpath('/sys/dev/block/{}:{}'.format(os.major(device), os.minor(device)))
+    # Partitions (sda1) do not have a queue of their own; their disk (sda) does
+    for candidate in (sys_path, os.path.dirname(sys_path)):
+        try:
+            with open(os.path.join(candidate, 'queue', 'rotational')) as rotational_f:
+                return HDD if rotational_f.read().strip() == '1' else SSD
+        except IOError:
+            continue
+    return None
+
+
+def get_local_data_path():
+    """
+    :return: The first data path of the locally installed node; None if ElasticSearch is not installed
+    """
+    configuration_directory = utilities.get_environment_file_dict().get('ES_PATH_CONF')
+    if not configuration_directory:
+        return None
+    path_data = elastic_configs.ConfigManager(configuration_directory).path_data
+    if isinstance(path_data, list):
+        path_data = path_data[0] if path_data else None
+    if not path_data:
+        return None
+    return str(path_data).split(',')[0].strip()
+
+
+def resolve_profile(profile, data_node_count):
+    """
+    :param profile: auto, single-node or cluster
+    :param data_node_count: The number of data nodes in the cluster
+    :return: single-node or cluster
+    """
+    if profile not in PROFILES:
+        raise elastic_exceptions.InvalidIndexSettingError(
+            "{} is not a valid profile; use one of {}.".format(profile, ', '.join(PROFILES)))
+    if profile == AUTO:
+        return SINGLE_NODE if data_node_count <= 1 else CLUSTER
+    return profile
+
+
+def resolve_disk_type(disk_type, local=True):
+    """
+    :param disk_type: auto, ssd or hdd; None (unknown) is passed through
+    :param local: True, if ElasticSearch runs on this host (its data disk can only be inspected locally)
+    :return: ssd, hdd or None (unknown)
+    """
+    if disk_type is not None and disk_type not in DISK_TYPES:
+        raise elastic_exceptions.InvalidIndexSettingError(
+            "{} is not a valid disk type; use one of {}.".format(disk_type, ', '.join(DISK_TYPES)))
+    if disk_type != AUTO:
+        return disk_type
+    data_path = get_local_data_path() if local else None
+    return get_disk_type(data_path) if data_path else None
+
+
+def get_index_settings(profile, disk_type=None, reset_defaults=False):
+    """
+    :param profile: single-node or cluster
+    :param disk_type: ssd, hdd or None (unknown)
+    :param reset_defaults: Explicitly reset the settings ElasticSearch's defaults suit (for updating live indices)
+    :return: An OrderedDict of index settings
+    """
+    settings = OrderedDict(PROFILE_SETTINGS[profile])
+    if profile == CLUSTER and reset_defaults:
+        settings['index.translog.sync_interval'] = None
+    if disk_type == HDD:
+        settings['index.merge.scheduler.max_thread_count'] = HDD_MERGE_THREADS
+    elif disk_type == SSD and reset_defaults:
+        settings['index.merge.scheduler.max_thread_count'] = None
+    return settings
+
+
+def manage_profile(action='show', profile=AUTO, disk_type=AUTO, host=None, port=None, username='elastic',
+                   password='changeme', stdout=True, verbose=False):
+    """
+    View or apply the single-node/cluster index profile
+
+    :param action: show or apply
+    :param profile: auto, single-node or cluster; auto picks single-node when the cluster has one data node
+    :param disk_type: auto, ssd or hdd; auto inspects the data disk of the local node
+    :param host: The ElasticSearch host; defaults to the locally installed node
+    :param port: The ElasticSearch HTTP port; defaults to the locally installed node
+    :param username: The user to authenticate as (E.G elastic)
+    :param password: The password of that user
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: The settings as JSON, or a summary of the changes made
+    """
+    # Imported here, as the index templates embed the profile
+    from dynamite_nsm.services.elasticsearch import indices as elastic_indices
+
+    index_manager = elastic_indices.IndexManager(host, port, username=username, password=password, stdout=stdout,
+                                                 verbose=verbose)
+    profile, disk_type = index_manager.resolve_profile(profile, disk_type)
+    if action == 'show':
+        return json.dumps(OrderedDict([('profile', profile), ('disk_type', disk_type),
+                                       ('settings', get_index_settings(profile, disk_type))]), indent=2)
+    elif action == 'apply':
+        index_manager.apply_templates(profile=profile, disk_type=disk_type)
+        updated = index_manager.apply_profile_to_indices(profile, disk_type)
+        return "Applied the {} profile ({} disk) to the templates and {} existing indices.".format(
+            profile, disk_type or 'unknown', updated)
+    raise elastic_exceptions.InvalidIndexSettingError("{} is not a valid action.".format(action))
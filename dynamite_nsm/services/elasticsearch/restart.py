@@ -0,0 +1,218 @@
+import logging
+import subprocess
+from collections import OrderedDict
+
+from dynamite_nsm import utilities
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.base import readiness
+from dynamite_nsm.services.elasticsearch import api as elastic_api
+from dynamite_nsm.services.elasticsearch import config as elastic_configs
+from dynamite_nsm.services.elasticsearch import process as elastic_process
+from dynamite_nsm.services.elasticsearch import exceptions as elastic_exceptions
+
+# How other nodes are restarted; {host} is the node's publish address, {name} its node.name
+DEFAULT_REMOTE_RESTART_COMMAND = 'ssh {host} systemctl restart elasticsearch.service'
+
+DEFAULT_REJOIN_TIMEOUT = 600
+DEFAULT_RECOVERY_TIMEOUT = 3600
+
+# Synced flush marks idle shards, so that their copies are reused without comparing files; 7.6 does this on _flush
+SYNCED_FLUSH_MAX_VERSION = (7, 6)
+
+
+class RollingRestartManager:
+    """
+    Restart ElasticSearch nodes one at a time, without ElasticSearch re-replicating their shards in the meantime
+    """
+
+    def __init__(self, host=None, port=None, username='elastic', password='changeme',
+                 remote_restart_command=DEFAULT_REMOTE_RESTART_COMMAND, stdout=True, verbose=False):
+        """
+        :param host: The ElasticSearch host; defaults to the locally installed node
+        :param port: The ElasticSearch HTTP port; defaults to the locally installed node
+        :param username: The user to authenticate as (E.G elastic)
+        :param password: The password of that user
+        :param remote_restart_command: The command restarting a node on another host; {host} and {name} are filled in
+        :param stdout: Print the output to console
+        :param verbose: Include detailed debug messages
+        """
+        log_level = logging.INFO
+        if verbose:
+            log_level = logging.DEBUG
+        self.logger = get_logger('ELASTICSEARCH_RESTART', level=log_level, stdout=stdout)
+        self.username = username
+        self.password = password
+        self.remote_restart_command = remote_restart_command
+        self.stdout = stdout
+        self.verbose = verbose
+        self.api = elastic_api.ElasticsearchAPI(host, port, username=username, password=password)
+        self.local_node_name = None
+        configuration_directory = utilities.get_environment_file_dict().get('ES_PATH_CONF')
+        if configuration_directory:
+            self.local_node_name = elastic_configs.ConfigManager(configuration_directory).node_name
+
+    def get_nodes(self):
+        """
+        :return: An OrderedDict mapping each node name to its HTTP host and port, master-eligible nodes last
+        """
+        nodes = self.api.get('/_nodes/http').get('nodes', {}).values()
+        # Restarting the elected master forces an election; do it once, after every other node
+        master = self.api.get('/_cat/master?format=json')[0].get('node')
+        nodes = sorted(nodes, key=lambda n: (n['name'] == master, 'master' in n.get('roles', []), n['name']))
+        result = OrderedDict()
+        for node in nodes:
+            publish_address = node.get('http', {}).get('publish_address', '')
+            # host/ip:port or ip:port
+            host, _, port = publish_address.split('/')[-1].rpartition(':')
+            result[node['name']] = (host, int(port or 9200))
+        return result
+
+    def get_connected_node(self):
+        """
+        :return: The node.name of the node the API requests go to
+        """
+        return list(self.api.get('/_nodes/_local').get('nodes', {}).values())[0]['name']
+
+    def _get_api(self, exclude_node=None):
+        # While a node restarts, talk to the cluster through any other one
+        if exclude_node is None:
+            return self.api
+        for name, (host, port) in self.get_nodes().items():
+            if name != exclude_node:
+                return elastic_api.ElasticsearchAPI(host, port, username=self.username, password=self.password)
+        return None
+
+    def set_allocation(self, value):
+        """
+        :param value: primaries (only allocate primaries), or None (the default; allocate everything)
+        """
+        self.api.put('/_cluster/settings', {'persistent': {'cluster.routing.allocation.enable': value}})
+
+    def flush(self):
+        """
+        Flush every index, so that restarted shards have nothing to replay from their translog
+        """
+        if self.api.get_version()[0:2] < SYNCED_FLUSH_MAX_VERSION:
+            # Partially failed synced flushes (E.G shards with ongoing indexing) return 409; those get a normal flush
+            if self.api.post('/_flush/synced', ignore=(409,), timeout=300) is not None:
+                return
+        self.api.post('/_flush', timeout=300)
+
+    def restart_node(self, name, host):
+        """
+        :param name: The node.name of the node
+        :param host: The host the node publishes its HTTP address on
+        """
+        if name == self.local_node_name:
+            self.logger.info('Restarting {} (this host) through systemd.'.format(name))
+            elastic_process.ProcessManager(stdout=self.stdout, verbose=self.verbose).restart()
+            return
+        command = self.remote_restart_command.format(host=host, name=name)
+        self.logger.info('Restarting {}; {}'.format(name, command))
+        if subprocess.call(command, shell=True) != 0:
+            self.logger.error('Failed to restart {}.'.format(name))
+            self.logger.debug('Failed to restart {}; {} exited with an error.'.format(name, command))
+            raise elastic_exceptions.RollingRestartError("Failed to restart {}; '{}' failed.".format(name, command))
+
+    def wait_for_node(self, name, timeout=DEFAULT_REJOIN_TIMEOUT):
+        """
+        :param name: The node.name of the node that was restarted
+        :param timeout: The maximum number of seconds to wait
+        """
+        def rejoined():
+            api = self._get_api(exclude_node=name) or self.api
+            return name in [node.get('name') for node in api.get('/_cat/nodes?format=json&h=name')]
+
+        self.logger.info('Waiting for {} to rejoin the cluster.'.format(name))
+        if not readiness.wait_for(rejoined, timeout=timeout, logger=None, description=name):
+            self.logger.error('{} did not rejoin the cluster.'.format(name))
+            raise elastic_exceptions.RollingRestartError("{} did not rejoin within {}s.".format(name, timeout))
+        self.logger.info('{} rejoined the cluster.'.format(name))
+
+    def wait_for_recovery(self, wait_for_status='green', timeout=DEFAULT_RECOVERY_TIMEOUT):
+        """
+        :param wait_for_status: The cluster health to wait for (green or yellow)
+        :param timeout: The maximum number of seconds to wait
+        """
+        accepted = ('green',) if wait_for_status == 'green' else ('green', 'yellow')
+
+        def recovered():
+            health = self.api.get('/_cluster/health')
+            progress = 'Cluster {}: {:.1f}% of shards active, {} initializing, {} relocating, {} unassigned.'.format(
+                health.get('status'), float(health.get('active_shards_percent_as_number', 0)),
+                health.get('initializing_shards'), health.get('relocating_shards'), health.get('unassigned_shards'))
+            self.logger.info(progress)
+            return health.get('status') in accepted
+
+        if not readiness.wait_for(recovered, timeout=timeout, logger=None, description='cluster recovery'):
+            self.logger.error('The cluster did not recover.')
+            raise elastic_exceptions.RollingRestartError("The cluster did not reach {} within {}s.".format(
+                wait_for_status, timeout))
+
+    def restart(self, node_names=None, wait_for_status='green', rejoin_timeout=DEFAULT_REJOIN_TIMEOUT,
+                recovery_timeout=DEFAULT_RECOVERY_TIMEOUT):
+        """
+        Restart each node in turn; allocation is restricted to primaries during the restart, so the cluster does not
+        rebuild the missing replicas elsewhere, only to move them back when the node returns
+
+        :param node_names: The nodes to restart; defaults to the local node
+        :param wait_for_status: The cluster health to reach before moving on to the next node (green or yellow)
+        :param rejoin_timeout: The maximum number of seconds a node may take to rejoin
+        :param recovery_timeout: The maximum number of seconds the cluster may take to recover after each node
+        :return: A list of the nodes restarted
+        """
+        nodes = self.get_nodes()
+        if not node_names:
+            if not self.local_node_name or self.local_node_name not in nodes:
+                raise elastic_exceptions.RollingRestartError("The local node is not part of the cluster.")
+            node_names = [self.local_node_name]
+        unknown = [name for name in node_names if name not in nodes]
+        if unknown:
+            raise elastic_exceptions.RollingRestartError("Unknown nodes: {}.".format(', '.join(unknown)))
+        restarted = []
+        self.wait_for_recovery(wait_for_status=wait_for_status, timeout=recovery_timeout)
+        for name in [name for name in nodes if name in node_names]:
+            host, _ = nodes[name]
+            self.logger.info('Restricting shard allocation to primaries.')
+            self.set_allocation('primaries')
+            try:
+                self.logger.info('Flushing all indices.')
+                self.flush()
+                # The API this manager talks through may be the node being restarted
+                if self.get_connected_node() == name:
+                    self.api = self._get_api(exclude_node=name) or self.api
+                self.restart_node(name, host)
+                self.wait_for_node(name, timeout=rejoin_timeout)
+            finally:
+                self.logger.info('Re-enabling shard allocation.')
+                readiness.wait_for(lambda: self.set_allocation(None) or True, timeout=rejoin_timeout, logger=None)
+            self.wait_for_recovery(wait_for_status=wait_for_status, timeout=recovery_timeout)
+            restarted.append(name)
+        return restarted
+
+
+def rolling_restart(node_names=None, all_nodes=False, host=None, port=None, username='elastic', password='changeme',
+                    wait_for_status='green', remote_restart_command=DEFAULT_REMOTE_RESTART_COMMAND, stdout=True,
+                    verbose=False):
+    """
+    Restart ElasticSearch nodes one at a time, waiting for the cluster to recover after each
+
+    :param node_names: The nodes to restart; defaults to the local node
+    :param all_nodes: Restart every node in the cluster
+    :param host: The ElasticSearch host; defaults to the locally installed node
+    :param port: The ElasticSearch HTTP port; defaults to the locally installed node
+    :param username: The user to authenticate as (E.G elastic)
+    :param password: The password of that user
+    :param wait_for_status: The cluster health to reach before moving on to the next node (green or yellow)
+    :param remote_restart_command: The command restarting a node on another host; {host} and {name} are filled in
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: A summary of the nodes restarted
+    """
+    restart_manager = RollingRestartManager(host, port, username=username, password=password,
+                                            remote_restart_command=remote_restart_command, stdout=stdout,
+                                            verbose=verbose)
+    if all_nodes:
+        node_names = list(restart_manager.get_nodes().keys())
+    restarted = restart_manager.restart(node_names=node_names, wait_for_status=wait_for_status)
+    return "Restarted: {}.".format(', '.join(restarted))
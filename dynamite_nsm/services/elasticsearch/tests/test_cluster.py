@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+from dynamite_nsm.services.elasticsearch import cluster
+from dynamite_nsm.services.elasticsearch import install as elastic_install
+from dynamite_nsm.services.elasticsearch import indices as elastic_indices
+from dynamite_nsm.services.elasticsearch import exceptions as elastic_exceptions
+
+CLUSTER_DEFINITION = {
+    'cluster_name': 'dynamite-cluster',
+    'nodes': [
+        {'name': 'es-1', 'host': '10.0.0.10', 'roles': ['master', 'data', 'ingest']},
+        {'name': 'es-2', 'host': '10.0.0.11', 'roles': ['master', 'data', 'ingest']},
+        {'name': 'es-3', 'host': '10.0.0.12', 'roles': ['master', 'data', 'ingest']}
+    ]
+}
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.definition = cluster.validate_cluster_definition(CLUSTER_DEFINITION)
+        self.profiler = mock.Mock()
+        self.profiler.is_running.return_value = True
+        self.profiler.get_listener.return_value = ('10.0.0.10', 9200)
+        self.health_codes = []
+        self.bootstrap_passwords = mock.Mock()
+        self.wait_for_formation = mock.Mock()
+        patchers = [
+            mock.patch('dynamite_nsm.utilities.get_environment_file_dict',
+                       return_value={'ES_HOME': '/opt/dynamite/elasticsearch/',
+                                     'ES_PATH_CONF': '/etc/dynamite/elasticsearch/'}),
+            mock.patch.object(cluster.elastic_configs, 'ConfigManager', return_value=mock.Mock(node_name='es-1')),
+            mock.patch.object(cluster.elastic_profile, 'ProcessProfiler', return_value=self.profiler),
+            mock.patch.object(cluster.readiness, 'http_get', side_effect=self._http_get),
+            mock.patch.object(cluster.readiness.time, 'sleep'),
+            mock.patch.object(elastic_install, 'bootstrap_passwords', self.bootstrap_passwords),
+            mock.patch.object(cluster.ClusterManager, 'wait_for_formation', self.wait_for_formation),
+            mock.patch.object(elastic_indices, 'IndexManager')
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _http_get(self, url, username=None, password=None, timeout=None):
+        assert('/_cluster/health' in url)
+        # Before the builtin users are set up, the elastic user authenticates with the keystore's bootstrap.password
+        assert((username, password) == ('elastic', 'secret'))
+        return self.health_codes.pop(0) if len(self.health_codes) > 1 else self.health_codes[0], None
+
+    def test_passwords_bootstrapped_once_after_master_elected(self):
+        # Unreachable while starting, then 503 until a quorum of masters elects one
+        self.health_codes = [None, 503, 503, 200]
+
+        cluster.bootstrap_cluster(self.definition, password='secret', stdout=False)
+
+        assert(self.health_codes == [200])
+        self.bootstrap_passwords.assert_called_once_with('/opt/dynamite/elasticsearch/',
+                                                         '/etc/dynamite/elasticsearch/', 'secret', stdout=False,
+                                                         verbose=False)
+        self.wait_for_formation.assert_called_once_with(timeout=cluster.DEFAULT_FORMATION_TIMEOUT)
+
+    def test_password_bootstrap_failure_is_not_retried(self):
+        self.health_codes = [200]
+        self.bootstrap_passwords.side_effect = elastic_exceptions.InstallElasticsearchError('setup-passwords failed')
+
+        with self.assertRaises(elastic_exceptions.InstallElasticsearchError):
+            cluster.bootstrap_cluster(self.definition, password='secret', stdout=False)
+
+        assert(self.bootstrap_passwords.call_count == 1)
+        assert(not self.wait_for_formation.called)
+
+    def test_no_master_elected(self):
+        self.health_codes = [503]
+
+        with self.assertRaises(elastic_exceptions.InvalidClusterDefinitionError):
+            cluster.bootstrap_cluster(self.definition, password='secret', timeout=0, stdout=False)
+
+        assert(not self.bootstrap_passwords.called)
+
+    def test_authentication_required_is_not_an_election(self):
+        # Security is checked before the master, so a 401 (E.G a wrong password) must not start the bootstrap
+        self.health_codes = [401]
+
+        with self.assertRaises(elastic_exceptions.InvalidClusterDefinitionError):
+            cluster.bootstrap_cluster(self.definition, password='secret', timeout=0, stdout=False)
+
+        assert(not self.bootstrap_passwords.called)
@@ -86,5 +86,18 @@ class Tests(unittest.TestCase):
 
         assert (config_manager_read.java_initial_memory == 10 and config_manager_read.java_maximum_memory == 10)
 
+    def test_elasticyaml_update_node_roles(self):
+        self.config_manager.node_master = False
+        self.config_manager.node_data = True
+        self.config_manager.transport_port = 9301
+        self.config_manager.node_attributes = {'box_type': 'warm'}
+        self.config_manager.write_elasticsearch_config()
+
+        config_manager_read = config.ConfigManager(self.config_directory)
+
+        assert (config_manager_read.node_master is False and config_manager_read.node_data is True and
+                config_manager_read.node_ingest is None and config_manager_read.transport_port == 9301 and
+                config_manager_read.node_attributes == {'box_type': 'warm'})
+
     def tearDown(self):
         shutil.rmtree(self.config_root, ignore_errors=True)
@@ -0,0 +1,38 @@
+import unittest
+
+from dynamite_nsm.services.elasticsearch import indices
+
+
+class Tests(unittest.TestCase):
+
+    def test_lifecycle_policy_keeps_indices_by_default(self):
+        phases = indices.get_lifecycle_policy()['policy']['phases']
+
+        assert(list(phases.keys()) == ['hot', 'warm'])
+
+    def test_lifecycle_policy_deletes_after_retention(self):
+        phases = indices.get_lifecycle_policy(retention_days=90)['policy']['phases']
+
+        assert(phases['delete'] == {'min_age': '90d', 'actions': {'delete': {}}})
+
+    def test_tiered_lifecycle_policy_with_retention(self):
+        phases = indices.get_lifecycle_policy(warm_after_days=3, retention_days=90, tiered=True)['policy']['phases']
+
+        assert(phases['warm']['min_age'] == '3d')
+        assert(phases['warm']['actions']['allocate'] == {'require': {'box_type': indices.WARM_BOX_TYPE}})
+        assert(phases['delete']['min_age'] == '90d')
+
+    def test_daily_lifecycle_policy_has_no_rollover(self):
+        phases = indices.get_lifecycle_policy(rollover=False)['policy']['phases']
+
+        assert('hot' not in phases)
+        assert('delete' not in phases)
+
+    def test_daily_lifecycle_policy_is_not_made_readonly(self):
+        daily = indices.get_lifecycle_policy(rollover=False)['policy']['phases']
+        rollover = indices.get_lifecycle_policy()['policy']['phases']
+
+        # Late events are still written to daily indices, by event timestamp
+        assert('readonly' not in daily['warm']['actions'])
+        assert('forcemerge' in daily['warm']['actions'])
+        assert('readonly' in rollover['warm']['actions'])
@@ -0,0 +1,57 @@
+import json
+import unittest
+from unittest import mock
+
+from dynamite_nsm.services.elasticsearch import install as elastic_install
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = mock.Mock()
+        self.profiler.is_installed.return_value = True
+        self.profiler.is_running.return_value = True
+        self.profiler.is_ready.side_effect = self._is_ready
+        self.health = []
+        self.bootstrap_passwords = mock.Mock(side_effect=lambda *args, **kwargs: self.calls.append('bootstrap'))
+        self.calls = []
+        patchers = [
+            mock.patch('dynamite_nsm.utilities.create_dynamite_environment_file'),
+            mock.patch.object(elastic_install.InstallManager, 'extract_archive'),
+            mock.patch.object(elastic_install.InstallManager, 'setup_transport_keystore'),
+            mock.patch.object(elastic_install.elastic_profile, 'ProcessProfiler', return_value=self.profiler),
+            mock.patch.object(elastic_install.elastic_process, 'ProcessManager'),
+            mock.patch.object(elastic_install.readiness, 'http_get', side_effect=self._http_get),
+            mock.patch.object(elastic_install.readiness.time, 'sleep'),
+            mock.patch.object(elastic_install, 'bootstrap_passwords', self.bootstrap_passwords)
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.installer = elastic_install.InstallManager('/etc/dynamite/elasticsearch/',
+                                                        '/opt/dynamite/elasticsearch/',
+                                                        '/var/log/dynamite/elasticsearch/', password='secret',
+                                                        download_elasticsearch_archive=False)
+
+    def _is_ready(self, username=None, password=None, wait_for_status='yellow'):
+        return elastic_install.readiness.elasticsearch_is_ready('localhost', 9200, username=username,
+                                                                password=password, wait_for_status=wait_for_status)
+
+    def _http_get(self, url, username=None, password=None, timeout=None):
+        assert('wait_for_status=yellow' in url)
+        self.calls.append((username, password))
+        code, status = self.health.pop(0)
+        return code, json.dumps({'status': status}) if status else None
+
+    def test_already_running_waits_for_yellow_before_bootstrapping(self):
+        # Authentication required only proves the HTTP layer is up; red means the shards are not allocated yet
+        self.health = [(401, None), (200, 'red'), (200, 'yellow')]
+
+        self.installer.setup_passwords()
+
+        assert(self.calls == [('elastic', 'secret')] * 3 + ['bootstrap'])
+
+    def test_unauthenticated_response_is_not_ready(self):
+        self.health = [(401, None)]
+
+        assert(not elastic_install.readiness.elasticsearch_is_ready('localhost', 9200))
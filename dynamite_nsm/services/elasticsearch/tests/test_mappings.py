@@ -0,0 +1,74 @@
+import re
+import unittest
+
+from dynamite_nsm.services.elasticsearch import mappings
+
+# Representative Zeek (conn, dhcp, files, dns, http, smtp) and Suricata (eve.json) fields, and the template each
+# should fall into
+FIELD_TEMPLATES = [
+    ('id.orig_h', '192.168.4.76', 'ip_addresses'),
+    ('id.resp_h', 'fe80::1', 'ip_addresses'),
+    ('orig_l2_addr', '00:16:3e:ae:43:fb', 'strings'),
+    ('resp_l2_addr', '00:16:3e:ae:43:fc', 'strings'),
+    ('client_addr', '192.168.4.76', 'ip_addresses'),
+    ('assigned_addr', '192.168.4.76', 'ip_addresses'),
+    ('mac', '00:16:3e:ae:43:fb', 'strings'),
+    ('x_originating_ip', '10.0.0.5', 'ip_addresses'),
+    ('src_ip', '192.168.4.76', 'ip_addresses'),
+    ('dest_ip', '192.168.4.1', 'ip_addresses'),
+    ('ether.src_mac', '00:16:3e:ae:43:fb', 'strings'),
+    ('ether.dest_mac', '00:16:3e:ae:43:fc', 'strings'),
+    ('uid', 'CMdzit1AMNsmfAIiQc', 'identifiers'),
+    ('orig_fuids', 'FHAsbC2Dz8ZzqwJX6', 'identifiers'),
+    ('community_id', '1:LQU9qZlK+B5F3KDmev6m5PMibrg=', 'identifiers'),
+    ('files.sha256', 'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855', 'identifiers'),
+    ('payload', 'R0VUIC8gSFRUUC8xLjE=', 'unindexed_payloads'),
+    ('payload_printable', 'GET / HTTP/1.1', 'unindexed_payloads'),
+    ('alert.signature', 'ET POLICY curl User-Agent Outbound', 'free_text'),
+    ('query', 'example.com', 'free_text'),
+    ('user_agent', 'curl/7.68.0', 'free_text'),
+    ('proto', 'udp', 'strings'),
+    ('event_type', 'alert', 'strings'),
+    ('conn_state', 'SF', 'strings'),
+    ('id.orig_p', 36844, None),
+    ('flow_id', 1184395034557916, None),
+]
+
+
+def get_template_name(field, value):
+    """
+    The first dynamic template ElasticSearch would apply to a field it has no explicit mapping for
+
+    :param field: The field name; templates are matched on the last part of a dotted name
+    :param value: The value; only strings match templates limited to match_mapping_type string
+    :return: The name of the template, or None if none of them match
+    """
+    name = field.split('.')[-1]
+    for template_name, template in mappings.DYNAMIC_TEMPLATES:
+        if template.get('match_mapping_type') == 'string' and not isinstance(value, str):
+            continue
+        if 'match' in template and not re.match(template['match'] + r'\Z', name):
+            continue
+        if 'unmatch' in template and re.match(template['unmatch'] + r'\Z', name):
+            continue
+        return template_name
+    return None
+
+
+class Tests(unittest.TestCase):
+
+    def test_fields_map_to_expected_templates(self):
+        for field, value, expected in FIELD_TEMPLATES:
+            template_name = get_template_name(field, value)
+            assert template_name == expected, '{} matched {}, not {}'.format(field, template_name, expected)
+
+    def test_l2_addresses_are_not_ip_addresses(self):
+        for field in ('orig_l2_addr', 'resp_l2_addr'):
+            assert(get_template_name(field, '00:16:3e:ae:43:fb') != 'ip_addresses')
+
+    def test_get_mappings_preserves_template_order(self):
+        dynamic_templates = mappings.get_mappings()['dynamic_templates']
+
+        assert([list(t.keys())[0] for t in dynamic_templates] == [name for name, _ in mappings.DYNAMIC_TEMPLATES])
+        # The catch-all must come last, or it would shadow every other string template
+        assert(list(dynamic_templates[-1].keys())[0] == 'strings')
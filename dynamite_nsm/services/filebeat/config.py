@@ -1,4 +1,6 @@
 import os
+import re
+import copy
 import time
 import shutil
 from yaml import load, dump
@@ -9,15 +11,81 @@ except ImportError:
     from yaml import Loader, Dumper
 
 from dynamite_nsm import utilities
+from dynamite_nsm.services.filebeat import throughput as filebeat_throughput
 from dynamite_nsm.services.filebeat import exceptions as filebeat_exceptions
 
 
+FILTER_ACTIONS = ('drop_event', 'drop_fields', 'include_fields')
+
+ZEEK_LOG_PATH_PATTERN = '/zeek/logs/.*\\.log$'
+SURICATA_LOG_PATH_PATTERN = '/eve\\.json$'
+
+# Zeek and Suricata both write one JSON document per line; field filters only touch lines that look like JSON, so that
+# a Zeek instance writing TSV logs never has its events stripped
+JSON_MESSAGE_CONDITION = {'regexp': {'message': '^\\{'}}
+
+# Field filters decode the JSON message under this field, rather than into the event root, and ship it instead of the
+# raw message; the LogStash router encodes it back into message, so ElastiFlow and Synesis parse events as before
+DECODED_MESSAGE_FIELD = 'message_decoded'
+
+
+def get_log_source_condition(log_source):
+    """
+    Build the Filebeat condition that matches the events of a log source
+
+    :param log_source: zeek, zeek:<log> (E.G zeek:conn), suricata, or suricata:<event_type> (E.G suricata:flow)
+    :return: A Filebeat condition
+    """
+    analyzer, _, name = str(log_source).partition(':')
+    if name and not re.match(r'^[a-zA-Z0-9_\-]+$', name):
+        raise filebeat_exceptions.InvalidFilterError("{} is not a valid log source.".format(log_source))
+    if analyzer == 'zeek':
+        if not name:
+            return {'regexp': {'log.file.path': ZEEK_LOG_PATH_PATTERN}}
+        return {'regexp': {'log.file.path': '/{}\\.log$'.format(name)}}
+    elif analyzer == 'suricata':
+        condition = {'regexp': {'log.file.path': SURICATA_LOG_PATH_PATTERN}}
+        if not name:
+            return condition
+        return {'and': [condition, {'contains': {'message': '"event_type":"{}"'.format(name)}}]}
+    raise filebeat_exceptions.InvalidFilterError(
+        "{} is not a valid log source; expected zeek[:<log>] or suricata[:<event_type>].".format(log_source))
+
+
+def get_log_source_from_condition(condition):
+    """
+    The inverse of get_log_source_condition
+
+    :param condition: A Filebeat condition
+    :return: The log source the condition matches (E.G zeek:conn), or None if it is not a log source condition
+    """
+    if not isinstance(condition, dict):
+        return None
+    path_pattern = condition.get('regexp', {}).get('log.file.path')
+    if path_pattern == ZEEK_LOG_PATH_PATTERN:
+        return 'zeek'
+    elif path_pattern == SURICATA_LOG_PATH_PATTERN:
+        return 'suricata'
+    elif path_pattern:
+        match = re.match(r'^/([a-zA-Z0-9_\-]+)\\\.log\$$', path_pattern)
+        return 'zeek:{}'.format(match.group(1)) if match else None
+    sub_conditions = condition.get('and', [])
+    if len(sub_conditions) > 1 and get_log_source_from_condition(sub_conditions[0]) == 'suricata':
+        match = re.match(r'^"event_type":"(.+)"$', str(sub_conditions[1].get('contains', {}).get('message')))
+        if match:
+            return 'suricata:{}'.format(match.group(1))
+    if sub_conditions:
+        return get_log_source_from_condition(sub_conditions[0])
+    return None
+
+
 class ConfigManager:
     tokens = {
         'inputs': ('filebeat.inputs',),
         'logstash_targets': ('output.logstash', ),
         'kafka_targets': ('output.kafka', ),
-        'processors': ('processors',)
+        'processors': ('processors',),
+        'queue': ('queue',)
     }
 
     def __init__(self, install_directory):
@@ -27,6 +95,7 @@ class ConfigManager:
         self.logstash_targets = {}
         self.kafka_targets = {}
         self.processors = []
+        self.queue = {}
 
         self._parse_filebeatyaml()
 
@@ -63,6 +132,110 @@ class ConfigManager:
         for var_name in vars(self).keys():
             set_instance_var_from_token(variable_name=var_name, data=self.config_data)
 
+    @staticmethod
+    def _build_filter(action, log_source, fields=None, contains=None):
+        """
+        :return: A tuple containing the filter's processor, and the decode and cleanup processors it depends on (None
+                 for drop_event filters, which match on the raw message)
+        """
+        if action not in FILTER_ACTIONS:
+            raise filebeat_exceptions.InvalidFilterError(
+                "{} is not a valid action; expected one of {}.".format(action, ', '.join(FILTER_ACTIONS)))
+        source_condition = get_log_source_condition(log_source)
+        if action == 'drop_event':
+            when = source_condition
+            if contains:
+                when = {'and': [source_condition, {'contains': {'message': contains}}]}
+            return {'drop_event': {'when': copy.deepcopy(when)}}, None, None
+        if not fields:
+            raise filebeat_exceptions.InvalidFilterError("{} requires a list of fields.".format(action))
+        # Field filters work on the decoded JSON document; the raw message is dropped once every filter of the log
+        # source has run, otherwise the stripped fields would still be shipped inside of it
+        decoded_condition = {'and': [source_condition, JSON_MESSAGE_CONDITION]}
+        when = decoded_condition
+        if contains:
+            when = {'and': [source_condition, JSON_MESSAGE_CONDITION, {'contains': {'message': contains}}]}
+        fields = ['{}.{}'.format(DECODED_MESSAGE_FIELD, field) for field in fields
+                  if field not in ('message', 'fields', 'log')]
+        if action == 'include_fields':
+            # Keep the agent tag, and the source file (used to tell the log types apart downstream)
+            fields = fields + ['message', 'fields', 'log']
+        # Each processor gets its own copy of the condition; shared objects would be written out as YAML anchors
+        decode_processor = {'decode_json_fields': {'fields': ['message'], 'target': DECODED_MESSAGE_FIELD,
+                                                   'when': copy.deepcopy(decoded_condition)}}
+        cleanup_processor = {'drop_fields': {'fields': ['message'], 'when': copy.deepcopy(decoded_condition)}}
+        return {action: {'fields': fields, 'when': copy.deepcopy(when)}}, decode_processor, cleanup_processor
+
+    def _is_field_filter_of(self, processor, decode_processor):
+        action = list(processor.keys())[0]
+        if action not in ('drop_fields', 'include_fields') or processor == self._get_cleanup_of(decode_processor):
+            return False
+        decoded_condition = decode_processor['decode_json_fields']['when']
+        return processor[action].get('when', {}).get('and', [])[:2] == decoded_condition['and']
+
+    @staticmethod
+    def _get_cleanup_of(decode_processor):
+        return {'drop_fields': {'fields': ['message'],
+                                'when': copy.deepcopy(decode_processor['decode_json_fields']['when'])}}
+
+    def _resize_throughput_profile(self, throughput_profile, current_profile, customized):
+        if throughput_profile:
+            self.apply_throughput_profile(throughput_profile)
+        elif current_profile:
+            # Worker counts and loadbalance depend on the number of targets
+            self.apply_throughput_profile(current_profile)
+        elif not customized and not self.queue:
+            self.apply_throughput_profile(filebeat_throughput.DEFAULT_THROUGHPUT_PROFILE)
+
+    def add_filter(self, action, log_source, fields=None, contains=None):
+        """
+        Filter events at the agent, before they are shipped
+
+        :param action: drop_event, drop_fields or include_fields
+        :param log_source: zeek, zeek:<log> (E.G zeek:weird), suricata, or suricata:<event_type> (E.G suricata:flow)
+        :param fields: The fields to drop or keep (drop_fields and include_fields only)
+        :param contains: Only filter events whose raw message contains this string (E.G "proto":"udp")
+        :return: True, if the filter was added; False if it already existed
+        """
+        processor, decode_processor, cleanup_processor = self._build_filter(action, log_source, fields, contains)
+        if processor in self.processors:
+            return False
+        if not decode_processor:
+            # drop_event filters run before any event is decoded, so that they can match on the raw message
+            for i, existing in enumerate(self.processors):
+                if list(existing.keys())[0] not in ('add_fields', 'drop_event'):
+                    self.processors.insert(i, processor)
+                    break
+            else:
+                self.processors.append(processor)
+            return True
+        if decode_processor not in self.processors:
+            self.processors.append(decode_processor)
+        if cleanup_processor in self.processors:
+            self.processors.remove(cleanup_processor)
+        self.processors.append(processor)
+        self.processors.append(cleanup_processor)
+        return True
+
+    def apply_throughput_profile(self, profile, cpu_count=None):
+        """
+        Tune how events are batched, queued and shipped to the Logstash/Kafka targets
+
+        :param profile: The name of a profile in throughput.THROUGHPUT_PROFILES (E.G high-throughput)
+        :param cpu_count: The number of logical CPUs to size the output workers for; detected if not given
+        """
+        logstash_settings, logstash_queue_settings = filebeat_throughput.get_throughput_settings(
+            profile, target_count=len(self.get_logstash_target_hosts()), cpu_count=cpu_count)
+        self.logstash_targets.update(logstash_settings)
+        kafka_settings, kafka_queue_settings = filebeat_throughput.get_throughput_settings(
+            profile, target_count=len(self.get_kafka_target_hosts()), cpu_count=cpu_count)
+        self.kafka_targets.update(filebeat_throughput.get_kafka_output_settings(kafka_settings))
+        # The queue is shared, and sized for the output that is enabled
+        if self.is_kafka_output_enabled():
+            self.queue = {'mem': dict(kafka_queue_settings)}
+        else:
+            self.queue = {'mem': dict(logstash_queue_settings)}
+
     def disable_kafka_output(self):
         """
         Disable Kafka; Enable Logstash
@@ -121,6 +294,40 @@ class ConfigManager:
 
         return self.logstash_targets.get('hosts', [])
 
+    def get_filters(self):
+        """
+        Get the filters configured through add_filter
+
+        :return: A list of dictionaries containing the index, action, log_source, fields and contains condition of
+                 each filter
+        """
+        filters = []
+        decode_processors = [p for p in self.processors if list(p.keys())[0] == 'decode_json_fields']
+        cleanup_processors = [self._get_cleanup_of(p) for p in decode_processors]
+        for i, processor in enumerate(self.processors):
+            action = list(processor.keys())[0]
+            if action not in FILTER_ACTIONS or processor in cleanup_processors:
+                continue
+            when = processor[action].get('when', {})
+            log_source = get_log_source_from_condition(when)
+            decoded_prefix = '{}.'.format(DECODED_MESSAGE_FIELD)
+            fields = [f[len(decoded_prefix):] if f.startswith(decoded_prefix) else f
+                      for f in processor[action].get('fields', []) if f not in ('message', 'fields', 'log')]
+            contains = None
+            try:
+                if log_source and when != self._build_filter(action, log_source, fields)[0][action]['when']:
+                    contains = when.get('and', [{}])[-1].get('contains', {}).get('message')
+            except filebeat_exceptions.InvalidFilterError:
+                pass
+            filters.append(dict(
+                index=i,
+                action=action,
+                log_source=log_source,
+                fields=fields,
+                contains=contains
+            ))
+        return filters
+
     def get_kafka_target_config(self):
         """
         Get Kafka target config object
@@ -137,6 +344,16 @@ class ConfigManager:
 
         return self.kafka_targets.get('hosts', [])
 
+    def get_output_tuning(self):
+        """
+        Get the settings that control how events are batched and shipped to the enabled output
+
+        :return: A dictionary of output settings (E.G bulk_max_size, worker, pipelining, compression_level)
+        """
+        if self.is_kafka_output_enabled():
+            return {k: v for k, v in self.kafka_targets.items() if k in filebeat_throughput.KAFKA_OUTPUT_TUNABLES}
+        return {k: v for k, v in self.logstash_targets.items() if k in filebeat_throughput.LOGSTASH_OUTPUT_TUNABLES}
+
     def get_monitor_target_paths(self):
         """
         A list of log paths to monitor
@@ -149,6 +366,45 @@ class ConfigManager:
         except (AttributeError, IndexError, KeyError):
             return None
 
+    def get_queue_config(self):
+        """
+        Get the internal queue events are buffered in before they are shipped
+
+        :return: The queue config object (E.G {'mem': {'events': 4096}}); empty if Filebeat's defaults are used
+        """
+
+        return self.queue
+
+    def get_throughput_profile(self, cpu_count=None):
+        """
+        Get the throughput profile the current output and queue settings were generated from
+
+        :param cpu_count: The number of logical CPUs the profile was sized for; detected if not given
+        :return: The name of the profile, or None if the settings were customized (or never tuned)
+        """
+        if self.is_kafka_output_enabled():
+            target_count = len(self.get_kafka_target_hosts())
+        else:
+            target_count = len(self.get_logstash_target_hosts())
+        for profile in filebeat_throughput.THROUGHPUT_PROFILES:
+            output_settings, queue_settings = filebeat_throughput.get_throughput_settings(
+                profile, target_count=target_count, cpu_count=cpu_count)
+            if self.is_kafka_output_enabled():
+                output_settings = filebeat_throughput.get_kafka_output_settings(output_settings)
+            if self.get_output_tuning() == dict(output_settings) and self.queue == {'mem': dict(queue_settings)}:
+                return profile
+        return None
+
+    def has_filter(self, action, log_source, fields=None, contains=None):
+        """
+        :param action: drop_event, drop_fields or include_fields
+        :param log_source: zeek, zeek:<log> (E.G zeek:weird), suricata, or suricata:<event_type> (E.G suricata:flow)
+        :param fields: The fields to drop or keep (drop_fields and include_fields only)
+        :param contains: Only filter events whose raw message contains this string
+        :return: True, if the filter is configured
+        """
+        return self._build_filter(action, log_source, fields, contains)[0] in self.processors
+
     def is_kafka_output_enabled(self):
         """
         Check if Kafka is enabled.
@@ -165,6 +421,40 @@ class ConfigManager:
 
         return self.logstash_targets.get('enabled', False)
 
+    def remove_filter(self, action, log_source, fields=None, contains=None):
+        """
+        Remove a filter added through add_filter
+
+        :param action: drop_event, drop_fields or include_fields
+        :param log_source: zeek, zeek:<log> (E.G zeek:weird), suricata, or suricata:<event_type> (E.G suricata:flow)
+        :param fields: The fields to drop or keep (drop_fields and include_fields only)
+        :param contains: Only filter events whose raw message contains this string
+        :return: True, if the filter was removed; False if it did not exist
+        """
+        processor = self._build_filter(action, log_source, fields, contains)[0]
+        if processor not in self.processors:
+            return False
+        self.remove_filter_at(self.processors.index(processor))
+        return True
+
+    def remove_filter_at(self, index):
+        """
+        Remove a filter by its index (see get_filters)
+
+        :param index: The index of the filter's processor
+        """
+        if index not in [f['index'] for f in self.get_filters()]:
+            raise filebeat_exceptions.InvalidFilterError("There is no filter at index {}.".format(index))
+        del self.processors[index]
+        # Drop the decode and cleanup steps of log sources that no longer have any field filters
+        for decode_processor in [p for p in self.processors if list(p.keys())[0] == 'decode_json_fields']:
+            if any([self._is_field_filter_of(p, decode_processor) for p in self.processors]):
+                continue
+            self.processors.remove(decode_processor)
+            cleanup_processor = self._get_cleanup_of(decode_processor)
+            if cleanup_processor in self.processors:
+                self.processors.remove(cleanup_processor)
+
     def set_agent_tag(self, agent_tag):
         """
         Create a tag to associate events/entities with the originating agent
@@ -180,8 +470,10 @@ class ConfigManager:
                 if list(processor.keys())[0] == 'add_fields':
                     processor['add_fields'] = {'fields': {'originating_agent_tag': agent_tag}}
                     break
+            else:
+                self.processors.insert(0, {'add_fields': {'fields': {'originating_agent_tag': agent_tag}}})
 
-    def set_kafka_targets(self, target_hosts, topic, username=None, password=None):
+    def set_kafka_targets(self, target_hosts, topic, username=None, password=None, throughput_profile=None):
         """
         Define Kafka endpoints where events should be sent
 
@@ -189,8 +481,11 @@ class ConfigManager:
         :param topic: A Kafka topic
         :param username: The username used to authenticate to Kafka broker
         :param password: The password used to authenticate to Kafka broker
+        :param throughput_profile: The throughput profile to apply (E.G wan-constrained); if not given, the current
+                                   profile is re-sized for the new targets, and customized settings are kept
         """
-
+        current_profile = self.get_throughput_profile()
+        tunables = {k: v for k, v in self.kafka_targets.items() if k in filebeat_throughput.KAFKA_OUTPUT_TUNABLES}
         self.kafka_targets = {
             'hosts': target_hosts,
             'topic': topic,
@@ -198,16 +493,44 @@ class ConfigManager:
             'password': password,
             'enabled': True
         }
+        self.kafka_targets.update(tunables)
         self.logstash_targets['enabled'] = False
+        self._resize_throughput_profile(throughput_profile, current_profile, customized=bool(tunables))
 
-    def set_logstash_targets(self, target_hosts):
+    def set_logstash_targets(self, target_hosts, throughput_profile=None):
         """
         Define LogStash endpoints where events should be sent
 
         :param target_hosts: A list of Logstash hosts, and their service port (E.G ["192.168.0.9:5044"])
+        :param throughput_profile: The throughput profile to apply (E.G high-throughput); if not given, the current
+                                   profile is re-sized for the new targets, and customized settings are kept
         """
-
+        current_profile = self.get_throughput_profile()
+        tunables = {k: v for k, v in self.logstash_targets.items()
+                    if k in filebeat_throughput.LOGSTASH_OUTPUT_TUNABLES}
         self.logstash_targets = {'hosts': target_hosts, 'enabled': True}
+        self.logstash_targets.update(tunables)
+        if tunables and not throughput_profile and not current_profile:
+            # Customized settings are kept, but with several targets events must be spread across all of them
+            self.logstash_targets['loadbalance'] = len(target_hosts) > 1
+        self._resize_throughput_profile(throughput_profile, current_profile, customized=bool(tunables))
+
+    def set_memory_queue(self, events, flush_min_events=None, flush_timeout=None):
+        """
+        Buffer events in memory before they are shipped (Filebeat's default queue)
+
+        :param events: The maximum number of events the queue can hold
+        :param flush_min_events: The minimum number of events to gather before a batch is shipped (0 ships at once)
+        :param flush_timeout: The longest time to wait for flush_min_events to be gathered (E.G 1s)
+        """
+        if not isinstance(events, int) or events < 1:
+            raise filebeat_exceptions.InvalidThroughputSettingError("The queue must hold at least one event.")
+        queue_settings = {'events': events}
+        if flush_min_events is not None:
+            queue_settings['flush.min_events'] = int(flush_min_events)
+        if flush_timeout:
+            queue_settings['flush.timeout'] = str(flush_timeout)
+        self.queue = {'mem': queue_settings}
 
     def set_monitor_target_paths(self, monitor_log_paths):
         """
@@ -228,6 +551,39 @@ class ConfigManager:
                     _input = {'type': 'log', 'enabled': True, 'paths': monitor_log_paths}
                     self.inputs[i] = _input
 
+    def set_output_tuning(self, bulk_max_size=None, worker=None, pipelining=None, compression_level=None,
+                          loadbalance=None, slow_start=None):
+        """
+        Tune how events are batched and shipped; settings that are not given are left as they are
+
+        :param bulk_max_size: The maximum number of events in a single batch
+        :param worker: The number of workers (connections) per Logstash target
+        :param pipelining: The number of batches sent to a Logstash target before waiting for an acknowledgement
+        :param compression_level: The gzip compression level (0 disables compression; 9 compresses the most)
+        :param loadbalance: If True, spread batches across all Logstash targets instead of sending to one of them
+        :param slow_start: If True, start with small batches and grow them while the Logstash target keeps up
+        """
+        output_settings = dict(bulk_max_size=bulk_max_size, worker=worker, pipelining=pipelining,
+                               compression_level=compression_level, loadbalance=loadbalance, slow_start=slow_start)
+        output_settings = {k: v for k, v in output_settings.items() if v is not None}
+        filebeat_throughput.validate_output_settings(output_settings)
+        self.logstash_targets.update(output_settings)
+        self.kafka_targets.update(filebeat_throughput.get_kafka_output_settings(output_settings))
+
+    def set_spool_queue(self, size, path=None, flush_timeout=None):
+        """
+        Buffer events in a file on disk before they are shipped, so that they survive restarts and long outages of
+        the targets (beta in Filebeat 7.2)
+
+        :param size: The maximum size of the spool file (E.G 1GiB)
+        :param path: The path of the spool file; defaults to spool.dat in Filebeat's data directory
+        :param flush_timeout: The longest time to wait before a batch is shipped (E.G 5s)
+        """
+        queue_settings = {'file': {'path': path or '${path.data}/spool.dat', 'size': str(size)}}
+        if flush_timeout:
+            queue_settings['read'] = {'flush.timeout': str(flush_timeout)}
+        self.queue = {'spool': queue_settings}
+
     @staticmethod
     def validate_agent_tag(agent_tag):
         import re
@@ -249,7 +605,6 @@ class ConfigManager:
             for i in range(0, len(path) - 1):
                 try:
                     partial_config_data = partial_config_data[path[i]]
-                    print(partial_config_data)
                 except KeyError:
                     pass
             partial_config_data.update({path[-1]: value})
@@ -82,4 +82,30 @@ class WriteFilebeatConfigError(exceptions.WriteConfigError):
         :param message: A more specific error message
         """
         msg = "An error occurred when writing filebeat.yml configuration: {}".format(message)
-        super(WriteFilebeatConfigError, self).__init__(msg)
\ No newline at end of file
+        super(WriteFilebeatConfigError, self).__init__(msg)
+
+
+class InvalidFilterError(Exception):
+    """
+    Thrown when a Filebeat filter (processor) is invalid
+    """
+
+    def __init__(self, message):
+        """
+        :param message: A more specific error message
+        """
+        msg = "Invalid Filebeat filter: {}".format(message)
+        super(InvalidFilterError, self).__init__(msg)
+
+
+class InvalidThroughputSettingError(Exception):
+    """
+    Thrown when a Filebeat output or queue setting is invalid
+    """
+
+    def __init__(self, message):
+        """
+        :param message: A more specific error message
+        """
+        msg = "Invalid Filebeat throughput setting: {}".format(message)
+        super(InvalidThroughputSettingError, self).__init__(msg)
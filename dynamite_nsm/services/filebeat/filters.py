@@ -0,0 +1,333 @@
+import os
+import re
+import glob
+import json
+import logging
+from collections import OrderedDict
+
+import tabulate
+
+from dynamite_nsm import utilities
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.filebeat import config as filebeat_config
+from dynamite_nsm.services.filebeat import exceptions as filebeat_exceptions
+
+DEFAULT_SAMPLE_SIZE = 1000
+
+# Curated filter sets; each filter is a dictionary of add_filter keyword arguments
+FILTER_PROFILES = OrderedDict([
+    ('zeek-drop-noisy', dict(
+        description="Drop weird.log and dpd.log; high volume, and rarely looked at outside of troubleshooting.",
+        filters=[
+            dict(action='drop_event', log_source='zeek:weird'),
+            dict(action='drop_event', log_source='zeek:dpd'),
+        ]
+    )),
+    ('zeek-slim-conn', dict(
+        description="Strip conn.log fields the Dynamite dashboards do not use.",
+        filters=[
+            dict(action='drop_fields', log_source='zeek:conn',
+                 fields=['local_orig', 'local_resp', 'missed_bytes', 'tunnel_parents', 'orig_l2_addr',
+                         'resp_l2_addr']),
+        ]
+    )),
+    ('suricata-drop-flow', dict(
+        description="Drop Suricata flow and netflow events; Zeek's conn.log already records every connection.",
+        filters=[
+            dict(action='drop_event', log_source='suricata:flow'),
+            dict(action='drop_event', log_source='suricata:netflow'),
+        ]
+    )),
+    ('suricata-drop-stats', dict(
+        description="Drop Suricata's periodic engine stats events.",
+        filters=[
+            dict(action='drop_event', log_source='suricata:stats'),
+        ]
+    )),
+])
+
+
+def _get_path(event, field):
+    # Zeek field names contain dots (E.G message_decoded.id.orig_h); at each level, look for the literal key before
+    # walking nested objects
+    if field in event:
+        return [field]
+    keys = field.split('.')
+    for i in range(1, len(keys)):
+        head = '.'.join(keys[:i])
+        if isinstance(event.get(head), dict):
+            path = _get_path(event[head], '.'.join(keys[i:]))
+            if path:
+                return [head] + path
+    return None
+
+
+def _get_field(event, field):
+    path = _get_path(event, field)
+    if not path:
+        return False, None
+    value = event
+    for key in path:
+        value = value[key]
+    return True, value
+
+
+def _delete_field(event, field):
+    path = _get_path(event, field)
+    if not path:
+        return
+    value = event
+    for key in path[:-1]:
+        value = value[key]
+    del value[path[-1]]
+
+
+def matches_condition(event, condition):
+    """
+    Evaluate a Filebeat condition against an event (equals, contains, regexp, has_fields, and, or, not)
+
+    :param event: A dictionary representing the event
+    :param condition: A Filebeat condition
+    :return: True, if the event matches
+    """
+    if not condition:
+        return True
+    for operator, operand in condition.items():
+        if operator == 'and':
+            if not all([matches_condition(event, c) for c in operand]):
+                return False
+        elif operator == 'or':
+            if not any([matches_condition(event, c) for c in operand]):
+                return False
+        elif operator == 'not':
+            if matches_condition(event, operand):
+                return False
+        elif operator == 'has_fields':
+            if not all([_get_field(event, field)[0] for field in operand]):
+                return False
+        elif operator in ('equals', 'contains', 'regexp'):
+            for field, expected in operand.items():
+                found, value = _get_field(event, field)
+                if not found:
+                    return False
+                if operator == 'equals' and value != expected:
+                    return False
+                elif operator == 'contains' and str(expected) not in str(value):
+                    return False
+                elif operator == 'regexp' and not re.search(expected, str(value)):
+                    return False
+        else:
+            # Conditions we cannot evaluate (E.G range, network) never match
+            return False
+    return True
+
+
+def apply_processors(event, processors):
+    """
+    Run an event through the filtering processors the way Filebeat would
+
+    :param event: A dictionary representing the event; modified in place
+    :param processors: A list of Filebeat processors
+    :return: The event, or None if it was dropped
+    """
+    for processor in processors:
+        action, options = list(processor.items())[0]
+        options = options or {}
+        if not matches_condition(event, options.get('when')):
+            continue
+        if action == 'drop_event':
+            return None
+        elif action == 'decode_json_fields':
+            for field in options.get('fields', []):
+                try:
+                    decoded = json.loads(_get_field(event, field)[1])
+                except (TypeError, ValueError):
+                    continue
+                if isinstance(decoded, dict):
+                    if options.get('target'):
+                        event[options['target']] = decoded
+                    else:
+                        event.update(decoded)
+        elif action == 'drop_fields':
+            for field in options.get('fields', []):
+                _delete_field(event, field)
+        elif action == 'include_fields':
+            kept = {}
+            for field in options.get('fields', []):
+                path = _get_path(event, field)
+                if not path:
+                    continue
+                value, kept_value = event, kept
+                for key in path[:-1]:
+                    value = value[key]
+                    kept_value = kept_value.setdefault(key, {})
+                kept_value[path[-1]] = value[path[-1]]
+            event.clear()
+            event.update(kept)
+    return event
+
+
+def get_event_size(event):
+    """
+    :param event: A dictionary representing the event (or None if it was dropped)
+    :return: The approximate number of bytes the event adds to the shipped payload
+    """
+    if event is None:
+        return 0
+    event = dict(event)
+    # Filebeat metadata (log.file.path, agent, host...) is the same whether or not the event was filtered
+    event.pop('log', None)
+    if list(event.keys()) == ['message']:
+        return len(event['message'])
+    return len(json.dumps(event, separators=(',', ':')))
+
+
+def estimate_savings(filebeat_configuration, sample_size=DEFAULT_SAMPLE_SIZE, processors=None):
+    """
+    Estimate the share of bytes the configured filters remove, from the most recent lines of each monitored log
+
+    :param filebeat_configuration: A filebeat_config.ConfigManager instance
+    :param sample_size: The number of lines to sample from the end of each log file
+    :param processors: The processors to evaluate; defaults to those currently configured
+    :return: An OrderedDict mapping each log file to a dictionary containing the number of sampled events, and their
+             size in bytes before and after filtering
+    """
+    if processors is None:
+        processors = filebeat_configuration.processors
+    results = OrderedDict()
+    for pattern in filebeat_configuration.get_monitor_target_paths() or []:
+        for path in sorted(glob.glob(pattern)):
+            if not os.path.isfile(path):
+                continue
+            try:
+                lines = utilities.tail_file(path, n=sample_size)
+            except (IOError, OSError, UnicodeDecodeError):
+                continue
+            before = after = events = 0
+            for line in lines:
+                line = line.rstrip('\n')
+                if not line or line.startswith('#'):
+                    continue
+                events += 1
+                before += len(line)
+                after += get_event_size(apply_processors({'log': {'file': {'path': path}}, 'message': line},
+                                                         processors))
+            results[path] = dict(events=events, before=before, after=after)
+    return results
+
+
+def format_savings(results):
+    """
+    :param results: The output of estimate_savings
+    :return: A table describing the estimated savings of each log file
+    """
+    rows = []
+    total_before = total_after = 0
+    for path, result in results.items():
+        if not result['events']:
+            continue
+        total_before += result['before']
+        total_after += result['after']
+        rows.append([os.path.basename(path), result['events'], result['before'], result['after'],
+                     '{:.1f}%'.format(100.0 * (result['before'] - result['after']) / max(1, result['before']))])
+    rows.append(['TOTAL', sum([r['events'] for r in results.values()]), total_before, total_after,
+                 '{:.1f}%'.format(100.0 * (total_before - total_after) / max(1, total_before))])
+    return tabulate.tabulate(rows, headers=['Log', 'Sampled Events', 'Bytes Before', 'Bytes After', 'Saved'],
+                             tablefmt='fancy_grid')
+
+
+def apply_filter_profile(filebeat_configuration, profile_name):
+    """
+    :param filebeat_configuration: A filebeat_config.ConfigManager instance
+    :param profile_name: The name of a profile in FILTER_PROFILES
+    :return: The number of filters that were added
+    """
+    if profile_name not in FILTER_PROFILES:
+        raise filebeat_exceptions.InvalidFilterError("{} is not a valid profile; expected one of {}.".format(
+            profile_name, ', '.join(FILTER_PROFILES)))
+    return len([f for f in FILTER_PROFILES[profile_name]['filters'] if filebeat_configuration.add_filter(**f)])
+
+
+def remove_filter_profile(filebeat_configuration, profile_name):
+    """
+    :param filebeat_configuration: A filebeat_config.ConfigManager instance
+    :param profile_name: The name of a profile in FILTER_PROFILES
+    :return: The number of filters that were removed
+    """
+    if profile_name not in FILTER_PROFILES:
+        raise filebeat_exceptions.InvalidFilterError("{} is not a valid profile; expected one of {}.".format(
+            profile_name, ', '.join(FILTER_PROFILES)))
+    return len([f for f in FILTER_PROFILES[profile_name]['filters'] if filebeat_configuration.remove_filter(**f)])
+
+
+def is_filter_profile_applied(filebeat_configuration, profile_name):
+    """
+    :param filebeat_configuration: A filebeat_config.ConfigManager instance
+    :param profile_name: The name of a profile in FILTER_PROFILES
+    :return: True, if every filter of the profile is configured
+    """
+    return all([filebeat_configuration.has_filter(**f) for f in FILTER_PROFILES[profile_name]['filters']])
+
+
+def manage_filters(action='list', profile=None, log_source=None, filter_action=None, fields=None, contains=None,
+                   index=None, sample_size=DEFAULT_SAMPLE_SIZE, install_directory=None, stdout=True, verbose=False):
+    """
+    List, add or remove agent-side filters and profiles, or estimate what they save
+
+    :param action: list, profiles, add, remove, apply-profile, remove-profile or estimate
+    :param profile: The profile to apply/remove, or to estimate the savings of
+    :param log_source: The log source to filter (add/remove) (E.G zeek:weird)
+    :param filter_action: drop_event, drop_fields or include_fields (add/remove)
+    :param fields: The fields to drop or keep (add/remove)
+    :param contains: Only filter events whose raw message contains this string (add/remove)
+    :param index: The index of the filter to remove (as shown by list)
+    :param sample_size: The number of lines to sample from the end of each log file (estimate)
+    :param install_directory: Path to the Filebeat install directory (E.G /opt/dynamite/filebeat/)
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: A table, or a summary of the changes made
+    """
+    log_level = logging.INFO
+    if verbose:
+        log_level = logging.DEBUG
+    logger = get_logger('FILEBEAT', level=log_level, stdout=stdout)
+    install_directory = install_directory or utilities.get_environment_file_dict().get('FILEBEAT_HOME')
+    if not install_directory:
+        raise filebeat_exceptions.ReadFilebeatConfigError("Filebeat is not installed.")
+    filebeat_configuration = filebeat_config.ConfigManager(install_directory)
+    if action == 'list':
+        rows = [[f['index'], f['action'], f['log_source'], ', '.join(f['fields']), f['contains']]
+                for f in filebeat_configuration.get_filters()]
+        return tabulate.tabulate(rows, headers=['Index', 'Action', 'Log Source', 'Fields', 'Contains'],
+                                 tablefmt='fancy_grid')
+    elif action == 'profiles':
+        rows = [[name, is_filter_profile_applied(filebeat_configuration, name), p['description']]
+                for name, p in FILTER_PROFILES.items()]
+        return tabulate.tabulate(rows, headers=['Profile', 'Applied', 'Description'], tablefmt='fancy_grid')
+    elif action == 'estimate':
+        processors = None
+        if profile:
+            # Estimate a profile that has not been applied yet, on top of the current filters
+            apply_filter_profile(filebeat_configuration, profile)
+            processors = filebeat_configuration.processors
+        return format_savings(estimate_savings(filebeat_configuration, sample_size=sample_size,
+                                               processors=processors))
+    if action == 'add':
+        changed = int(filebeat_configuration.add_filter(filter_action, log_source, fields=fields, contains=contains))
+    elif action == 'remove':
+        if index is not None:
+            filebeat_configuration.remove_filter_at(index)
+            changed = 1
+        else:
+            changed = int(filebeat_configuration.remove_filter(filter_action, log_source, fields=fields,
+                                                               contains=contains))
+    elif action == 'apply-profile':
+        changed = apply_filter_profile(filebeat_configuration, profile)
+    elif action == 'remove-profile':
+        changed = remove_filter_profile(filebeat_configuration, profile)
+    else:
+        raise filebeat_exceptions.InvalidFilterError("{} is not a valid action.".format(action))
+    if changed:
+        filebeat_configuration.write_config()
+        logger.info("Filebeat filters updated; restart the agent for the changes to take effect.")
+    return "{} filter(s) changed.".format(changed)
@@ -4,7 +4,6 @@ import sys
 import time
 import shutil
 import logging
-import subprocess
 
 try:
     from yaml import CLoader as Loader, CDumper as Dumper
@@ -20,13 +19,15 @@ from dynamite_nsm import exceptions as general_exceptions
 from dynamite_nsm.services.filebeat import config as filebeat_configs
 from dynamite_nsm.services.filebeat import profile as filebeat_profile
 from dynamite_nsm.services.filebeat import process as filebeat_process
+from dynamite_nsm.services.filebeat import throughput as filebeat_throughput
 from dynamite_nsm.services.filebeat import exceptions as filebeat_exceptions
 
 
 class InstallManager(install.BaseInstallManager):
 
     def __init__(self, install_directory, monitor_log_paths, targets, kafka_topic=None, kafka_username=None,
-                 kafka_password=None, agent_tag=None, download_filebeat_archive=True, stdout=True, verbose=False):
+                 kafka_password=None, agent_tag=None, download_filebeat_archive=True, stdout=True, verbose=False,
+                 throughput_profile=None):
         """
         Install Filebeat
 
@@ -40,6 +41,7 @@ class InstallManager(install.BaseInstallManager):
         :param download_filebeat_archive: If True, download the Filebeat archive from a mirror
         :param stdout: Print the output to console
         :param verbose: Include detailed debug messages
+        :param throughput_profile: The output/queue throughput profile (E.G high-throughput); defaults to balanced
         """
 
         self.monitor_paths = list(monitor_log_paths)
@@ -51,6 +53,7 @@ class InstallManager(install.BaseInstallManager):
         self.stdout = stdout
         self.verbose = verbose
         self.agent_tag = agent_tag
+        self.throughput_profile = throughput_profile or filebeat_throughput.DEFAULT_THROUGHPUT_PROFILE
         install.BaseInstallManager.__init__(self, 'filebeat', verbose=self.verbose, stdout=stdout)
         if download_filebeat_archive:
             try:
@@ -86,6 +89,10 @@ class InstallManager(install.BaseInstallManager):
             self.logger.error("Invalid Targets specified: {}.".format(targets))
             raise filebeat_exceptions.InstallFilebeatError(
                 "Invalid Targets specified: {}.".format(targets))
+        if self.throughput_profile not in filebeat_throughput.THROUGHPUT_PROFILES:
+            self.logger.error("Invalid throughput profile specified: {}.".format(self.throughput_profile))
+            raise filebeat_exceptions.InstallFilebeatError(
+                "Invalid throughput profile specified: {}.".format(self.throughput_profile))
 
     @staticmethod
     def validate_targets(targets, stdout=True, verbose=False):
@@ -124,7 +131,6 @@ class InstallManager(install.BaseInstallManager):
         Creates necessary directory structure, and copies required files, generates a default configuration
         """
 
-        env_file = os.path.join(const.CONFIG_PATH, 'environment')
         self.logger.info('Creating FileBeat install directory.')
         utilities.makedirs(self.install_directory, exist_ok=True)
         self.logger.info('Copying FileBeat to install directory.')
@@ -155,16 +161,19 @@ class InstallManager(install.BaseInstallManager):
                 "You have enabled the Agent's Kafka output which does integrate natively with Dynamite "
                 "Monitor/LogStash component. You will have to bring your own broker. Happy Hacking!")
             time.sleep(2)
-            beats_config.set_kafka_targets(target_hosts=self.targets, topic=self.kafka_topic,
-                                           username=self.kafka_username, password=self.kafka_password)
             # setup example upstream LogStash example, just in case you want to configure later
             beats_config.set_logstash_targets(target_hosts=['localhost:5601'])
+            beats_config.set_kafka_targets(target_hosts=self.targets, topic=self.kafka_topic,
+                                           username=self.kafka_username, password=self.kafka_password,
+                                           throughput_profile=self.throughput_profile)
             beats_config.enable_kafka_output()
         else:
             # setup example upstream Kafka example, just in case you want to configure later
             beats_config.set_kafka_targets(target_hosts=['localhost:9092'], topic='dynamite-nsm-events')
             beats_config.enable_logstash_output()
-            beats_config.set_logstash_targets(self.targets)
+            beats_config.set_logstash_targets(self.targets, throughput_profile=self.throughput_profile)
+        self.logger.info("Applied the {} throughput profile: {}; queue: {}.".format(
+            self.throughput_profile, beats_config.get_output_tuning(), beats_config.get_queue_config()))
         try:
             beats_config.write_config()
         except filebeat_exceptions.WriteFilebeatConfigError:
@@ -178,11 +187,13 @@ class InstallManager(install.BaseInstallManager):
             self.logger.debug("Failed to set permissions of filebeat.yml file; {}".format(e))
             filebeat_exceptions.InstallFilebeatError("Failed to set permissions of filebeat.yml file; {}".format(e))
         try:
-            with open(env_file) as env_f:
-                if 'FILEBEAT_HOME' not in env_f.read():
-                    self.logger.info('Updating FileBeat default script path [{}]'.format(self.install_directory))
-                    subprocess.call('echo FILEBEAT_HOME="{}" >> {}'.format(self.install_directory, env_file),
-                                    shell=True)
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'FILEBEAT_HOME' not in env_dict:
+                self.logger.info('Updating FileBeat default script path [{}]'.format(self.install_directory))
+                new_variables['FILEBEAT_HOME'] = self.install_directory
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except Exception as e:
             self.logger.error("General error occurred while attempting to install FileBeat.")
             self.logger.debug("General error occurred while attempting to install FileBeat; {}".format(e))
@@ -199,8 +210,8 @@ class InstallManager(install.BaseInstallManager):
 
 
 def install_filebeat(install_directory, monitor_log_paths, targets, kafka_topic=None, kafka_username=None,
-                     kafka_password=None, agent_tag=None, download_filebeat_archive=True,
-                     stdout=True, verbose=False):
+                     kafka_password=None, agent_tag=None, download_filebeat_archive=True, stdout=True, verbose=False,
+                     throughput_profile=None):
     """
     Install Filebeat
 
@@ -214,6 +225,7 @@ def install_filebeat(install_directory, monitor_log_paths, targets, kafka_topic=
     :param download_filebeat_archive: If True, download the Filebeat archive from a mirror
     :param stdout: Print the output to console
     :param verbose: Include detailed debug messages
+    :param throughput_profile: The output/queue throughput profile (E.G high-throughput); defaults to balanced
     """
     log_level = logging.INFO
     if verbose:
@@ -228,7 +240,7 @@ def install_filebeat(install_directory, monitor_log_paths, targets, kafka_topic=
                                         targets=targets, kafka_topic=kafka_topic, kafka_username=kafka_username,
                                         kafka_password=kafka_password, agent_tag=agent_tag,
                                         download_filebeat_archive=download_filebeat_archive, stdout=stdout,
-                                        verbose=verbose)
+                                        verbose=verbose, throughput_profile=throughput_profile)
     filebeat_installer.setup_filebeat()
 
 
@@ -246,7 +258,6 @@ def uninstall_filebeat(prompt_user=True, stdout=True, verbose=False):
         log_level = logging.DEBUG
     logger = get_logger('FILEBEAT', level=log_level, stdout=stdout)
     logger.info("Uninstalling FileBeat.")
-    env_file = os.path.join(const.CONFIG_PATH, 'environment')
     environment_variables = utilities.get_environment_file_dict()
     filebeat_profiler = filebeat_profile.ProcessProfiler()
     if prompt_user:
@@ -267,16 +278,7 @@ def uninstall_filebeat(prompt_user=True, stdout=True, verbose=False):
             raise filebeat_exceptions.UninstallFilebeatError('Could not kill Filebeat process; {}'.format(e))
     install_directory = environment_variables.get('FILEBEAT_HOME')
     try:
-        with open(env_file) as env_fr:
-            env_lines = ''
-            for line in env_fr.readlines():
-                if 'FILEBEAT_HOME' in line:
-                    continue
-                elif line.strip() == '':
-                    continue
-                env_lines += line.strip() + '\n'
-        with open(env_file, 'w') as env_fw:
-            env_fw.write(env_lines)
+        utilities.remove_from_environment_file('FILEBEAT_HOME')
         if filebeat_profiler.is_installed():
             shutil.rmtree(install_directory, ignore_errors=True)
     except Exception as e:
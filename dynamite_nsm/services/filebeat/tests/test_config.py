@@ -0,0 +1,175 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from dynamite_nsm.services.filebeat import config
+from dynamite_nsm.services.filebeat import filters
+from dynamite_nsm.services.logstash import pipelines
+from dynamite_nsm.services.filebeat import exceptions as filebeat_exceptions
+
+ZEEK_CONN_PATH = '/opt/dynamite/zeek/logs/current/conn.log'
+SURICATA_EVE_PATH = '/var/log/suricata/eve.json'
+
+ZEEK_CONN_JSON = json.dumps({'ts': 1591367999.305988, 'uid': 'CMdzit1AMNsmfAIiQc', 'id.orig_h': '192.168.4.76',
+                             'id.orig_p': 36844, 'id.resp_h': '192.168.4.1', 'id.resp_p': 53, 'proto': 'udp',
+                             'missed_bytes': 0, 'tunnel_parents': [], 'orig_l2_addr': '00:16:3e:ae:43:fb'})
+ZEEK_CONN_TSV = '\t'.join(['1591367999.305988', 'CMdzit1AMNsmfAIiQc', '192.168.4.76', '36844', '192.168.4.1', '53',
+                           'udp', '0', '(empty)', '00:16:3e:ae:43:fb'])
+
+
+def create_dummy_filebeatyaml(install_directory):
+    example_config_string = \
+        '''
+filebeat.inputs:
+- type: log
+  enabled: true
+  paths:
+  - /opt/dynamite/zeek/logs/current/*.log
+  - /var/log/suricata/eve.json
+output.logstash:
+  hosts:
+  - localhost:5044
+  enabled: true
+processors:
+- add_fields:
+    fields:
+      originating_agent_tag: test_agent
+        '''
+    with open(os.path.join(install_directory, 'filebeat.yml'), 'w') as f:
+        f.write(example_config_string)
+
+
+def create_event(path, message):
+    return {'log': {'file': {'path': path}}, 'fields': {'originating_agent_tag': 'test_agent'}, 'message': message}
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.install_directory = tempfile.mkdtemp()
+        create_dummy_filebeatyaml(self.install_directory)
+        self.config_manager = config.ConfigManager(self.install_directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.install_directory)
+
+    def test_add_filter_round_trip(self):
+        self.config_manager.add_filter('drop_event', 'zeek:weird')
+        self.config_manager.add_filter('drop_fields', 'zeek:conn', fields=['missed_bytes', 'tunnel_parents'])
+        self.config_manager.add_filter('drop_event', 'suricata:flow', contains='"proto":"UDP"')
+        self.config_manager.write_config()
+
+        config_manager_read = config.ConfigManager(self.install_directory)
+        found = [(f['action'], f['log_source'], f['fields'], f['contains'])
+                 for f in config_manager_read.get_filters()]
+
+        assert(('drop_event', 'zeek:weird', [], None) in found)
+        assert(('drop_fields', 'zeek:conn', ['missed_bytes', 'tunnel_parents'], None) in found)
+        assert(('drop_event', 'suricata:flow', [], '"proto":"UDP"') in found)
+        assert(len(found) == 3)
+        assert(config_manager_read.get_agent_tag() == 'test_agent')
+
+    def test_drop_event_runs_before_decode(self):
+        self.config_manager.add_filter('drop_fields', 'zeek:conn', fields=['missed_bytes'])
+        self.config_manager.add_filter('drop_event', 'zeek:weird')
+
+        actions = [list(p.keys())[0] for p in self.config_manager.processors]
+
+        assert(actions == ['add_fields', 'drop_event', 'decode_json_fields', 'drop_fields', 'drop_fields'])
+
+    def test_remove_last_field_filter_removes_decode_and_cleanup(self):
+        self.config_manager.add_filter('drop_fields', 'zeek:conn', fields=['missed_bytes'])
+        self.config_manager.add_filter('include_fields', 'zeek:conn', fields=['id.orig_h', 'id.resp_h'],
+                                       contains='"proto":"tcp"')
+        self.config_manager.add_filter('drop_event', 'zeek:weird')
+        self.config_manager.write_config()
+        config_manager_read = config.ConfigManager(self.install_directory)
+
+        field_filters = [f for f in config_manager_read.get_filters() if f['log_source'] == 'zeek:conn']
+        config_manager_read.remove_filter_at(field_filters[0]['index'])
+        actions = [list(p.keys())[0] for p in config_manager_read.processors]
+
+        # The remaining field filter of zeek:conn still needs the message decoded, and dropped afterwards
+        assert(actions == ['add_fields', 'drop_event', 'decode_json_fields', 'include_fields', 'drop_fields'])
+
+        config_manager_read.remove_filter_at(config_manager_read.get_filters()[-1]['index'])
+        config_manager_read.write_config()
+        actions = [list(p.keys())[0] for p in config.ConfigManager(self.install_directory).processors]
+
+        assert(actions == ['add_fields', 'drop_event'])
+
+    def test_remove_filter_at_invalid_index(self):
+        self.config_manager.add_filter('drop_fields', 'zeek:conn', fields=['missed_bytes'])
+        decode_index = [list(p.keys())[0] for p in self.config_manager.processors].index('decode_json_fields')
+
+        with self.assertRaises(filebeat_exceptions.InvalidFilterError):
+            self.config_manager.remove_filter_at(decode_index)
+        with self.assertRaises(filebeat_exceptions.InvalidFilterError):
+            self.config_manager.remove_filter_at(0)
+
+    def test_log_source_condition_inverse(self):
+        for log_source in ('zeek', 'zeek:conn', 'zeek:known_services', 'suricata', 'suricata:flow',
+                           'suricata:tls'):
+            condition = config.get_log_source_condition(log_source)
+
+            assert(config.get_log_source_from_condition(condition) == log_source)
+            # Filters that narrow the log source down further still resolve to it
+            narrowed = {'and': [condition, config.JSON_MESSAGE_CONDITION, {'contains': {'message': 'x'}}]}
+            assert(config.get_log_source_from_condition(narrowed) == log_source)
+
+        assert(config.get_log_source_from_condition(config.JSON_MESSAGE_CONDITION) is None)
+        assert(config.get_log_source_from_condition(None) is None)
+
+    def test_apply_processors_zeek_json(self):
+        self.config_manager.add_filter('drop_fields', 'zeek:conn', fields=['missed_bytes', 'tunnel_parents'])
+
+        event = filters.apply_processors(create_event(ZEEK_CONN_PATH, ZEEK_CONN_JSON),
+                                         self.config_manager.processors)
+
+        decoded = event[config.DECODED_MESSAGE_FIELD]
+        assert(decoded['id.orig_h'] == '192.168.4.76')
+        assert('missed_bytes' not in decoded and 'tunnel_parents' not in decoded)
+        # The raw message would still carry the dropped fields
+        assert('message' not in event)
+        assert(event['fields']['originating_agent_tag'] == 'test_agent')
+
+    def test_filtered_message_restored_by_logstash_router(self):
+        self.config_manager.add_filter('drop_fields', 'zeek:conn', fields=['missed_bytes', 'tunnel_parents'])
+        self.config_manager.add_filter('include_fields', 'zeek:conn', fields=['ts', 'uid', 'id.orig_h', 'proto'])
+        event = filters.apply_processors(create_event(ZEEK_CONN_PATH, ZEEK_CONN_JSON),
+                                         self.config_manager.processors)
+
+        # What the router's ruby filter does, before ElastiFlow parses the message as usual
+        router_config = pipelines.get_router_config([(None, pipelines.ZEEK_PIPELINE_ID)])
+        assert("event.remove('{}')".format(config.DECODED_MESSAGE_FIELD) in router_config)
+        event['message'] = json.dumps(event.pop(config.DECODED_MESSAGE_FIELD))
+
+        expected = dict([(k, v) for k, v in json.loads(ZEEK_CONN_JSON).items() if k in ('ts', 'uid', 'id.orig_h',
+                                                                                         'proto')])
+        assert(json.loads(event['message']) == expected)
+        assert(event['log']['file']['path'] == ZEEK_CONN_PATH)
+        assert(event['fields']['originating_agent_tag'] == 'test_agent')
+
+    def test_apply_processors_zeek_tsv(self):
+        self.config_manager.add_filter('drop_fields', 'zeek:conn', fields=['missed_bytes', 'tunnel_parents'])
+        self.config_manager.add_filter('include_fields', 'zeek:conn', fields=['id.orig_h'])
+
+        event = filters.apply_processors(create_event(ZEEK_CONN_PATH, ZEEK_CONN_TSV),
+                                         self.config_manager.processors)
+
+        assert(event['message'] == ZEEK_CONN_TSV)
+        assert(event['log']['file']['path'] == ZEEK_CONN_PATH)
+
+    def test_apply_processors_drop_event(self):
+        self.config_manager.add_filter('drop_event', 'suricata:flow')
+        flow = json.dumps({'event_type': 'flow', 'src_ip': '192.168.4.76'}, separators=(',', ':'))
+        alert = json.dumps({'event_type': 'alert', 'src_ip': '192.168.4.76'}, separators=(',', ':'))
+
+        assert(filters.apply_processors(create_event(SURICATA_EVE_PATH, flow), self.config_manager.processors)
+               is None)
+        assert(filters.apply_processors(create_event(SURICATA_EVE_PATH, alert), self.config_manager.processors)
+               is not None)
+        assert(filters.apply_processors(create_event(ZEEK_CONN_PATH, ZEEK_CONN_JSON), self.config_manager.processors)
+               is not None)
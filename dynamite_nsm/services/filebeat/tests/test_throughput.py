@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from dynamite_nsm.services.filebeat import config
+from dynamite_nsm.services.filebeat import throughput
+from dynamite_nsm.services.filebeat import exceptions as filebeat_exceptions
+from dynamite_nsm.services.filebeat.tests.test_config import create_dummy_filebeatyaml
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.install_directory = tempfile.mkdtemp()
+        create_dummy_filebeatyaml(self.install_directory)
+        # Profiles applied without an explicit cpu_count are sized for this host
+        patcher = mock.patch('psutil.cpu_count', return_value=16)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.config_manager = config.ConfigManager(self.install_directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.install_directory)
+
+    def test_workers_split_across_targets(self):
+        # high-throughput may use half of 16 CPUs; 8 workers for one target, 2 each for four
+        single, _ = throughput.get_throughput_settings('high-throughput', target_count=1, cpu_count=16)
+        several, _ = throughput.get_throughput_settings('high-throughput', target_count=4, cpu_count=16)
+        many, _ = throughput.get_throughput_settings('high-throughput', target_count=32, cpu_count=16)
+
+        assert(single['worker'] == 8)
+        assert(several['worker'] == 2)
+        assert(many['worker'] == 1)
+
+    def test_workers_capped_by_profile(self):
+        output_settings, _ = throughput.get_throughput_settings('balanced', target_count=1, cpu_count=64)
+
+        assert(output_settings['worker'] == throughput.THROUGHPUT_PROFILES['balanced']['max_workers'])
+
+    def test_queue_holds_batches_for_every_connection(self):
+        _, queue_settings = throughput.get_throughput_settings('high-throughput', target_count=2, cpu_count=16)
+        _, low_latency_queue = throughput.get_throughput_settings('low-latency', target_count=1, cpu_count=2)
+        _, wan_queue = throughput.get_throughput_settings('wan-constrained', target_count=1, cpu_count=2)
+
+        # 4 workers x 2 targets x 4 pipelined batches, twice over
+        assert(queue_settings['events'] == 2 * 4 * 2 * 4 * 4096)
+        assert(queue_settings['flush.min_events'] == 4096)
+        assert(low_latency_queue['events'] == throughput.MIN_QUEUE_EVENTS)
+        assert('flush.timeout' not in low_latency_queue)
+        assert(wan_queue['events'] == throughput.WAN_QUEUE_EVENTS)
+
+    def test_loadbalance_only_with_several_targets(self):
+        single, _ = throughput.get_throughput_settings('balanced', target_count=1, cpu_count=16)
+        several, _ = throughput.get_throughput_settings('balanced', target_count=2, cpu_count=16)
+
+        assert(single['loadbalance'] is False)
+        assert(several['loadbalance'] is True)
+
+    def test_invalid_profile(self):
+        with self.assertRaises(filebeat_exceptions.InvalidThroughputSettingError):
+            throughput.get_throughput_settings('fastest')
+
+    def test_throughput_profile_stable_across_set_logstash_targets(self):
+        self.config_manager.apply_throughput_profile('high-throughput')
+        assert(self.config_manager.get_throughput_profile() == 'high-throughput')
+
+        self.config_manager.set_logstash_targets(['10.0.0.1:5044', '10.0.0.2:5044', '10.0.0.3:5044', '10.0.0.4:5044'])
+        self.config_manager.write_config()
+        config_manager_read = config.ConfigManager(self.install_directory)
+
+        assert(config_manager_read.get_throughput_profile() == 'high-throughput')
+        assert(config_manager_read.get_output_tuning()['worker'] == 2)
+        assert(config_manager_read.get_output_tuning()['loadbalance'] is True)
+
+        config_manager_read.set_logstash_targets(['10.0.0.1:5044'])
+
+        assert(config_manager_read.get_throughput_profile() == 'high-throughput')
+        assert(config_manager_read.get_output_tuning()['worker'] == 8)
+        assert(config_manager_read.get_output_tuning()['loadbalance'] is False)
+
+    def test_customized_settings_kept_across_set_logstash_targets(self):
+        self.config_manager.apply_throughput_profile('balanced')
+        self.config_manager.set_output_tuning(worker=3)
+        assert(self.config_manager.get_throughput_profile() is None)
+
+        self.config_manager.set_logstash_targets(['10.0.0.1:5044', '10.0.0.2:5044'])
+
+        assert(self.config_manager.get_throughput_profile() is None)
+        assert(self.config_manager.get_output_tuning()['worker'] == 3)
+        assert(self.config_manager.get_output_tuning()['loadbalance'] is True)
@@ -0,0 +1,154 @@
+from collections import OrderedDict
+
+import psutil
+
+from dynamite_nsm.services.filebeat import exceptions as filebeat_exceptions
+
+DEFAULT_THROUGHPUT_PROFILE = 'balanced'
+
+# Settings of output.logstash that control how events are batched and shipped
+LOGSTASH_OUTPUT_TUNABLES = ('bulk_max_size', 'worker', 'pipelining', 'compression_level', 'loadbalance', 'slow_start')
+
+# output.kafka balances across brokers (partitions) on its own, and has no worker or pipelining settings
+KAFKA_OUTPUT_TUNABLES = ('bulk_max_size', 'compression', 'compression_level')
+
+# Named output and queue settings; cpu_share is the share of CPU cores the output workers may use, as Zeek and
+# Suricata need the rest
+THROUGHPUT_PROFILES = OrderedDict([
+    ('low-latency', dict(
+        description="Ship every event as soon as it is read, in small synchronous batches.",
+        bulk_max_size=512,
+        pipelining=0,
+        compression_level=0,
+        cpu_share=0.125,
+        max_workers=2,
+        queue_min_events=0,
+        queue_flush_timeout=None,
+        slow_start=False
+    )),
+    ('balanced', dict(
+        description="Filebeat's defaults, with enough workers to keep every target busy.",
+        bulk_max_size=2048,
+        pipelining=2,
+        compression_level=3,
+        cpu_share=0.25,
+        max_workers=4,
+        queue_min_events=512,
+        queue_flush_timeout='1s',
+        slow_start=False
+    )),
+    ('high-throughput', dict(
+        description="Large, pipelined batches across several workers per target; cheap compression.",
+        bulk_max_size=4096,
+        pipelining=4,
+        compression_level=1,
+        cpu_share=0.5,
+        max_workers=8,
+        queue_min_events=4096,
+        queue_flush_timeout='1s',
+        slow_start=False
+    )),
+    ('wan-constrained', dict(
+        description="Maximum compression and a deep queue to ride out a slow or lossy link to the monitor.",
+        bulk_max_size=2048,
+        pipelining=4,
+        compression_level=9,
+        cpu_share=0.125,
+        max_workers=1,
+        queue_min_events=2048,
+        queue_flush_timeout='5s',
+        slow_start=True
+    )),
+])
+
+# The memory queue should hold at least this many full batches for every connection Filebeat has open
+QUEUE_BATCHES_PER_CONNECTION = 2
+MIN_QUEUE_EVENTS = 4096
+WAN_QUEUE_EVENTS = 65536
+
+
+def get_worker_count(profile, target_count=1, cpu_count=None):
+    """
+    The number of output workers per target; Filebeat opens a connection per worker, to every target
+
+    :param profile: The name of a profile in THROUGHPUT_PROFILES
+    :param target_count: The number of Logstash targets events are balanced across
+    :param cpu_count: The number of logical CPUs; detected if not given
+    :return: The number of workers per target
+    """
+    if not cpu_count:
+        cpu_count = psutil.cpu_count() or 1
+    settings = THROUGHPUT_PROFILES[profile]
+    workers = int(cpu_count * settings['cpu_share']) // max(1, target_count)
+    return max(1, min(settings['max_workers'], workers))
+
+
+def get_throughput_settings(profile=DEFAULT_THROUGHPUT_PROFILE, target_count=1, cpu_count=None):
+    """
+    Build the output and queue settings of a throughput profile for this host
+
+    :param profile: The name of a profile in THROUGHPUT_PROFILES
+    :param target_count: The number of Logstash/Kafka targets
+    :param cpu_count: The number of logical CPUs; detected if not given
+    :return: A tuple containing the output settings (LOGSTASH_OUTPUT_TUNABLES), and the queue.mem settings
+    """
+    if profile not in THROUGHPUT_PROFILES:
+        raise filebeat_exceptions.InvalidThroughputSettingError(
+            "{} is not a valid profile; expected one of {}.".format(profile, ', '.join(THROUGHPUT_PROFILES)))
+    settings = THROUGHPUT_PROFILES[profile]
+    target_count = max(1, target_count)
+    worker = get_worker_count(profile, target_count=target_count, cpu_count=cpu_count)
+    output_settings = OrderedDict([
+        ('bulk_max_size', settings['bulk_max_size']),
+        ('worker', worker),
+        ('pipelining', settings['pipelining']),
+        ('compression_level', settings['compression_level']),
+        # Without loadbalance Filebeat sends to a single (random) target, and only fails over to the others
+        ('loadbalance', target_count > 1),
+        ('slow_start', settings['slow_start'])
+    ])
+    connections = worker * target_count * max(1, settings['pipelining'])
+    events = max(MIN_QUEUE_EVENTS, QUEUE_BATCHES_PER_CONNECTION * connections * settings['bulk_max_size'])
+    if profile == 'wan-constrained':
+        events = max(events, WAN_QUEUE_EVENTS)
+    queue_settings = OrderedDict([('events', events), ('flush.min_events', settings['queue_min_events'])])
+    if settings['queue_flush_timeout']:
+        queue_settings['flush.timeout'] = settings['queue_flush_timeout']
+    return output_settings, queue_settings
+
+
+def get_kafka_output_settings(output_settings):
+    """
+    :param output_settings: Output settings, as returned by get_throughput_settings
+    :return: The subset of the settings output.kafka understands
+    """
+    kafka_settings = OrderedDict()
+    if 'bulk_max_size' in output_settings:
+        kafka_settings['bulk_max_size'] = output_settings['bulk_max_size']
+    if 'compression_level' in output_settings:
+        # compression_level only applies to gzip; a level of 0 means do not compress at all
+        kafka_settings['compression'] = 'gzip' if output_settings['compression_level'] else 'none'
+        kafka_settings['compression_level'] = output_settings['compression_level']
+    return kafka_settings
+
+
+def validate_output_settings(output_settings):
+    """
+    :param output_settings: A dictionary of LOGSTASH_OUTPUT_TUNABLES
+    :return: None; raises InvalidThroughputSettingError if a setting is out of range
+    """
+    for name, value in output_settings.items():
+        if name not in LOGSTASH_OUTPUT_TUNABLES:
+            raise filebeat_exceptions.InvalidThroughputSettingError("{} is not a tunable output setting.".format(name))
+        if name in ('loadbalance', 'slow_start'):
+            if not isinstance(value, bool):
+                raise filebeat_exceptions.InvalidThroughputSettingError("{} must be true or false.".format(name))
+            continue
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise filebeat_exceptions.InvalidThroughputSettingError("{} must be an integer.".format(name))
+        if name in ('bulk_max_size', 'worker') and value < 1:
+            raise filebeat_exceptions.InvalidThroughputSettingError("{} must be at least 1.".format(name))
+        elif name == 'pipelining' and value < 0:
+            raise filebeat_exceptions.InvalidThroughputSettingError("pipelining cannot be negative.")
+        elif name == 'compression_level' and not 0 <= value <= 9:
+            raise filebeat_exceptions.InvalidThroughputSettingError("compression_level must be between 0 and 9.")
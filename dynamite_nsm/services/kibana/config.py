@@ -134,16 +134,15 @@ class ConfigManager:
         """
         env_path = os.path.join(const.CONFIG_PATH, 'environment')
         try:
-            with open(env_path) as env_f:
-                for line in env_f.readlines():
-                    if line.startswith('JAVA_HOME'):
-                        self.java_home = line.split('=')[1].strip()
-                    elif line.startswith('KIBANA_PATH_CONF'):
-                        self.kibana_path_conf = line.split('=')[1].strip()
-                    elif line.startswith('KIBANA_HOME'):
-                        self.kibana_home = line.split('=')[1].strip()
-                    elif line.startswith('KIBANA_LOGS'):
-                        self.kibana_logs = line.split('=')[1].strip()
+            for key, value in utilities.get_environment_file_dict().items():
+                if key == 'JAVA_HOME':
+                    self.java_home = value
+                elif key == 'KIBANA_PATH_CONF':
+                    self.kibana_path_conf = value
+                elif key == 'KIBANA_HOME':
+                    self.kibana_home = value
+                elif key == 'KIBANA_LOGS':
+                    self.kibana_logs = value
 
         except IOError:
             raise general_exceptions.ReadConfigError("Could not locate environment config at {}".format(env_path))
@@ -3,7 +3,6 @@ import sys
 import time
 import shutil
 import logging
-import subprocess
 
 try:
     from yaml import CLoader as Loader, CDumper as Dumper
@@ -16,6 +15,7 @@ from dynamite_nsm import utilities
 from dynamite_nsm import package_manager
 from dynamite_nsm.logger import get_logger
 from dynamite_nsm.services.base import install
+from dynamite_nsm.services.base import readiness
 from dynamite_nsm import exceptions as general_exceptions
 from dynamite_nsm.services.kibana import config as kibana_configs
 from dynamite_nsm.services.kibana import process as kibana_process
@@ -64,19 +64,23 @@ class InstallManager(install.BaseInstallManager):
         self.stdout = stdout
         self.verbose = verbose
         utilities.create_dynamite_environment_file()
+        install.BaseInstallManager.__init__(self, 'kibana', verbose=self.verbose, stdout=self.stdout)
         if download_kibana_archive:
             try:
-                self.download_from_mirror(const.KIBANA_MIRRORS, const.KIBANA_ARCHIVE_NAME, stdout=stdout,
-                                          verbose=verbose)
-            except (general_exceptions.ArchiveExtractionError, general_exceptions.DownloadError):
+                self.download_and_extract_from_mirror(const.KIBANA_MIRRORS, const.KIBANA_ARCHIVE_NAME, stdout=stdout,
+                                                      verbose=verbose)
+            except general_exceptions.DownloadError:
                 self.logger.error("Failed to download Kibana archive.")
                 raise kibana_exceptions.InstallKibanaError("Failed to download Kibana archive.")
-        try:
-            self.extract_archive(os.path.join(const.INSTALL_CACHE, const.KIBANA_ARCHIVE_NAME))
-        except general_exceptions.ArchiveExtractionError:
-            self.logger.error("Failed to extract Kibana archive.")
-            raise kibana_exceptions.InstallKibanaError("Failed to extract Kibana archive.")
-        install.BaseInstallManager.__init__(self, 'kibana', verbose=self.verbose, stdout=self.stdout)
+            except general_exceptions.ArchiveExtractionError:
+                self.logger.error("Failed to extract Kibana archive.")
+                raise kibana_exceptions.InstallKibanaError("Failed to extract Kibana archive.")
+        else:
+            try:
+                self.extract_archive(os.path.join(const.INSTALL_CACHE, const.KIBANA_ARCHIVE_NAME))
+            except general_exceptions.ArchiveExtractionError:
+                self.logger.error("Failed to extract Kibana archive.")
+                raise kibana_exceptions.InstallKibanaError("Failed to extract Kibana archive.")
 
     def _copy_kibana_files_and_directories(self):
         config_paths = [
@@ -140,20 +144,20 @@ class InstallManager(install.BaseInstallManager):
     def _create_kibana_environment_variables(self):
         env_file = os.path.join(const.CONFIG_PATH, 'environment')
         try:
-            if 'KIBANA_PATH_CONF' not in open(env_file).read():
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'KIBANA_PATH_CONF' not in env_dict:
                 self.logger.info('Updating Kibana default configuration path [{}]'.format(
                     self.configuration_directory))
-                subprocess.call('echo KIBANA_PATH_CONF="{}" >> {}'.format(
-                    self.configuration_directory, env_file),
-                    shell=True)
-            if 'KIBANA_HOME' not in open(env_file).read():
+                new_variables['KIBANA_PATH_CONF'] = self.configuration_directory
+            if 'KIBANA_HOME' not in env_dict:
                 self.logger.info('Updating Kibana default home path [{}]'.format(self.install_directory))
-                subprocess.call('echo KIBANA_HOME="{}" >> {}'.format(self.install_directory, env_file),
-                                shell=True)
-            if 'KIBANA_LOGS' not in open(env_file).read():
+                new_variables['KIBANA_HOME'] = self.install_directory
+            if 'KIBANA_LOGS' not in env_dict:
                 self.logger.info('Updating Kibana default log path [{}]'.format(self.log_directory))
-                subprocess.call('echo KIBANA_LOGS="{}" >> {}'.format(self.log_directory, env_file),
-                                shell=True)
+                new_variables['KIBANA_LOGS'] = self.log_directory
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except IOError:
             raise kibana_exceptions.InstallKibanaError("Failed to open {} for reading.".format(env_file))
         except Exception as e:
@@ -167,34 +171,32 @@ class InstallManager(install.BaseInstallManager):
         if self.elasticsearch_host in ['localhost', '127.0.0.1', '0.0.0.0', '::1', '::/128']:
             self.logger.info('Starting ElasticSearch.')
             elastic_process.ProcessManager().start()
-            while not elastic_profile.ProcessProfiler().is_listening():
-                self.logger.info('Waiting for ElasticSearch API to become accessible.')
-                time.sleep(5)
-            self.logger.info('ElasticSearch API is up.')
-            self.logger.info('Sleeping for 5 seconds, while ElasticSearch API finishes booting.')
-            time.sleep(5)
+            es_profiler = elastic_profile.ProcessProfiler()
+            if not readiness.wait_for(lambda: es_profiler.is_ready(username='elastic',
+                                                                   password=self.elasticsearch_password),
+                                      logger=self.logger, description='ElasticSearch API'):
+                self.logger.error('ElasticSearch API did not become ready within {} seconds.'.format(
+                    readiness.DEFAULT_READY_TIMEOUT))
+                raise kibana_exceptions.InstallKibanaError(
+                    "ElasticSearch API did not become ready within {} seconds.".format(
+                        readiness.DEFAULT_READY_TIMEOUT))
         try:
             kibana_proc = kibana_process.ProcessManager()
             kibana_proc.optimize()
             utilities.set_ownership_of_file(self.install_directory, user='dynamite', group='dynamite')
             utilities.set_ownership_of_file(self.configuration_directory, user='dynamite', group='dynamite')
-            time.sleep(5)
             self.logger.info('Starting Kibana.')
             kibana_proc.start()
         except Exception as e:
             raise kibana_exceptions.InstallKibanaError("General error while starting Kibana process; {}".format(e))
-        kibana_api_start_attempts = 0
-        while not kibana_profile.ProcessProfiler().is_listening() and kibana_api_start_attempts != 5:
-            self.logger.info('Waiting for Kibana API to become accessible.')
-            kibana_api_start_attempts += 1
-            time.sleep(5)
-        if kibana_api_start_attempts == 5:
-            self.logger.error('Kibana API could not be started after {} attempts.'.format(kibana_api_start_attempts))
+        kb_profiler = kibana_profile.ProcessProfiler()
+        if not readiness.wait_for(
+                lambda: kb_profiler.is_ready(username='elastic', password=self.elasticsearch_password),
+                logger=self.logger, description='Kibana API'):
+            self.logger.error('Kibana API did not become ready within {} seconds.'.format(
+                readiness.DEFAULT_READY_TIMEOUT))
             raise kibana_exceptions.InstallKibanaError(
-                "Kibana API could not be started after {} attempts.".format(kibana_api_start_attempts))
-        self.logger.info('Kibana API is up.')
-        self.logger.info('Sleeping for 10 seconds, while Kibana API finishes booting.')
-        time.sleep(10)
+                "Kibana API did not become ready within {} seconds.".format(readiness.DEFAULT_READY_TIMEOUT))
         api_config = kibana_configs.ApiConfigManager(self.configuration_directory)
         kibana_object_create_attempts = 1
         while kibana_object_create_attempts != 5:
@@ -344,7 +346,6 @@ def uninstall_kibana(prompt_user=True, stdout=True, verbose=False):
         log_level = logging.DEBUG
     logger = get_logger('KIBANA', level=log_level, stdout=stdout)
 
-    env_file = os.path.join(const.CONFIG_PATH, 'environment')
     environment_variables = utilities.get_environment_file_dict()
     kb_profiler = kibana_profile.ProcessProfiler()
     if not kb_profiler.is_installed():
@@ -369,20 +370,7 @@ def uninstall_kibana(prompt_user=True, stdout=True, verbose=False):
         shutil.rmtree(kb_config.kibana_home)
         shutil.rmtree(kb_config.kibana_logs)
         shutil.rmtree(const.INSTALL_CACHE, ignore_errors=True)
-        env_lines = ''
-        with open(env_file) as env_fr:
-            for line in env_fr.readlines():
-                if 'KIBANA_PATH_CONF' in line:
-                    continue
-                elif 'KIBANA_HOME' in line:
-                    continue
-                elif 'KIBANA_LOGS' in line:
-                    continue
-                elif line.strip() == '':
-                    continue
-                env_lines += line.strip() + '\n'
-        with open(env_file, 'w') as env_fw:
-            env_fw.write(env_lines)
+        utilities.remove_from_environment_file('KIBANA_PATH_CONF', 'KIBANA_HOME', 'KIBANA_LOGS')
     except Exception as e:
         logger.error("General error occurred while attempting to uninstall Kibana.".format(e))
         logger.debug("General error occurred while attempting to uninstall Kibana; {}".format(e))
@@ -4,6 +4,7 @@ from dynamite_nsm import const
 from dynamite_nsm import utilities
 
 from dynamite_nsm.services.base import profile
+from dynamite_nsm.services.base import readiness
 from dynamite_nsm.services.kibana import config as kibana_config
 from dynamite_nsm.services.kibana import process as kibana_process
 
@@ -32,15 +33,32 @@ class ProcessProfiler(profile.BaseProcessProfiler):
                 return kibana_process.ProcessManager().status()['RUNNING']
         return False
 
-    def is_listening(self):
+    def get_listener(self):
         if not self.kibana_config:
-            return False
+            return None
         if not os.path.exists(self.kibana_config):
-            return False
+            return None
 
-        kb_config_obj = kibana_config.ConfigManager(configuration_directory=self.kibana_config)
+        kb_config_obj = profile.get_cached_config(
+            kibana_config.ConfigManager, self.kibana_config,
+            dependent_files=[os.path.join(self.kibana_config, 'kibana.yml'), self.env_file])
         host = kb_config_obj.server_host
         port = kb_config_obj.server_port
         if host.strip() == '0.0.0.0':
             host = 'localhost'
-        return utilities.check_socket(host, port)
+        return host, port
+
+    def is_ready(self, username=None, password=None):
+        """
+        Application-level readiness check against the /api/status API
+
+        :param username: The user to authenticate as (E.G elastic)
+        :param password: The password of that user
+        :return: True, if Kibana is ready
+        """
+        if not self._listener:
+            self._listener = self.get_listener()
+        if not self._listener:
+            return False
+        host, port = self._listener
+        return readiness.kibana_is_ready(host, port, username=username, password=password)
@@ -23,6 +23,7 @@ from dynamite_nsm import const
 from dynamite_nsm import utilities
 from dynamite_nsm import package_manager
 from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.base import install
 from dynamite_nsm import exceptions as general_exceptions
 from dynamite_nsm.services.lab.data import embedded_images
 from dynamite_nsm.services.lab import config as lab_configs
@@ -132,15 +133,14 @@ class InstallManager:
         :param stdout: Print output to console
         """
 
-        url = None
         try:
-            with open(const.DYNAMITE_SDK_MIRRORS, 'r') as sdk_archive:
-                for url in sdk_archive.readlines():
-                    if utilities.download_file(url, const.DYNAMITE_SDK_ARCHIVE_NAME, stdout=stdout):
-                        break
+            install.BaseInstallManager.download_from_mirror(const.DYNAMITE_SDK_MIRRORS,
+                                                            const.DYNAMITE_SDK_ARCHIVE_NAME, stdout=stdout)
+        except general_exceptions.DownloadError:
+            raise
         except Exception as e:
             raise general_exceptions.DownloadError(
-                "General error while downloading DynamiteSDK from {}; {}".format(url, e))
+                "General error while downloading DynamiteSDK; {}".format(e))
 
     @staticmethod
     def extract_dynamite_sdk():
@@ -334,17 +334,17 @@ class InstallManager:
             raise lab_exceptions.InstallLabError(
                 "General error occurred while attempting to create root directories; {}".format(e))
         try:
-            with open(env_file) as env_f:
-                env_str = env_f.read()
-                if 'NOTEBOOK_HOME' not in env_str:
-                    self.logger.info('Updating Notebook home path [{}]'.format(self.notebook_home))
-                    subprocess.call('echo NOTEBOOK_HOME="{}" >> {}'.format(
-                        self.notebook_home, env_file), shell=True)
-                if 'DYNAMITE_LAB_CONFIG' not in env_str:
-                    self.logger.info('Updating Dynamite Lab Config path [{}]'.format(
-                        self.configuration_directory))
-                    subprocess.call('echo DYNAMITE_LAB_CONFIG="{}" >> {}'.format(
-                        self.configuration_directory, env_file), shell=True)
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'NOTEBOOK_HOME' not in env_dict:
+                self.logger.info('Updating Notebook home path [{}]'.format(self.notebook_home))
+                new_variables['NOTEBOOK_HOME'] = self.notebook_home
+            if 'DYNAMITE_LAB_CONFIG' not in env_dict:
+                self.logger.info('Updating Dynamite Lab Config path [{}]'.format(
+                    self.configuration_directory))
+                new_variables['DYNAMITE_LAB_CONFIG'] = self.configuration_directory
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except IOError:
             self.logger.error("Failed to open {} for reading.".format(env_file))
             raise lab_exceptions.InstallLabError(
@@ -412,12 +412,14 @@ class InstallManager:
             raise lab_exceptions.InstallLabError(
                 "General error occurred while attempting to create root directories; {}".format(e))
         try:
-            with open(env_file) as env_f:
-                if 'DYNAMITE_LAB_CONFIG' not in env_f.read():
-                    self.logger.info('Updating Dynamite Lab Config path [{}]'.format(
-                        self.configuration_directory))
-                    subprocess.call('echo DYNAMITE_LAB_CONFIG="{}" >> {}'.format(
-                        self.configuration_directory, env_file), shell=True)
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'DYNAMITE_LAB_CONFIG' not in env_dict:
+                self.logger.info('Updating Dynamite Lab Config path [{}]'.format(
+                    self.configuration_directory))
+                new_variables['DYNAMITE_LAB_CONFIG'] = self.configuration_directory
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except IOError:
             self.logger.error("Failed to open {} for reading.".format(env_file))
             raise lab_exceptions.InstallLabError("Failed to open {} for reading.".format(env_file))
@@ -566,7 +568,6 @@ def uninstall_dynamite_lab(prompt_user=True, stdout=True, verbose=False):
         log_level = logging.DEBUG
     logger = get_logger('LAB', level=log_level, stdout=stdout)
 
-    env_file = os.path.join(const.CONFIG_PATH, 'environment')
     environment_variables = utilities.get_environment_file_dict()
     configuration_directory = environment_variables.get('DYNAMITE_LAB_CONFIG')
     notebook_home = environment_variables.get('NOTEBOOK_HOME')
@@ -588,20 +589,8 @@ def uninstall_dynamite_lab(prompt_user=True, stdout=True, verbose=False):
     shutil.rmtree(configuration_directory)
     shutil.rmtree(notebook_home)
     shutil.rmtree(const.INSTALL_CACHE, ignore_errors=True)
-    env_lines = ''
     try:
-        with open(env_file) as env_fr:
-            for line in env_fr.readlines():
-                if 'DYNAMITE_LAB_CONFIG' in line:
-                    continue
-                elif 'NOTEBOOK_HOME' in line:
-                    continue
-                elif line.strip() == '':
-                    continue
-                env_lines += line.strip() + '\n'
-
-        with open(env_file, 'w') as env_fw:
-            env_fw.write(env_lines)
+        utilities.remove_from_environment_file('DYNAMITE_LAB_CONFIG', 'NOTEBOOK_HOME')
     except Exception as e:
         logger.error('General error occurred while attempting to uninstall lab.')
         logger.debug("General error occurred while attempting to uninstall lab; {}".format(e))
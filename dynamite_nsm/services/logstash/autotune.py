@@ -0,0 +1,347 @@
+import os
+import json
+import time
+import logging
+from yaml import load
+
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
+
+import psutil
+import tabulate
+
+from dynamite_nsm import utilities
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.base import readiness
+from dynamite_nsm.services.logstash import config as logstash_config
+from dynamite_nsm.services.logstash import process as logstash_process
+from dynamite_nsm.services.logstash import exceptions as logstash_exceptions
+
+# Logstash's elasticsearch output spends most of its time waiting on bulk requests, so workers are oversubscribed
+# relative to the number of cores; with one worker per core (the default) the CPU sits idle while a backlog grows
+WORKERS_PER_CORE = 1.5
+MAX_WORKERS = 64
+
+# The approximate heap footprint of an in-flight event once it has been decoded and enriched (ElastiFlow/Synesis)
+EVENT_HEAP_BYTES = 16384
+
+# The share of the heap all in-flight batches combined are allowed to occupy; the rest is left to the filters and GC
+IN_FLIGHT_HEAP_FRACTION = 0.2
+
+MIN_BATCH_SIZE = 125
+BATCH_SIZE_STEP = 125
+
+# Estimates stop here (bulk requests of a few MB); calibration may still try batches up to MAX_BATCH_SIZE
+MAX_ESTIMATED_BATCH_SIZE = 2048
+MAX_BATCH_SIZE = 4096
+
+# The longest a worker waits for a batch to fill up before flushing it to the outputs
+DEFAULT_BATCH_DELAY = 50
+
+# pipeline.ordered was introduced in Logstash 7.7; older versions refuse to start when it is set
+PIPELINE_ORDERED_MIN_VERSION = (7, 7)
+
+DEFAULT_SAMPLE_SECONDS = 60
+DEFAULT_WARMUP_SECONDS = 30
+DEFAULT_MAX_GC_FRACTION = 0.05
+GC_FRACTION_GROWTH = 1.5
+LOGSTASH_API_HOST = 'localhost'
+LOGSTASH_API_PORT = 9600
+
+
+def get_pipeline_ids(configuration_directory):
+    """
+    :param configuration_directory: Path to the configuration directory (E.G /etc/dynamite/logstash/)
+    :return: The ids of the pipelines defined in pipelines.yml (['main'] if there is no pipelines.yml)
+    """
+    return logstash_config.PipelineConfigManager(configuration_directory).get_pipeline_ids() or ['main']
+
+
+def get_logstash_version(install_directory):
+    """
+    :param install_directory: Path to the Logstash install directory (E.G /opt/dynamite/logstash/)
+    :return: A tuple of integers (E.G (7, 2, 0)); None if the version could not be determined
+    """
+    try:
+        with open(os.path.join(install_directory, 'versions.yml')) as versions_f:
+            version = str(load(versions_f, Loader=Loader).get('logstash'))
+    except (IOError, TypeError, AttributeError):
+        return None
+    try:
+        return tuple([int(part) for part in version.split('-')[0].split('.')])
+    except ValueError:
+        return None
+
+
+def get_worker_count(cpu_count=None, pipeline_count=1):
+    """
+    :param cpu_count: The number of logical CPUs; detected if not given
+    :param pipeline_count: The number of pipelines sharing those CPUs
+    :return: The number of workers each pipeline should run
+    """
+    if not cpu_count:
+        cpu_count = psutil.cpu_count() or 1
+    workers = int(round(cpu_count * WORKERS_PER_CORE / max(1, pipeline_count)))
+    return max(2, min(MAX_WORKERS, workers))
+
+
+def get_batch_size(heap_size_gigs, workers, pipeline_count=1):
+    """
+    The largest batch size that keeps every in-flight batch within IN_FLIGHT_HEAP_FRACTION of the heap
+
+    :param heap_size_gigs: The maximum JVM heap (-Xmx) in gigabytes
+    :param workers: The number of workers per pipeline
+    :param pipeline_count: The number of pipelines
+    :return: The number of events each worker collects before running its filters and outputs
+    """
+    in_flight_budget = heap_size_gigs * (1024 ** 3) * IN_FLIGHT_HEAP_FRACTION
+    batch_size = in_flight_budget / float(workers * max(1, pipeline_count) * EVENT_HEAP_BYTES)
+    batch_size = int(batch_size // BATCH_SIZE_STEP) * BATCH_SIZE_STEP
+    return max(MIN_BATCH_SIZE, min(MAX_ESTIMATED_BATCH_SIZE, batch_size))
+
+
+def get_pipeline_settings(heap_size_gigs, cpu_count=None, pipeline_count=1):
+    """
+    :param heap_size_gigs: The maximum JVM heap (-Xmx) in gigabytes
+    :param cpu_count: The number of logical CPUs; detected if not given
+    :param pipeline_count: The number of pipelines
+    :return: A dictionary containing the pipeline_workers, pipeline_batch_size and pipeline_batch_delay to use
+    """
+    workers = get_worker_count(cpu_count, pipeline_count)
+    return dict(
+        pipeline_workers=workers,
+        pipeline_batch_size=get_batch_size(heap_size_gigs, workers, pipeline_count),
+        pipeline_batch_delay=DEFAULT_BATCH_DELAY
+    )
+
+
+def get_node_stats(host=LOGSTASH_API_HOST, port=LOGSTASH_API_PORT):
+    """
+    Take a snapshot of the counters calibration is based on
+
+    :param host: The LogStash API host
+    :param port: The LogStash API port
+    :return: A dictionary containing the time, the number of events sent out by all pipelines, and the total time
+             (in milliseconds) the JVM spent collecting garbage
+    """
+    code, body = readiness.http_get('http://{}:{}/_node/stats/pipelines'.format(host, port))
+    if code != 200:
+        raise logstash_exceptions.LogstashAutotuneError("Could not retrieve pipeline stats; HTTP {}".format(code))
+    events_out = 0
+    for pipeline in json.loads(body).get('pipelines', {}).values():
+        events_out += pipeline.get('events', {}).get('out', 0) or 0
+    code, body = readiness.http_get('http://{}:{}/_node/stats/jvm'.format(host, port))
+    if code != 200:
+        raise logstash_exceptions.LogstashAutotuneError("Could not retrieve JVM stats; HTTP {}".format(code))
+    gc_millis = 0
+    for collector in json.loads(body).get('jvm', {}).get('gc', {}).get('collectors', {}).values():
+        gc_millis += collector.get('collection_time_in_millis', 0) or 0
+    return dict(time=time.time(), events_out=events_out, gc_millis=gc_millis)
+
+
+def measure_throughput(sample_seconds=DEFAULT_SAMPLE_SECONDS, host=LOGSTASH_API_HOST, port=LOGSTASH_API_PORT):
+    """
+    :param sample_seconds: The number of seconds to measure for
+    :param host: The LogStash API host
+    :param port: The LogStash API port
+    :return: A tuple containing the events sent per second, and the fraction of the time spent in GC
+    """
+    start = get_node_stats(host, port)
+    time.sleep(sample_seconds)
+    end = get_node_stats(host, port)
+    elapsed = max(0.001, end['time'] - start['time'])
+    events_per_second = (end['events_out'] - start['events_out']) / elapsed
+    gc_fraction = (end['gc_millis'] - start['gc_millis']) / (elapsed * 1000)
+    return events_per_second, gc_fraction
+
+
+class PipelineAutotuner:
+    """
+    Choose pipeline.workers and pipeline.batch.size from the hardware, and optionally calibrate the batch size
+    against the node stats API
+
+    Workers are derived from the number of cores (shared by every pipeline in pipelines.yml), and the batch size from
+    the heap set in jvm.options. Calibration restarts LogStash with a few batch sizes around that estimate, and keeps
+    the one that sent the most events per second without pushing the time spent in GC past the allowed fraction (or
+    well above what the estimate itself produced).
+    """
+
+    def __init__(self, configuration_directory=None, install_directory=None, cpu_count=None,
+                 api_host=LOGSTASH_API_HOST, api_port=LOGSTASH_API_PORT, stdout=True, verbose=False):
+        """
+        :param configuration_directory: Path to the configuration directory (E.G /etc/dynamite/logstash/)
+        :param install_directory: Path to the install directory (E.G /opt/dynamite/logstash/)
+        :param cpu_count: The number of logical CPUs; detected if not given
+        :param api_host: The LogStash API host
+        :param api_port: The LogStash API port
+        :param stdout: Print the output to console
+        :param verbose: Include detailed debug messages
+        """
+        log_level = logging.INFO
+        if verbose:
+            log_level = logging.DEBUG
+        self.logger = get_logger('LOGSTASH_AUTOTUNE', level=log_level, stdout=stdout)
+        env_dict = utilities.get_environment_file_dict()
+        self.configuration_directory = configuration_directory or env_dict.get('LS_PATH_CONF')
+        self.install_directory = install_directory or env_dict.get('LS_HOME')
+        if not self.configuration_directory:
+            raise logstash_exceptions.LogstashAutotuneError("LogStash is not installed.")
+        self.cpu_count = cpu_count
+        self.api_host = api_host
+        self.api_port = api_port
+        self.ls_config = logstash_config.ConfigManager(self.configuration_directory)
+        self.pipeline_ids = get_pipeline_ids(self.configuration_directory)
+
+    def get_current_settings(self):
+        """
+        :return: A dictionary containing the pipeline settings currently in logstash.yml (None means the default)
+        """
+        return dict(
+            pipeline_workers=self.ls_config.pipeline_workers,
+            pipeline_batch_size=self.ls_config.pipeline_batch_size,
+            pipeline_batch_delay=self.ls_config.pipeline_batch_delay,
+            pipeline_ordered=self.ls_config.pipeline_ordered
+        )
+
+    def get_recommended_settings(self):
+        """
+        :return: A dictionary containing the pipeline settings derived from the cores and the JVM heap
+        """
+        heap_size_gigs = self.ls_config.java_maximum_memory or 1
+        return get_pipeline_settings(heap_size_gigs, cpu_count=self.cpu_count,
+                                     pipeline_count=len(self.pipeline_ids))
+
+    def supports_pipeline_ordered(self):
+        """
+        :return: True, if the installed LogStash understands pipeline.ordered
+        """
+        version = get_logstash_version(self.install_directory) if self.install_directory else None
+        return bool(version) and version[0:2] >= PIPELINE_ORDERED_MIN_VERSION
+
+    def apply(self, settings):
+        """
+        :param settings: A dictionary of pipeline settings (as returned by get_recommended_settings)
+        """
+        for name, value in settings.items():
+            setattr(self.ls_config, name, value)
+        self.ls_config.write_logstash_config()
+
+    def _restart_and_wait(self, timeout=readiness.DEFAULT_READY_TIMEOUT):
+        logstash_process.ProcessManager(stdout=False).restart()
+        if not readiness.wait_for(lambda: readiness.logstash_is_ready(self.api_host, self.api_port),
+                                  timeout=timeout, logger=self.logger, description='LogStash API'):
+            raise logstash_exceptions.LogstashAutotuneError("LogStash did not come back up after restarting.")
+
+    def calibrate(self, settings, sample_seconds=DEFAULT_SAMPLE_SECONDS, warmup_seconds=DEFAULT_WARMUP_SECONDS,
+                  max_gc_fraction=DEFAULT_MAX_GC_FRACTION):
+        """
+        Measure a few batch sizes around the recommended one on live traffic, and pick the best
+
+        :param settings: The recommended pipeline settings
+        :param sample_seconds: The number of seconds to measure each batch size for
+        :param warmup_seconds: The number of seconds to wait after each restart before measuring
+        :param max_gc_fraction: The largest fraction of time the JVM may spend collecting garbage
+        :return: A tuple containing the chosen settings, and a list of (batch size, events/sec, gc fraction)
+        """
+        base_batch_size = settings['pipeline_batch_size']
+        candidates = sorted(set([max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, size)) for size in
+                                 (base_batch_size // 2, base_batch_size, base_batch_size * 2)]))
+        # Measure the recommended size first; it sets the GC baseline the other candidates are held to
+        candidates.remove(base_batch_size)
+        candidates.insert(0, base_batch_size)
+        measurements = []
+        for batch_size in candidates:
+            candidate = dict(settings, pipeline_batch_size=batch_size)
+            self.logger.info("Measuring pipeline.batch.size: {} for {}s.".format(batch_size, sample_seconds))
+            self.apply(candidate)
+            self._restart_and_wait()
+            time.sleep(warmup_seconds)
+            events_per_second, gc_fraction = measure_throughput(sample_seconds, self.api_host, self.api_port)
+            self.logger.debug("pipeline.batch.size: {}; {:.1f} events/s; {:.1%} GC.".format(
+                batch_size, events_per_second, gc_fraction))
+            measurements.append((batch_size, events_per_second, gc_fraction))
+        baseline_gc = measurements[0][2]
+        gc_ceiling = max(max_gc_fraction, baseline_gc * GC_FRACTION_GROWTH)
+        acceptable = [m for m in measurements if m[2] <= gc_ceiling] or [measurements[0]]
+        best = max(acceptable, key=lambda m: (m[1], -m[0]))
+        if best[1] <= 0:
+            self.logger.warning("No events flowed through LogStash while calibrating; keeping the estimate.")
+            best = measurements[0]
+        return dict(settings, pipeline_batch_size=best[0]), measurements
+
+    def autotune(self, calibrate=False, sample_seconds=DEFAULT_SAMPLE_SECONDS,
+                 warmup_seconds=DEFAULT_WARMUP_SECONDS, max_gc_fraction=DEFAULT_MAX_GC_FRACTION, ordered=None,
+                 dry_run=False):
+        """
+        :param calibrate: If True, calibrate the batch size against live traffic (restarts LogStash several times)
+        :param sample_seconds: The number of seconds to measure each batch size for
+        :param warmup_seconds: The number of seconds to wait after each restart before measuring
+        :param max_gc_fraction: The largest fraction of time the JVM may spend collecting garbage
+        :param ordered: auto, true or false; sets pipeline.ordered (LogStash 7.7+), left unchanged if not given
+        :param dry_run: If True, only report the recommended settings
+        :return: A table comparing the current and chosen settings (and the calibration measurements, if any)
+        """
+        current = self.get_current_settings()
+        chosen = self.get_recommended_settings()
+        if ordered is not None:
+            if not self.supports_pipeline_ordered():
+                raise logstash_exceptions.LogstashAutotuneError(
+                    "pipeline.ordered requires LogStash {}.{} or later.".format(*PIPELINE_ORDERED_MIN_VERSION))
+            chosen['pipeline_ordered'] = str(ordered).lower()
+        self.logger.info("{} pipeline(s) [{}] sharing {} CPUs, with a {}GB heap.".format(
+            len(self.pipeline_ids), ', '.join(self.pipeline_ids), self.cpu_count or psutil.cpu_count(),
+            self.ls_config.java_maximum_memory))
+        measurements = []
+        if calibrate and not dry_run:
+            if not readiness.logstash_is_ready(self.api_host, self.api_port):
+                raise logstash_exceptions.LogstashAutotuneError(
+                    "LogStash must be running with live traffic to calibrate.")
+            try:
+                chosen, measurements = self.calibrate(chosen, sample_seconds=sample_seconds,
+                                                      warmup_seconds=warmup_seconds, max_gc_fraction=max_gc_fraction)
+            except logstash_exceptions.LogstashAutotuneError:
+                self.logger.error("Calibration failed; restoring the original pipeline settings.")
+                self.apply(current)
+                self._restart_and_wait()
+                raise
+        if not dry_run:
+            self.apply(chosen)
+            if measurements:
+                self._restart_and_wait()
+            else:
+                self.logger.info("Restart LogStash for the new pipeline settings to take effect.")
+        rows = []
+        for name, key in (('pipeline.workers', 'pipeline_workers'), ('pipeline.batch.size', 'pipeline_batch_size'),
+                          ('pipeline.batch.delay', 'pipeline_batch_delay'), ('pipeline.ordered', 'pipeline_ordered')):
+            if key not in chosen:
+                continue
+            rows.append([name, current[key] if current[key] is not None else '(default)', chosen[key]])
+        output = tabulate.tabulate(rows, headers=['Setting', 'Current', 'Tuned'], tablefmt='fancy_grid')
+        if measurements:
+            output += '\n' + tabulate.tabulate(
+                [[size, '{:.1f}'.format(eps), '{:.1%}'.format(gc)] for size, eps, gc in measurements],
+                headers=['Batch Size', 'Events/s', 'GC Time'], tablefmt='fancy_grid')
+        return output
+
+
+def autotune_pipelines(calibrate=False, sample_seconds=DEFAULT_SAMPLE_SECONDS, warmup_seconds=DEFAULT_WARMUP_SECONDS,
+                       max_gc_fraction=DEFAULT_MAX_GC_FRACTION, ordered=None, dry_run=False, stdout=True,
+                       verbose=False):
+    """
+    Size the LogStash pipeline workers and batches from the hardware (and optionally live traffic)
+
+    :param calibrate: If True, calibrate the batch size against live traffic (restarts LogStash several times)
+    :param sample_seconds: The number of seconds to measure each batch size for
+    :param warmup_seconds: The number of seconds to wait after each restart before measuring
+    :param max_gc_fraction: The largest fraction of time the JVM may spend collecting garbage
+    :param ordered: auto, true or false; sets pipeline.ordered (LogStash 7.7+), left unchanged if not given
+    :param dry_run: If True, only report the recommended settings
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: A table comparing the current and chosen settings
+    """
+    return PipelineAutotuner(stdout=stdout, verbose=verbose).autotune(
+        calibrate=calibrate, sample_seconds=sample_seconds, warmup_seconds=warmup_seconds,
+        max_gc_fraction=max_gc_fraction, ordered=ordered, dry_run=dry_run)
@@ -29,7 +29,16 @@ class ConfigManager:
         'path_data': ('path.data',),
         'path_logs': ('path.logs',),
         'pipeline_batch_size': ('pipeline.batch.size',),
-        'pipeline_batch_delay': ('pipeline.batch.delay',)
+        'pipeline_batch_delay': ('pipeline.batch.delay',),
+        'pipeline_workers': ('pipeline.workers',),
+        'pipeline_ordered': ('pipeline.ordered',),
+        'queue_type': ('queue.type',),
+        'queue_max_bytes': ('queue.max_bytes',),
+        'queue_checkpoint_writes': ('queue.checkpoint.writes',),
+        'path_queue': ('path.queue',),
+        'dead_letter_queue_enable': ('dead_letter_queue.enable',),
+        'dead_letter_queue_max_bytes': ('dead_letter_queue.max_bytes',),
+        'path_dead_letter_queue': ('path.dead_letter_queue',)
     }
 
     def __init__(self, configuration_directory):
@@ -48,6 +57,15 @@ class ConfigManager:
         self.path_logs = None
         self.pipeline_batch_size = None
         self.pipeline_batch_delay = None
+        self.pipeline_workers = None
+        self.pipeline_ordered = None
+        self.queue_type = None
+        self.queue_max_bytes = None
+        self.queue_checkpoint_writes = None
+        self.path_queue = None
+        self.dead_letter_queue_enable = None
+        self.dead_letter_queue_max_bytes = None
+        self.path_dead_letter_queue = None
 
         self._parse_environment_file()
         self._parse_jvm_options()
@@ -112,14 +130,13 @@ class ConfigManager:
         """
         env_path = os.path.join(const.CONFIG_PATH, 'environment')
         try:
-            with open(env_path) as env_f:
-                for line in env_f.readlines():
-                    if line.startswith('JAVA_HOME'):
-                        self.java_home = line.split('=')[1].strip()
-                    elif line.startswith('LS_PATH_CONF'):
-                        self.ls_path_conf = line.split('=')[1].strip()
-                    elif line.startswith('LS_HOME'):
-                        self.ls_home = line.split('=')[1].strip()
+            for key, value in utilities.get_environment_file_dict().items():
+                if key == 'JAVA_HOME':
+                    self.java_home = value
+                elif key == 'LS_PATH_CONF':
+                    self.ls_path_conf = value
+                elif key == 'LS_HOME':
+                    self.ls_home = value
         except IOError:
             raise general_exceptions.ReadConfigError("Could not locate environment config at {}".format(env_path))
         except Exception as e:
@@ -235,6 +252,10 @@ class ConfigManager:
             if k not in self.tokens:
                 continue
             token_path = self.tokens[k]
+            if v is None:
+                # Unset settings fall back to LogStash's defaults; a null value would fail validation
+                self.config_data.pop(token_path[0], None)
+                continue
             update_dict_from_path(token_path, v)
         try:
             with open(os.path.join(self.configuration_directory, 'logstash.yml'), 'w') as configyaml:
@@ -255,6 +276,151 @@ class ConfigManager:
         self.write_jvm_config()
 
 
+class PipelineConfigManager:
+    """
+    Wrapper for configuring pipelines.yml
+    """
+
+    # Per-pipeline settings that override their logstash.yml counterparts
+    settings = {
+        'workers': 'pipeline.workers',
+        'batch_size': 'pipeline.batch.size',
+        'batch_delay': 'pipeline.batch.delay',
+        'queue_type': 'queue.type',
+        'queue_max_bytes': 'queue.max_bytes',
+        'queue_checkpoint_writes': 'queue.checkpoint.writes'
+    }
+
+    def __init__(self, configuration_directory):
+        """
+        :param configuration_directory: Path to the configuration directory (E.G /etc/dynamite/logstash/)
+        """
+        self.configuration_directory = configuration_directory
+        self.pipelines = []
+
+        self._parse_pipelinesyaml()
+
+    def _parse_pipelinesyaml(self):
+        pipelinesyaml_path = os.path.join(self.configuration_directory, 'pipelines.yml')
+        try:
+            with open(pipelinesyaml_path, 'r') as configyaml:
+                self.pipelines = load(configyaml, Loader=Loader) or []
+        except IOError:
+            # LogStash runs a single "main" pipeline from logstash.yml when there is no pipelines.yml
+            self.pipelines = []
+        except Exception as e:
+            raise logstash_exceptions.ReadLogstashConfigError(
+                "General exception when opening/parsing config at {}; {}".format(pipelinesyaml_path, e))
+        if not isinstance(self.pipelines, list):
+            raise logstash_exceptions.ReadLogstashConfigError(
+                "{} must contain a list of pipelines.".format(pipelinesyaml_path))
+
+    def add_pipeline(self, pipeline_id, path_config=None, config_string=None, workers=None, batch_size=None,
+                     batch_delay=None, queue_type=None, queue_max_bytes=None, queue_checkpoint_writes=None):
+        """
+        Define a pipeline; replaces any existing pipeline with the same id
+
+        :param pipeline_id: The id of the pipeline (E.G suricata)
+        :param path_config: A path (or glob) to the pipeline's config files
+        :param config_string: The pipeline's config, inline (used instead of path_config)
+        :param workers: The number of workers running the pipeline's filters and outputs
+        :param batch_size: The number of events each worker collects before running its filters and outputs
+        :param batch_delay: The number of milliseconds to wait for a batch to fill up
+        :param queue_type: memory or persisted
+        :param queue_max_bytes: The capacity of a persisted queue (E.G 1gb)
+        :param queue_checkpoint_writes: The number of events written to a persisted queue between checkpoints
+        """
+        if bool(path_config) == bool(config_string):
+            raise logstash_exceptions.WriteLogstashConfigError(
+                "Pipeline {} requires either a path.config or a config.string.".format(pipeline_id))
+        pipeline = {'pipeline.id': pipeline_id}
+        if path_config:
+            pipeline['path.config'] = path_config
+        else:
+            pipeline['config.string'] = config_string
+        self.remove_pipeline(pipeline_id)
+        self.pipelines.append(pipeline)
+        self.set_pipeline_settings(pipeline_id, workers=workers, batch_size=batch_size, batch_delay=batch_delay,
+                                   queue_type=queue_type, queue_max_bytes=queue_max_bytes,
+                                   queue_checkpoint_writes=queue_checkpoint_writes)
+
+    def get_pipeline(self, pipeline_id):
+        """
+        :param pipeline_id: The id of the pipeline (E.G suricata)
+        :return: The pipeline's config object; None if it is not defined
+        """
+        for pipeline in self.pipelines:
+            if pipeline.get('pipeline.id') == pipeline_id:
+                return pipeline
+        return None
+
+    def get_pipeline_ids(self):
+        """
+        :return: A list of the ids of the pipelines defined
+        """
+        return [pipeline.get('pipeline.id') for pipeline in self.pipelines]
+
+    def remove_pipeline(self, pipeline_id):
+        """
+        :param pipeline_id: The id of the pipeline (E.G suricata)
+        :return: True, if the pipeline was removed
+        """
+        pipeline = self.get_pipeline(pipeline_id)
+        if pipeline is None:
+            return False
+        self.pipelines.remove(pipeline)
+        return True
+
+    def set_pipeline_settings(self, pipeline_id, **settings):
+        """
+        Override logstash.yml settings for a single pipeline; a value of None reverts to logstash.yml
+
+        :param pipeline_id: The id of the pipeline (E.G suricata)
+        :param settings: workers, batch_size, batch_delay, queue_type, queue_max_bytes or queue_checkpoint_writes
+        """
+        pipeline = self.get_pipeline(pipeline_id)
+        if pipeline is None:
+            raise logstash_exceptions.WriteLogstashConfigError("Pipeline {} is not defined.".format(pipeline_id))
+        for name, value in settings.items():
+            if name not in self.settings:
+                raise logstash_exceptions.WriteLogstashConfigError("{} is not a pipeline setting.".format(name))
+            if value is None:
+                pipeline.pop(self.settings[name], None)
+            else:
+                pipeline[self.settings[name]] = value
+
+    def write_config(self):
+        """
+        Writes pipelines.yml, backs up the original
+        """
+        pipelinesyaml_path = os.path.join(self.configuration_directory, 'pipelines.yml')
+        backup_configurations = os.path.join(self.configuration_directory, 'config_backups/')
+        pipelines_config_backup = os.path.join(backup_configurations, 'pipelines.yml.backup.{}'.format(
+            int(time.time())))
+        try:
+            utilities.makedirs(backup_configurations, exist_ok=True)
+        except Exception as e:
+            raise logstash_exceptions.WriteLogstashConfigError(
+                "General error while attempting to create backup directory at {}; {}".format(backup_configurations, e))
+        if os.path.exists(pipelinesyaml_path):
+            try:
+                shutil.copy(pipelinesyaml_path, pipelines_config_backup)
+            except Exception as e:
+                raise logstash_exceptions.WriteLogstashConfigError(
+                    "General error while attempting to copy old pipelines.yml file to {}; {}".format(
+                        backup_configurations, e))
+        try:
+            with open(pipelinesyaml_path, 'w') as configyaml:
+                dump(self.pipelines, configyaml, default_flow_style=False)
+        except IOError:
+            raise logstash_exceptions.WriteLogstashConfigError(
+                "Could not locate {}".format(self.configuration_directory))
+        except Exception as e:
+            raise logstash_exceptions.WriteLogstashConfigError(
+                "General error while attempting to write new pipelines.yml file to {}; {}".format(
+                    self.configuration_directory, e))
+
+
 def change_logstash_elasticsearch_password(password='changeme', prompt_user=True, stdout=True, verbose=False):
     """
     Change the password used by Logstash to authenticate to Elasticsearch
@@ -1,6 +1,5 @@
 import os
 import logging
-import subprocess
 
 from dynamite_nsm import const
 from dynamite_nsm import utilities
@@ -34,33 +33,33 @@ class InstallManager:
         Create required environmental variables; copy configurations to various directories.
         """
 
-        env_file = os.path.join(const.CONFIG_PATH, 'environment')
         self.logger.info('Creating ElastiFlow installation and configuration directories.')
         utilities.makedirs(self.install_directory, exist_ok=True)
         self.logger.info('Copying ElastiFlow configurations.')
         utilities.copytree(os.path.join(const.DEFAULT_CONFIGS, 'logstash', 'zeek'), self.install_directory)
         utilities.set_ownership_of_file(self.install_directory, user='dynamite', group='dynamite')
         try:
-            with open(env_file) as env_f:
-                env_str = env_f.read()
-                if 'ELASTIFLOW_DICT_PATH' not in env_str:
-                    dict_path = os.path.join(self.install_directory, 'dictionaries')
-                    self.logger.info('Updating ElastiFlow dictionary configuration path [{}]'.format(dict_path))
-                    subprocess.call('echo ELASTIFLOW_DICT_PATH="{}" >> {}'.format(dict_path, env_file), shell=True)
-                if 'ELASTIFLOW_TEMPLATE_PATH' not in env_str:
-                    template_path = os.path.join(self.install_directory, 'templates')
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'ELASTIFLOW_DICT_PATH' not in env_dict:
+                dict_path = os.path.join(self.install_directory, 'dictionaries')
+                self.logger.info('Updating ElastiFlow dictionary configuration path [{}]'.format(dict_path))
+                new_variables['ELASTIFLOW_DICT_PATH'] = dict_path
+            if 'ELASTIFLOW_TEMPLATE_PATH' not in env_dict:
+                template_path = os.path.join(self.install_directory, 'templates')
 
-                    self.logger.info('Updating ElastiFlow template configuration path [{}]'.format(template_path))
-                    subprocess.call('echo ELASTIFLOW_TEMPLATE_PATH="{}" >> {}'.format(template_path, env_file),
-                                    shell=True)
-                if 'ELASTIFLOW_GEOIP_DB_PATH' not in env_str:
-                    geo_path = os.path.join(self.install_directory, 'geoipdbs')
-                    self.logger.info('Updating ElastiFlow GeoDBs configuration path [{}]'.format(geo_path))
-                    subprocess.call('echo ELASTIFLOW_GEOIP_DB_PATH="{}" >> {}'.format(geo_path, env_file), shell=True)
-                if 'ELASTIFLOW_DEFINITION_PATH' not in env_str:
-                    def_path = os.path.join(self.install_directory, 'definitions')
-                    self.logger.info('Updating ElastiFlow definitions configuration path [{}]'.format(def_path))
-                    subprocess.call('echo ELASTIFLOW_DEFINITION_PATH="{}" >> {}'.format(def_path, env_file), shell=True)
+                self.logger.info('Updating ElastiFlow template configuration path [{}]'.format(template_path))
+                new_variables['ELASTIFLOW_TEMPLATE_PATH'] = template_path
+            if 'ELASTIFLOW_GEOIP_DB_PATH' not in env_dict:
+                geo_path = os.path.join(self.install_directory, 'geoipdbs')
+                self.logger.info('Updating ElastiFlow GeoDBs configuration path [{}]'.format(geo_path))
+                new_variables['ELASTIFLOW_GEOIP_DB_PATH'] = geo_path
+            if 'ELASTIFLOW_DEFINITION_PATH' not in env_dict:
+                def_path = os.path.join(self.install_directory, 'definitions')
+                self.logger.info('Updating ElastiFlow definitions configuration path [{}]'.format(def_path))
+                new_variables['ELASTIFLOW_DEFINITION_PATH'] = def_path
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except Exception as e:
             self.logger.error('Failed to read ElastiFlow environment variables.')
             self.logger.debug("Failed to read ElastiFlow environment variables; {}".format(e))
@@ -72,4 +72,29 @@ class WriteLogstashConfigError(exceptions.WriteConfigError):
         :param message: A more specific error message
         """
         msg = "An error occurred when writing logstash.yml configuration: {}".format(message)
-        super(WriteLogstashConfigError, self).__init__(msg)
\ No newline at end of file
+        super(WriteLogstashConfigError, self).__init__(msg)
+
+
+class LogstashAutotuneError(Exception):
+    """
+    Thrown when the LogStash pipeline settings could not be tuned
+    """
+
+    def __init__(self, message):
+        """
+        :param message: A more specific error message
+        """
+        msg = "An error occurred while tuning LogStash pipelines: {}".format(message)
+        super(LogstashAutotuneError, self).__init__(msg)
+
+
+class InsufficientQueueDiskError(WriteLogstashConfigError):
+    """
+    Thrown when the free disk cannot fit a persisted queue for every pipeline
+    """
+
+    def __init__(self, message):
+        """
+        :param message: A more specific error message
+        """
+        super(InsufficientQueueDiskError, self).__init__(message)
@@ -17,9 +17,15 @@ from dynamite_nsm.logger import get_logger
 from dynamite_nsm.services.base import install
 from dynamite_nsm import exceptions as general_exceptions
 from dynamite_nsm.services.logstash import config as logstash_config
+from dynamite_nsm.services.logstash import autotune as logstash_autotune
 from dynamite_nsm.services.logstash import profile as logstash_profile
+from dynamite_nsm.services.logstash import queues as logstash_queues
+from dynamite_nsm.services.logstash import pipelines as logstash_pipelines
 from dynamite_nsm.services.logstash import process as logstash_process
+from dynamite_nsm.services.elasticsearch import api as elastic_api
 from dynamite_nsm.services.elasticsearch import profile as elastic_profile
+from dynamite_nsm.services.elasticsearch import indices as elastic_indices
+from dynamite_nsm.services.elasticsearch import exceptions as elastic_exceptions
 from dynamite_nsm.services.logstash.synesis import config as synesis_config
 from dynamite_nsm.services.logstash import exceptions as logstash_exceptions
 from dynamite_nsm.services.logstash.synesis import install as synesis_install
@@ -71,19 +77,23 @@ class InstallManager(install.BaseInstallManager):
         self.stdout = stdout
         self.verbose = verbose
         utilities.create_dynamite_environment_file()
+        install.BaseInstallManager.__init__(self, 'logstash', verbose=self.verbose, stdout=stdout)
         if download_logstash_archive:
             try:
-                self.download_from_mirror(const.LOGSTASH_MIRRORS, const.LOGSTASH_ARCHIVE_NAME, stdout=stdout,
-                                          verbose=verbose)
-            except (general_exceptions.ArchiveExtractionError, general_exceptions.DownloadError):
+                self.download_and_extract_from_mirror(const.LOGSTASH_MIRRORS, const.LOGSTASH_ARCHIVE_NAME,
+                                                      stdout=stdout, verbose=verbose)
+            except general_exceptions.DownloadError:
                 self.logger.error("Failed to download LogStash archive.")
                 raise logstash_exceptions.InstallLogstashError("Failed to download LogStash archive.")
-        try:
-            self.extract_archive(os.path.join(const.INSTALL_CACHE, const.LOGSTASH_ARCHIVE_NAME))
-        except general_exceptions.ArchiveExtractionError:
-            self.logger.error("Failed to extract LogStash archive.")
-            raise logstash_exceptions.InstallLogstashError("Failed to extract LogStash archive.")
-        install.BaseInstallManager.__init__(self, 'logstash', verbose=self.verbose, stdout=stdout)
+            except general_exceptions.ArchiveExtractionError:
+                self.logger.error("Failed to extract LogStash archive.")
+                raise logstash_exceptions.InstallLogstashError("Failed to extract LogStash archive.")
+        else:
+            try:
+                self.extract_archive(os.path.join(const.INSTALL_CACHE, const.LOGSTASH_ARCHIVE_NAME))
+            except general_exceptions.ArchiveExtractionError:
+                self.logger.error("Failed to extract LogStash archive.")
+                raise logstash_exceptions.InstallLogstashError("Failed to extract LogStash archive.")
 
     def _copy_logstash_files_and_directories(self):
         self.logger.info('Copying required LogStash files and directories.')
@@ -158,20 +168,20 @@ class InstallManager(install.BaseInstallManager):
     def _create_logstash_environment_variables(self):
         env_file = os.path.join(const.CONFIG_PATH, 'environment')
         try:
-            with open(env_file) as env_f:
-                env_str = env_f.read()
-                if 'LS_PATH_CONF' not in env_str:
-                    self.logger.info('Updating LogStash default configuration path [{}]'.format(
-                        self.configuration_directory))
-                    subprocess.call('echo LS_PATH_CONF="{}" >> {}'.format(self.configuration_directory, env_file),
-                                    shell=True)
-                if 'LS_HOME' not in env_str:
-                    self.logger.info('Updating LogStash default home path [{}]'.format(self.install_directory))
-                    subprocess.call('echo LS_HOME="{}" >> {}'.format(self.install_directory, env_file), shell=True)
-                if 'LS_LOGS' not in env_str:
-                    self.logger.info('Updating LogStash default log path [{}]'.format(self.log_directory))
-                    subprocess.call('echo LS_LOGS="{}" >> {}'.format(self.log_directory, env_file), shell=True)
-
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'LS_PATH_CONF' not in env_dict:
+                self.logger.info('Updating LogStash default configuration path [{}]'.format(
+                    self.configuration_directory))
+                new_variables['LS_PATH_CONF'] = self.configuration_directory
+            if 'LS_HOME' not in env_dict:
+                self.logger.info('Updating LogStash default home path [{}]'.format(self.install_directory))
+                new_variables['LS_HOME'] = self.install_directory
+            if 'LS_LOGS' not in env_dict:
+                self.logger.info('Updating LogStash default log path [{}]'.format(self.log_directory))
+                new_variables['LS_LOGS'] = self.log_directory
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except IOError:
             self.logger.error("Failed to open {} for reading.".format(env_file))
             raise logstash_exceptions.InstallLogstashError(
@@ -236,6 +246,67 @@ class InstallManager(install.BaseInstallManager):
         ls_config.java_maximum_memory = int(self.heap_size_gigs)
         ls_config.write_configs()
 
+    def _setup_source_pipelines(self):
+        self.logger.info('Splitting ElastiFlow and Synesis into per-source pipelines.')
+        try:
+            logstash_pipelines.setup_source_pipelines(self.configuration_directory, stdout=self.stdout,
+                                                      verbose=self.verbose)
+        except (logstash_exceptions.ReadLogstashConfigError, logstash_exceptions.WriteLogstashConfigError) as e:
+            self.logger.error('Failed to write pipelines.yml.')
+            self.logger.debug('Failed to write pipelines.yml; {}'.format(e))
+            raise logstash_exceptions.InstallLogstashError('Failed to write pipelines.yml; {}'.format(e))
+
+    def _setup_rollover_aliases(self):
+        es_api = elastic_api.ElasticsearchAPI(self.elasticsearch_host, self.elasticsearch_port, username='elastic',
+                                              password=self.elasticsearch_password)
+        prefixes = []
+        try:
+            for family in elastic_indices.INDEX_FAMILIES.values():
+                if es_api.get('/_alias/{}'.format(family['prefix']), ignore=(404,)):
+                    prefixes.append(family['prefix'])
+        except elastic_exceptions.ElasticsearchAPIError as e:
+            self.logger.warning('Could not look up the ElasticSearch rollover aliases; writing to daily indices.')
+            self.logger.debug('Could not look up the ElasticSearch rollover aliases; {}'.format(e))
+            return
+        try:
+            for path in logstash_pipelines.use_rollover_aliases(prefixes, self.configuration_directory):
+                self.logger.debug('Writing to rollover aliases in {}.'.format(path))
+        except logstash_exceptions.WriteLogstashConfigError as e:
+            self.logger.error('Failed to point LogStash at the rollover aliases.')
+            self.logger.debug('Failed to point LogStash at the rollover aliases; {}'.format(e))
+            raise logstash_exceptions.InstallLogstashError(
+                'Failed to point LogStash at the rollover aliases; {}'.format(e))
+
+    def _setup_queues(self):
+        self.logger.info('Sizing LogStash persisted queues from the free disk space.')
+        try:
+            queue_manager = logstash_queues.QueueManager(configuration_directory=self.configuration_directory,
+                                                         install_directory=self.install_directory,
+                                                         stdout=self.stdout, verbose=self.verbose)
+            self.logger.debug(queue_manager.size_queues())
+        except logstash_exceptions.InsufficientQueueDiskError as e:
+            self.logger.warning('Not enough free disk for persisted queues; pipelines will queue in memory.')
+            self.logger.debug('Not enough free disk for persisted queues; {}'.format(e))
+        except (logstash_exceptions.ReadLogstashConfigError, logstash_exceptions.WriteLogstashConfigError) as e:
+            self.logger.error('Failed to write queue settings.')
+            self.logger.debug('Failed to write queue settings; {}'.format(e))
+            raise logstash_exceptions.InstallLogstashError('Failed to write queue settings; {}'.format(e))
+
+    def _setup_pipeline_tuning(self):
+        ls_config = logstash_config.ConfigManager(configuration_directory=self.configuration_directory)
+        pipeline_ids = logstash_autotune.get_pipeline_ids(self.configuration_directory)
+        settings = logstash_autotune.get_pipeline_settings(int(self.heap_size_gigs), pipeline_count=len(pipeline_ids))
+        self.logger.info('Sizing {} pipeline(s) to {} workers, with batches of {} events.'.format(
+            len(pipeline_ids), settings['pipeline_workers'], settings['pipeline_batch_size']))
+        for name, value in settings.items():
+            setattr(ls_config, name, value)
+        try:
+            ls_config.write_logstash_config()
+        except logstash_exceptions.WriteLogstashConfigError as e:
+            self.logger.error('Failed to write pipeline settings.')
+            self.logger.debug('Failed to write pipeline settings; {}'.format(e))
+            raise logstash_exceptions.InstallLogstashError('Failed to write pipeline settings; {}'.format(e))
+
     def _setup_elastiflow(self):
         self.logger.info("Setting up ElastiFlow [Dynamite Patched Version].")
         try:
@@ -327,6 +398,10 @@ class InstallManager(install.BaseInstallManager):
         except Exception as e:
             raise logstash_exceptions.InstallLogstashError(
                 "General error while copying pipeline.yml file; {}".format(e))
+        self._setup_source_pipelines()
+        self._setup_rollover_aliases()
+        self._setup_queues()
+        self._setup_pipeline_tuning()
         try:
             utilities.makedirs(self.install_directory, exist_ok=True)
             utilities.makedirs(self.configuration_directory, exist_ok=True)
@@ -426,7 +501,6 @@ def uninstall_logstash(prompt_user=True, stdout=True, verbose=False):
         log_level = logging.DEBUG
     logger = get_logger('LOGSTASH', level=log_level, stdout=stdout)
 
-    env_file = os.path.join(const.CONFIG_PATH, 'environment')
     environment_variables = utilities.get_environment_file_dict()
     configuration_directory = environment_variables.get('LS_PATH_CONF')
     ls_profiler = logstash_profile.ProcessProfiler()
@@ -451,26 +525,9 @@ def uninstall_logstash(prompt_user=True, stdout=True, verbose=False):
         shutil.rmtree(ls_config.ls_home)
         shutil.rmtree(ls_config.path_logs)
         shutil.rmtree(const.INSTALL_CACHE, ignore_errors=True)
-        env_lines = ''
-        with open(env_file) as env_fr:
-            for line in env_fr.readlines():
-                if 'LS_PATH_CONF' in line:
-                    continue
-                elif 'LS_HOME' in line:
-                    continue
-                elif 'LS_LOGS' in line:
-                    continue
-                elif 'ELASTIFLOW_' in line:
-                    continue
-                elif 'SYNLITE_' in line:
-                    continue
-                elif 'ES_PASSWD' in line:
-                    continue
-                elif line.strip() == '':
-                    continue
-                env_lines += line.strip() + '\n'
-            with open(env_file, 'w') as env_fw:
-                env_fw.write(env_lines)
+        plugin_variables = [key for key in utilities.get_environment_file_dict()
+                            if key.startswith(('ELASTIFLOW_', 'SYNLITE_'))]
+        utilities.remove_from_environment_file('LS_PATH_CONF', 'LS_HOME', 'LS_LOGS', 'ES_PASSWD', *plugin_variables)
     except Exception as e:
         logger.error("General error occurred while attempting to uninstall LogStash.".format(e))
         logger.debug("General error occurred while attempting to uninstall LogStash; {}".format(e))
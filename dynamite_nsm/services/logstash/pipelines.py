@@ -0,0 +1,222 @@
+import os
+import re
+import glob
+import logging
+
+from dynamite_nsm import utilities
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.filebeat import config as filebeat_config
+from dynamite_nsm.services.logstash import config as logstash_config
+from dynamite_nsm.services.logstash import exceptions as logstash_exceptions
+
+# Every Filebeat event arrives on a single beats input; this pipeline only routes them to the pipeline of their source
+ROUTER_PIPELINE_ID = 'beats'
+ZEEK_PIPELINE_ID = 'zeek'
+SURICATA_PIPELINE_ID = 'suricata'
+FLOWS_PIPELINE_ID = 'flows'
+
+GENERATED_PIPELINE_DIRECTORY = 'pipelines'
+
+# Pipelines fed by the router buffer on disk, so that a slow filter (E.G reverse DNS lookups in Synesis) fills its own
+# queue instead of blocking the router, and with it every other source
+SOURCE_PIPELINE_SETTINGS = {
+    ROUTER_PIPELINE_ID: dict(workers=2),
+    ZEEK_PIPELINE_ID: dict(queue_type='persisted', queue_max_bytes='1gb'),
+    SURICATA_PIPELINE_ID: dict(queue_type='persisted', queue_max_bytes='1gb'),
+    FLOWS_PIPELINE_ID: dict()
+}
+
+# Agents with field filters ship the filtered JSON document of an event instead of its raw message; it is encoded back
+# into message here, so that the ElastiFlow and Synesis filters receive the events they were written for
+ROUTER_CONFIG = """input {{
+  beats {{
+    id => "dynamite_beats"
+    host => "${{ELASTIFLOW_ZEEK_HOST:0.0.0.0}}"
+    port => "${{ELASTIFLOW_ZEEK_PORT:5044}}"
+    client_inactivity_timeout => 180
+  }}
+}}
+filter {{
+  if [{decoded_field}] {{
+    ruby {{
+      id => "dynamite_encode_decoded_message"
+      code => "event.set('message', LogStash::Json.dump(event.remove('{decoded_field}')))"
+    }}
+  }}
+}}
+output {{
+{routes}
+}}
+"""
+
+# The daily indices ElastiFlow/Synesis write to (E.G index => "suricata-1.1.0-%{+YYYY.MM.dd}")
+DAILY_INDEX_PATTERN = r'(index\s*=>\s*["\'])({})-%\{{\+YYYY\.MM\.dd\}}(["\'])'
+
+PIPELINE_INPUT_CONFIG = """input {{
+  pipeline {{
+    id => "{address}_input"
+    address => "{address}"
+  }}
+}}
+"""
+
+
+def classify_config_files(conf_directory):
+    """
+    Split the config files of a LogStash config directory by the kind of plugins they define
+
+    :param conf_directory: Path to a conf.d directory (E.G /etc/dynamite/logstash/synesis/conf.d/)
+    :return: A tuple containing the beats input files, the other input files, and the filter/output files
+    """
+    beats_inputs, inputs, pipeline_files = [], [], []
+    for path in sorted(glob.glob(os.path.join(conf_directory, '*.conf'))):
+        try:
+            with open(path) as conf_f:
+                content = conf_f.read()
+        except IOError:
+            continue
+        if re.search(r'^\s*input\s*\{', content, re.MULTILINE):
+            if re.search(r'\bbeats\s*\{', content):
+                beats_inputs.append(path)
+            else:
+                inputs.append(path)
+        else:
+            pipeline_files.append(path)
+    return beats_inputs, inputs, pipeline_files
+
+
+def get_path_config(paths):
+    """
+    :param paths: A list of config file paths
+    :return: A path.config glob matching exactly those files
+    """
+    if len(paths) == 1:
+        return paths[0]
+    return '{' + ','.join(paths) + '}'
+
+
+def get_router_config(routes):
+    """
+    :param routes: A list of (condition, pipeline_id) tuples; the last pipeline receives every unmatched event
+    :return: The config of the router pipeline
+    """
+    if len(routes) == 1:
+        lines = ['  pipeline {{ send_to => ["{}"] }}'.format(routes[0][1])]
+    else:
+        lines = []
+        for i, (condition, pipeline_id) in enumerate(routes):
+            if i == 0:
+                lines.append('  if {} {{'.format(condition))
+            elif i < len(routes) - 1:
+                lines.append('  }} else if {} {{'.format(condition))
+            else:
+                lines.append('  } else {')
+            lines.append('    pipeline {{ send_to => ["{}"] }}'.format(pipeline_id))
+        lines.append('  }')
+    return ROUTER_CONFIG.format(routes='\n'.join(lines), decoded_field=filebeat_config.DECODED_MESSAGE_FIELD)
+
+
+def _write_pipeline_input(configuration_directory, address):
+    generated_directory = os.path.join(configuration_directory, GENERATED_PIPELINE_DIRECTORY)
+    utilities.makedirs(generated_directory, exist_ok=True)
+    input_path = os.path.join(generated_directory, '{}_input.conf'.format(address))
+    with open(input_path, 'w') as input_f:
+        input_f.write(PIPELINE_INPUT_CONFIG.format(address=address))
+    return input_path
+
+
+def use_rollover_aliases(index_prefixes, configuration_directory=None):
+    """
+    Point the elasticsearch outputs that write to daily indices at the rollover alias of the same prefix
+
+    :param index_prefixes: The prefixes that have a rollover alias in ElasticSearch (E.G ['suricata-1.1.0'])
+    :param configuration_directory: Path to the configuration directory (E.G /etc/dynamite/logstash/)
+    :return: A list of the config files changed
+    """
+    configuration_directory = configuration_directory or utilities.get_environment_file_dict().get('LS_PATH_CONF')
+    if not configuration_directory or not index_prefixes:
+        return []
+    pattern = re.compile(DAILY_INDEX_PATTERN.format('|'.join([re.escape(prefix) for prefix in index_prefixes])))
+    changed = []
+    for conf_directory in (os.path.join(configuration_directory, 'elastiflow', 'conf.d'),
+                           os.path.join(configuration_directory, 'synesis', 'conf.d')):
+        for path in sorted(glob.glob(os.path.join(conf_directory, '*.conf'))):
+            try:
+                with open(path) as conf_f:
+                    content = conf_f.read()
+                new_content = pattern.sub(r'\1\2\3', content)
+                if new_content == content:
+                    continue
+                with open(path, 'w') as conf_f:
+                    conf_f.write(new_content)
+            except IOError as e:
+                raise logstash_exceptions.WriteLogstashConfigError("Could not update {}; {}".format(path, e))
+            changed.append(path)
+    return changed
+
+
+def setup_source_pipelines(configuration_directory=None, stdout=True, verbose=False):
+    """
+    Run each source in its own pipeline, behind a router that owns the shared beats input
+
+    NetFlow/sFlow/IPFIX keep their own (UDP/TCP) inputs in the flows pipeline. Zeek events are processed by the
+    ElastiFlow filters, and Suricata events by the Synesis filters, each in a pipeline fed by the router. Any pipeline
+    that previously loaded the ElastiFlow or Synesis configs is replaced; other pipelines are left as they are.
+
+    :param configuration_directory: Path to the configuration directory (E.G /etc/dynamite/logstash/)
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: A list of the ids of the pipelines defined
+    """
+    log_level = logging.INFO
+    if verbose:
+        log_level = logging.DEBUG
+    logger = get_logger('LOGSTASH', level=log_level, stdout=stdout)
+    configuration_directory = configuration_directory or utilities.get_environment_file_dict().get('LS_PATH_CONF')
+    if not configuration_directory:
+        raise logstash_exceptions.WriteLogstashConfigError("LogStash is not installed.")
+    elastiflow_directory = os.path.join(configuration_directory, 'elastiflow', 'conf.d')
+    synesis_directory = os.path.join(configuration_directory, 'synesis', 'conf.d')
+    elastiflow_beats_inputs, flow_inputs, elastiflow_files = classify_config_files(elastiflow_directory)
+    synesis_beats_inputs, synesis_inputs, synesis_files = classify_config_files(synesis_directory)
+    source_paths = [os.path.join(configuration_directory, source) for source in ('elastiflow', 'synesis')]
+    source_files = set(elastiflow_beats_inputs + flow_inputs + elastiflow_files + synesis_beats_inputs +
+                       synesis_inputs + synesis_files)
+    pipelines_config = logstash_config.PipelineConfigManager(configuration_directory)
+    for pipeline in list(pipelines_config.pipelines):
+        path_config = str(pipeline.get('path.config', ''))
+        # A pipeline left loading these configs would bind the beats port a second time
+        if pipeline.get('pipeline.id') in SOURCE_PIPELINE_SETTINGS or \
+                any([path in path_config for path in source_paths]) or \
+                source_files.intersection(glob.glob(path_config)):
+            logger.debug('Replacing pipeline {}.'.format(pipeline.get('pipeline.id')))
+            pipelines_config.pipelines.remove(pipeline)
+
+    routes = []
+    if synesis_files:
+        routes.append(('[log][file][path] =~ /eve\\.json$/', SURICATA_PIPELINE_ID))
+        pipelines_config.add_pipeline(
+            SURICATA_PIPELINE_ID,
+            path_config=get_path_config(
+                [_write_pipeline_input(configuration_directory, SURICATA_PIPELINE_ID)] + synesis_files),
+            **SOURCE_PIPELINE_SETTINGS[SURICATA_PIPELINE_ID])
+    if elastiflow_files:
+        routes.append((None, ZEEK_PIPELINE_ID))
+        pipelines_config.add_pipeline(
+            ZEEK_PIPELINE_ID,
+            path_config=get_path_config(
+                [_write_pipeline_input(configuration_directory, ZEEK_PIPELINE_ID)] + elastiflow_files),
+            **SOURCE_PIPELINE_SETTINGS[ZEEK_PIPELINE_ID])
+        if flow_inputs:
+            pipelines_config.add_pipeline(
+                FLOWS_PIPELINE_ID, path_config=get_path_config(flow_inputs + elastiflow_files),
+                **SOURCE_PIPELINE_SETTINGS[FLOWS_PIPELINE_ID])
+    if routes:
+        pipelines_config.add_pipeline(ROUTER_PIPELINE_ID, config_string=get_router_config(routes),
+                                      **SOURCE_PIPELINE_SETTINGS[ROUTER_PIPELINE_ID])
+    else:
+        logger.warning('Neither ElastiFlow nor Synesis configs were found; pipelines.yml left unchanged.')
+        return pipelines_config.get_pipeline_ids()
+    pipelines_config.write_config()
+    logger.info('Defined pipelines: {}.'.format(', '.join(pipelines_config.get_pipeline_ids())))
+    return pipelines_config.get_pipeline_ids()
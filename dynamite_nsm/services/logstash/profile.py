@@ -4,6 +4,7 @@ from dynamite_nsm import const
 from dynamite_nsm import utilities
 
 from dynamite_nsm.services.base import profile
+from dynamite_nsm.services.base import readiness
 from dynamite_nsm.services.logstash import process as logstash_process
 
 
@@ -30,3 +31,13 @@ class ProcessProfiler(profile.BaseProcessProfiler):
             except KeyError:
                 return logstash_process.ProcessManager().status()['RUNNING']
         return False
+
+    def is_ready(self):
+        """
+        Application-level readiness check against the node API
+
+        :return: True, if LogStash is ready
+        """
+        if not self.is_installed():
+            return False
+        return readiness.logstash_is_ready()
@@ -0,0 +1,405 @@
+import os
+import re
+import glob
+import json
+import shutil
+import logging
+
+import psutil
+import tabulate
+
+from dynamite_nsm import utilities
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.base import readiness
+from dynamite_nsm.services.logstash import config as logstash_config
+from dynamite_nsm.services.logstash import process as logstash_process
+from dynamite_nsm.services.logstash import exceptions as logstash_exceptions
+
+BYTE_UNITS = {'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3, 'tb': 1024 ** 4, 'pb': 1024 ** 5}
+
+# The average size of a Zeek/Suricata event once serialized to a persisted queue page
+DEFAULT_EVENT_BYTES = 1024
+DEFAULT_EVENTS_PER_SECOND = 1000
+
+# How long an Elasticsearch outage the persisted queues should absorb before back-pressure reaches the agents
+DEFAULT_BUFFER_SECONDS = 3600
+
+# The share of the free disk on path.data the queues may claim; Elasticsearch often shares the same volume
+DEFAULT_DISK_SHARE = 0.5
+
+# queue.max_bytes must leave room for at least a few pages (queue.page_capacity defaults to 64mb)
+MIN_QUEUE_BYTES = 256 * BYTE_UNITS['mb']
+DEFAULT_DLQ_MAX_BYTES = '1gb'
+
+REPLAY_PIPELINE_PREFIX = 'dlq_replay_'
+REPLAY_CONFIG = """input {{
+  dead_letter_queue {{
+    id => "{pipeline_id}_dlq"
+    path => "{path}"
+    pipeline_id => "{pipeline_id}"
+    commit_offsets => true
+  }}
+}}
+filter {{
+  mutate {{
+    add_tag => ["dlq_replay"]
+  }}
+}}
+output {{
+  pipeline {{ send_to => ["{pipeline_id}"] }}
+}}
+"""
+
+LOGSTASH_API_HOST = 'localhost'
+LOGSTASH_API_PORT = 9600
+
+
+def parse_byte_size(size):
+    """
+    :param size: A LogStash byte size (E.G 1024mb, 4gb) or a number of bytes
+    :return: The number of bytes
+    """
+    if isinstance(size, int):
+        return size
+    match = re.match(r'^\s*(\d+)\s*([kmgtp]?b)?\s*$', str(size).lower())
+    if not match:
+        raise logstash_exceptions.WriteLogstashConfigError("{} is not a valid byte size.".format(size))
+    return int(match.group(1)) * BYTE_UNITS[match.group(2) or 'b']
+
+
+def format_byte_size(size):
+    """
+    :param size: A number of bytes
+    :return: The size in the largest whole unit LogStash understands (E.G 1536mb)
+    """
+    for unit in ('pb', 'tb', 'gb', 'mb', 'kb'):
+        if size >= BYTE_UNITS[unit] and size % BYTE_UNITS[unit] == 0:
+            return '{}{}'.format(size // BYTE_UNITS[unit], unit)
+    return '{}b'.format(size)
+
+
+def format_readable_size(size):
+    """
+    :param size: A number of bytes
+    :return: The size, rounded to one decimal in the largest unit below it (E.G 1.5GB)
+    """
+    for unit in ('pb', 'tb', 'gb', 'mb', 'kb'):
+        if size >= BYTE_UNITS[unit]:
+            return '{:.1f}{}'.format(float(size) / BYTE_UNITS[unit], unit.upper())
+    return '{}B'.format(size)
+
+
+def get_directory_size(path):
+    """
+    :param path: The path to a directory
+    :return: The number of bytes the files within it occupy; 0 if it does not exist
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                continue
+    return total
+
+
+def get_free_disk_bytes(path):
+    """
+    :param path: A path that may not exist yet (E.G path.data before the first start)
+    :return: The number of bytes free on the volume holding it
+    """
+    path = os.path.abspath(path)
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return psutil.disk_usage(path).free
+
+
+def get_queue_sizes(path_queue, pipeline_ids, events_per_second=DEFAULT_EVENTS_PER_SECOND,
+                    buffer_seconds=DEFAULT_BUFFER_SECONDS, event_bytes=DEFAULT_EVENT_BYTES,
+                    disk_share=DEFAULT_DISK_SHARE):
+    """
+    Size the persisted queue of each pipeline to hold buffer_seconds worth of events, within the free disk
+
+    :param path_queue: LogStash's path.queue (path.data/queue by default), under which the queues are kept
+    :param pipeline_ids: The ids of the pipelines with a persisted queue; the events are assumed to be split evenly
+    :param events_per_second: The number of events per second expected across all of these pipelines
+    :param buffer_seconds: The number of seconds of events the queues should hold
+    :param event_bytes: The average size of a serialized event
+    :param disk_share: The share of the free disk the queues may claim
+    :return: A tuple containing the queue.max_bytes of each pipeline, and the number of seconds they can buffer;
+             raises InsufficientQueueDiskError if the share of the disk cannot fit MIN_QUEUE_BYTES per pipeline
+    """
+    if not pipeline_ids:
+        return 0, 0
+    # The queues already on disk belong to us; count them as free when re-sizing
+    available = get_free_disk_bytes(path_queue) + get_directory_size(path_queue)
+    wanted = int(events_per_second * buffer_seconds * event_bytes) // len(pipeline_ids)
+    budget = int(available * disk_share) // len(pipeline_ids)
+    if budget < MIN_QUEUE_BYTES:
+        # Rounding up to the minimum would promise the queues more disk than disk_share allows
+        raise logstash_exceptions.InsufficientQueueDiskError(
+            "The {} share of the {} free on {} cannot fit a {} queue for each of {} pipelines; free up disk, raise "
+            "the disk share, or persist fewer pipelines.".format(
+                format_readable_size(int(available * disk_share)), format_readable_size(available), path_queue,
+                format_readable_size(MIN_QUEUE_BYTES), len(pipeline_ids)))
+    # Whole megabytes keep the values in pipelines.yml readable; only round down when the disk is the limit
+    if wanted <= budget:
+        per_pipeline = -(-wanted // BYTE_UNITS['mb']) * BYTE_UNITS['mb']
+    else:
+        per_pipeline = budget - budget % BYTE_UNITS['mb']
+    per_pipeline = max(MIN_QUEUE_BYTES, per_pipeline)
+    buffered_seconds = per_pipeline * len(pipeline_ids) // max(1, int(events_per_second * event_bytes))
+    return per_pipeline, buffered_seconds
+
+
+class QueueManager:
+    """
+    Size the persisted queues, and inspect or replay the dead-letter queues, of every LogStash pipeline
+    """
+
+    def __init__(self, configuration_directory=None, install_directory=None, api_host=LOGSTASH_API_HOST,
+                 api_port=LOGSTASH_API_PORT, stdout=True, verbose=False):
+        """
+        :param configuration_directory: Path to the configuration directory (E.G /etc/dynamite/logstash/)
+        :param install_directory: Path to the install directory (E.G /opt/dynamite/logstash/)
+        :param api_host: The LogStash API host
+        :param api_port: The LogStash API port
+        :param stdout: Print the output to console
+        :param verbose: Include detailed debug messages
+        """
+        log_level = logging.INFO
+        if verbose:
+            log_level = logging.DEBUG
+        self.logger = get_logger('LOGSTASH_QUEUES', level=log_level, stdout=stdout)
+        env_dict = utilities.get_environment_file_dict()
+        self.configuration_directory = configuration_directory or env_dict.get('LS_PATH_CONF')
+        self.install_directory = install_directory or env_dict.get('LS_HOME')
+        if not self.configuration_directory:
+            raise logstash_exceptions.ReadLogstashConfigError("LogStash is not installed.")
+        self.api_host = api_host
+        self.api_port = api_port
+        self.ls_config = logstash_config.ConfigManager(self.configuration_directory)
+        self.pipelines_config = logstash_config.PipelineConfigManager(self.configuration_directory)
+
+    @property
+    def path_data(self):
+        return self.ls_config.path_data or os.path.join(self.install_directory or '', 'data')
+
+    @property
+    def path_queue(self):
+        return self.ls_config.path_queue or os.path.join(self.path_data, 'queue')
+
+    @property
+    def path_dead_letter_queue(self):
+        return self.ls_config.path_dead_letter_queue or os.path.join(self.path_data, 'dead_letter_queue')
+
+    def get_pipeline_ids(self):
+        """
+        :return: The ids of the pipelines that process events (DLQ replay pipelines excluded)
+        """
+        pipeline_ids = self.pipelines_config.get_pipeline_ids() or ['main']
+        return [pipeline_id for pipeline_id in pipeline_ids if not pipeline_id.startswith(REPLAY_PIPELINE_PREFIX)]
+
+    def get_persisted_pipeline_ids(self):
+        """
+        :return: The ids of the pipelines that run on a persisted queue (per pipelines.yml, or logstash.yml)
+        """
+        persisted = []
+        for pipeline_id in self.get_pipeline_ids():
+            pipeline = self.pipelines_config.get_pipeline(pipeline_id) or {}
+            if pipeline.get('queue.type', self.ls_config.queue_type) == 'persisted':
+                persisted.append(pipeline_id)
+        return persisted
+
+    def size_queues(self, events_per_second=DEFAULT_EVENTS_PER_SECOND, buffer_seconds=DEFAULT_BUFFER_SECONDS,
+                    event_bytes=DEFAULT_EVENT_BYTES, disk_share=DEFAULT_DISK_SHARE, pipeline_ids=None,
+                    enable_dead_letter_queue=True, dry_run=False):
+        """
+        Size (and enable) the persisted queues; pipelines.yml overrides are used when there is more than one pipeline
+
+        :param events_per_second: The number of events per second expected across the queued pipelines
+        :param buffer_seconds: The number of seconds of events the queues should hold
+        :param event_bytes: The average size of a serialized event
+        :param disk_share: The share of the free disk on path.data the queues may claim
+        :param pipeline_ids: The pipelines to queue on disk; defaults to those already persisted (or every pipeline)
+        :param enable_dead_letter_queue: Keep events Elasticsearch rejects (mapping errors) in the dead-letter queue
+        :param dry_run: If True, only report the queue sizes
+        :return: A table describing the queue of each pipeline
+        """
+        pipeline_ids = pipeline_ids or self.get_persisted_pipeline_ids() or self.get_pipeline_ids()
+        max_bytes, buffered_seconds = get_queue_sizes(
+            self.path_queue, pipeline_ids, events_per_second=events_per_second, buffer_seconds=buffer_seconds,
+            event_bytes=event_bytes, disk_share=disk_share)
+        if buffered_seconds < buffer_seconds:
+            self.logger.warning('{} free on {} can only buffer {}s of the {}s requested.'.format(
+                format_readable_size(get_free_disk_bytes(self.path_queue)), self.path_queue, buffered_seconds,
+                buffer_seconds))
+        if not dry_run:
+            if self.pipelines_config.pipelines:
+                for pipeline_id in pipeline_ids:
+                    self.pipelines_config.set_pipeline_settings(
+                        pipeline_id, queue_type='persisted', queue_max_bytes=format_byte_size(max_bytes))
+                self.pipelines_config.write_config()
+            else:
+                self.ls_config.queue_type = 'persisted'
+                self.ls_config.queue_max_bytes = format_byte_size(max_bytes)
+            if enable_dead_letter_queue:
+                self.ls_config.dead_letter_queue_enable = True
+                self.ls_config.dead_letter_queue_max_bytes = \
+                    self.ls_config.dead_letter_queue_max_bytes or DEFAULT_DLQ_MAX_BYTES
+            self.ls_config.write_logstash_config()
+            self.logger.info('Restart LogStash for the new queue settings to take effect.')
+        rows = [[pipeline_id, 'persisted', format_byte_size(max_bytes), '{:.1f}'.format(buffered_seconds / 3600.0)]
+                for pipeline_id in pipeline_ids]
+        return tabulate.tabulate(rows, headers=['Pipeline', 'Queue', 'queue.max_bytes', 'Hours Buffered'],
+                                 tablefmt='fancy_grid')
+
+    def get_queue_stats(self):
+        """
+        Read the depth of every queue from the node stats API, or from disk if LogStash is not running
+
+        :return: A dictionary mapping each pipeline to its queue type, events queued, bytes queued, queue.max_bytes,
+                 and dead-letter queue bytes (None when not known)
+        """
+        stats = {}
+        code, body = readiness.http_get('http://{}:{}/_node/stats/pipelines'.format(self.api_host, self.api_port))
+        if code == 200:
+            for pipeline_id, pipeline in json.loads(body).get('pipelines', {}).items():
+                queue = pipeline.get('queue') or {}
+                capacity = queue.get('capacity') or {}
+                stats[pipeline_id] = dict(
+                    type=queue.get('type', 'memory'),
+                    events=queue.get('events_count', queue.get('events')),
+                    queue_bytes=capacity.get('queue_size_in_bytes'),
+                    max_bytes=capacity.get('max_queue_size_in_bytes'),
+                    dlq_bytes=(pipeline.get('dead_letter_queue') or {}).get('queue_size_in_bytes')
+                )
+            return stats
+        self.logger.debug('LogStash API is unreachable (HTTP {}); reading queue sizes from disk.'.format(code))
+        for pipeline_id in self.get_pipeline_ids():
+            pipeline = self.pipelines_config.get_pipeline(pipeline_id) or {}
+            queue_type = pipeline.get('queue.type', self.ls_config.queue_type) or 'memory'
+            max_bytes = pipeline.get('queue.max_bytes', self.ls_config.queue_max_bytes)
+            stats[pipeline_id] = dict(
+                type=queue_type,
+                events=None,
+                queue_bytes=get_directory_size(os.path.join(self.path_queue, pipeline_id)),
+                max_bytes=parse_byte_size(max_bytes) if max_bytes and queue_type == 'persisted' else None,
+                dlq_bytes=get_directory_size(os.path.join(self.path_dead_letter_queue, pipeline_id))
+            )
+        return stats
+
+    def status(self):
+        """
+        :return: A table describing the depth of the queues of each pipeline
+        """
+        rows = []
+        for pipeline_id, stats in sorted(self.get_queue_stats().items()):
+            used = ''
+            if stats['queue_bytes'] is not None and stats['max_bytes']:
+                used = '{:.1%}'.format(float(stats['queue_bytes']) / stats['max_bytes'])
+            rows.append([
+                pipeline_id, stats['type'],
+                stats['events'] if stats['events'] is not None else '',
+                format_readable_size(stats['queue_bytes']) if stats['queue_bytes'] is not None else '',
+                format_readable_size(stats['max_bytes']) if stats['max_bytes'] else '', used,
+                format_readable_size(stats['dlq_bytes']) if stats['dlq_bytes'] is not None else ''
+            ])
+        return tabulate.tabulate(rows, headers=['Pipeline', 'Queue', 'Events', 'Queued', 'Capacity', 'Used',
+                                                'Dead Letters'], tablefmt='fancy_grid')
+
+    def _check_pipeline(self, pipeline_id):
+        if pipeline_id not in self.get_pipeline_ids():
+            raise logstash_exceptions.WriteLogstashConfigError("Pipeline {} is not defined.".format(pipeline_id))
+
+    def replay_dead_letters(self, pipeline_id):
+        """
+        Feed the dead-letter queue of a pipeline back into it, through a dlq_replay_<pipeline_id> pipeline
+
+        Only pipelines fed by the beats router (which listen on a pipeline address of the same name) can be replayed
+        into. Replayed events are tagged dlq_replay. The replay pipeline keeps running (and commits its offset) until
+        drain_dead_letters removes it.
+
+        :param pipeline_id: The id of the pipeline (E.G suricata)
+        """
+        self._check_pipeline(pipeline_id)
+        pipeline = self.pipelines_config.get_pipeline(pipeline_id) or {}
+        if 'address => "{}"'.format(pipeline_id) not in self._read_pipeline_config(pipeline):
+            raise logstash_exceptions.WriteLogstashConfigError(
+                "Pipeline {} has no pipeline input to replay into.".format(pipeline_id))
+        self.pipelines_config.add_pipeline(
+            REPLAY_PIPELINE_PREFIX + pipeline_id, workers=1,
+            config_string=REPLAY_CONFIG.format(path=self.path_dead_letter_queue, pipeline_id=pipeline_id))
+        self.pipelines_config.write_config()
+        self.logger.info('Restart LogStash to replay the dead letters of {}.'.format(pipeline_id))
+
+    def drain_dead_letters(self, pipeline_id):
+        """
+        Discard the dead-letter queue of a pipeline (and stop replaying it); LogStash must be stopped
+
+        :param pipeline_id: The id of the pipeline (E.G suricata)
+        :return: The number of bytes discarded
+        """
+        self._check_pipeline(pipeline_id)
+        if logstash_process.ProcessManager(stdout=False).status().get('running'):
+            raise logstash_exceptions.WriteLogstashConfigError(
+                "LogStash holds a lock on its dead-letter queues; stop it before draining.")
+        if self.pipelines_config.remove_pipeline(REPLAY_PIPELINE_PREFIX + pipeline_id):
+            self.pipelines_config.write_config()
+        dlq_directory = os.path.join(self.path_dead_letter_queue, pipeline_id)
+        drained = get_directory_size(dlq_directory)
+        shutil.rmtree(dlq_directory, ignore_errors=True)
+        self.logger.info('Discarded {} of dead letters from {}.'.format(format_readable_size(drained), pipeline_id))
+        return drained
+
+    @staticmethod
+    def _read_pipeline_config(pipeline):
+        if 'config.string' in pipeline:
+            return pipeline['config.string']
+        content = ''
+        path_config = str(pipeline.get('path.config', ''))
+        # Expand the {a,b} globs written by the source pipelines setup
+        match = re.match(r'^\{(.*)\}$', path_config)
+        for pattern in match.group(1).split(',') if match else [path_config]:
+            for path in sorted(glob.glob(pattern)):
+                with open(path) as conf_f:
+                    content += conf_f.read()
+        return content
+
+
+def manage_queues(action='status', events_per_second=DEFAULT_EVENTS_PER_SECOND, buffer_seconds=DEFAULT_BUFFER_SECONDS,
+                  event_bytes=DEFAULT_EVENT_BYTES, disk_share=DEFAULT_DISK_SHARE, pipeline_id=None,
+                  enable_dead_letter_queue=True, dry_run=False, stdout=True, verbose=False):
+    """
+    Inspect or size the persisted queues, or replay/drain a dead-letter queue
+
+    :param action: status, size, replay or drain
+    :param events_per_second: The number of events per second expected across the queued pipelines (size)
+    :param buffer_seconds: The number of seconds of events the queues should hold (size)
+    :param event_bytes: The average size of a serialized event (size)
+    :param disk_share: The share of the free disk on path.data the queues may claim (size)
+    :param pipeline_id: The pipeline to size (default all persisted), or to replay/drain
+    :param enable_dead_letter_queue: Enable the dead-letter queue (size)
+    :param dry_run: If True, only report the queue sizes (size)
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: A table, or a summary of the changes made
+    """
+    queue_manager = QueueManager(stdout=stdout, verbose=verbose)
+    if action == 'status':
+        return queue_manager.status()
+    elif action == 'size':
+        return queue_manager.size_queues(
+            events_per_second=events_per_second, buffer_seconds=buffer_seconds, event_bytes=event_bytes,
+            disk_share=disk_share, pipeline_ids=[pipeline_id] if pipeline_id else None,
+            enable_dead_letter_queue=enable_dead_letter_queue, dry_run=dry_run)
+    if not pipeline_id:
+        raise logstash_exceptions.WriteLogstashConfigError("{} requires a pipeline.".format(action))
+    if action == 'replay':
+        queue_manager.replay_dead_letters(pipeline_id)
+        return "Replaying the dead letters of {}.".format(pipeline_id)
+    elif action == 'drain':
+        return "Discarded {} of dead letters from {}.".format(
+            format_readable_size(queue_manager.drain_dead_letters(pipeline_id)), pipeline_id)
+    raise logstash_exceptions.WriteLogstashConfigError("{} is not a valid action.".format(action))
@@ -1,7 +1,6 @@
 import os
 import sys
 import logging
-import subprocess
 
 from dynamite_nsm import const
 from dynamite_nsm import utilities
@@ -34,30 +33,28 @@ class InstallManager:
         Create required environmental variables; copy configurations to various directories.
         """
 
-        env_file = os.path.join(const.CONFIG_PATH, 'environment')
         self.logger.info('Creating Synesis installation and configuration directories.')
         utilities.makedirs(self.install_directory, exist_ok=True)
         self.logger.info('Copying Synesis configurations.')
         utilities.copytree(os.path.join(const.DEFAULT_CONFIGS, 'logstash','suricata'), self.install_directory)
         utilities.set_ownership_of_file(self.install_directory, user='dynamite', group='dynamite')
         try:
-            with open(env_file) as env_f:
-                env_str = env_f.read()
-                if 'SYNLITE_SURICATA_DICT_PATH' not in env_str:
-                    dict_path = os.path.join(self.install_directory, 'dictionaries')
-                    self.logger.info('Updating Synesis dictionary configuration path [{}]'.format(dict_path))
-                    subprocess.call('echo SYNLITE_SURICATA_DICT_PATH="{}" >> {}'.format(dict_path, env_file),
-                                    shell=True)
-                if 'SYNLITE_SURICATA_TEMPLATE_PATH' not in env_str:
-                    template_path = os.path.join(self.install_directory, 'templates')
-                    self.logger.info('Updating Synesis template configuration path [{}]'.format(template_path))
-                    subprocess.call('echo SYNLITE_SURICATA_TEMPLATE_PATH="{}" >> {}'.format(template_path, env_file),
-                                    shell=True)
-                if 'SYNLITE_SURICATA_GEOIP_DB_PATH' not in env_str:
-                    geo_path = os.path.join(self.install_directory, 'geoipdbs')
-                    self.logger.info('Updating Synesis GeoDBs configuration path [{}]'.format(geo_path))
-                    subprocess.call('echo SYNLITE_SURICATA_GEOIP_DB_PATH="{}" >> {}'.format(geo_path, env_file),
-                                    shell=True)
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'SYNLITE_SURICATA_DICT_PATH' not in env_dict:
+                dict_path = os.path.join(self.install_directory, 'dictionaries')
+                self.logger.info('Updating Synesis dictionary configuration path [{}]'.format(dict_path))
+                new_variables['SYNLITE_SURICATA_DICT_PATH'] = dict_path
+            if 'SYNLITE_SURICATA_TEMPLATE_PATH' not in env_dict:
+                template_path = os.path.join(self.install_directory, 'templates')
+                self.logger.info('Updating Synesis template configuration path [{}]'.format(template_path))
+                new_variables['SYNLITE_SURICATA_TEMPLATE_PATH'] = template_path
+            if 'SYNLITE_SURICATA_GEOIP_DB_PATH' not in env_dict:
+                geo_path = os.path.join(self.install_directory, 'geoipdbs')
+                self.logger.info('Updating Synesis GeoDBs configuration path [{}]'.format(geo_path))
+                new_variables['SYNLITE_SURICATA_GEOIP_DB_PATH'] = geo_path
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except Exception as e:
             self.logger.error('Failed to read Synesis environment variables.')
             self.logger.debug("Failed to read Synesis environment variables; {}".format(e))
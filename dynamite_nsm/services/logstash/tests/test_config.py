@@ -66,6 +66,26 @@ class Tests(unittest.TestCase):
 
         assert(config_manager_read.pipeline_batch_delay == 10)
 
+    def test_logstashyaml_update_pipeline_workers(self):
+        self.config_manager.pipeline_workers = 12
+        self.config_manager.write_logstash_config()
+
+        config_manager_read = config.ConfigManager(self.config_directory)
+
+        assert(config_manager_read.pipeline_workers == 12 and config_manager_read.pipeline_ordered is None)
+        assert('pipeline.ordered' not in config_manager_read.config_data)
+
+    def test_logstashyaml_update_persisted_queue(self):
+        self.config_manager.queue_type = 'persisted'
+        self.config_manager.queue_max_bytes = '4gb'
+        self.config_manager.dead_letter_queue_enable = True
+        self.config_manager.write_logstash_config()
+
+        config_manager_read = config.ConfigManager(self.config_directory)
+
+        assert(config_manager_read.queue_type == 'persisted' and config_manager_read.queue_max_bytes == '4gb')
+        assert(config_manager_read.dead_letter_queue_enable is True)
+
     def test_javaopts_update_heapsize(self):
         self.config_manager.java_maximum_memory = 10
         self.config_manager.java_initial_memory = 10
@@ -75,5 +95,17 @@ class Tests(unittest.TestCase):
 
         assert(config_manager_read.java_initial_memory == 10 and config_manager_read.java_maximum_memory == 10)
 
+    def test_pipelinesyaml_add_pipeline(self):
+        pipelines_manager = config.PipelineConfigManager(self.config_directory)
+        pipelines_manager.add_pipeline('suricata', path_config='/etc/dynamite/logstash/synesis/conf.d/*.conf',
+                                       queue_type='persisted', queue_max_bytes='1gb')
+        pipelines_manager.write_config()
+
+        pipelines_manager_read = config.PipelineConfigManager(self.config_directory)
+
+        assert(pipelines_manager_read.get_pipeline_ids() == ['suricata'])
+        assert(pipelines_manager_read.get_pipeline('suricata')['queue.type'] == 'persisted')
+        assert('pipeline.workers' not in pipelines_manager_read.get_pipeline('suricata'))
+
     def tearDown(self):
         shutil.rmtree(self.config_root, ignore_errors=True)
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from dynamite_nsm.services.logstash import queues
+from dynamite_nsm.services.logstash import exceptions as logstash_exceptions
+
+MB = queues.BYTE_UNITS['mb']
+GB = queues.BYTE_UNITS['gb']
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.path_queue = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path_queue)
+
+    def _get_queue_sizes(self, free_bytes, pipeline_ids, **kwargs):
+        with mock.patch.object(queues, 'get_free_disk_bytes', return_value=free_bytes):
+            return queues.get_queue_sizes(self.path_queue, pipeline_ids, **kwargs)
+
+    def test_parse_byte_size(self):
+        assert(queues.parse_byte_size('1024mb') == GB)
+        assert(queues.parse_byte_size(' 4GB ') == 4 * GB)
+        assert(queues.parse_byte_size('512') == 512)
+        assert(queues.parse_byte_size(2048) == 2048)
+        with self.assertRaises(logstash_exceptions.WriteLogstashConfigError):
+            queues.parse_byte_size('1.5gb')
+
+    def test_format_byte_size(self):
+        assert(queues.format_byte_size(4 * GB) == '4gb')
+        assert(queues.format_byte_size(1536 * MB) == '1536mb')
+        assert(queues.format_byte_size(1000) == '1000b')
+        for size in (GB, 1536 * MB, 3 * 1024 + 1):
+            assert(queues.parse_byte_size(queues.format_byte_size(size)) == size)
+
+    def test_get_queue_sizes_buffer_fits(self):
+        # 1000 events/s of 1KiB for an hour, split across two pipelines
+        max_bytes, buffered_seconds = self._get_queue_sizes(100 * GB, ['zeek', 'suricata'])
+
+        assert(max_bytes == -(-1000 * 3600 * 1024 // 2 // MB) * MB)
+        assert(buffered_seconds >= 3600)
+
+    def test_get_queue_sizes_limited_by_disk(self):
+        max_bytes, buffered_seconds = self._get_queue_sizes(2 * GB, ['zeek', 'suricata'])
+
+        # Half of the free disk, split evenly
+        assert(max_bytes == 512 * MB)
+        assert(buffered_seconds < 3600)
+
+    def test_get_queue_sizes_small_buffer_rounded_up_to_minimum(self):
+        max_bytes, _ = self._get_queue_sizes(100 * GB, ['zeek'], events_per_second=1, buffer_seconds=60)
+
+        assert(max_bytes == queues.MIN_QUEUE_BYTES)
+
+    def test_get_queue_sizes_counts_existing_queues(self):
+        with open(os.path.join(self.path_queue, 'page.0'), 'wb') as page_f:
+            page_f.write(b'\0' * MB)
+
+        max_bytes, _ = self._get_queue_sizes(1023 * MB, ['zeek'])
+
+        assert(max_bytes == 512 * MB)
+
+    def test_get_queue_sizes_below_minimum(self):
+        # 600MB free leaves 100MB per pipeline; the minimum queue would over-commit the disk share
+        with self.assertRaises(logstash_exceptions.InsufficientQueueDiskError):
+            self._get_queue_sizes(600 * MB, ['zeek', 'suricata', 'syslog'])
+
+    def test_get_queue_sizes_no_pipelines(self):
+        assert(self._get_queue_sizes(100 * GB, []) == (0, 0))
@@ -0,0 +1,148 @@
+import math
+
+import psutil
+
+from dynamite_nsm import topology
+
+# The snaplen Suricata uses when default-packet-size is not set (a full ethernet frame)
+DEFAULT_PACKET_SIZE = 1514
+
+# Assumed when the link speed cannot be read (E.G virtual NICs, or the link is down at install time)
+DEFAULT_LINK_SPEED_MBPS = 1000
+
+# The average size of a packet on the wire, used to turn link speed into a packet rate
+AVERAGE_WIRE_PACKET_SIZE = 800
+
+# How much line-rate traffic the rings of an interface should be able to absorb while its threads are busy
+RING_BUFFER_MS = 100
+
+MIN_RING_SIZE = 2048
+MAX_RING_SIZE = 131072
+
+# The largest share of available memory the rings of all interfaces combined are allowed to reserve
+DEFAULT_MEMORY_FRACTION = 0.25
+
+# Suricata's examples count cluster-ids down from 99; each interface needs its own fanout group
+FIRST_CLUSTER_ID = 99
+
+
+def _align(value, alignment=16):
+    return int(math.ceil(value / float(alignment))) * alignment
+
+
+def get_frame_size(snaplen=DEFAULT_PACKET_SIZE):
+    """
+    The size of a single TPACKET_V3 frame, as computed by Suricata (snaplen plus the aligned tpacket3_hdr and
+    sockaddr_ll headers)
+
+    :param snaplen: The maximum number of bytes captured per packet (default-packet-size)
+    :return: The frame size in bytes
+    """
+    return _align(snaplen + _align(_align(48) + 20 + 14) - 14)
+
+
+def get_block_size(link_speed):
+    """
+    Larger blocks mean fewer poll wakeups per packet, which matters on fast links
+
+    :param link_speed: The link speed in Mbps
+    :return: The block size in bytes (a power of two multiple of the page size)
+    """
+    if link_speed >= 10000:
+        return 1048576
+    elif link_speed >= 1000:
+        return 262144
+    return 32768
+
+
+def get_ring_memory(ring_size, block_size, threads, snaplen=DEFAULT_PACKET_SIZE):
+    """
+    :param ring_size: The number of frames in the ring of each thread
+    :param block_size: The TPACKET_V3 block size in bytes
+    :param threads: The number of capture threads on the interface
+    :param snaplen: The maximum number of bytes captured per packet (default-packet-size)
+    :return: The number of bytes the mmap rings of an interface will reserve
+    """
+    frames_per_block = max(1, block_size // get_frame_size(snaplen))
+    return int(math.ceil(ring_size / float(frames_per_block))) * block_size * threads
+
+
+def _get_ring_size(link_speed, threads):
+    packets_per_second = link_speed * 1000000 / 8.0 / AVERAGE_WIRE_PACKET_SIZE
+    ring_size = int(math.ceil(packets_per_second * RING_BUFFER_MS / 1000.0 / threads))
+    return max(MIN_RING_SIZE, min(MAX_RING_SIZE, ring_size))
+
+
+def plan_afpacket_interfaces(network_capture_interfaces, cpu_topology=None, available_memory=None,
+                             memory_fraction=DEFAULT_MEMORY_FRACTION, snaplen=DEFAULT_PACKET_SIZE):
+    """
+    Size the AF_PACKET capture of each network interface from its hardware
+
+    Each interface gets one thread per receive queue (capped by the free physical cores local to the NIC), and
+    cluster_qm when every queue has its own thread, so that packets stay on the CPU the NIC delivered them to;
+    otherwise cluster_flow. Rings are sized to hold RING_BUFFER_MS of line-rate traffic, and shrunk evenly if all
+    rings combined would reserve more than memory_fraction of the available memory.
+
+    :param network_capture_interfaces: A list of network interface names
+    :param cpu_topology: A topology.CPUTopology instance; read from sysfs if not given
+    :param available_memory: The memory available to Suricata in bytes; defaults to what is currently available
+    :param memory_fraction: The largest share of available memory the rings are allowed to reserve
+    :param snaplen: The maximum number of bytes captured per packet (default-packet-size)
+    :return: A list of dictionaries containing the af-packet settings (interface, threads, cluster_id, cluster_type,
+             ring_size, block_size, tpacket_v3, use_mmap, defrag) of each interface, along with the numa_node,
+             rx_queues, link_speed and memory (in bytes) it will reserve
+    """
+    if not cpu_topology:
+        cpu_topology = topology.CPUTopology.from_sysfs()
+    if available_memory is None:
+        available_memory = psutil.virtual_memory().available
+    workers = topology.plan_capture_workers(network_capture_interfaces, topology=cpu_topology,
+                                            strategy='conservative')
+    plans = []
+    for i, worker in enumerate(workers):
+        interface = worker['interface']
+        rx_queues = cpu_topology.get_interface_rx_queue_count(interface)
+        link_speed = cpu_topology.get_interface_link_speed(interface) or DEFAULT_LINK_SPEED_MBPS
+        threads = max(1, worker['lb_procs'])
+        cluster_type = 'cluster_flow'
+        if rx_queues > 1:
+            threads = min(threads, rx_queues)
+            if threads == rx_queues:
+                cluster_type = 'cluster_qm'
+        plans.append(dict(
+            interface=interface,
+            threads=threads,
+            cluster_id=FIRST_CLUSTER_ID - i,
+            cluster_type=cluster_type,
+            ring_size=_get_ring_size(link_speed, threads),
+            block_size=get_block_size(link_speed),
+            tpacket_v3=True,
+            use_mmap=True,
+            defrag=True,
+            numa_node=worker['numa_node'],
+            rx_queues=rx_queues,
+            link_speed=link_speed
+        ))
+
+    def update_memory():
+        for p in plans:
+            p['memory'] = get_ring_memory(p['ring_size'], p['block_size'], p['threads'], snaplen=snaplen)
+        return sum([p['memory'] for p in plans])
+
+    budget = int(available_memory * memory_fraction)
+    total = update_memory()
+    # Rings are rounded up to whole blocks, so scaling once may still leave them slightly over budget
+    while total > budget and any([plan['ring_size'] > MIN_RING_SIZE for plan in plans]):
+        scale = min(0.9, budget / float(total))
+        for plan in plans:
+            plan['ring_size'] = max(MIN_RING_SIZE, int(plan['ring_size'] * scale))
+        total = update_memory()
+    return plans
+
+
+def get_reserved_memory(plans):
+    """
+    :param plans: The output of plan_afpacket_interfaces
+    :return: The number of bytes the mmap rings of all interfaces combined will reserve
+    """
+    return sum([plan['memory'] for plan in plans])
@@ -138,7 +138,8 @@ class ConfigManager:
             set_instance_var_from_token(variable_name=var_name, data=self.config_data)
 
     def add_afpacket_interface(self, interface, threads=None, cluster_id=None, cluster_type='cluster_flow',
-                               bpf_filter=None):
+                               bpf_filter=None, ring_size=None, block_size=None, tpacket_v3=None, use_mmap=None,
+                               defrag=None):
         """
         Add a new AF_PACKET interface to monitor
 
@@ -147,6 +148,11 @@ class ConfigManager:
         :param cluster_id: The AF_PACKET cluster id; AF_PACKET will load balance packets based on flow
         :param cluster_type: Recommended modes are cluster_flow on most boxes and cluster_cpu or cluster_qm on system
         :param bpf_filter: bpf filter for this interface (E.G tcp)
+        :param ring_size: The number of packets each thread's ring buffer holds
+        :param block_size: The size of each TPACKET_V3 block in bytes (a power of two multiple of the page size)
+        :param tpacket_v3: If True, use the block based TPACKET_V3 ring (requires use_mmap)
+        :param use_mmap: If True, read packets from a memory mapped ring instead of copying them out of the kernel
+        :param defrag: If True, have the kernel reassemble IP fragments before they are load balanced
         :return: None
         """
         interface_config = {
@@ -160,6 +166,16 @@ class ConfigManager:
             interface_config['cluster-type'] = cluster_type
         if bpf_filter:
             interface_config['bpf-filter'] = bpf_filter
+        if ring_size:
+            interface_config['ring-size'] = ring_size
+        if block_size:
+            interface_config['block-size'] = block_size
+        if tpacket_v3 is not None:
+            interface_config['tpacket-v3'] = tpacket_v3
+        if use_mmap is not None:
+            interface_config['use-mmap'] = use_mmap
+        if defrag is not None:
+            interface_config['defrag'] = defrag
 
         self.af_packet_interfaces.append(interface_config)
 
@@ -3,16 +3,17 @@ import sys
 import time
 import shutil
 import logging
-import subprocess
 
 from dynamite_nsm import const
 from dynamite_nsm import systemctl
 from dynamite_nsm import utilities
 from dynamite_nsm import package_manager
 from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.base import build
 from dynamite_nsm.services.base import install
 from dynamite_nsm import exceptions as general_exceptions
 from dynamite_nsm.services.suricata import config as suricata_configs
+from dynamite_nsm.services.suricata import afpacket as suricata_afpacket
 from dynamite_nsm.services.suricata import process as suricata_process
 from dynamite_nsm.services.suricata import profile as suricata_profile
 from dynamite_nsm.services.suricata import exceptions as suricata_exceptions
@@ -83,63 +84,41 @@ class InstallManager(install.BaseInstallManager):
         if self.stdout:
             utilities.print_coffee_art()
         time.sleep(1)
+        try:
+            build_directory = build.prepare_build_tree(
+                'suricata', os.path.join(const.INSTALL_CACHE, const.SURICATA_DIRECTORY_NAME))
+        except (IOError, OSError) as e:
+            self.logger.error("General error occurred while preparing Suricata build tree.")
+            self.logger.debug("General error occurred while preparing Suricata build tree; {}".format(e))
+            raise suricata_exceptions.InstallSuricataError(
+                "General error occurred while preparing Suricata build tree; {}".format(e))
+        env = build.get_build_environment()
         self.logger.info('Configuring Suricata.')
-        if self.verbose:
-            suricata_config_p = subprocess.Popen(
-                './configure --prefix={} --sysconfdir={} --localstatedir=/var/dynamite/suricata'.format(
-                    self.install_directory, suricata_config_parent), shell=True,
-                cwd=os.path.join(const.INSTALL_CACHE, const.SURICATA_DIRECTORY_NAME))
-        else:
-            suricata_config_p = subprocess.Popen(
-                './configure --prefix={} --sysconfdir={} --localstatedir=/var/dynamite/suricata'.format(
-                    self.install_directory, suricata_config_parent),
-                shell=True, cwd=os.path.join(const.INSTALL_CACHE, const.SURICATA_DIRECTORY_NAME),
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         try:
-            suricata_config_p.communicate()
+            suricata_config_return_code = build.configure(
+                build_directory,
+                './configure --prefix={} --sysconfdir={} --localstatedir=/var/dynamite/suricata'.format(
+                    self.install_directory, suricata_config_parent), env=env, verbose=self.verbose)
         except Exception as e:
             self.logger.error("General error occurred while configuring Suricata.")
             self.logger.debug("General error occurred while configuring Suricata; {}".format(e))
             raise suricata_exceptions.InstallSuricataError(
                 "General error occurred while configuring Suricata; {}".format(e))
-        if suricata_config_p.returncode != 0:
+        if suricata_config_return_code != 0:
             self.logger.error(
-                "Zeek configuration process returned non-zero; exit-code: {}".format(suricata_config_p.returncode))
+                "Suricata configuration process returned non-zero; exit-code: {}".format(suricata_config_return_code))
             raise suricata_exceptions.InstallSuricataError(
-                "Suricata configuration process returned non-zero; exit-code: {}".format(suricata_config_p.returncode))
-        time.sleep(1)
-        self.logger.info("Compiling Suricata.")
-        if utilities.get_cpu_core_count() > 1:
-            parallel_threads = utilities.get_cpu_core_count() - 1
-        else:
-            parallel_threads = 1
-        if self.verbose:
-            compile_suricata_process = subprocess.Popen(
-                'make -g {}; make install; make install-conf'.format(parallel_threads), shell=True,
-                cwd=os.path.join(const.INSTALL_CACHE,
-                                 const.SURICATA_DIRECTORY_NAME))
-            try:
-                compile_suricata_process.communicate()
-            except Exception as e:
-                self.logger.error("General error occurred while compiling Suricata.")
-                self.logger.debug("General error occurred while compiling Suricata; {}".format(e))
-                raise suricata_exceptions.InstallSuricataError(
-                    "General error occurred while compiling Suricata; {}".format(e))
-            compile_suricata_return_code = compile_suricata_process.returncode
-        else:
-            compile_suricata_process = subprocess.Popen(
-                'make -g {}; make install; make install-conf'.format(parallel_threads), shell=True,
-                cwd=os.path.join(const.INSTALL_CACHE,
-                                 const.SURICATA_DIRECTORY_NAME),
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            try:
-                compile_suricata_return_code = utilities.run_subprocess_with_status(compile_suricata_process,
-                                                                                    expected_lines=935)
-            except Exception as e:
-                self.logger.error("General error occurred while compiling Suricata.")
-                self.logger.debug("General error occurred while compiling Suricata; {}".format(e))
-                raise suricata_exceptions.InstallSuricataError(
-                    "General error occurred while compiling Suricata; {}".format(e))
+                "Suricata configuration process returned non-zero; exit-code: {}".format(suricata_config_return_code))
+        jobs = build.get_parallel_jobs()
+        self.logger.info("Compiling Suricata with {} parallel jobs.".format(jobs))
+        try:
+            compile_suricata_return_code = build.make(build_directory, targets=('install', 'install-conf'),
+                                                      jobs=jobs, env=env, verbose=self.verbose, expected_lines=935)
+        except Exception as e:
+            self.logger.error("General error occurred while compiling Suricata.")
+            self.logger.debug("General error occurred while compiling Suricata; {}".format(e))
+            raise suricata_exceptions.InstallSuricataError(
+                "General error occurred while compiling Suricata; {}".format(e))
         if compile_suricata_return_code != 0:
             self.logger.error(
                 "Failed to compile Suricata from source; error code: {}; run with --verbose flag for more info.".format(
@@ -324,15 +303,16 @@ class InstallManager(install.BaseInstallManager):
         self._copy_suricata_files_and_directories()
         self._configure_and_compile_suricata()
         try:
-            with open(env_file) as env_f:
-                if 'SURICATA_HOME' not in env_f.read():
-                    self.logger.info('Updating Suricata default home path [{}]'.format(self.install_directory))
-                    subprocess.call('echo SURICATA_HOME="{}" >> {}'.format(self.install_directory, env_file),
-                                    shell=True)
-                if 'SURICATA_CONFIG' not in env_f.read():
-                    self.logger.info('Updating Suricata default config path [{}]'.format(self.configuration_directory))
-                    subprocess.call('echo SURICATA_CONFIG="{}" >> {}'.format(
-                        self.configuration_directory, env_file), shell=True)
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'SURICATA_HOME' not in env_dict:
+                self.logger.info('Updating Suricata default home path [{}]'.format(self.install_directory))
+                new_variables['SURICATA_HOME'] = self.install_directory
+            if 'SURICATA_CONFIG' not in env_dict:
+                self.logger.info('Updating Suricata default config path [{}]'.format(self.configuration_directory))
+                new_variables['SURICATA_CONFIG'] = self.configuration_directory
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except IOError:
             self.logger.error("Failed to open {} for reading.".format(env_file))
             raise suricata_exceptions.InstallSuricataError(
@@ -348,8 +328,21 @@ class InstallManager(install.BaseInstallManager):
             self.logger.error("Failed to read Suricata configuration.")
             raise suricata_exceptions.InstallSuricataError("Failed to read Suricata configuration.")
         config.af_packet_interfaces = []
-        for interface in self.capture_network_interfaces:
-            config.add_afpacket_interface(interface, threads='auto', cluster_id=99)
+        snaplen = config.config_data.get('default-packet-size') or suricata_afpacket.DEFAULT_PACKET_SIZE
+        afpacket_plans = suricata_afpacket.plan_afpacket_interfaces(self.capture_network_interfaces, snaplen=snaplen)
+        for plan in afpacket_plans:
+            self.logger.info(
+                "Capturing on {} [threads: {}, cluster-type: {}, ring-size: {}, block-size: {}, memory: {} MB].".format(
+                    plan['interface'], plan['threads'], plan['cluster_type'], plan['ring_size'], plan['block_size'],
+                    plan['memory'] // (1024 ** 2)))
+            self.logger.debug("{} has {} receive queues, a {} Mbps link, and is attached to NUMA node {}.".format(
+                plan['interface'], plan['rx_queues'], plan['link_speed'], plan['numa_node']))
+            config.add_afpacket_interface(plan['interface'], threads=plan['threads'], cluster_id=plan['cluster_id'],
+                                          cluster_type=plan['cluster_type'], ring_size=plan['ring_size'],
+                                          block_size=plan['block_size'], tpacket_v3=plan['tpacket_v3'],
+                                          use_mmap=plan['use_mmap'], defrag=plan['defrag'])
+        self.logger.info("Suricata AF_PACKET rings will reserve {} MB of memory.".format(
+            suricata_afpacket.get_reserved_memory(afpacket_plans) // (1024 ** 2)))
         try:
             config.write_config()
         except suricata_exceptions.WriteSuricataConfigError:
@@ -407,7 +400,6 @@ def uninstall_suricata(prompt_user=True, stdout=True, verbose=False):
     logger = get_logger('SURICATA', level=log_level, stdout=stdout)
     logger.info("Uninstalling Suricata.")
 
-    env_file = os.path.join(const.CONFIG_PATH, 'environment')
     environment_variables = utilities.get_environment_file_dict()
     suricata_profiler = suricata_profile.ProcessProfiler()
     if not suricata_profiler.is_installed():
@@ -431,20 +423,7 @@ def uninstall_suricata(prompt_user=True, stdout=True, verbose=False):
             logger.debug("Could not kill Suricata process. Cannot uninstall; {}".format(e))
             raise suricata_exceptions.UninstallSuricataError("Could not kill Suricata process.")
     try:
-        with open(env_file) as env_fr:
-            env_lines = ''
-            for line in env_fr.readlines():
-                if 'SURICATA_HOME' in line:
-                    continue
-                elif 'SURICATA_CONFIG' in line:
-                    continue
-                elif 'OINKMASTER_HOME' in line:
-                    continue
-                elif line.strip() == '':
-                    continue
-                env_lines += line.strip() + '\n'
-        with open(env_file, 'w') as env_fw:
-            env_fw.write(env_lines)
+        utilities.remove_from_environment_file('SURICATA_HOME', 'SURICATA_CONFIG', 'OINKMASTER_HOME')
         if suricata_profiler.is_installed():
             shutil.rmtree(environment_variables.get('SURICATA_HOME'), ignore_errors=True)
             shutil.rmtree(environment_variables.get('SURICATA_CONFIG'), ignore_errors=True)
@@ -49,7 +49,6 @@ class InstallManager(install.BaseInstallManager):
             raise oinkmaster_exceptions.InstallOinkmasterError("Failed to extract Oinkmaster archive.")
 
     def setup_oinkmaster(self):
-        env_file = os.path.join(const.CONFIG_PATH, 'environment')
         self.logger.info("Installing Oinkmaster.")
         try:
             utilities.makedirs(self.install_directory, exist_ok=True)
@@ -70,10 +69,9 @@ class InstallManager(install.BaseInstallManager):
                 os.path.join(const.INSTALL_CACHE, const.OINKMASTER_DIRECTORY_NAME), self.install_directory, e)))
             raise oinkmaster_exceptions.InstallOinkmasterError(
                 "General error while copying Oinkmaster from install cache; {}".format(e))
-        if 'OINKMASTER_HOME' not in open(env_file).read():
+        if 'OINKMASTER_HOME' not in utilities.get_environment_file_dict():
             self.logger.info('Updating Oinkmaster default home path [{}]'.format(self.install_directory))
-            subprocess.call('echo OINKMASTER_HOME="{}" >> {}'.format(self.install_directory, env_file),
-                            shell=True)
+            utilities.update_environment_file({'OINKMASTER_HOME': self.install_directory})
         self.logger.info('PATCHING oinkmaster.conf with emerging-threats URL.')
         try:
             with open(os.path.join(self.install_directory, 'oinkmaster.conf'), 'a') as f:
@@ -37,5 +37,25 @@ class Tests(unittest.TestCase):
 
         assert ('mon0' in [interface['interface'] for interface in config_manager_read.af_packet_interfaces])
 
+    def test_suricatayaml_add_tuned_af_packet_interface(self):
+        self.config_manager.add_afpacket_interface(interface='mon1',
+                                                   threads=4,
+                                                   cluster_id=98,
+                                                   cluster_type='cluster_qm',
+                                                   ring_size=40000,
+                                                   block_size=1048576,
+                                                   tpacket_v3=True,
+                                                   use_mmap=True,
+                                                   defrag=True)
+        self.config_manager.write_config()
+
+        config_manager_read = config.ConfigManager(configuration_directory=self.config_directory)
+        interface_config = [interface for interface in config_manager_read.af_packet_interfaces
+                            if interface['interface'] == 'mon1'][0]
+
+        assert (interface_config['ring-size'] == 40000)
+        assert (interface_config['block-size'] == 1048576)
+        assert (interface_config['tpacket-v3'] is True and interface_config['use-mmap'] is True)
+
     def tearDown(self):
         shutil.rmtree(self.config_root, ignore_errors=True)
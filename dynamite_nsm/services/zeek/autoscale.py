@@ -0,0 +1,439 @@
+import os
+import json
+import time
+import logging
+import subprocess
+
+import psutil
+import tabulate
+
+from dynamite_nsm import topology
+from dynamite_nsm import utilities
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.zeek import config as zeek_configs
+from dynamite_nsm.services.zeek import exceptions as zeek_exceptions
+
+DEFAULT_LOSS_THRESHOLD = 1.0
+DEFAULT_IDLE_LOSS_THRESHOLD = 0.1
+DEFAULT_IDLE_CPU_PERCENT = 30.0
+DEFAULT_SAMPLES = 3
+DEFAULT_COOLDOWN = 3600
+DEFAULT_QUIET_RATIO = 0.5
+DEFAULT_INTERVAL = 900
+ZEEKCTL_DEPLOY_TIMEOUT = 600
+
+
+def read_zeek_log(path):
+    """
+    Read a Zeek log written in either the default tab separated format, or as JSON (one record per line)
+
+    :param path: The path to the log (E.G /opt/dynamite/zeek/logs/current/capture_loss.log)
+    :return: A list of dictionaries, one per record (empty if the log does not exist)
+    """
+    records = []
+    fields = None
+    separator = '\t'
+    try:
+        with open(path) as log_f:
+            for line in log_f:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                if line.startswith('{'):
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        pass
+                elif line.startswith('#separator'):
+                    separator = line.split(' ', 1)[1].encode('utf-8').decode('unicode_escape')
+                elif line.startswith('#fields'):
+                    fields = line.split(separator)[1:]
+                elif not line.startswith('#') and fields:
+                    records.append(dict(zip(fields, line.split(separator))))
+    except IOError:
+        pass
+    return records
+
+
+class WorkerAutoscaler:
+    """
+    Adjust the number of processes (lb_procs) of each Zeek worker based on its capture loss and CPU usage
+
+    A worker is only scaled up after every one of its last N capture loss measurements exceeded the loss threshold,
+    and scaled down after every one of them was below the idle threshold while its processes were mostly idle;
+    measurements taken before a worker's last change (and within the cooldown period after it) are ignored. A scaled
+    worker has every one of its processes pinned to a core. New layouts are written to node.cfg straight away, but only
+    deployed once traffic has dropped to a quiet level.
+    """
+
+    def __init__(self, install_directory=None, state_path=None, loss_threshold=DEFAULT_LOSS_THRESHOLD,
+                 idle_loss_threshold=DEFAULT_IDLE_LOSS_THRESHOLD, idle_cpu_percent=DEFAULT_IDLE_CPU_PERCENT,
+                 samples=DEFAULT_SAMPLES, cooldown=DEFAULT_COOLDOWN, quiet_ratio=DEFAULT_QUIET_RATIO,
+                 dry_run=False, stdout=True, verbose=False):
+        """
+        :param install_directory: Path to the Zeek install directory (E.G /opt/dynamite/zeek/)
+        :param state_path: Path to the file the autoscaler keeps its state in
+        :param loss_threshold: The capture loss percentage above which a worker is scaled up
+        :param idle_loss_threshold: The capture loss percentage below which a worker may be scaled down
+        :param idle_cpu_percent: The average CPU usage of a worker's processes below which it is considered idle
+        :param samples: The number of consecutive capture loss measurements that must agree before scaling
+        :param cooldown: The minimum number of seconds between two changes to the same worker
+        :param quiet_ratio: Pending changes are deployed once the packet rate drops below this fraction of its peak
+        :param dry_run: If True, only report what would change
+        :param stdout: Print the output to console
+        :param verbose: Include detailed debug messages
+        """
+        log_level = logging.INFO
+        if verbose:
+            log_level = logging.DEBUG
+        self.logger = get_logger('ZEEK_AUTOSCALE', level=log_level, stdout=stdout)
+        env_dict = utilities.get_environment_file_dict()
+        self.install_directory = install_directory or env_dict.get('ZEEK_HOME')
+        if not self.install_directory:
+            raise zeek_exceptions.CallZeekProcessError("Zeek is not installed.")
+        if not state_path:
+            state_path = os.path.join(env_dict.get('ZEEK_SCRIPTS', self.install_directory), 'autoscale_state.json')
+        self.state_path = state_path
+        self.log_directory = os.path.join(self.install_directory, 'logs', 'current')
+        self.loss_threshold = loss_threshold
+        self.idle_loss_threshold = idle_loss_threshold
+        self.idle_cpu_percent = idle_cpu_percent
+        self.samples = samples
+        self.cooldown = cooldown
+        self.quiet_ratio = quiet_ratio
+        self.dry_run = dry_run
+        self.cpu_topology = topology.CPUTopology.from_sysfs()
+
+    def _read_state(self):
+        try:
+            with open(self.state_path) as state_f:
+                return json.load(state_f)
+        except (IOError, ValueError):
+            return {'last_change': {}, 'pending_deploy': False}
+
+    def _write_state(self, state):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as state_f:
+            json.dump(state, state_f, indent=1)
+        os.rename(tmp_path, self.state_path)
+
+    @staticmethod
+    def _worker_for_peer(peer, worker_names):
+        """
+        zeekctl names the processes of a worker <worker>-<n>
+        """
+        if peer in worker_names:
+            return peer
+        prefix = peer.rsplit('-', 1)[0]
+        if prefix in worker_names:
+            return prefix
+        return None
+
+    def read_capture_loss(self, worker_names):
+        """
+        :param worker_names: The names of the workers defined in node.cfg
+        :return: A dictionary mapping each worker to a list of (timestamp, highest percent lost across its processes)
+        """
+        intervals = {}
+        for record in read_zeek_log(os.path.join(self.log_directory, 'capture_loss.log')):
+            worker = self._worker_for_peer(record.get('peer', ''), worker_names)
+            if not worker:
+                continue
+            try:
+                ts = float(record['ts'])
+                percent_lost = float(record['percent_lost'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            # Processes of a worker report in the same interval; bucket them by the minute
+            key = int(ts // 60)
+            current = intervals.setdefault(worker, {}).get(key)
+            if current is None or percent_lost > current[1]:
+                intervals[worker][key] = (ts, percent_lost)
+        return dict([(worker, sorted(buckets.values())) for worker, buckets in intervals.items()])
+
+    def read_packet_rates(self):
+        """
+        :return: A list of (timestamp, packets processed per second across all workers), ordered by time
+        """
+        totals = {}
+        for record in read_zeek_log(os.path.join(self.log_directory, 'stats.log')):
+            try:
+                ts = float(record['ts'])
+                pkts = int(record.get('pkts_proc') or 0)
+            except (KeyError, TypeError, ValueError):
+                continue
+            # Every worker process reports the packets it processed since its previous report at the same interval
+            bucket = totals.setdefault(int(ts // 60), [ts, 0])
+            bucket[1] += pkts
+        rates = []
+        previous_ts = None
+        for ts, pkts in sorted(totals.values()):
+            if previous_ts is not None and ts > previous_ts:
+                rates.append((ts, pkts / (ts - previous_ts)))
+            previous_ts = ts
+        return rates
+
+    def get_worker_cpu_usage(self, worker_names, sample_seconds=1.0):
+        """
+        :param worker_names: The names of the workers defined in node.cfg
+        :param sample_seconds: The period CPU usage is measured over
+        :return: A dictionary mapping each worker to the average CPU percent of its processes
+        """
+        processes = {}
+        for proc in psutil.process_iter():
+            try:
+                if not proc.name().startswith(('zeek', 'bro')):
+                    continue
+                worker = self._worker_for_peer(proc.environ().get('CLUSTER_NODE', ''), worker_names)
+                if worker:
+                    proc.cpu_percent(None)
+                    processes.setdefault(worker, []).append(proc)
+            except (psutil.Error, OSError):
+                continue
+        if not processes:
+            return {}
+        time.sleep(sample_seconds)
+        usage = {}
+        for worker, procs in processes.items():
+            readings = []
+            for proc in procs:
+                try:
+                    readings.append(proc.cpu_percent(None))
+                except psutil.Error:
+                    continue
+            if readings:
+                usage[worker] = sum(readings) / len(readings)
+        return usage
+
+    def _free_cores(self, node_config, numa_node, claimed=()):
+        interface_nodes = set()
+        pinned = set()
+        for values in node_config.node_config.values():
+            if values.get('type') != 'worker':
+                continue
+            interface_nodes.add(self.cpu_topology.get_interface_numa_node(
+                str(values.get('interface', '')).replace('af_packet::', '')))
+            pinned.update([int(cpu) for cpu in str(values.get('pin_cpus', '')).split(',') if cpu.strip()])
+        reserved_cores = topology.get_default_reserved_cores(self.cpu_topology)
+        reserved = self.cpu_topology.reserve_cores(reserved_cores, avoid_nodes=interface_nodes)
+        return [cpu_id for cpu_id in self.cpu_topology.get_physical_cores(numa_node)
+                if cpu_id not in pinned and cpu_id not in reserved and cpu_id not in claimed]
+
+    def plan(self, node_config=None):
+        """
+        Work out which workers should be scaled
+
+        :param node_config: A zeek_configs.NodeConfigManager instance; read from node.cfg if not given
+        :return: A list of dictionaries describing the decision taken for each worker
+        """
+        if not node_config:
+            node_config = zeek_configs.NodeConfigManager(self.install_directory)
+        state = self._read_state()
+        now = time.time()
+        worker_names = node_config.list_workers()
+        capture_loss = self.read_capture_loss(worker_names)
+        cpu_usage = self.get_worker_cpu_usage(worker_names)
+        decisions = []
+        claimed = []
+        for worker in sorted(worker_names):
+            values = node_config.node_config[worker]
+            interface = str(values.get('interface', '')).replace('af_packet::', '')
+            pinned_cpus = [int(cpu) for cpu in str(values.get('pin_cpus', '')).split(',') if cpu.strip()]
+            lb_procs = int(values.get('lb_procs', len(pinned_cpus) or 1))
+            last_change = state['last_change'].get(worker, 0)
+            measurements = [loss for ts, loss in capture_loss.get(worker, []) if ts > last_change][-self.samples:]
+            decision = dict(
+                worker=worker,
+                interface=interface,
+                lb_procs=lb_procs,
+                new_lb_procs=lb_procs,
+                pinned_cpus=pinned_cpus,
+                new_pinned_cpus=pinned_cpus,
+                loss=measurements[-1] if measurements else None,
+                cpu=cpu_usage.get(worker),
+                action='keep',
+                reason=''
+            )
+            decisions.append(decision)
+            if now - last_change < self.cooldown:
+                decision['reason'] = 'cooling down after the last change'
+                continue
+            if len(measurements) < self.samples:
+                decision['reason'] = 'waiting for {} capture loss measurements'.format(self.samples)
+                continue
+            if min(measurements) > self.loss_threshold:
+                action = 'scale_up'
+                new_lb_procs = lb_procs + 1
+                reason = 'capture loss above {}% for {} measurements'.format(self.loss_threshold, self.samples)
+            elif max(measurements) < self.idle_loss_threshold and lb_procs > 1 and \
+                    decision['cpu'] is not None and decision['cpu'] < self.idle_cpu_percent:
+                action = 'scale_down'
+                new_lb_procs = lb_procs - 1
+                reason = 'capture loss below {}% and CPU below {}%'.format(self.idle_loss_threshold,
+                                                                          self.idle_cpu_percent)
+            else:
+                decision['reason'] = 'within thresholds'
+                continue
+            # Every process of a scaled worker is pinned; a worker that was not (fully) pinned takes free cores local
+            # to its interface for the processes that have none
+            new_pinned_cpus = pinned_cpus[:new_lb_procs]
+            missing = new_lb_procs - len(new_pinned_cpus)
+            if missing:
+                free_cores = self._free_cores(node_config, self.cpu_topology.get_interface_numa_node(interface),
+                                              claimed=claimed)
+                if len(free_cores) < missing:
+                    decision['reason'] = '{}, but {} free cores are needed to pin {} processes on {}'.format(
+                        reason, missing, new_lb_procs, interface)
+                    self.logger.info('Not scaling {}; {}.'.format(worker, decision['reason']))
+                    continue
+                new_pinned_cpus = new_pinned_cpus + free_cores[:missing]
+                claimed.extend(free_cores[:missing])
+            decision['action'] = action
+            decision['new_lb_procs'] = new_lb_procs
+            decision['new_pinned_cpus'] = new_pinned_cpus
+            decision['reason'] = reason
+        return decisions
+
+    def apply(self, decisions, node_config=None):
+        """
+        Rewrite node.cfg with the new worker layout, and flag it for deployment
+
+        :param decisions: The decisions returned by plan()
+        :param node_config: The zeek_configs.NodeConfigManager instance the decisions were planned from
+        :return: True, if node.cfg was changed
+        """
+        changes = [decision for decision in decisions if decision['action'] != 'keep']
+        if not changes:
+            return False
+        if not node_config:
+            node_config = zeek_configs.NodeConfigManager(self.install_directory)
+        state = self._read_state()
+        changed = False
+        for decision in changes:
+            values = node_config.node_config[decision['worker']]
+            node_config.add_worker(name=decision['worker'], interface=decision['interface'],
+                                   host=values.get('host', 'localhost'),
+                                   lb_procs=decision['new_lb_procs'],
+                                   pin_cpus=decision['new_pinned_cpus'])
+            # add_worker silently ignores CPUs that do not exist on this host
+            if node_config.node_config[decision['worker']].get('pin_cpus') != ','.join(
+                    [str(cpu) for cpu in decision['new_pinned_cpus']]):
+                self.logger.warning('Could not pin {} to CPUs {}.'.format(decision['worker'],
+                                                                         decision['new_pinned_cpus']))
+                continue
+            changed = True
+            state['last_change'][decision['worker']] = time.time()
+            self.logger.info('{} {} to {} processes; {}.'.format(
+                decision['action'].replace('_', ' ').capitalize(), decision['worker'],
+                decision['new_lb_procs'], decision['reason']))
+        if not changed:
+            return False
+        node_config.write_config()
+        state['pending_deploy'] = True
+        self._write_state(state)
+        return True
+
+    def is_quiet(self):
+        """
+        :return: True, if the current packet rate is below quiet_ratio of the highest rate in the current stats.log
+        """
+        rates = self.read_packet_rates()
+        if not rates:
+            return True
+        peak = max([rate for _, rate in rates])
+        return peak == 0 or rates[-1][1] <= peak * self.quiet_ratio
+
+    def deploy(self, force=False):
+        """
+        Run zeekctl deploy if a new layout is pending, and traffic is quiet (or force is set)
+
+        :param force: Deploy regardless of the current traffic level
+        :return: True, if the layout was deployed
+        """
+        state = self._read_state()
+        if not state.get('pending_deploy'):
+            return False
+        if not force and not self.is_quiet():
+            self.logger.info('Deferring zeekctl deploy until traffic quiets down.')
+            return False
+        self.logger.info('Deploying new Zeek worker layout.')
+        p = subprocess.Popen([os.path.join(self.install_directory, 'bin', 'zeekctl'), 'deploy'],
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        try:
+            out, _ = p.communicate(timeout=ZEEKCTL_DEPLOY_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            p.kill()
+            out, _ = p.communicate()
+        if p.returncode != 0:
+            self.logger.error('zeekctl deploy returned non-zero; exit-code: {}'.format(p.returncode))
+            self.logger.debug('zeekctl deploy output: {}'.format(out.decode('utf-8', 'ignore')))
+            raise zeek_exceptions.CallZeekProcessError(
+                'zeekctl deploy returned non-zero; exit-code: {}'.format(p.returncode))
+        state['pending_deploy'] = False
+        self._write_state(state)
+        return True
+
+    @staticmethod
+    def report(decisions):
+        """
+        :param decisions: The decisions returned by plan()
+        :return: A table describing each decision
+        """
+        rows = []
+        for decision in decisions:
+            rows.append([
+                decision['worker'],
+                '{}'.format(decision['lb_procs']) if decision['new_lb_procs'] == decision['lb_procs'] else
+                '{} -> {}'.format(decision['lb_procs'], decision['new_lb_procs']),
+                '{:.2f}%'.format(decision['loss']) if decision['loss'] is not None else '-',
+                '{:.0f}%'.format(decision['cpu']) if decision['cpu'] is not None else '-',
+                ','.join([str(cpu) for cpu in decision['pinned_cpus']]),
+                ','.join([str(cpu) for cpu in decision['new_pinned_cpus']]),
+                decision['action'],
+                decision['reason']
+            ])
+        return tabulate.tabulate(rows,
+                                 headers=['Worker', 'Procs', 'Loss', 'CPU', 'Pinned', 'Planned', 'Action', 'Reason'],
+                                 tablefmt='fancy_grid')
+
+    def tick(self, deploy_now=False):
+        """
+        Run a single evaluation
+
+        :param deploy_now: Deploy any changes immediately, rather than waiting for traffic to quiet down
+        :return: A report of the decisions taken
+        """
+        node_config = zeek_configs.NodeConfigManager(self.install_directory)
+        decisions = self.plan(node_config)
+        if not self.dry_run:
+            self.apply(decisions, node_config)
+            self.deploy(force=deploy_now)
+        return self.report(decisions)
+
+
+def autoscale_workers(dry_run=False, interval=None, deploy_now=False, stdout=True, verbose=False):
+    """
+    Evaluate (and optionally keep re-evaluating) the Zeek worker layout against recent capture loss
+
+    :param dry_run: If True, only report what would change
+    :param interval: If given, keep re-evaluating every interval seconds
+    :param deploy_now: Deploy changes immediately, rather than waiting for traffic to quiet down
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: A report of the latest decisions
+    """
+    autoscaler = WorkerAutoscaler(dry_run=dry_run, stdout=stdout, verbose=verbose)
+    while True:
+        if not interval:
+            return autoscaler.tick(deploy_now=deploy_now)
+        # A failed evaluation or deploy must not end the loop; a pending deploy is retried on the next one
+        try:
+            report = autoscaler.tick(deploy_now=deploy_now)
+        except (zeek_exceptions.CallZeekProcessError, zeek_exceptions.ReadsZeekConfigError,
+                zeek_exceptions.WriteZeekConfigError) as e:
+            autoscaler.logger.error('Failed to evaluate the Zeek worker layout; retrying in {}s.'.format(interval))
+            autoscaler.logger.debug('Failed to evaluate the Zeek worker layout; {}'.format(e))
+            time.sleep(interval)
+            continue
+        autoscaler.logger.info('Zeek worker layout:\n{}'.format(report))
+        time.sleep(interval)
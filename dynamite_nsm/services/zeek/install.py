@@ -1,24 +1,18 @@
 import os
 import sys
 import time
-import math
 import shutil
 import logging
 import tarfile
 import subprocess
 
-try:
-    # Python 3
-    from itertools import zip_longest
-except ImportError:
-    # Python 2
-    from itertools import izip_longest as zip_longest
-
 from dynamite_nsm import const
 from dynamite_nsm import systemctl
+from dynamite_nsm import topology
 from dynamite_nsm import utilities
 from dynamite_nsm import package_manager
 from dynamite_nsm.logger import get_logger
+from dynamite_nsm.services.base import build
 from dynamite_nsm.services.base import install
 from dynamite_nsm import exceptions as general_exceptions
 from dynamite_nsm.services.zeek import config as zeek_configs
@@ -98,69 +92,25 @@ class InstallManager(install.BaseInstallManager):
             log_level = logging.DEBUG
         logger = get_logger('ZEEK', level=log_level, stdout=stdout)
 
-        cpus = [c for c in range(0, utilities.get_cpu_core_count())]
         logger.info("Calculating optimal Zeek worker strategy [strategy: {}].".format(strategy))
-        logger.debug("Detected CPU Cores: {}".format(cpus))
-
-        # Reserve 0 for KERNEL/Userland opts
-        available_cpus = cpus[1:]
-
-        def grouper(n, iterable):
-            args = [iter(iterable)] * n
-            return zip_longest(*args)
-
-        def create_workers(net_interfaces, avail_cpus):
-            idx = 0
-            zeek_worker_configs = []
-            for net_interface in net_interfaces:
-                if idx >= len(avail_cpus):
-                    idx = 0
-                if isinstance(avail_cpus[idx], int):
-                    avail_cpus[idx] = [avail_cpus[idx]]
-                zeek_worker_configs.append(
-                    dict(
-                        name='dynamite-worker-' + net_interface,
-                        host='localhost',
-                        interface=net_interface,
-                        lb_procs=len(avail_cpus[idx]),
-                        pinned_cpus=avail_cpus[idx]
-                    )
+        cpu_topology = topology.CPUTopology.from_sysfs()
+        logger.debug("Detected NUMA nodes: {}; physical cores: {}".format(
+            cpu_topology.get_numa_nodes(), cpu_topology.get_physical_cores()))
+        zeek_workers = []
+        for worker in topology.plan_capture_workers(network_capture_interfaces, topology=cpu_topology,
+                                                    strategy=strategy):
+            if worker['numa_node'] is None and len(cpu_topology.get_numa_nodes()) > 1:
+                logger.warning("Could not determine the NUMA node {} is attached to; its workers may receive packets "
+                               "across nodes.".format(worker['interface']))
+            zeek_workers.append(
+                dict(
+                    name='dynamite-worker-' + worker['interface'],
+                    host='localhost',
+                    interface=worker['interface'],
+                    lb_procs=worker['lb_procs'],
+                    pinned_cpus=worker['pinned_cpus']
                 )
-                idx += 1
-            return zeek_worker_configs
-
-        if len(available_cpus) <= len(network_capture_interfaces):
-            # Wrap the number of CPUs around the number of network interfaces;
-            # Since there are more network interfaces than CPUs; CPUs will be assigned more than once
-            # lb_procs will always be 1
-
-            zeek_workers = create_workers(network_capture_interfaces, available_cpus)
-
-        else:
-            # In this scenario we choose from one of two strategies
-            #  1. Aggressive:
-            #     - Take the ratio of network_interfaces to available CPUS; ** ROUND UP **.
-            #     - Group the available CPUs by this integer
-            #       (if the ratio == 2 create as many groupings of 2 CPUs as possible)
-            #     - Apply the same wrapping logic used above, but with the CPU groups instead of single CPU instances
-            #  2. Conservative:
-            #     - Take the ratio of network_interfaces to available CPUS; ** ROUND DOWN **.
-            #     - Group the available CPUs by this integer
-            #       (if the ratio == 2 create as many groupings of 2 CPUs as possible)
-            #     - Apply the same wrapping logic used above, but with the CPU groups instead of single CPU instances
-            aggressive_ratio = int(math.ceil(len(available_cpus) / float(len(network_capture_interfaces))))
-            conservative_ratio = int(math.floor(len(available_cpus) / len(network_capture_interfaces)))
-            if strategy == 'aggressive':
-                cpu_groups = grouper(aggressive_ratio, available_cpus)
-            else:
-                cpu_groups = grouper(conservative_ratio, available_cpus)
-
-            temp_cpu_groups = []
-            for cpu_group in cpu_groups:
-                cpu_group = [c for c in cpu_group if c]
-                temp_cpu_groups.append(cpu_group)
-            cpu_groups = temp_cpu_groups
-            zeek_workers = create_workers(network_capture_interfaces, cpu_groups)
+            )
         logger.info('Zeek Worker Count: {}'.format(len(zeek_workers)))
         logger.debug('Zeek Workers: {}'.format(zeek_workers))
         return zeek_workers
@@ -221,57 +171,57 @@ class InstallManager(install.BaseInstallManager):
                 return False
         return True
 
-    def setup_zeek_af_packet_plugin(self):
-        bro_af_packet_plugin_path = \
-            os.path.join(const.DEFAULT_CONFIGS, 'zeek', 'uncompiled_scripts', 'zeek-af_packet-plugin')
-        self.logger.info('Configuring Zeek Zeek_AF_Packet plugin.')
-        if self.verbose:
-            print('./configure --zeek-dist={} --install-root={} --with-latest-kernel'.format(
-                    os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME), self.configuration_directory))
-            config_zeek_af_packet_process = subprocess.Popen(
-                './configure --zeek-dist={} --install-root={} --with-latest-kernel'.format(
-                    os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME), self.configuration_directory),
-                shell=True, cwd=bro_af_packet_plugin_path
-            )
-        else:
-            config_zeek_af_packet_process = subprocess.Popen(
-                './configure --zeek-dist={} --install-root={} --with-latest-kernel'.format(
-                    os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME), self.configuration_directory),
-                shell=True, cwd=bro_af_packet_plugin_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-            )
+    @staticmethod
+    def get_zeek_build_directory():
+        """
+        :return: The path to the configured Zeek source tree plugins are built against
+        """
+        build_directory = build.get_build_tree_path('zeek', const.ZEEK_DIRECTORY_NAME)
+        if os.path.exists(build_directory):
+            return build_directory
+        return os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME)
 
+    def _build_zeek_plugin(self, plugin_name, plugin_directory_name, configure_command):
+        plugin_source_path = os.path.join(const.DEFAULT_CONFIGS, 'zeek', 'uncompiled_scripts', plugin_directory_name)
         try:
-            config_zeek_af_packet_process.communicate()
+            build_directory = build.prepare_build_tree('zeek-plugins', plugin_source_path, prune=False)
+        except (IOError, OSError) as e:
+            self.logger.error('General error occurred while preparing {} build tree.'.format(plugin_name))
+            self.logger.debug('General error occurred while preparing {} build tree; {}'.format(plugin_name, e))
+            raise zeek_exceptions.InstallZeekError(
+                "General error occurred while preparing {} build tree; {}".format(plugin_name, e))
+        env = build.get_build_environment()
+        self.logger.info('Configuring Zeek {} plugin.'.format(plugin_name))
+        try:
+            config_return_code = build.configure(build_directory, configure_command, env=env, verbose=self.verbose)
         except Exception as e:
-            self.logger.error('General error occurred while starting Zeek_AF_Packet configuration.')
-            self.logger.debug('General error occurred while starting Zeek_AF_Packet configuration; {}'.format(e))
-        if config_zeek_af_packet_process.returncode != 0:
-            self.logger.debug("Zeek_AF_Packet configuration returned non-zero; exit-code: {}".format(
-                config_zeek_af_packet_process.returncode))
+            self.logger.error('General error occurred while starting {} configuration.'.format(plugin_name))
+            self.logger.debug('General error occurred while starting {} configuration; {}'.format(plugin_name, e))
             raise zeek_exceptions.InstallZeekError(
-                "Zeek_AF_Packet configuration returned non-zero; exit-code: {}".format(
-                    config_zeek_af_packet_process.returncode))
-        self.logger.info('Compiling Zeek Zeek_AF_Packet plugin.')
-        if self.verbose:
-            compile_zeek_af_packet_process = subprocess.Popen('make; make install', shell=True,
-                                                              cwd=bro_af_packet_plugin_path)
-        else:
-            compile_zeek_af_packet_process = subprocess.Popen('make; make install', shell=True,
-                                                              cwd=bro_af_packet_plugin_path,
-                                                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                "General error occurred while starting {} configuration; {}".format(plugin_name, e))
+        if config_return_code != 0:
+            self.logger.debug("{} configuration returned non-zero; exit-code: {}".format(
+                plugin_name, config_return_code))
+            raise zeek_exceptions.InstallZeekError(
+                "{} configuration returned non-zero; exit-code: {}".format(plugin_name, config_return_code))
+        self.logger.info('Compiling Zeek {} plugin.'.format(plugin_name))
         try:
-            compile_zeek_af_packet_process.communicate()
+            compile_return_code = build.make(build_directory, env=env, verbose=self.verbose)
         except Exception as e:
-            self.logger.error('General error occurred while compiling Zeek_AF_Packet.')
-            self.logger.debug("General error occurred while compiling Zeek_AF_Packet; {}".format(e))
+            self.logger.error('General error occurred while compiling {}.'.format(plugin_name))
+            self.logger.debug("General error occurred while compiling {}; {}".format(plugin_name, e))
             raise zeek_exceptions.InstallZeekError(
-                "General error occurred while compiling Zeek_AF_Packet; {}".format(e))
-        if compile_zeek_af_packet_process.returncode != 0:
-            self.logger.error("General error occurred while compiling Zeek_AF_Packet; {}".format(
-                compile_zeek_af_packet_process.returncode))
+                "General error occurred while compiling {}; {}".format(plugin_name, e))
+        if compile_return_code != 0:
+            self.logger.error("General error occurred while compiling {}; {}".format(plugin_name, compile_return_code))
             raise zeek_exceptions.InstallZeekError(
-                "Zeek_AF_Packet compilation process returned non-zero; exit-code: {}".format(
-                    compile_zeek_af_packet_process.returncode))
+                "{} compilation process returned non-zero; exit-code: {}".format(plugin_name, compile_return_code))
+
+    def setup_zeek_af_packet_plugin(self):
+        self._build_zeek_plugin(
+            'Zeek_AF_Packet', 'zeek-af_packet-plugin',
+            './configure --zeek-dist={} --install-root={} --with-latest-kernel'.format(
+                self.get_zeek_build_directory(), self.configuration_directory))
         try:
             shutil.copytree(os.path.join(self.configuration_directory, 'Zeek_AF_Packet'),
                             os.path.join(self.install_directory, 'lib', 'zeek', 'plugins', 'Zeek_AF_Packet'))
@@ -285,60 +235,10 @@ class InstallManager(install.BaseInstallManager):
                         e))
 
     def setup_zeek_community_id_plugin(self):
-        bro_commmunity_id_plugin_path = \
-            os.path.join(const.DEFAULT_CONFIGS, 'zeek', 'uncompiled_scripts', 'zeek-community-id')
-        self.logger.info('Configuring Zeek Corelight_CommunityID plugin.')
-        if self.verbose:
-            config_zeek_community_id_script_process = subprocess.Popen(
-                './configure --zeek-dist={} --install-root={}'.format(
-                    os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME), self.configuration_directory),
-                shell=True, cwd=bro_commmunity_id_plugin_path
-            )
-        else:
-            config_zeek_community_id_script_process = subprocess.Popen(
-                './configure --zeek-dist={} --install-root={}'.format(
-                    os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME), self.configuration_directory),
-                shell=True, cwd=bro_commmunity_id_plugin_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        try:
-            config_zeek_community_id_script_process.communicate()
-        except Exception as e:
-            self.logger.error('General error occurred while starting Corelight_CommunityID configuration.')
-            self.logger.debug('General error occurred while starting Corelight_CommunityID configuration; {}'.format(e))
-            raise zeek_exceptions.InstallZeekError(
-                "General error occurred while starting Corelight_CommunityID configuration; {}".format(e))
-        if config_zeek_community_id_script_process.returncode != 0:
-            self.logger.debug("Corelight_CommunityID configuration returned non-zero; exit-code: {}".format(
-                config_zeek_community_id_script_process.returncode))
-            raise zeek_exceptions.InstallZeekError(
-                "Corelight_CommunityID configuration returned non-zero; exit-code: {}".format(
-                    config_zeek_community_id_script_process.returncode))
-        self.logger.info('Compiling Zeek Corelight_CommunityID [PATCHED] plugin.')
-        if utilities.get_cpu_core_count() > 1:
-            parallel_threads = utilities.get_cpu_core_count() - 1
-        else:
-            parallel_threads = 1
-        if self.verbose:
-            compile_zeek_community_id_script_process = subprocess.Popen(
-                'make -g {}; make install'.format(parallel_threads), shell=True,
-                cwd=bro_commmunity_id_plugin_path)
-        else:
-            compile_zeek_community_id_script_process = subprocess.Popen(
-                'make -g {}; make install'.format(parallel_threads), shell=True,
-                cwd=bro_commmunity_id_plugin_path,
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        try:
-            compile_zeek_community_id_script_process.communicate()
-        except Exception as e:
-            self.logger.error('General error occurred while compiling Corelight_CommunityID [PATCHED].')
-            self.logger.debug("General error occurred while compiling Corelight_CommunityID [PATCHED]; {}".format(e))
-            raise zeek_exceptions.InstallZeekError(
-                "General error occurred while compiling Corelight_CommunityID [PATCHED]; {}".format(e))
-        if compile_zeek_community_id_script_process.returncode != 0:
-            self.logger.error("General error occurred while compiling Corelight_CommunityID [PATCHED]; {}".format(
-                compile_zeek_community_id_script_process.returncode))
-            raise zeek_exceptions.InstallZeekError(
-                "Corelight_CommunityID [PATCHED] compilation process returned non-zero; exit-code: {}".format(
-                    compile_zeek_community_id_script_process.returncode))
+        self._build_zeek_plugin(
+            'Corelight_CommunityID [PATCHED]', 'zeek-community-id',
+            './configure --zeek-dist={} --install-root={}'.format(
+                self.get_zeek_build_directory(), self.configuration_directory))
         try:
             shutil.copytree(os.path.join(self.configuration_directory, 'Corelight_CommunityID'),
                             os.path.join(self.install_directory, 'lib', 'zeek', 'plugins', 'Corelight_CommunityID'))
@@ -548,53 +448,40 @@ class InstallManager(install.BaseInstallManager):
         if self.stdout:
             utilities.print_coffee_art()
         time.sleep(1)
+        try:
+            build_directory = build.prepare_build_tree(
+                'zeek', os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME))
+        except (IOError, OSError) as e:
+            self.logger.error("General error occurred while preparing Zeek build tree.")
+            self.logger.debug("General error occurred while preparing Zeek build tree; {}".format(e))
+            raise zeek_exceptions.InstallZeekError(
+                "General error occurred while preparing Zeek build tree; {}".format(e))
+        env = build.get_build_environment()
         self.logger.info('Configuring Zeek.')
-        if self.verbose:
-            zeek_config_p = subprocess.Popen('./configure --prefix={} --scriptdir={}'.format(
-                self.install_directory, self.configuration_directory),
-                shell=True, cwd=os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME))
-        else:
-            zeek_config_p = subprocess.Popen('./configure --prefix={} --scriptdir={}'.format(
-                self.install_directory, self.configuration_directory),
-                shell=True, cwd=os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME), stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE)
         try:
-            zeek_config_p.communicate()
+            zeek_config_return_code = build.configure(
+                build_directory, './configure --prefix={} --scriptdir={}'.format(
+                    self.install_directory, self.configuration_directory), env=env, verbose=self.verbose)
         except Exception as e:
             self.logger.error("General error occurred while configuring Zeek.")
             self.logger.debug("General error occurred while configuring Zeek; {}".format(e))
             raise zeek_exceptions.InstallZeekError(
                 "General error occurred while configuring Zeek; {}".format(e))
-        if zeek_config_p.returncode != 0:
+        if zeek_config_return_code != 0:
             self.logger.error(
-                "Zeek configuration process returned non-zero; exit-code: {}".format(zeek_config_p.returncode))
+                "Zeek configuration process returned non-zero; exit-code: {}".format(zeek_config_return_code))
             raise zeek_exceptions.InstallZeekError(
-                "Zeek configuration process returned non-zero; exit-code: {}".format(zeek_config_p.returncode))
-        time.sleep(1)
-        self.logger.info("Compiling Zeek.")
-        if self.verbose:
-            compile_zeek_process = subprocess.Popen('make; make install', shell=True,
-                                                    cwd=os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME))
-            try:
-                compile_zeek_process.communicate()
-            except Exception as e:
-                self.logger.error("General error occurred while compiling Zeek.")
-                self.logger.debug("General error occurred while compiling Zeek; {}".format(e))
-                raise zeek_exceptions.InstallZeekError(
-                    "General error occurred while compiling Zeek; {}".format(e))
-            compile_zeek_return_code = compile_zeek_process.returncode
-        else:
-            compile_zeek_process = subprocess.Popen('make; make install', shell=True,
-                                                    cwd=os.path.join(const.INSTALL_CACHE, const.ZEEK_DIRECTORY_NAME),
-                                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            try:
-                compile_zeek_return_code = utilities.run_subprocess_with_status(compile_zeek_process,
-                                                                                expected_lines=6779)
-            except Exception as e:
-                self.logger.error("General error occurred while compiling Zeek.")
-                self.logger.debug("General error occurred while compiling Zeek; {}".format(e))
-                raise zeek_exceptions.InstallZeekError(
-                    "General error occurred while compiling Zeek; {}".format(e))
+                "Zeek configuration process returned non-zero; exit-code: {}".format(zeek_config_return_code))
+        jobs = build.get_parallel_jobs()
+        self.logger.info("Compiling Zeek with {} parallel jobs.".format(jobs))
+        try:
+            compile_zeek_return_code = build.make(build_directory, jobs=jobs, env=env, verbose=self.verbose,
+                                                  expected_lines=6779)
+        except Exception as e:
+            self.logger.error("General error occurred while compiling Zeek.")
+            self.logger.debug("General error occurred while compiling Zeek; {}".format(e))
+            raise zeek_exceptions.InstallZeekError(
+                "General error occurred while compiling Zeek; {}".format(e))
         if compile_zeek_return_code != 0:
             self.logger.error(
                 "Failed to compile Zeek from source; error code: {}; run with --verbose flag for more info.".format(
@@ -602,15 +489,16 @@ class InstallManager(install.BaseInstallManager):
             raise zeek_exceptions.InstallZeekError(
                 "Zeek compilation process returned non-zero; exit-code: {}".format(compile_zeek_return_code))
         try:
-            with open(env_file) as env_f:
-                if 'ZEEK_HOME' not in env_f.read():
-                    self.logger.info('Updating Zeek default home path [{}]'.format(self.install_directory))
-                    subprocess.call('echo ZEEK_HOME="{}" >> {}'.format(self.install_directory, env_file),
-                                    shell=True)
-                if 'ZEEK_SCRIPTS' not in env_f.read():
-                    self.logger.info('Updating Zeek default script path [{}]'.format(self.configuration_directory))
-                    subprocess.call('echo ZEEK_SCRIPTS="{}" >> {}'.format(self.configuration_directory, env_file),
-                                    shell=True)
+            env_dict = utilities.get_environment_file_dict()
+            new_variables = {}
+            if 'ZEEK_HOME' not in env_dict:
+                self.logger.info('Updating Zeek default home path [{}]'.format(self.install_directory))
+                new_variables['ZEEK_HOME'] = self.install_directory
+            if 'ZEEK_SCRIPTS' not in env_dict:
+                self.logger.info('Updating Zeek default script path [{}]'.format(self.configuration_directory))
+                new_variables['ZEEK_SCRIPTS'] = self.configuration_directory
+            if new_variables:
+                utilities.update_environment_file(new_variables)
         except IOError as e:
             self.logger.error("Failed to open {} for reading.".format(env_file))
             self.logger.debug("Failed to open {} for reading; {}".format(env_file, e))
@@ -708,7 +596,6 @@ def uninstall_zeek(prompt_user=True, stdout=True, verbose=False):
         log_level = logging.DEBUG
     logger = get_logger('ZEEK', level=log_level, stdout=stdout)
     logger.info("Uninstalling Zeek.")
-    env_file = os.path.join(const.CONFIG_PATH, 'environment')
     environment_variables = utilities.get_environment_file_dict()
     zeek_profiler = zeek_profile.ProcessProfiler()
     if not zeek_profiler.is_installed():
@@ -733,20 +620,7 @@ def uninstall_zeek(prompt_user=True, stdout=True, verbose=False):
     install_directory = environment_variables.get('ZEEK_HOME')
     config_directory = environment_variables.get('ZEEK_SCRIPTS')
     try:
-        with open(env_file) as env_fr:
-            env_lines = ''
-            for line in env_fr.readlines():
-                if 'ZEEK_HOME' in line:
-                    continue
-                elif 'ZEEK_SCRIPTS' in line:
-                    continue
-                elif 'PF_RING_HOME' in line:
-                    continue
-                elif line.strip() == '':
-                    continue
-                env_lines += line.strip() + '\n'
-        with open(env_file, 'w') as env_fw:
-            env_fw.write(env_lines)
+        utilities.remove_from_environment_file('ZEEK_HOME', 'ZEEK_SCRIPTS', 'PF_RING_HOME')
         if zeek_profiler.is_installed():
             shutil.rmtree(install_directory, ignore_errors=True)
             shutil.rmtree(config_directory, ignore_errors=True)
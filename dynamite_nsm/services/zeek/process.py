@@ -10,6 +10,8 @@ from dynamite_nsm import exceptions as general_exceptions
 from dynamite_nsm.services.zeek import profile as zeek_profile
 from dynamite_nsm.services.zeek import exceptions as zeek_exceptions
 
+ZEEKCTL_STATUS_TIMEOUT = 10
+
 
 class ProcessManager(process.BaseProcessManager):
     """
@@ -31,15 +33,16 @@ class ProcessManager(process.BaseProcessManager):
             raise zeek_exceptions.CallZeekProcessError("Zzeek is not installed.")
 
     def status(self):
-        p = subprocess.Popen('{} status'.format(os.path.join(self.install_directory, 'bin', 'zeekctl')), shell=True,
+        p = subprocess.Popen([os.path.join(self.install_directory, 'bin', 'zeekctl'), 'status'],
                              stdout=subprocess.PIPE)
-        out, err = p.communicate()
+        try:
+            out, err = p.communicate(timeout=ZEEKCTL_STATUS_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.logger.warning('zeekctl status did not return after {} seconds.'.format(ZEEKCTL_STATUS_TIMEOUT))
+            p.kill()
+            out, err = p.communicate()
         raw_output = out.decode('utf-8')
-        systemd_info = self.sysctl.status('zeek.service')
-        systemd_info_dict = {
-            'command': systemd_info.cmd,
-            'exit_code': systemd_info.exit,
-        }
+        _, systemd_info_dict = self.get_systemd_info()
 
         zeek_status = {
             'running': False
@@ -66,10 +69,6 @@ class ProcessManager(process.BaseProcessManager):
             )
         if self.verbose:
             zeek_status['subprocesses'] = zeek_subprocesses
-            systemd_info_dict.update({
-                'stdout': utilities.wrap_text(systemd_info.out),
-                'stderr': utilities.wrap_text(systemd_info.err)
-            })
         else:
             zeek_status['subprocess_count'] = len(zeek_subprocesses)
         if self.log_path:
@@ -98,7 +97,10 @@ class ProcessManager(process.BaseProcessManager):
                     )
             else:
                 status_tbl.append(['Subprocesses', len(zeek_subprocesses)])
-
+            if zeek_status['info'].get('active_state'):
+                status_tbl.append([
+                    'State', zeek_status['info'].get('active_state')
+                ])
             if zeek_status['info'].get('command'):
                 status_tbl.append([
                     'Command', zeek_status['info'].get('command')
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from dynamite_nsm import topology
+from dynamite_nsm.services.zeek import autoscale
+
+NODE_CFG = '''[manager]
+type = manager
+host = localhost
+
+[worker-1]
+type = worker
+interface = af_packet::eth0
+lb_method = custom
+lb_procs = 2
+pin_cpus = 2,3
+host = localhost
+'''
+
+
+def create_dummy_zeek_install(install_directory):
+    os.makedirs(os.path.join(install_directory, 'etc'))
+    os.makedirs(os.path.join(install_directory, 'logs', 'current'))
+    write_node_cfg(install_directory, NODE_CFG)
+
+
+def write_node_cfg(install_directory, node_cfg):
+    with open(os.path.join(install_directory, 'etc', 'node.cfg'), 'w') as f:
+        f.write(node_cfg)
+
+
+def get_unpinned_node_cfg(lb_procs):
+    return NODE_CFG.replace('lb_procs = 2\npin_cpus = 2,3\n', 'lb_procs = {}\n'.format(lb_procs))
+
+
+def write_capture_loss(install_directory, percents_lost, peer='worker-1-1', now=None):
+    """
+    One JSON capture_loss record per value, five minutes apart, the last one a minute ago
+    """
+    now = now or time.time()
+    with open(os.path.join(install_directory, 'logs', 'current', 'capture_loss.log'), 'w') as f:
+        for i, percent_lost in enumerate(percents_lost):
+            ts = now - 60 - (len(percents_lost) - 1 - i) * 300
+            f.write(json.dumps({'ts': ts, 'peer': peer, 'percent_lost': percent_lost}) + '\n')
+
+
+def write_stats(install_directory, packets_processed):
+    """
+    A tab separated stats.log with one worker process reporting every five minutes
+    """
+    now = time.time()
+    with open(os.path.join(install_directory, 'logs', 'current', 'stats.log'), 'w') as f:
+        f.write('#separator \\x09\n')
+        f.write('#fields\tts\tpeer\tpkts_proc\n')
+        for i, pkts in enumerate(packets_processed):
+            f.write('{}\tworker-1-1\t{}\n'.format(now - (len(packets_processed) - i) * 300, pkts))
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.install_directory = tempfile.mkdtemp()
+        create_dummy_zeek_install(self.install_directory)
+        self.state_path = os.path.join(self.install_directory, 'autoscale_state.json')
+        # Eight single threaded cores on one node; eth0 has no NUMA information
+        cpu_topology = topology.CPUTopology(dict([(cpu_id, (0, 0, cpu_id)) for cpu_id in range(0, 8)]),
+                                            sys_root=self.install_directory)
+        patchers = [
+            mock.patch('dynamite_nsm.utilities.get_environment_file_dict', return_value={}),
+            mock.patch.object(topology.CPUTopology, 'from_sysfs', return_value=cpu_topology)
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.autoscaler = autoscale.WorkerAutoscaler(install_directory=self.install_directory,
+                                                     state_path=self.state_path, stdout=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.install_directory)
+
+    def _plan(self, cpu_percent=None):
+        usage = {'worker-1': cpu_percent} if cpu_percent is not None else {}
+        with mock.patch.object(self.autoscaler, 'get_worker_cpu_usage', return_value=usage):
+            return self.autoscaler.plan()[0]
+
+    def _write_last_change(self, seconds_ago):
+        with open(self.state_path, 'w') as f:
+            json.dump({'last_change': {'worker-1': time.time() - seconds_ago}, 'pending_deploy': False}, f)
+
+    def test_plan_scale_up_after_consecutive_loss(self):
+        write_capture_loss(self.install_directory, [2.5, 3.0, 5.0])
+
+        decision = self._plan(cpu_percent=95.0)
+
+        assert(decision['action'] == 'scale_up')
+        assert(decision['loss'] == 5.0)
+        assert(decision['new_pinned_cpus'][:2] == [2, 3] and len(decision['new_pinned_cpus']) == 3)
+        assert(decision['new_pinned_cpus'][2] not in (0, 1))
+
+    def test_plan_keeps_worker_on_single_spike(self):
+        write_capture_loss(self.install_directory, [0.5, 12.0, 2.0])
+
+        decision = self._plan(cpu_percent=95.0)
+
+        assert(decision['action'] == 'keep')
+        assert(decision['reason'] == 'within thresholds')
+
+    def test_plan_waits_for_enough_measurements(self):
+        write_capture_loss(self.install_directory, [8.0, 9.0])
+
+        decision = self._plan()
+
+        assert(decision['action'] == 'keep')
+        assert(decision['reason'].startswith('waiting for 3'))
+
+    def test_plan_scale_down_only_when_idle(self):
+        write_capture_loss(self.install_directory, [0.0, 0.01, 0.0])
+
+        busy = self._plan(cpu_percent=80.0)
+        idle = self._plan(cpu_percent=5.0)
+
+        assert(busy['action'] == 'keep')
+        assert(idle['action'] == 'scale_down')
+        assert(idle['new_pinned_cpus'] == [2])
+
+    def test_plan_cooldown_after_change(self):
+        write_capture_loss(self.install_directory, [5.0, 5.0, 5.0])
+        self._write_last_change(seconds_ago=600)
+
+        decision = self._plan()
+
+        assert(decision['action'] == 'keep')
+        assert(decision['reason'] == 'cooling down after the last change')
+
+    def test_plan_ignores_measurements_before_last_change(self):
+        write_capture_loss(self.install_directory, [5.0, 5.0, 5.0, 5.0])
+        self.autoscaler.cooldown = 60
+        # Only the latest measurement was taken after the change
+        self._write_last_change(seconds_ago=120)
+
+        decision = self._plan()
+
+        assert(decision['action'] == 'keep')
+        assert(decision['reason'].startswith('waiting for'))
+
+    def test_is_quiet_compares_against_peak_rate(self):
+        write_stats(self.install_directory, [0, 300000, 300000, 60000])
+
+        rates = self.autoscaler.read_packet_rates()
+
+        assert([int(rate) for _, rate in rates] == [1000, 1000, 200])
+        assert(self.autoscaler.is_quiet())
+        write_stats(self.install_directory, [0, 300000, 300000, 240000])
+        assert(not self.autoscaler.is_quiet())
+
+    def test_plan_scale_up_pins_every_process_of_unpinned_worker(self):
+        write_node_cfg(self.install_directory, get_unpinned_node_cfg(lb_procs=4))
+        write_capture_loss(self.install_directory, [2.5, 3.0, 5.0])
+
+        decision = self._plan(cpu_percent=95.0)
+
+        assert(decision['action'] == 'scale_up')
+        assert(decision['lb_procs'] == 4 and decision['new_lb_procs'] == 5)
+        assert(len(set(decision['new_pinned_cpus'])) == 5)
+
+    def test_plan_refuses_to_pin_unpinned_worker_without_free_cores(self):
+        write_node_cfg(self.install_directory, get_unpinned_node_cfg(lb_procs=8))
+        write_capture_loss(self.install_directory, [2.5, 3.0, 5.0])
+
+        decision = self._plan(cpu_percent=95.0)
+
+        assert(decision['action'] == 'keep')
+        assert(decision['new_lb_procs'] == 8 and decision['new_pinned_cpus'] == [])
+        assert('free cores are needed to pin 9 processes' in decision['reason'])
+
+    def test_plan_scale_down_unpinned_worker(self):
+        write_node_cfg(self.install_directory, get_unpinned_node_cfg(lb_procs=3))
+        write_capture_loss(self.install_directory, [0.0, 0.01, 0.0])
+
+        decision = self._plan(cpu_percent=5.0)
+
+        assert(decision['action'] == 'scale_down')
+        assert(decision['new_lb_procs'] == 2 and len(decision['new_pinned_cpus']) == 2)
+
+    def test_interval_loop_survives_deploy_errors(self):
+        ticks = [autoscale.zeek_exceptions.CallZeekProcessError('zeekctl deploy returned non-zero'), 'report',
+                 KeyboardInterrupt()]
+        with mock.patch.object(autoscale.WorkerAutoscaler, '__init__', return_value=None), \
+                mock.patch.object(autoscale.WorkerAutoscaler, 'logger', mock.Mock(), create=True), \
+                mock.patch.object(autoscale.WorkerAutoscaler, 'tick', side_effect=ticks) as tick, \
+                mock.patch.object(autoscale.time, 'sleep'):
+            with self.assertRaises(KeyboardInterrupt):
+                autoscale.autoscale_workers(interval=60, stdout=False)
+
+        assert(tick.call_count == 3)
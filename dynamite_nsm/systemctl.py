@@ -1,9 +1,23 @@
 import os
+import shlex
+import threading
 import subprocess
 from shutil import copy2
 
+try:
+    from shutil import which
+except ImportError:
+    from distutils.spawn import find_executable as which
+
+try:
+    import dbus
+except ImportError:
+    dbus = None
+
 from dynamite_nsm import exceptions
 
+UNIT_STATE_PROPERTIES = ('LoadState', 'ActiveState', 'UnitFileState')
+
 
 class CmdResult:
     """
@@ -18,6 +32,169 @@ class CmdResult:
         self.svc = None
 
 
+class UnitStateTable:
+    """
+    A per-invocation table of systemd unit states.
+
+    All requested units are resolved together; through the systemd D-Bus API when python-dbus is available,
+    otherwise with a single `systemctl show` call. Results are kept for the remainder of the invocation and are only
+    refreshed when a unit is (re)started, stopped, enabled or disabled.
+    """
+
+    def __init__(self):
+        self.states = {}
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+
+    @staticmethod
+    def _empty_state():
+        return {prop: None for prop in UNIT_STATE_PROPERTIES}
+
+    @staticmethod
+    def parse_show_output(units, output):
+        """
+        Parse the output of a multi-unit `systemctl show -p Id -p ... unit1 unit2` call
+
+        :param units: The list of unit names in the order they were passed to systemctl
+        :param output: The decoded stdout of systemctl show
+        :return: A dictionary mapping each unit name to a dictionary of its properties
+        """
+        blocks = []
+        block = {}
+        for line in output.split('\n'):
+            line = line.strip()
+            if not line:
+                if block:
+                    blocks.append(block)
+                    block = {}
+                continue
+            if '=' in line:
+                key, value = line.split('=', 1)
+                block[key.strip()] = value.strip()
+        if block:
+            blocks.append(block)
+
+        states = {}
+        # systemctl emits one block per unit in argument order; aliased units report their canonical Id, so fall
+        # back to matching on Id only if the blocks cannot be lined up with the requested units.
+        if len(blocks) == len(units):
+            pairs = zip(units, blocks)
+        else:
+            blocks_by_id = {b.get('Id'): b for b in blocks}
+            pairs = [(u, blocks_by_id.get(u, {})) for u in units]
+        for unit, block in pairs:
+            state = UnitStateTable._empty_state()
+            for prop in UNIT_STATE_PROPERTIES:
+                if block.get(prop):
+                    state[prop] = block[prop]
+            states[unit] = state
+        return states
+
+    @staticmethod
+    def _fetch_via_dbus(units):
+        bus = dbus.SystemBus()
+        systemd = bus.get_object('org.freedesktop.systemd1', '/org/freedesktop/systemd1')
+        manager = dbus.Interface(systemd, 'org.freedesktop.systemd1.Manager')
+        states = {}
+        for unit in manager.ListUnitsByNames(list(units)):
+            name, _, load_state, active_state = [str(v) for v in unit[0:4]]
+            state = UnitStateTable._empty_state()
+            state.update({'LoadState': load_state, 'ActiveState': active_state})
+            states[name] = state
+        for unit in units:
+            states.setdefault(unit, UnitStateTable._empty_state())
+        return states
+
+    @staticmethod
+    def _fetch_via_systemctl(units):
+        cmd = ['systemctl', 'show', '-p', 'Id'] + \
+              [arg for prop in UNIT_STATE_PROPERTIES for arg in ('-p', prop)] + list(units)
+        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = p.communicate()
+        if p.returncode != 0:
+            return {unit: UnitStateTable._empty_state() for unit in units}
+        try:
+            out = out.decode()
+        except UnicodeDecodeError:
+            return {unit: UnitStateTable._empty_state() for unit in units}
+        return UnitStateTable.parse_show_output(units, out)
+
+    def fetch(self, units):
+        """
+        Query the state of several units at once, and store the results in the table
+
+        :param units: A list of unit names (E.G ['filebeat.service', 'zeek.service'])
+        :return: A dictionary mapping each unit name to a dictionary of its properties
+        """
+        units = sorted(set(units))
+        if not units:
+            return {}
+        states = None
+        if dbus:
+            try:
+                states = self._fetch_via_dbus(units)
+            except Exception:
+                states = None
+        if states is None:
+            states = self._fetch_via_systemctl(units)
+        with self._lock:
+            self.states.update(states)
+        return states
+
+    def ensure(self, units):
+        """
+        Make sure that every unit in the list has an entry in the table; fetches only those that are missing
+
+        :param units: A list of unit names
+        """
+        # Serialize lookups so that concurrent callers (E.G status probes) share one query rather than racing
+        with self._fetch_lock:
+            with self._lock:
+                missing = [unit for unit in units if unit not in self.states]
+            if missing:
+                self.fetch(missing)
+
+    def get(self, unit):
+        """
+        :param unit: The name of the unit
+        :return: A dictionary of the unit's properties
+        """
+        self.ensure([unit])
+        with self._lock:
+            return dict(self.states[unit])
+
+    def refresh(self, unit=None):
+        """
+        Re-query the table after a state changing operation; all known units are refreshed in one call, since
+        starting/stopping a target also affects the units it wants
+
+        :param unit: An additional unit to include in the refresh
+        """
+        with self._lock:
+            units = list(self.states.keys())
+        if unit:
+            units.append(unit)
+        self.fetch(units)
+
+    def clear(self):
+        with self._lock:
+            self.states = {}
+
+
+unit_state_table = UnitStateTable()
+_systemctl_path = None
+
+
+def get_systemctl_path():
+    """
+    :return: The path to the systemctl binary, resolved once per invocation; None if it can not be found
+    """
+    global _systemctl_path
+    if not _systemctl_path:
+        _systemctl_path = which('systemctl')
+    return _systemctl_path
+
+
 class SystemCtl:
     """
     Provides a wrapper for systemctl for managing Dynamite services.
@@ -28,7 +205,7 @@ class SystemCtl:
     # Map each role type to a list of associated service unit files
     ROLE_SVCS = {
         'agent': ['dynamite-agent.target', 'filebeat.service', 'suricata.service', 'zeek.service'],
-        'monitor': ['dynamite-monitor.target', 'elastic.service', 'logstash.service', 'kibana.service'],
+        'monitor': ['dynamite-monitor.target', 'elasticsearch.service', 'logstash.service', 'kibana.service'],
         'scanner': ['dynamite-scanner.target', 'rumble.service', 'filebeat.service']
     }
 
@@ -44,14 +221,14 @@ class SystemCtl:
         # all roles.
 
         # Verify systemctl is installed and in path, bail if not
-        p = subprocess.Popen('which systemctl', stdout=subprocess.PIPE,
-                             stderr=subprocess.PIPE, shell=True)
-        p.communicate()
-        if p.returncode != 0:
-            raise exceptions.CallProcessError('Systemctl not found, is it installed?  {}'.format(p.stderr.read()))
+        if not get_systemctl_path():
+            raise exceptions.CallProcessError('Systemctl not found, is it installed?')
 
-        # Update the status for Dynamite services based on the active roles
+        # Update the status for Dynamite services based on the active roles; the states of all units are fetched in
+        # a single query and shared by every SystemCtl instance for the rest of the invocation
+        self.unit_states = unit_state_table
         svcs = self._get_svc_units(roles)
+        self.unit_states.ensure(svcs)
         for s in svcs:
             self._update_comp_status(s)
 
@@ -96,11 +273,7 @@ class SystemCtl:
         """
         Retrieve the ActiveState and LoadState from systemctl for a given unit name.
         """
-        state = {'LoadState': None, 'ActiveState': None}
-        res = self._exec('show', component, ['-p ActiveState -p LoadState'])
-        if res.exit == 0 and res.err == '' and res.out != '':
-            state = {l.split('=')[0].strip(): l.split('=')[1].strip() for l in res.out.split('\n') if '=' in l}
-        return state
+        return self.unit_states.get(component)
 
     def _get_comp_status(self, component):
         """
@@ -109,13 +282,11 @@ class SystemCtl:
         :return: dict() with keys 'RUNNING' and 'ENABLED'
         """
         status = {'ENABLED': False, 'RUNNING': False}
-        res = self._exec('show', component, ['-p ActiveState -p LoadState'])
-        if res.exit == 0 and res.err == '' and res.out != '':
-            state = {l.split('=')[0].strip(): l.split('=')[1].strip() for l in res.out.split('\n') if '=' in l}
-            if state['LoadState'] == 'loaded':
-                status['ENABLED'] = True
-            if state['ActiveState'] == 'active':
-                status['RUNNING'] = True
+        state = self._get_comp_state(component)
+        if state['LoadState'] == 'loaded':
+            status['ENABLED'] = True
+        if state['ActiveState'] == 'active':
+            status['RUNNING'] = True
         return status
 
     def _update_comp_status(self, component):
@@ -149,8 +320,8 @@ class SystemCtl:
         if args and len(args) > 0:
             for arg in args:
                 res.cmd += " " + arg
-        p = subprocess.Popen(res.cmd, stdout=subprocess.PIPE,
-                             stderr=subprocess.PIPE, shell=True)
+        p = subprocess.Popen(shlex.split(res.cmd), stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE)
         out, err = p.communicate()
         try:
             res.err = err.decode().strip()
@@ -166,6 +337,7 @@ class SystemCtl:
         :return:  A tuple in the form of: (<"service name">, Running (T/F), Enabled (T/F))
         """
         self._exec(cmd, svc, [])
+        self.unit_states.refresh(svc)
         return self._update_comp_status(svc)
 
     @staticmethod
@@ -174,9 +346,10 @@ class SystemCtl:
         Executes `systemctl daemon-reload` to reload all systemd unit files.
         :return:  True if successful.  False otherwise.
         """
-        p = subprocess.Popen('systemctl daemon-reload', stdout=subprocess.PIPE,
-                             stderr=subprocess.PIPE, shell=True)
+        p = subprocess.Popen(['systemctl', 'daemon-reload'], stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE)
         p.communicate()
+        unit_state_table.clear()
         return p.returncode == 0
 
     def disable(self, svc, daemon_reload=True):
@@ -239,6 +412,17 @@ class SystemCtl:
         _, running, _ = self._exec_update("start", svc)
         return running
 
+    def get_state(self, svc):
+        """
+        Look up the state of a service in the shared unit state table, without running systemctl status.
+
+        :param svc: The name of the service or target
+        :return: A dictionary of the unit's LoadState, ActiveState and UnitFileState
+        """
+
+        svc = self._format_svc_string(svc)
+        return self.unit_states.get(svc)
+
     def status(self, svc):
         """
         Displays the full systemctl status output for the given service.
@@ -0,0 +1,233 @@
+import io
+import os
+import re
+import time
+import shutil
+import tarfile
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+try:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+
+from dynamite_nsm import const
+from dynamite_nsm import download
+from dynamite_nsm import artifact_cache
+from dynamite_nsm.services.base import install
+from dynamite_nsm import exceptions as general_exceptions
+
+ARCHIVE = bytes(bytearray(range(256))) * 4096
+SLOW_CHUNK_DELAY = 0.05
+
+
+def create_tar_archive(version):
+    tar_f = io.BytesIO()
+    with tarfile.open(fileobj=tar_f, mode='w:gz') as tf:
+        content = 'elasticsearch {}'.format(version).encode()
+        member = tarfile.TarInfo('elasticsearch/bin/elasticsearch')
+        member.size = len(content)
+        tf.addfile(member, io.BytesIO(content))
+    return tar_f.getvalue()
+
+
+TAR_ARCHIVE = create_tar_archive('7.2.0')
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    """
+    Serves ARCHIVE on every path (TAR_ARCHIVE on .tar.gz paths), honouring byte ranges;
+    /slow/ paths trickle it out, /drop/ paths cut the first response off half way
+    """
+
+    requests = []
+    dropped = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        archive = TAR_ARCHIVE if self.path.endswith('.tar.gz') else ARCHIVE
+        start, end = 0, len(archive) - 1
+        range_header = self.headers.get('Range')
+        ArchiveHandler.requests.append((self.path, range_header))
+        if range_header:
+            match = re.match(r'bytes=(\d+)-(\d*)', range_header)
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, end, len(archive)))
+        else:
+            self.send_response(200)
+        body = archive[start:end + 1]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.path.startswith('/drop/') and self.path not in ArchiveHandler.dropped:
+            ArchiveHandler.dropped.add(self.path)
+            self.wfile.write(body[:len(body) // 2])
+            return
+        for i in range(0, len(body), 16 * 1024):
+            if self.path.startswith('/slow/'):
+                time.sleep(SLOW_CHUNK_DELAY)
+            self.wfile.write(body[i:i + 16 * 1024])
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ArchiveHandler)
+        cls.base_url = 'http://127.0.0.1:{}'.format(cls.server.server_address[1])
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever)
+        cls.server_thread.daemon = True
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.destination = os.path.join(self.directory, 'archive')
+        ArchiveHandler.requests = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_rank_mirrors_fastest_first(self):
+        slow = download.MirrorEntry(self.base_url + '/slow/archive')
+        fast = download.MirrorEntry(self.base_url + '/fast/archive')
+        unreachable = download.MirrorEntry('http://127.0.0.1:1/archive')
+
+        ranked = download.rank_mirrors([unreachable, slow, fast])
+
+        assert(ranked == [fast, slow, unreachable])
+        assert(fast.accepts_ranges and fast.size == len(ARCHIVE))
+        assert(unreachable.throughput is None)
+
+    def test_fetch_resumes_part_after_dropped_connection(self):
+        entry = download.MirrorEntry(self.base_url + '/drop/archive')
+        entry.accepts_ranges, entry.size = True, len(ARCHIVE)
+
+        with self.assertRaises(Exception):
+            download.fetch(entry, self.destination)
+        partial_size = os.path.getsize(self.destination + '.part0')
+        assert(0 < partial_size < len(ARCHIVE))
+
+        download.fetch(entry, self.destination)
+
+        assert(ArchiveHandler.requests[-1][1] == 'bytes={}-{}'.format(partial_size, len(ARCHIVE) - 1))
+        with open(self.destination, 'rb') as archive_f:
+            assert(archive_f.read() == ARCHIVE)
+        assert(not os.path.exists(self.destination + '.part0'))
+
+    def test_fetch_reassembles_segments(self):
+        entry = download.probe_mirror(download.MirrorEntry(self.base_url + '/fast/archive'))
+        ArchiveHandler.requests = []
+
+        download.fetch(entry, self.destination, segments=4, segment_threshold=1)
+
+        assert(len(set([range_header for _, range_header in ArchiveHandler.requests])) == 4)
+        with open(self.destination, 'rb') as archive_f:
+            assert(archive_f.read() == ARCHIVE)
+        assert(os.listdir(self.directory) == ['archive'])
+
+    def test_fetch_rejects_sha256_mismatch(self):
+        entry = download.probe_mirror(download.MirrorEntry(self.base_url + '/fast/archive', '0' * 64))
+
+        with self.assertRaises(general_exceptions.DownloadError):
+            download.fetch(entry, self.destination)
+
+        assert(os.listdir(self.directory) == [])
+
+    def test_download_from_mirrors_falls_back_on_sha256_mismatch(self):
+        sha256 = download.sha256_of_file(self._write_reference())
+        entries = [download.MirrorEntry(self.base_url + '/fast/archive', 'f' * 64),
+                   download.MirrorEntry(self.base_url + '/slow/archive', sha256)]
+
+        path = download.download_from_mirrors(entries, 'archive', directory=self.directory)
+
+        assert(download.sha256_of_file(path) == sha256)
+
+    def test_extract_archive_replaces_previous_extraction(self):
+        download.extract_archive(self._write_tar('7.1.0'), self.directory)
+        entry = download.probe_mirror(download.MirrorEntry(self.base_url + '/fast/archive.tar.gz'))
+
+        download.stream_extract(entry, self.destination, self.directory)
+
+        with open(os.path.join(self.directory, 'elasticsearch', 'bin', 'elasticsearch')) as binary_f:
+            assert(binary_f.read() == 'elasticsearch 7.2.0')
+        assert(sorted(os.listdir(self.directory)) == ['7.1.0.tar.gz', 'archive', 'elasticsearch'])
+
+    def test_promote_keeps_previous_extraction_on_failure(self):
+        download.extract_archive(self._write_tar('7.1.0'), self.directory)
+        staging_directory = tempfile.mkdtemp(dir=self.directory, prefix='.extract-')
+        os.makedirs(os.path.join(staging_directory, 'elasticsearch'))
+        real_rename = os.rename
+
+        def failing_rename(source, destination):
+            if source.startswith(staging_directory):
+                raise OSError('interrupted')
+            real_rename(source, destination)
+
+        with mock.patch('os.rename', failing_rename):
+            with self.assertRaises(OSError):
+                download._promote(staging_directory, self.directory)
+
+        with open(os.path.join(self.directory, 'elasticsearch', 'bin', 'elasticsearch')) as binary_f:
+            assert(binary_f.read() == 'elasticsearch 7.1.0')
+        assert(not [name for name in os.listdir(self.directory) if name.startswith('.replaced-')])
+
+    def test_stream_extract_tees_into_artifact_cache(self):
+        install_cache = os.path.join(self.directory, 'install_cache')
+        cache = artifact_cache.ArtifactCache(cache_directory=os.path.join(self.directory, 'artifacts'))
+        entry = download.probe_mirror(download.MirrorEntry(self.base_url + '/fast/archive.tar.gz'))
+        logger = install.BaseInstallManager._get_logger(stdout=False, verbose=False)
+
+        with mock.patch.object(const, 'INSTALL_CACHE', install_cache):
+            install.BaseInstallManager._stream_extract_into_cache(cache, entry, 'archive.tar.gz', logger)
+
+        object_path = cache.lookup('archive.tar.gz')
+        assert(os.listdir(cache.objects_directory) == [os.path.basename(object_path)])
+        # The install_cache copy is a link to the cached object, not a second write
+        assert(os.path.samefile(object_path, os.path.join(install_cache, 'archive.tar.gz')))
+        assert(os.path.exists(os.path.join(install_cache, 'elasticsearch', 'bin', 'elasticsearch')))
+
+    def test_stream_extract_archive_larger_than_artifact_cache(self):
+        install_cache = os.path.join(self.directory, 'install_cache')
+        cache = artifact_cache.ArtifactCache(cache_directory=os.path.join(self.directory, 'artifacts'),
+                                             max_size_bytes=1)
+        cache.store('old.tar.gz', self._write_tar('7.1.0'))
+        entry = download.probe_mirror(download.MirrorEntry(self.base_url + '/fast/archive.tar.gz'))
+        logger = install.BaseInstallManager._get_logger(stdout=False, verbose=False)
+
+        with mock.patch.object(const, 'INSTALL_CACHE', install_cache):
+            install.BaseInstallManager._stream_extract_into_cache(cache, entry, 'archive.tar.gz', logger)
+            assert(install.BaseInstallManager.is_extracted(os.path.join(install_cache, 'archive.tar.gz')))
+
+        # Older archives make room, but the one just stored is not evicted from under the installer
+        assert(cache.lookup('old.tar.gz') is None)
+        assert(os.path.samefile(cache.lookup('archive.tar.gz'), os.path.join(install_cache, 'archive.tar.gz')))
+
+    def _write_tar(self, version):
+        archive_path = os.path.join(self.directory, '{}.tar.gz'.format(version))
+        with open(archive_path, 'wb') as archive_f:
+            archive_f.write(create_tar_archive(version))
+        return archive_path
+
+    def _write_reference(self):
+        reference_path = os.path.join(tempfile.mkdtemp(), 'reference')
+        with open(reference_path, 'wb') as reference_f:
+            reference_f.write(ARCHIVE)
+        self.addCleanup(shutil.rmtree, os.path.dirname(reference_path))
+        return reference_path
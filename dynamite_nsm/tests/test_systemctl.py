@@ -0,0 +1,53 @@
+import unittest
+
+from dynamite_nsm import systemctl
+
+SHOW_OUTPUT = '''Id=elasticsearch.service
+LoadState=loaded
+ActiveState=active
+UnitFileState=enabled
+
+Id=logstash.service
+LoadState=loaded
+ActiveState=failed
+UnitFileState=disabled
+
+Id=kibana.service
+LoadState=not-found
+ActiveState=inactive
+UnitFileState=
+'''
+
+
+class Tests(unittest.TestCase):
+
+    def test_parse_show_output_multiple_units(self):
+        states = systemctl.UnitStateTable.parse_show_output(
+            ['elasticsearch.service', 'logstash.service', 'kibana.service'], SHOW_OUTPUT)
+
+        assert(states['elasticsearch.service'] == {'LoadState': 'loaded', 'ActiveState': 'active',
+                                                   'UnitFileState': 'enabled'})
+        assert(states['logstash.service']['ActiveState'] == 'failed')
+        assert(states['logstash.service']['UnitFileState'] == 'disabled')
+
+    def test_parse_show_output_not_found_unit(self):
+        states = systemctl.UnitStateTable.parse_show_output(
+            ['elasticsearch.service', 'logstash.service', 'kibana.service'], SHOW_OUTPUT)
+
+        assert(states['kibana.service']['LoadState'] == 'not-found')
+        assert(states['kibana.service']['ActiveState'] == 'inactive')
+        assert(states['kibana.service']['UnitFileState'] is None)
+
+    def test_parse_show_output_matches_blocks_by_id(self):
+        # One block short; the remaining blocks are matched on their Id, and the missing unit has an empty state
+        states = systemctl.UnitStateTable.parse_show_output(
+            ['filebeat.service', 'logstash.service', 'kibana.service'], SHOW_OUTPUT.split('\n\n', 1)[1])
+
+        assert(states['logstash.service']['ActiveState'] == 'failed')
+        assert(states['kibana.service']['LoadState'] == 'not-found')
+        assert(states['filebeat.service'] == {'LoadState': None, 'ActiveState': None, 'UnitFileState': None})
+
+    def test_parse_show_output_empty(self):
+        states = systemctl.UnitStateTable.parse_show_output(['zeek.service'], '')
+
+        assert(states['zeek.service']['ActiveState'] is None)
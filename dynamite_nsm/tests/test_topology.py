@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from dynamite_nsm import topology
+
+
+def write_sysfs_file(sys_root, path, content):
+    path = os.path.join(sys_root, path)
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def create_dummy_sysfs(sys_root):
+    """
+    Two NUMA nodes with four hyperthreaded cores each; CPUs 8-15 are the siblings of CPUs 0-7.
+    eth0 is attached to node 1, eth1 is a virtual NIC (numa_node -1)
+    """
+    write_sysfs_file(sys_root, 'devices/system/cpu/online', '0-15')
+    write_sysfs_file(sys_root, 'devices/system/node/node0/cpulist', '0-3,8-11')
+    write_sysfs_file(sys_root, 'devices/system/node/node1/cpulist', '4-7,12-15')
+    for cpu_id in range(0, 16):
+        write_sysfs_file(sys_root, 'devices/system/cpu/cpu{}/topology/physical_package_id'.format(cpu_id),
+                         '0' if cpu_id % 8 < 4 else '1')
+        write_sysfs_file(sys_root, 'devices/system/cpu/cpu{}/topology/core_id'.format(cpu_id), str(cpu_id % 4))
+    write_sysfs_file(sys_root, 'class/net/eth0/device/numa_node', '1')
+    for queue in range(0, 2):
+        os.makedirs(os.path.join(sys_root, 'class/net/eth0/queues/rx-{}'.format(queue)))
+    write_sysfs_file(sys_root, 'class/net/eth1/device/numa_node', '-1')
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.sys_root = tempfile.mkdtemp()
+        create_dummy_sysfs(self.sys_root)
+        self.topology = topology.CPUTopology.from_sysfs(sys_root=self.sys_root)
+
+    def tearDown(self):
+        shutil.rmtree(self.sys_root)
+
+    def test_physical_cores_collapse_siblings(self):
+        assert(self.topology.get_numa_nodes() == [0, 1])
+        assert(self.topology.get_physical_cores() == list(range(0, 8)))
+        assert(self.topology.get_physical_cores(numa_node=1) == [4, 5, 6, 7])
+
+    def test_workers_pinned_to_nic_local_node(self):
+        workers = topology.plan_capture_workers(['eth0'], topology=self.topology)
+
+        assert(workers[0]['numa_node'] == 1)
+        assert(workers[0]['pinned_cpus'] == [4, 5, 6, 7])
+
+    def test_conservative_workers_capped_at_rx_queues(self):
+        workers = topology.plan_capture_workers(['eth0'], topology=self.topology, strategy='conservative')
+
+        assert(workers[0]['lb_procs'] == 2)
+        assert(set(workers[0]['pinned_cpus']) <= {4, 5, 6, 7})
+
+    def test_unknown_node_uses_cores_of_idle_nodes(self):
+        workers = topology.plan_capture_workers(['eth0', 'eth1'], topology=self.topology)
+
+        # CPU 0 and one more core of the node without capture NICs are reserved
+        assert(workers[1]['interface'] == 'eth1')
+        assert(workers[1]['numa_node'] is None)
+        assert(workers[1]['pinned_cpus'] == [2, 3])
+        assert(workers[0]['pinned_cpus'] == [4, 5, 6, 7])
+
+    def test_fallback_without_sysfs_reserves_cpu_0_only(self):
+        empty_sys_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, empty_sys_root)
+        with mock.patch('dynamite_nsm.utilities.get_cpu_core_count', return_value=4):
+            fallback_topology = topology.CPUTopology.from_sysfs(sys_root=empty_sys_root)
+
+        workers = topology.plan_capture_workers(['eth0'], topology=fallback_topology)
+
+        assert(not fallback_topology.detected)
+        assert(workers[0]['pinned_cpus'] == [1, 2, 3])
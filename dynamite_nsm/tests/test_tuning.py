@@ -0,0 +1,79 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from dynamite_nsm import tuning
+from dynamite_nsm import exceptions as general_exceptions
+
+
+def write_proc_sysctl(proc_root, key, value):
+    path = os.path.join(proc_root, 'sys', *key.split('.'))
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(str(value))
+
+
+def read_proc_sysctl(proc_root, key):
+    with open(os.path.join(proc_root, 'sys', *key.split('.'))) as f:
+        return f.read()
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.proc_root = os.path.join(self.directory, 'proc')
+        for key, _, _ in tuning.SYSCTL_PROFILES['monitor']:
+            write_proc_sysctl(self.proc_root, key, 0)
+        write_proc_sysctl(self.proc_root, 'vm.swappiness', 1)
+        patchers = [
+            mock.patch.object(tuning, 'PROC_ROOT', self.proc_root),
+            mock.patch.object(tuning, 'TUNING_DIRECTORY', os.path.join(self.directory, 'tuning')),
+            mock.patch.object(tuning, 'SYSCTL_DIRECTORY', self.directory),
+            mock.patch('dynamite_nsm.utilities.get_environment_file_dict', return_value={})
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.profile = tuning.TuningProfile('monitor', stdout=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_setting_methods_not_implemented(self):
+        with self.assertRaises(general_exceptions.MethodNotImplementedError):
+            tuning.Setting(1).read()
+
+    def test_monitor_profile_leaves_swappiness_alone(self):
+        self.profile.apply()
+
+        assert(read_proc_sysctl(self.proc_root, 'vm.max_map_count') == '262144')
+        assert(read_proc_sysctl(self.proc_root, 'vm.swappiness') == '1')
+        with open(self.profile.sysctl_path) as sysctl_f:
+            assert('vm.swappiness' not in sysctl_f.read())
+
+    def test_apply_restores_sysctls_dropped_from_profile(self):
+        # State left behind by a release whose monitor profile still lowered vm.swappiness from 60
+        os.makedirs(tuning.TUNING_DIRECTORY)
+        with open(self.profile.state_path, 'w') as state_f:
+            json.dump({'applied': [dict(kind='sysctl', key='vm.swappiness', desired=1, at_least=False,
+                                        original='60')]}, state_f)
+
+        self.profile.apply()
+
+        assert(read_proc_sysctl(self.proc_root, 'vm.swappiness') == '60')
+        with open(self.profile.state_path) as state_f:
+            assert('vm.swappiness' not in [entry['key'] for entry in json.load(state_f)['applied']])
+
+    def test_reapply_uses_interfaces_from_last_apply(self):
+        with mock.patch.object(tuning.TuningProfile, '_get_interface_settings', return_value=[]):
+            tuning.TuningProfile('monitor', capture_network_interfaces=['eth1'], stdout=False).apply()
+
+        # As the boot service runs it, without --capture-interfaces
+        with mock.patch.object(tuning, 'get_agent_capture_interfaces') as get_agent_capture_interfaces:
+            assert(tuning.TuningProfile('monitor', stdout=False).capture_network_interfaces == ['eth1'])
+        assert(not get_agent_capture_interfaces.called)
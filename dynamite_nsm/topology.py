@@ -0,0 +1,244 @@
+import os
+import math
+from collections import OrderedDict
+
+from dynamite_nsm import utilities
+
+SYS_ROOT = '/sys'
+
+# The number of physical cores kept free of capture workers; one for the kernel/userland (CPU 0), and one for the Zeek
+# manager, logger and proxy
+DEFAULT_RESERVED_CORES = 2
+# Without sysfs the cores cannot be told apart; only CPU 0 is kept free, as the worker calculation always did
+FALLBACK_RESERVED_CORES = 1
+
+
+def parse_cpu_list(cpu_list):
+    """
+    Parse a kernel CPU list (E.G 0-3,8-11)
+
+    :param cpu_list: The CPU list string
+    :return: A sorted list of CPU ids
+    """
+    cpus = set()
+    for part in cpu_list.strip().split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def _read(path, default=None):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except (IOError, OSError):
+        return default
+
+
+class CPUTopology:
+    """
+    The layout of logical CPUs, physical cores and NUMA nodes on this host, as reported by /sys/devices/system
+    """
+
+    def __init__(self, cpus, sys_root=SYS_ROOT, detected=True):
+        """
+        :param cpus: A dictionary mapping each logical CPU id to a (numa_node, package_id, core_id) tuple
+        :param sys_root: The sysfs mount point, used to look up network interfaces
+        :param detected: False, if the layout was guessed because sysfs did not describe the CPUs
+        """
+        self.cpus = cpus
+        self.sys_root = sys_root
+        self.detected = detected
+
+    @classmethod
+    def from_sysfs(cls, sys_root=SYS_ROOT):
+        """
+        Read the CPU topology from sysfs; when it is unavailable every logical CPU is treated as a separate physical
+        core on NUMA node 0
+
+        :param sys_root: The sysfs mount point
+        :return: A CPUTopology instance
+        """
+        cpu_directory = os.path.join(sys_root, 'devices', 'system', 'cpu')
+        node_directory = os.path.join(sys_root, 'devices', 'system', 'node')
+        online = _read(os.path.join(cpu_directory, 'online'))
+        if online:
+            cpu_ids = parse_cpu_list(online)
+        else:
+            cpu_ids = list(range(0, utilities.get_cpu_core_count()))
+        cpu_nodes = {}
+        if os.path.isdir(node_directory):
+            for name in os.listdir(node_directory):
+                if not name.startswith('node') or not name[4:].isdigit():
+                    continue
+                for cpu_id in parse_cpu_list(_read(os.path.join(node_directory, name, 'cpulist'), '')):
+                    cpu_nodes[cpu_id] = int(name[4:])
+        cpus = {}
+        for cpu_id in cpu_ids:
+            topology_directory = os.path.join(cpu_directory, 'cpu{}'.format(cpu_id), 'topology')
+            package_id = int(_read(os.path.join(topology_directory, 'physical_package_id'), 0))
+            core_id = int(_read(os.path.join(topology_directory, 'core_id'), cpu_id))
+            cpus[cpu_id] = (cpu_nodes.get(cpu_id, 0), package_id, core_id)
+        return cls(cpus, sys_root=sys_root, detected=bool(online))
+
+    def get_numa_nodes(self):
+        """
+        :return: A sorted list of NUMA node ids
+        """
+        return sorted(set([node for node, _, _ in self.cpus.values()]))
+
+    def get_physical_cores(self, numa_node=None):
+        """
+        Collapse hyperthread siblings; each physical core is represented by its lowest numbered logical CPU
+
+        :param numa_node: If given, only return the cores local to this NUMA node
+        :return: A sorted list of logical CPU ids, one per physical core
+        """
+        cores = {}
+        for cpu_id in sorted(self.cpus):
+            node, package_id, core_id = self.cpus[cpu_id]
+            if numa_node is not None and node != numa_node:
+                continue
+            cores.setdefault((package_id, core_id), cpu_id)
+        return sorted(cores.values())
+
+    def get_interface_numa_node(self, interface):
+        """
+        :param interface: The name of a network interface (E.G eth0)
+        :return: The NUMA node the interface's PCI device is attached to, or None if unknown (E.G virtual NICs)
+        """
+        numa_node = _read(os.path.join(self.sys_root, 'class', 'net', interface, 'device', 'numa_node'))
+        try:
+            numa_node = int(numa_node)
+        except (TypeError, ValueError):
+            return None
+        if numa_node < 0 or numa_node not in self.get_numa_nodes():
+            return None
+        return numa_node
+
+    def get_interface_rx_queue_count(self, interface):
+        """
+        :param interface: The name of a network interface (E.G eth0)
+        :return: The number of receive queues the interface exposes (0 if unknown)
+        """
+        queue_directory = os.path.join(self.sys_root, 'class', 'net', interface, 'queues')
+        try:
+            return len([name for name in os.listdir(queue_directory) if name.startswith('rx-')])
+        except OSError:
+            return 0
+
+    def get_interface_link_speed(self, interface):
+        """
+        :param interface: The name of a network interface (E.G eth0)
+        :return: The negotiated link speed in Mbps, or None if unknown (E.G the link is down, or a virtual NIC)
+        """
+        speed = _read(os.path.join(self.sys_root, 'class', 'net', interface, 'speed'))
+        try:
+            speed = int(speed)
+        except (TypeError, ValueError):
+            return None
+        if speed <= 0:
+            return None
+        return speed
+
+    def reserve_cores(self, count, avoid_nodes=()):
+        """
+        Choose the physical cores to keep free of capture workers; CPU 0 always comes first, additional cores are
+        preferably taken from NUMA nodes that no capture interface is attached to
+
+        :param count: The number of physical cores to reserve
+        :param avoid_nodes: NUMA nodes to take reserved cores from last
+        :return: A list of logical CPU ids
+        """
+        cores = self.get_physical_cores()
+        count = min(count, len(cores) - 1)
+        if count <= 0:
+            return []
+        reserved = [cores[0]]
+        candidates = sorted(cores[1:], key=lambda cpu_id: (self.cpus[cpu_id][0] in avoid_nodes, cpu_id))
+        reserved.extend(candidates[:count - 1])
+        return reserved
+
+
+def _assign_cores(interfaces, cores, strategy):
+    """
+    Split a list of cores between interfaces; if there are fewer cores than interfaces, cores are shared
+    """
+    if len(cores) <= len(interfaces):
+        return OrderedDict([(interface, [cores[i % len(cores)]]) for i, interface in enumerate(interfaces)])
+    if strategy == 'aggressive':
+        ratio = int(math.ceil(len(cores) / float(len(interfaces))))
+    else:
+        ratio = max(1, int(math.floor(len(cores) / float(len(interfaces)))))
+    groups = [cores[i:i + ratio] for i in range(0, len(cores), ratio)]
+    return OrderedDict([(interface, groups[i % len(groups)]) for i, interface in enumerate(interfaces)])
+
+
+def get_default_reserved_cores(topology):
+    """
+    :param topology: A CPUTopology instance
+    :return: The number of physical cores to keep free for the kernel and non-worker processes
+    """
+    return DEFAULT_RESERVED_CORES if topology.detected else FALLBACK_RESERVED_CORES
+
+
+def plan_capture_workers(network_capture_interfaces, topology=None, strategy='aggressive',
+                         reserved_cores=None):
+    """
+    Pin the capture workers for each network interface to physical cores on the NUMA node the interface is attached
+    to (hyperthread siblings are left idle). Interfaces on an unknown node share the cores of nodes that have no
+    interfaces attached, and fall back to every free core if there are none.
+
+    :param network_capture_interfaces: A list of network interface names
+    :param topology: A CPUTopology instance; read from sysfs if not given
+    :param strategy: 'aggressive', results in more CPUs pinned per interface, sometimes overshoots resources
+                     'conservative', results in less CPUs pinned per interface (never more than the interface's
+                     receive queues), but never overshoots resources
+    :param reserved_cores: The number of physical cores to keep free for the kernel and non-worker processes; defaults
+                           to DEFAULT_RESERVED_CORES, or FALLBACK_RESERVED_CORES when the topology could not be read
+    :return: A list of dictionaries containing the interface, numa_node, lb_procs and pinned_cpus of each worker
+    """
+    if not topology:
+        topology = CPUTopology.from_sysfs()
+    if reserved_cores is None:
+        reserved_cores = get_default_reserved_cores(topology)
+    interface_nodes = OrderedDict([(interface, topology.get_interface_numa_node(interface))
+                                   for interface in network_capture_interfaces])
+    reserved = topology.reserve_cores(reserved_cores, avoid_nodes=set(interface_nodes.values()))
+    free_cores = [cpu_id for cpu_id in topology.get_physical_cores() if cpu_id not in reserved]
+    if not free_cores:
+        free_cores = topology.get_physical_cores()
+
+    assignments = OrderedDict()
+    for node in topology.get_numa_nodes():
+        node_interfaces = [interface for interface, n in interface_nodes.items() if n == node]
+        if not node_interfaces:
+            continue
+        node_cores = [cpu_id for cpu_id in free_cores if topology.cpus[cpu_id][0] == node] or free_cores
+        assignments.update(_assign_cores(node_interfaces, node_cores, strategy))
+    unplaced = [interface for interface, node in interface_nodes.items() if node is None]
+    if unplaced:
+        busy_nodes = set([node for node in interface_nodes.values() if node is not None])
+        idle_cores = [cpu_id for cpu_id in free_cores if topology.cpus[cpu_id][0] not in busy_nodes] or free_cores
+        assignments.update(_assign_cores(unplaced, idle_cores, strategy))
+
+    workers = []
+    for interface in network_capture_interfaces:
+        pinned_cpus = assignments[interface]
+        if strategy != 'aggressive':
+            rx_queues = topology.get_interface_rx_queue_count(interface)
+            if rx_queues > 1:
+                pinned_cpus = pinned_cpus[:rx_queues]
+        workers.append(dict(
+            interface=interface,
+            numa_node=interface_nodes[interface],
+            lb_procs=len(pinned_cpus),
+            pinned_cpus=list(pinned_cpus)
+        ))
+    return workers
@@ -2,6 +2,7 @@ import npyscreen
 
 from dynamite_nsm.services.filebeat import config
 from dynamite_nsm.services.filebeat import exceptions
+from dynamite_nsm.services.filebeat import throughput
 from dynamite_nsm.utilities import get_environment_file_dict
 from dynamite_nsm.services.filebeat.install import InstallManager
 
@@ -94,10 +95,17 @@ class FilebeatInstanceSettingsForm(npyscreen.ActionForm):
 
     def __init__(self, *args, **keywords):
         self.agent_tag = None
+        self.throughput_profile = None
+        self.throughput_profile_names = list(throughput.THROUGHPUT_PROFILES.keys())
         super(FilebeatInstanceSettingsForm, self).__init__(*args, **keywords)
 
     def beforeEditing(self):
         self.agent_tag.value = self.parentApp.filebeat_config.get_agent_tag()
+        current_profile = self.parentApp.filebeat_config.get_throughput_profile()
+        if current_profile in self.throughput_profile_names:
+            self.throughput_profile.value = [self.throughput_profile_names.index(current_profile)]
+        else:
+            self.throughput_profile.value = []
 
     def create(self):
         is_kafka_enabled = self.parentApp.filebeat_config.is_kafka_output_enabled()
@@ -119,10 +127,19 @@ class FilebeatInstanceSettingsForm(npyscreen.ActionForm):
         else:
             self.add(npyscreen.TitleText, name='Kafka Targets', editable=False)
             self.add(TargetMultiSelect, values=kf_target_names, max_height=5)
+        self.nextrely += 1
+        self.throughput_profile = self.add(npyscreen.TitleSelectOne, name='Throughput Profile',
+                                           values=self.throughput_profile_names, max_height=5, begin_entry_at=22,
+                                           scroll_exit=True)
 
     def on_ok(self):
         try:
             self.parentApp.filebeat_config.set_agent_tag(self.agent_tag.value)
+            # Nothing is selected when the output settings were customized; leave them as they are
+            if self.throughput_profile.value:
+                selected_profile = self.throughput_profile_names[self.throughput_profile.value[0]]
+                if selected_profile != self.parentApp.filebeat_config.get_throughput_profile():
+                    self.parentApp.filebeat_config.apply_throughput_profile(selected_profile)
             self.parentApp.filebeat_config.write_config()
         except exceptions.InvalidAgentTag as e:
             res = npyscreen.notify_ok_cancel(
@@ -0,0 +1,675 @@
+import os
+import json
+import time
+import logging
+import subprocess
+from collections import OrderedDict
+
+try:
+    from shutil import which
+except ImportError:
+    from distutils.spawn import find_executable as which
+
+import psutil
+import tabulate
+
+from dynamite_nsm import const
+from dynamite_nsm import systemctl
+from dynamite_nsm import topology
+from dynamite_nsm import utilities
+from dynamite_nsm.logger import get_logger
+from dynamite_nsm import exceptions as general_exceptions
+
+TUNING_DIRECTORY = os.path.join(const.CONFIG_PATH, 'tuning')
+SYSCTL_DIRECTORY = '/etc/sysctl.d'
+PROC_ROOT = '/proc'
+
+# (key, value, at_least); settings marked at_least are left alone if the host is already configured higher
+SYSCTL_PROFILES = {
+    'agent': (
+        # Socket receive buffers; AF_PACKET sockets that do not use mmap are bounded by rmem_max
+        ('net.core.rmem_max', 134217728, True),
+        ('net.core.rmem_default', 8388608, True),
+        # Packets queued per CPU between the NIC interrupt and the network stack, and how many are processed per
+        # softirq; the defaults (1000/300) overflow at a few Gbps
+        ('net.core.netdev_max_backlog', 250000, True),
+        ('net.core.netdev_budget', 600, True),
+        # Busy-poll the NIC queues for up to 50us before sleeping
+        ('net.core.busy_poll', 50, False),
+        ('net.core.busy_read', 50, False),
+    ),
+    'monitor': (
+        # ElastiFlow asks for 32MB UDP receive buffers, which the kernel silently caps at rmem_max (208KB by default)
+        ('net.core.rmem_max', 33554432, True),
+        ('net.core.rmem_default', 8388608, True),
+        ('net.core.netdev_max_backlog', 30000, True),
+        ('vm.max_map_count', 262144, True),
+    )
+}
+
+# ethtool -K feature name -> the name ethtool -k reports it under
+CAPTURE_OFFLOADS = OrderedDict([
+    ('gro', 'generic-receive-offload'),
+    ('lro', 'large-receive-offload'),
+    ('tso', 'tcp-segmentation-offload'),
+])
+
+
+def _run(command):
+    """
+    :param command: A list of arguments
+    :return: A tuple containing the exit code and decoded stdout of the command
+    """
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        return 127, str(e)
+    out, err = process.communicate()
+    return process.returncode, (out or err).decode('utf-8', errors='ignore')
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except (IOError, OSError):
+        return None
+
+
+def _write(path, value):
+    try:
+        with open(path, 'w') as f:
+            f.write(str(value))
+    except (IOError, OSError) as e:
+        raise general_exceptions.TuningError("Could not write {} to {}; {}".format(value, path, e))
+
+
+class Setting:
+    """
+    A single tunable; knows how to read its current value and write a new one
+    """
+    kind = None
+
+    def __init__(self, desired):
+        self.desired = desired
+
+    @property
+    def name(self):
+        raise general_exceptions.MethodNotImplementedError()
+
+    def read(self):
+        raise general_exceptions.MethodNotImplementedError()
+
+    def write(self, value):
+        raise general_exceptions.MethodNotImplementedError()
+
+    def is_satisfied(self, current):
+        """
+        :param current: The current value
+        :return: True, if the current value does not need to change
+        """
+        return str(current) == str(self.desired)
+
+    def to_dict(self):
+        raise general_exceptions.MethodNotImplementedError()
+
+
+class SysctlSetting(Setting):
+    kind = 'sysctl'
+
+    def __init__(self, key, desired, at_least=False):
+        Setting.__init__(self, desired)
+        self.key = key
+        self.at_least = at_least
+
+    @property
+    def name(self):
+        return self.key
+
+    @property
+    def path(self):
+        return os.path.join(PROC_ROOT, 'sys', *self.key.split('.'))
+
+    def read(self):
+        value = _read(self.path)
+        if value is None:
+            return None
+        return ' '.join(value.split())
+
+    def write(self, value):
+        _write(self.path, value)
+
+    def is_satisfied(self, current):
+        if current is None:
+            # Not supported by this kernel
+            return True
+        if self.at_least:
+            try:
+                return int(current) >= int(self.desired)
+            except ValueError:
+                pass
+        return Setting.is_satisfied(self, current)
+
+    def to_dict(self):
+        return dict(kind=self.kind, key=self.key, desired=self.desired, at_least=self.at_least)
+
+
+class RingSizeSetting(Setting):
+    kind = 'ring'
+
+    def __init__(self, interface, desired=None):
+        self.interface = interface
+        if desired is None:
+            desired = self._read_ring_parameters()[0]
+        Setting.__init__(self, desired)
+
+    @property
+    def name(self):
+        return '{} rx-ring'.format(self.interface)
+
+    def _read_ring_parameters(self):
+        """
+        :return: A tuple containing the maximum and current RX ring sizes (None if unknown)
+        """
+        exit_code, output = _run(['ethtool', '-g', self.interface])
+        if exit_code != 0:
+            return None, None
+        maximum, current, section = None, None, None
+        for line in output.splitlines():
+            if line.startswith('Pre-set maximums'):
+                section = 'maximum'
+            elif line.startswith('Current hardware settings'):
+                section = 'current'
+            elif line.startswith('RX:'):
+                try:
+                    value = int(line.split(':', 1)[1])
+                except ValueError:
+                    continue
+                if section == 'maximum' and maximum is None:
+                    maximum = value
+                elif section == 'current' and current is None:
+                    current = value
+        return maximum, current
+
+    def read(self):
+        return self._read_ring_parameters()[1]
+
+    def write(self, value):
+        exit_code, output = _run(['ethtool', '-G', self.interface, 'rx', str(value)])
+        if exit_code != 0:
+            raise general_exceptions.TuningError(
+                "Could not set the RX ring of {} to {}; {}".format(self.interface, value, output.strip()))
+
+    def is_satisfied(self, current):
+        if current is None or self.desired is None:
+            return True
+        return int(current) >= int(self.desired)
+
+    def to_dict(self):
+        return dict(kind=self.kind, interface=self.interface, desired=self.desired)
+
+
+class OffloadSetting(Setting):
+    kind = 'offload'
+
+    def __init__(self, interface, feature, desired='off'):
+        Setting.__init__(self, desired)
+        self.interface = interface
+        self.feature = feature
+
+    @property
+    def name(self):
+        return '{} {}'.format(self.interface, self.feature)
+
+    def read(self):
+        exit_code, output = _run(['ethtool', '-k', self.interface])
+        if exit_code != 0:
+            return None
+        for line in output.splitlines():
+            key, _, value = line.strip().partition(':')
+            if key == CAPTURE_OFFLOADS[self.feature]:
+                value = value.split()
+                if not value or '[fixed]' in value:
+                    # The driver does not allow this feature to be changed
+                    return None
+                return value[0]
+        return None
+
+    def write(self, value):
+        exit_code, output = _run(['ethtool', '-K', self.interface, self.feature, str(value)])
+        if exit_code != 0:
+            raise general_exceptions.TuningError(
+                "Could not turn {} {} on {}; {}".format(self.feature, value, self.interface, output.strip()))
+
+    def is_satisfied(self, current):
+        return current is None or Setting.is_satisfied(self, current)
+
+    def to_dict(self):
+        return dict(kind=self.kind, interface=self.interface, feature=self.feature, desired=self.desired)
+
+
+class IRQAffinitySetting(Setting):
+    kind = 'irq'
+
+    def __init__(self, irq, interface, desired):
+        Setting.__init__(self, desired)
+        self.irq = irq
+        self.interface = interface
+
+    @property
+    def name(self):
+        return '{} irq {} affinity'.format(self.interface, self.irq)
+
+    @property
+    def path(self):
+        return os.path.join(PROC_ROOT, 'irq', str(self.irq), 'smp_affinity_list')
+
+    def read(self):
+        return _read(self.path)
+
+    def write(self, value):
+        _write(self.path, value)
+
+    def is_satisfied(self, current):
+        if current is None:
+            return True
+        return topology.parse_cpu_list(current) == topology.parse_cpu_list(str(self.desired))
+
+    def to_dict(self):
+        return dict(kind=self.kind, irq=self.irq, interface=self.interface, desired=self.desired)
+
+
+def setting_from_dict(setting_dict):
+    """
+    :param setting_dict: The output of Setting.to_dict()
+    :return: A Setting instance
+    """
+    setting_dict = dict(setting_dict)
+    kind = setting_dict.pop('kind')
+    setting_dict.pop('original', None)
+    return {
+        SysctlSetting.kind: SysctlSetting,
+        RingSizeSetting.kind: RingSizeSetting,
+        OffloadSetting.kind: OffloadSetting,
+        IRQAffinitySetting.kind: IRQAffinitySetting
+    }[kind](**setting_dict)
+
+
+def get_interface_irqs(interface, sys_root=topology.SYS_ROOT):
+    """
+    :param interface: The name of a network interface (E.G eth0)
+    :param sys_root: The sysfs mount point
+    :return: A sorted list of the IRQ numbers used by the interface
+    """
+    try:
+        return sorted([int(irq) for irq in os.listdir(os.path.join(sys_root, 'class', 'net', interface, 'device',
+                                                                   'msi_irqs'))])
+    except (OSError, ValueError):
+        pass
+    # Virtual and some older NICs do not expose msi_irqs; fall back to the IRQs named after the interface
+    irqs = []
+    for line in (_read(os.path.join(PROC_ROOT, 'interrupts')) or '').splitlines():
+        irq, _, rest = line.strip().partition(':')
+        fields = rest.split()
+        if irq.isdigit() and fields and (fields[-1] == interface or fields[-1].startswith(interface + '-')):
+            irqs.append(int(irq))
+    return sorted(irqs)
+
+
+def get_agent_capture_interfaces():
+    """
+    :return: A sorted list of the network interfaces the installed Zeek and Suricata instances capture on
+    """
+    interfaces = set()
+    env_dict = utilities.get_environment_file_dict()
+    if env_dict.get('ZEEK_HOME'):
+        from dynamite_nsm.services.zeek import config as zeek_config
+        try:
+            for worker in zeek_config.NodeConfigManager(env_dict['ZEEK_HOME']).node_config.values():
+                if worker.get('type') == 'worker':
+                    interfaces.add(worker['interface'].replace('af_packet::', ''))
+        except (IOError, OSError):
+            pass
+    if env_dict.get('SURICATA_CONFIG'):
+        from dynamite_nsm.services.suricata import config as suricata_config
+        from dynamite_nsm.services.suricata import exceptions as suricata_exceptions
+        try:
+            interfaces.update(suricata_config.ConfigManager(env_dict['SURICATA_CONFIG']).list_af_packet_interfaces())
+        except suricata_exceptions.ReadsSuricataConfigError:
+            pass
+    return sorted(interfaces)
+
+
+def get_agent_pinned_cpus():
+    """
+    :return: A sorted list of the logical CPUs the installed Zeek and Suricata workers are pinned to
+    """
+    pinned = set()
+    env_dict = utilities.get_environment_file_dict()
+    if env_dict.get('ZEEK_HOME'):
+        from dynamite_nsm.services.zeek import config as zeek_config
+        try:
+            for worker in zeek_config.NodeConfigManager(env_dict['ZEEK_HOME']).node_config.values():
+                if worker.get('type') == 'worker' and worker.get('pin_cpus'):
+                    pinned.update(topology.parse_cpu_list(worker['pin_cpus']))
+        except (IOError, OSError):
+            pass
+    if env_dict.get('SURICATA_CONFIG'):
+        from dynamite_nsm.services.suricata import config as suricata_config
+        from dynamite_nsm.services.suricata import exceptions as suricata_exceptions
+        try:
+            threading_config = suricata_config.ConfigManager(env_dict['SURICATA_CONFIG']).config_data.get(
+                'threading') or {}
+        except suricata_exceptions.ReadsSuricataConfigError:
+            threading_config = {}
+        if threading_config.get('set-cpu-affinity'):
+            for cpu_set in threading_config.get('cpu-affinity') or []:
+                worker_set = cpu_set.get('worker-cpu-set') if isinstance(cpu_set, dict) else None
+                if not worker_set:
+                    continue
+                for cpu in worker_set.get('cpu') or []:
+                    if str(cpu) != 'all':
+                        pinned.update(topology.parse_cpu_list(str(cpu)))
+    return sorted(pinned)
+
+
+def get_irq_cpus(interface, pinned_cpus, cpu_topology):
+    """
+    Choose the CPUs an interface's interrupts are handled on; never a CPU (or the hyperthread sibling of a CPU) a
+    capture worker is pinned to, preferably on the NUMA node the interface is attached to
+
+    :param interface: The name of a network interface (E.G eth0)
+    :param pinned_cpus: The logical CPUs capture workers are pinned to
+    :param cpu_topology: A topology.CPUTopology instance
+    :return: A sorted list of logical CPU ids (empty if every CPU is taken)
+    """
+    busy_cores = set([cpu_topology.cpus[cpu_id][1:] for cpu_id in pinned_cpus if cpu_id in cpu_topology.cpus])
+    free = [cpu_id for cpu_id, (_, package_id, core_id) in sorted(cpu_topology.cpus.items())
+            if (package_id, core_id) not in busy_cores]
+    numa_node = cpu_topology.get_interface_numa_node(interface)
+    local = [cpu_id for cpu_id in free if cpu_topology.cpus[cpu_id][0] == numa_node]
+    return local or free
+
+
+class TuningProfile:
+    """
+    Kernel and network interface settings for a Dynamite role (agent or monitor)
+
+    Applying a profile records the original value of everything it changes (and the capture interfaces it was applied
+    to) in /etc/dynamite/tuning/<profile>.json, persists sysctl settings to /etc/sysctl.d, and (for NIC and IRQ
+    settings, which do not survive a reboot) installs a oneshot systemd service that re-applies the profile at boot.
+    Reverting restores the recorded values.
+    """
+
+    def __init__(self, profile, capture_network_interfaces=None, stdout=True, verbose=False):
+        """
+        :param profile: The name of the profile (agent or monitor)
+        :param capture_network_interfaces: The interfaces to tune for packet capture; defaults to those the profile
+                                           was last applied to, or (for the agent profile) to the interfaces the
+                                           installed Zeek and Suricata instances capture on
+        :param stdout: Print the output to console
+        :param verbose: Include detailed debug messages
+        """
+        log_level = logging.INFO
+        if verbose:
+            log_level = logging.DEBUG
+        self.logger = get_logger('TUNING', level=log_level, stdout=stdout)
+        if profile not in SYSCTL_PROFILES:
+            raise general_exceptions.TuningError("Unknown profile {}; choose one of {}.".format(
+                profile, ', '.join(sorted(SYSCTL_PROFILES))))
+        self.profile = profile
+        self.state_path = os.path.join(TUNING_DIRECTORY, '{}.json'.format(profile))
+        if capture_network_interfaces is None:
+            # E.G the boot service re-applying the interfaces chosen with --capture-interfaces
+            capture_network_interfaces = self._read_state().get('capture_network_interfaces')
+        if capture_network_interfaces is None and profile == 'agent':
+            capture_network_interfaces = get_agent_capture_interfaces()
+        self.capture_network_interfaces = list(capture_network_interfaces or [])
+        self.sysctl_path = os.path.join(SYSCTL_DIRECTORY, '60-dynamite-{}.conf'.format(profile))
+        self.service_name = 'dynamite-tune-{}.service'.format(profile)
+
+    def _get_sysctl_settings(self):
+        settings = []
+        for key, value, at_least in SYSCTL_PROFILES[self.profile]:
+            if key == 'net.core.rmem_max' and self.profile == 'monitor':
+                value = max([value] + self._get_elastiflow_receive_buffers())
+            settings.append(SysctlSetting(key, value, at_least=at_least))
+        return settings
+
+    @staticmethod
+    def _get_elastiflow_receive_buffers():
+        if not utilities.get_environment_file_dict().get('LS_HOME'):
+            return []
+        from dynamite_nsm.services.logstash.elastiflow import config as elastiflow_config
+        ef_config = elastiflow_config.ConfigManager()
+        buffers = []
+        for attr in ('netflow_udp_rcv_buff', 'sflow_udp_rcv_buff', 'ipfix_udp_rcv_buff'):
+            try:
+                buffers.append(int(getattr(ef_config, attr)))
+            except (AttributeError, TypeError, ValueError):
+                continue
+        return buffers
+
+    def _get_interface_settings(self):
+        settings = []
+        if not self.capture_network_interfaces:
+            return settings
+        if not which('ethtool'):
+            self.logger.warning("ethtool is not installed; skipping NIC ring and offload settings.")
+        else:
+            for interface in self.capture_network_interfaces:
+                settings.append(RingSizeSetting(interface))
+                for feature in CAPTURE_OFFLOADS:
+                    settings.append(OffloadSetting(interface, feature))
+        cpu_topology = topology.CPUTopology.from_sysfs()
+        pinned_cpus = get_agent_pinned_cpus()
+        for interface in self.capture_network_interfaces:
+            irq_cpus = get_irq_cpus(interface, pinned_cpus, cpu_topology)
+            if not irq_cpus:
+                self.logger.warning("Every CPU is taken by capture workers; leaving {} IRQs alone.".format(interface))
+                continue
+            for irq in get_interface_irqs(interface, sys_root=cpu_topology.sys_root):
+                settings.append(IRQAffinitySetting(irq, interface, ','.join([str(c) for c in irq_cpus])))
+        return settings
+
+    def get_settings(self):
+        """
+        :return: A list of every Setting in this profile
+        """
+        return self._get_sysctl_settings() + self._get_interface_settings()
+
+    def _read_state(self):
+        try:
+            with open(self.state_path) as state_f:
+                return json.load(state_f)
+        except (IOError, ValueError):
+            return {'applied': []}
+
+    def _write_state(self, state):
+        utilities.makedirs(TUNING_DIRECTORY, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as state_f:
+            json.dump(state, state_f, indent=1)
+        os.rename(tmp_path, self.state_path)
+
+    def show(self, changes_only=False):
+        """
+        :param changes_only: If True, only include the settings that differ from the profile (diff)
+        :return: A table containing the current and desired value of each setting
+        """
+        rows = []
+        for setting in self.get_settings():
+            current = setting.read()
+            satisfied = setting.is_satisfied(current)
+            if changes_only and satisfied:
+                continue
+            if current is None:
+                state = 'unsupported'
+            elif satisfied:
+                state = 'ok'
+            else:
+                state = 'change'
+            rows.append([setting.kind, setting.name, current, setting.desired, state])
+        if changes_only and not rows:
+            return "The {} profile is already applied.".format(self.profile)
+        return tabulate.tabulate(rows, headers=['Kind', 'Setting', 'Current', 'Profile', 'State'],
+                                 tablefmt='fancy_grid')
+
+    def diff(self):
+        """
+        :return: A table containing only the settings that the profile would change
+        """
+        return self.show(changes_only=True)
+
+    def apply(self):
+        """
+        Apply the profile, recording the original value of every setting it changes
+
+        :return: The number of settings that were changed
+        """
+        state = self._read_state()
+        recorded = OrderedDict([('{}:{}'.format(entry['kind'], setting_from_dict(entry).name), entry)
+                                for entry in state['applied']])
+        changed = 0
+        errors = []
+        settings = self.get_settings()
+        # Sysctls dropped from the profile since they were applied go back to the host's original value
+        profile_keys = set(['{}:{}'.format(setting.kind, setting.name) for setting in settings])
+        for key, entry in list(recorded.items()):
+            if entry['kind'] != SysctlSetting.kind or key in profile_keys:
+                continue
+            del recorded[key]
+            if entry.get('original') is None:
+                continue
+            try:
+                self.logger.info("Restoring {} to {}; it is no longer part of the {} profile.".format(
+                    entry['key'], entry['original'], self.profile))
+                setting_from_dict(entry).write(entry['original'])
+            except general_exceptions.TuningError as e:
+                self.logger.warning(str(e))
+                errors.append(e)
+        for setting in settings:
+            current = setting.read()
+            if setting.is_satisfied(current):
+                continue
+            # Keep the value the host had before Dynamite first touched this setting
+            key = '{}:{}'.format(setting.kind, setting.name)
+            entry = setting.to_dict()
+            entry['original'] = recorded[key]['original'] if key in recorded else current
+            recorded[key] = entry
+            try:
+                self.logger.info("Setting {} to {} (was {}).".format(setting.name, setting.desired, current))
+                setting.write(setting.desired)
+                changed += 1
+            except general_exceptions.TuningError as e:
+                self.logger.warning(str(e))
+                errors.append(e)
+        state['applied'] = list(recorded.values())
+        state['capture_network_interfaces'] = self.capture_network_interfaces
+        state['time'] = time.time()
+        self._write_state(state)
+        self._persist(state['applied'])
+        if self.profile == 'agent' and self._irqbalance_running():
+            self.logger.warning("irqbalance is running and will move capture interface IRQs; stop it, or ban the "
+                                "capture worker CPUs with IRQBALANCE_BANNED_CPUS.")
+        if errors:
+            self.logger.warning("{} settings could not be applied.".format(len(errors)))
+        return changed
+
+    def _persist(self, applied):
+        sysctl_entries = [entry for entry in applied if entry['kind'] == SysctlSetting.kind]
+        if sysctl_entries:
+            with open(self.sysctl_path, 'w') as sysctl_f:
+                sysctl_f.write('# Managed by dynamite {} tune; remove with dynamite {} tune revert\n'.format(
+                    self.profile, self.profile))
+                for entry in sysctl_entries:
+                    sysctl_f.write('{}={}\n'.format(entry['key'], entry['desired']))
+        else:
+            utilities.safely_remove_file(self.sysctl_path)
+        if any([entry['kind'] != SysctlSetting.kind for entry in applied]):
+            self._install_boot_service()
+
+    def _install_boot_service(self):
+        if os.path.exists(os.path.join(systemctl.SystemCtl.UNIT_FILE_DIR, self.service_name)):
+            return
+        dynamite_path = which('dynamite') or '/usr/local/bin/dynamite'
+        service_path = os.path.join(TUNING_DIRECTORY, self.service_name)
+        utilities.makedirs(TUNING_DIRECTORY, exist_ok=True)
+        with open(service_path, 'w') as service_f:
+            service_f.write('[Unit]\n'
+                            'Description=Dynamite {profile} NIC and IRQ tuning\n'
+                            'After=network-online.target\n'
+                            'Wants=network-online.target\n\n'
+                            '[Service]\n'
+                            'Type=oneshot\n'
+                            'ExecStart={dynamite} {profile} tune apply --silent\n\n'
+                            '[Install]\n'
+                            'WantedBy=multi-user.target\n'.format(profile=self.profile, dynamite=dynamite_path))
+        try:
+            systemctl.SystemCtl().install_and_enable(service_path)
+        except general_exceptions.CallProcessError:
+            self.logger.warning("Could not find systemctl; NIC and IRQ settings will not persist across reboots.")
+
+    @staticmethod
+    def _irqbalance_running():
+        for process in psutil.process_iter():
+            try:
+                if process.name() == 'irqbalance':
+                    return True
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return False
+
+    def revert(self):
+        """
+        Restore every setting changed by apply() to its original value, and remove the persisted configuration
+
+        :return: The number of settings that were restored
+        """
+        state = self._read_state()
+        restored = 0
+        for entry in state['applied']:
+            setting = setting_from_dict(entry)
+            if entry.get('original') is None:
+                continue
+            try:
+                self.logger.info("Restoring {} to {}.".format(setting.name, entry['original']))
+                setting.write(entry['original'])
+                restored += 1
+            except general_exceptions.TuningError as e:
+                self.logger.warning(str(e))
+        if os.path.exists(self.sysctl_path):
+            os.remove(self.sysctl_path)
+        if os.path.exists(os.path.join(systemctl.SystemCtl.UNIT_FILE_DIR, self.service_name)):
+            try:
+                systemctl.SystemCtl().uninstall_and_disable(self.service_name)
+            except general_exceptions.CallProcessError:
+                pass
+        utilities.safely_remove_file(os.path.join(TUNING_DIRECTORY, self.service_name))
+        utilities.safely_remove_file(self.state_path)
+        return restored
+
+
+def tune(profile, action='show', capture_network_interfaces=None, stdout=True, verbose=False):
+    """
+    Show, diff, apply or revert a tuning profile
+
+    :param profile: The name of the profile (agent or monitor)
+    :param action: show, diff, apply or revert
+    :param capture_network_interfaces: The interfaces to tune for packet capture (agent profile only)
+    :param stdout: Print the output to console
+    :param verbose: Include detailed debug messages
+    :return: A table (show/diff), or a summary of the changes made (apply/revert)
+    """
+    tuning_profile = TuningProfile(profile, capture_network_interfaces=capture_network_interfaces, stdout=stdout,
+                                   verbose=verbose)
+    if action == 'show':
+        return tuning_profile.show()
+    elif action == 'diff':
+        return tuning_profile.diff()
+    elif action == 'apply':
+        return 'Applied the {} profile; {} settings changed.'.format(profile, tuning_profile.apply())
+    elif action == 'revert':
+        return 'Reverted the {} profile; {} settings restored.'.format(profile, tuning_profile.revert())
+    raise general_exceptions.TuningError("Unknown action {}; choose one of show, diff, apply or revert.".format(
+        action))
@@ -9,12 +9,24 @@ from dynamite_nsm.utilities import download_file
 from dynamite_nsm.utilities import extract_archive
 
 
+def _remove_cached_file(filename):
+    """
+    Remove a stale copy of a file from the install_cache, leaving everything else (including downloaded component
+    archives) in place
+
+    :param filename: The name of the file in the install_cache
+    """
+    path = os.path.join(const.INSTALL_CACHE, filename)
+    if os.path.exists(path):
+        os.remove(path)
+
+
 def update_default_configurations():
     """
     Retrieves the latest skeleton configurations for setting up ElasticSearch, LogStash, Zeek, and Suricata
     """
 
-    shutil.rmtree(const.INSTALL_CACHE, ignore_errors=True)
+    _remove_cached_file(const.DEFAULT_CONFIGS_ARCHIVE_NAME)
     makedirs(const.DEFAULT_CONFIGS, exist_ok=True)
     try:
         download_file(const.DEFAULT_CONFIGS_URL,
@@ -36,7 +48,7 @@ def update_mirrors():
     Retrieves the latest mirrors which contain the download locations for all components
     """
 
-    shutil.rmtree(const.INSTALL_CACHE, ignore_errors=True)
+    _remove_cached_file(const.MIRRORS_CONFIG_ARCHIVE_NAME)
     makedirs(const.MIRRORS, exist_ok=True)
     try:
         download_file(const.MIRRORS_CONFIG_URL,
@@ -40,6 +40,8 @@ import progressbar
 
 
 from dynamite_nsm import const
+from dynamite_nsm import environment
+from dynamite_nsm import exceptions as general_exceptions
 
 
 def check_pid(pid):
@@ -60,17 +62,20 @@ def check_pid(pid):
         return True
 
 
-def check_socket(host, port):
+def check_socket(host, port, timeout=None):
     """
     Check if a host is listening on a given port
 
     :param host: The host the service is listening on
     :param port: The port the service is listening on
+    :param timeout: The maximum number of seconds to wait on the connection attempt
     :return: True, if a service is listening on a given HOST:PORT
     """
     if isinstance(port, str):
         port = int(port)
     with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
+        if timeout is not None:
+            sock.settimeout(timeout)
         if sock.connect_ex((host, port)) == 0:
             return True
         else:
@@ -109,7 +114,7 @@ def create_dynamite_environment_file():
     env_file_f = open(env_file, 'a')
     env_file_f.write('')
     env_file_f.close()
-    set_permissions_of_file(env_file, 700)
+    os.chmod(env_file, 0o700)
 
 
 def create_dynamite_user(password):
@@ -139,81 +144,24 @@ def download_file(url, filename, stdout=False):
 
     :param url: The url to the file to download
     :param filename: The name of the file to store
-    :return: None
+    :return: True, if the download succeeded
     """
-    makedirs(const.INSTALL_CACHE, exist_ok=True)
-    response = urlopen(url)
-    try:
-        response_size_bytes = int(response.headers['Content-Length'])
-    except (KeyError, TypeError, ValueError):
-        response_size_bytes = None
-    CHUNK = 16 * 1024
-    widgets = [
-        '\033[92m',
-        '{} '.format(datetime.strftime(datetime.utcnow(), '%Y-%m-%d %H:%M:%S')),
-        '\033[0m',
-        '\033[0;36m'
-        'DOWNLOAD_MANAGER ',
-        '\033[0m',
-        '          | ',
-        progressbar.FileTransferSpeed(),
-        ' ', progressbar.Bar(),
-        ' ', '({})'.format(filename),
-        ' ', progressbar.ETA(),
+    from dynamite_nsm import download
 
-    ]
-    if response_size_bytes and response_size_bytes != 'NaN':
-        try:
-            pb = progressbar.ProgressBar(widgets=widgets, max_value=int(response_size_bytes))
-        except TypeError:
-            pb = progressbar.ProgressBar(widgets=widgets, maxval=int(response_size_bytes))
-    else:
-        widgets = [
-            '\033[92m',
-            '{} '.format(datetime.strftime(datetime.utcnow(), '%Y-%m-%d %H:%M:%S')),
-            '\033[0m',
-            '\033[0;36m'
-            'DOWNLOAD_MANAGER ',
-            '\033[0m',
-            '          | ',
-            ' ', progressbar.BouncingBar(),
-            ' ', '({})'.format(filename),
-        ]
-        try:
-            pb = progressbar.ProgressBar(widgets, max_value=progressbar.UnknownLength)
-        except TypeError:
-            pb = progressbar.ProgressBar(maxval=progressbar.UnknownLength)
-    if stdout:
-        try:
-            pb.start()
-        except Exception:
-            # Something broke, disable stdout going forward
-            stdout = False
     try:
-        with open(os.path.join(const.INSTALL_CACHE, filename), 'wb') as f:
-            chunk_num = 0
-            while True:
-                chunk = response.read(CHUNK)
-                if not chunk:
-                    break
-                f.write(chunk)
-                if stdout:
-                    try:
-                        pb.update(CHUNK * chunk_num)
-                    except ValueError:
-                        pass
-                chunk_num += 1
-            if stdout:
-                pb.finish()
-    except URLError:
+        download.download_from_mirrors([download.MirrorEntry(url.strip())], filename, stdout=stdout)
+    except general_exceptions.DownloadError:
         return False
     return True
 
 
 def download_java(stdout=False):
-    for url in open(const.JAVA_MIRRORS, 'r').readlines():
-        if download_file(url, const.JAVA_ARCHIVE_NAME, stdout):
-            break
+    from dynamite_nsm.services.base import install
+
+    try:
+        install.BaseInstallManager.download_from_mirror(const.JAVA_MIRRORS, const.JAVA_ARCHIVE_NAME, stdout=stdout)
+    except general_exceptions.DownloadError:
+        pass
 
 
 def extract_archive(archive_path, destination_path):
@@ -264,25 +212,32 @@ def get_environment_file_str():
     """
     :return: The contents of the /etc/dynamite/environment file as a giant export string
     """
-    export_str = ''
-    with open(os.path.join(const.CONFIG_PATH, 'environment')) as env_f:
-        for line in env_f.readlines():
-            if '=' in line:
-                key, value = line.strip().split('=')
-                export_str += 'export {}=\'{}\' && '.format(key, value)
-    return export_str
+    return environment.get_environment_store().export_string()
 
 
 def get_environment_file_dict():
     """
     :return: The contents of the /etc/dynamite/environment file as a dictionary
     """
-    export_dict = {}
-    for line in open(os.path.join(const.CONFIG_PATH, 'environment')).readlines():
-        if '=' in line:
-            key, value = line.strip().split('=')
-            export_dict[key] = value
-    return export_dict
+    return environment.get_environment_store().as_dict()
+
+
+def update_environment_file(variables):
+    """
+    Add or overwrite variables in the /etc/dynamite/environment file
+
+    :param variables: A dictionary of variable names and values (E.G {'ES_HOME': '/opt/dynamite/elasticsearch/'})
+    """
+    environment.get_environment_store().update(variables)
+
+
+def remove_from_environment_file(*keys):
+    """
+    Remove variables from the /etc/dynamite/environment file
+
+    :param keys: The names of the variables to remove (E.G 'ES_HOME', 'ES_LOGS')
+    """
+    environment.get_environment_store().remove(*keys)
 
 
 def get_memory_available_bytes():
@@ -544,10 +499,8 @@ def setup_java():
         shutil.move(os.path.join(const.INSTALL_CACHE, 'jdk-11.0.2'), '/usr/lib/jvm/')
     except shutil.Error:
         pass
-    if 'JAVA_HOME' not in open(os.path.join(const.CONFIG_PATH, 'environment')).read():
-        subprocess.call(
-            'echo JAVA_HOME="/usr/lib/jvm/jdk-11.0.2/" >> {}'.format(os.path.join(const.CONFIG_PATH, 'environment')),
-            shell=True)
+    if 'JAVA_HOME' not in get_environment_file_dict():
+        update_environment_file({'JAVA_HOME': '/usr/lib/jvm/jdk-11.0.2/'})
 
 
 def set_ownership_of_file(path, user='dynamite', group='dynamite'):